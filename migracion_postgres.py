@@ -2,6 +2,10 @@
 import csv
 import psycopg2
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migration_scripts'))
+from coercion import Coercer
 
 # --- Configuración de la Base de Datos ---
 DB_NAME = "postgres"  # <-- CAMBIA ESTO SI TU BASE DE DATOS TIENE OTRO NOMBRE
@@ -14,31 +18,13 @@ TABLE_NAME = "tbl_usuarios"
 # --- Configuración del Archivo CSV ---
 CSV_FILENAME = "xddd.csv"
 
-def clean_value(value, column_name):
-    """Convierte valores vacíos o placeholders a None y maneja tipos de datos."""
-    if not value or value.strip().startswith('VACIO_') or value.strip() == '*':
-        return None
-    
-    # Para la columna 'estado', asegurarse de que sea un entero
-    if column_name == 'estado':
-        try:
-            return int(value)
-        except (ValueError, TypeError):
-            return None # O un valor por defecto, ej: 0
-            
-    # Para la columna 'fecha_nacimiento', asegurarse de que sea una fecha válida o None
-    if column_name == 'fecha_nacimiento':
-        # Intenta analizar el formato AAAA-MM-DD
-        try:
-            # Simple validación de formato
-            if len(value.split('-')) == 3:
-                return value
-            else:
-                return None
-        except:
-            return None
+# Tipo de cada columna del CSV; las demás son texto. Los valores vacíos y
+# los marcadores ('*', VACIO_...) se cargan como NULL (ver coercion.py).
+COLUMN_TYPES = {'estado': 'int', 'fecha_nacimiento': 'date'}
 
-    return value.strip()
+def csv_coercer(header):
+    """Coercer para las filas (listas) de un CSV con la cabecera header."""
+    return Coercer(CSV_FILENAME, {i: COLUMN_TYPES.get(name, 'text') for i, name in enumerate(header)})
 
 def create_table(cur):
     """Crea la tabla en la base de datos si no existe."""
@@ -100,23 +86,23 @@ def migrate_data():
             """
 
             count = 0
-            for row in csv_reader:
-                # Limpiar cada valor de la fila antes de insertar
-                cleaned_row = [clean_value(val, header[i]) for i, val in enumerate(row)]
-                
+            values = csv_coercer(header)
+            # Las filas se limpian por lotes antes de insertarlas
+            for cleaned_row in values.stream(csv_reader):
                 try:
                     cur.execute(insert_sql, cleaned_row)
                     count += 1
                     if count % 1000 == 0:
                         print(f"{count} filas insertadas...")
                 except psycopg2.Error as e:
-                    print(f"Error al insertar la fila: {row}")
+                    print(f"Error al insertar la fila: {cleaned_row}")
                     print(f"Error de base de datos: {e}")
                     conn.rollback() # Revertir la transacción actual por si acaso
                     
         # Confirmar los cambios en la base de datos
         conn.commit()
         print(f"¡Migración completada! Se han insertado {count} filas en la tabla '{TABLE_NAME}'.")
+        values.print_counts()
 
     except psycopg2.OperationalError as e:
         print(f"Error de conexión: No se pudo conectar a la base de datos '{DB_NAME}'.")
@@ -1,35 +1,42 @@
 
 import psycopg2
 from db_connections import get_postgres_connection
+from crosswalk import get_crosswalk
 
-def add_system_user():
+def add_system_user(session=None):
     """
     Agrega un usuario 'sistema' a la tabla tbl_usuarios si no existe.
     """
     print("--- Agregando usuario 'sistema' ---")
     conn = None
     try:
-        conn = get_postgres_connection()
+        conn = session.postgres() if session else get_postgres_connection()
         if conn is None:
             raise Exception("No se pudo conectar a PostgreSQL.")
         
         cur = conn.cursor()
 
         # Verificar si el usuario ya existe
-        cur.execute("SELECT id FROM tbl_usuarios WHERE correo = %s", ('sistema@vriunap.pe',))
-        if cur.fetchone():
+        cur.execute("SELECT id, num_doc_identidad FROM tbl_usuarios WHERE correo = %s", ('sistema@vriunap.pe',))
+        existing = cur.fetchone()
+        if existing:
             print("El usuario 'sistema' ya existe en la base de datos.")
+            get_crosswalk(session).publish('usuarios_por_dni', 'add_system_user',
+                                           {existing[1]: existing[0]} if existing[1] else {})
             return
 
         # Insertar el nuevo usuario
         insert_query = """
         INSERT INTO tbl_usuarios (nombres, apellidos, num_doc_identidad, correo, estado)
         VALUES (%s, %s, %s, %s, %s)
+        RETURNING id
         """
         user_data = ('Sistema', 'Usuario del Sistema', '99999999', 'sistema@vriunap.pe', 1)
         
         cur.execute(insert_query, user_data)
+        system_user_id = cur.fetchone()[0]
         conn.commit()
+        get_crosswalk(session).publish('usuarios_por_dni', 'add_system_user', {user_data[2]: system_user_id})
         
         print("Usuario 'sistema' agregado exitosamente.")
 
@@ -37,8 +44,9 @@ def add_system_user():
         print(f"  ERROR CRÍTICO al agregar el usuario 'sistema': {e}")
         if conn:
             conn.rollback()
+        raise e
     finally:
-        if conn:
+        if conn and session is None:
             conn.close()
 
 if __name__ == '__main__':
@@ -0,0 +1,139 @@
+# Mide el rendimiento de cada paso de la migración.
+#
+# Ejecuta los pasos de MIGRATION_STEPS uno por uno, respetando sus
+# dependencias, cada uno en un proceso aparte para poder medir su memoria
+# máxima (peak RSS). Informa por paso las filas cargadas, el tiempo, las
+# filas por segundo y la memoria. Se usa contra instancias de prueba
+# llenadas con synthetic_data.py, configuradas con las variables de entorno
+# de db_connections.py.
+#
+# Uso:
+#   python benchmark_migrations.py --output bench_10x.json
+#   python benchmark_migrations.py --steps migrate_tbl_tramites migrate_tbl_asignacion_jurado
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from db_connections import get_postgres_connection
+from migration_scheduler import build_dependencies, parse_foreign_keys, run_steps
+from migration_state import count_rows
+from run_migrations import MIGRATION_STEPS, clean_destination_tables, prepare_destination_tables
+import sql_trace
+
+RESULT_PREFIX = "BENCHMARK_RESULT "
+
+
+def run_single_step(name):
+    """Ejecuta un paso en este proceso e imprime su tiempo y memoria máxima."""
+    step = next(step for step in MIGRATION_STEPS if step['name'] == name)
+    start = time.perf_counter()
+    step['func']()
+    elapsed = time.perf_counter() - start
+    # ru_maxrss está en KiB en Linux y en bytes en macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    print(RESULT_PREFIX + json.dumps({'seconds': elapsed, 'peak_rss_mb': round(peak_mb, 1)}))
+    if sql_trace.enabled():
+        sql_trace.TRACER.print_report()
+
+
+def benchmark_step(step, pg_conn):
+    """Ejecuta el paso en un subproceso y devuelve sus métricas."""
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--run-step', step['name']],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if process.returncode != 0:
+        print(process.stdout[-2000:])
+        print(process.stderr[-2000:])
+        raise Exception(f"El paso '{step['name']}' terminó con código {process.returncode}.")
+
+    if sql_trace.enabled() and "--- Sentencias SQL" in process.stdout:
+        print(process.stdout[process.stdout.index("--- Sentencias SQL"):])
+    lines = [line for line in process.stdout.splitlines() if line.startswith(RESULT_PREFIX)]
+    result = json.loads(lines[-1][len(RESULT_PREFIX):])
+    counts = count_rows(pg_conn, step.get('tables', []))
+    rows = sum(counts.values())
+    return {
+        'step': step['name'],
+        'rows': rows,
+        'row_counts': counts,
+        'seconds': round(result['seconds'], 3),
+        'wall_seconds': round(wall, 3),
+        'rows_per_second': round(rows / result['seconds'], 1) if result['seconds'] > 0 else None,
+        'peak_rss_mb': result['peak_rss_mb'],
+    }
+
+
+def run_benchmark(step_names=None, output=None):
+    """
+    Limpia el destino, ejecuta los pasos (todos o los indicados, más los
+    pasos de los que dependen) y muestra una tabla con los resultados.
+    """
+    steps = MIGRATION_STEPS
+    if step_names:
+        unknown = set(step_names) - {step['name'] for step in steps}
+        if unknown:
+            raise ValueError(f"Pasos desconocidos: {sorted(unknown)}")
+        dependencies = build_dependencies(steps, parse_foreign_keys())
+        needed = set()
+        queue = list(step_names)
+        while queue:
+            name = queue.pop()
+            if name not in needed:
+                needed.add(name)
+                queue.extend(dependencies[name])
+        steps = [step for step in steps if step['name'] in needed]
+
+    pg_conn = get_postgres_connection()
+    if pg_conn is None:
+        raise Exception("No se pudo conectar a PostgreSQL.")
+
+    results = []
+    try:
+        if not prepare_destination_tables(pg_conn) or not clean_destination_tables(pg_conn):
+            raise Exception("Falló la preparación del destino.")
+
+        def run_step(step):
+            result = benchmark_step(step, pg_conn)
+            result['measured'] = not step_names or step['name'] in step_names
+            results.append(result)
+
+        run_steps(steps, max_workers=1, run_step=run_step)
+    finally:
+        pg_conn.close()
+
+    measured = [result for result in results if result['measured']]
+    print(f"\n{'Paso':<42} {'Filas':>10} {'Tiempo (s)':>11} {'Filas/s':>11} {'RSS (MB)':>9}")
+    for result in measured:
+        rate = f"{result['rows_per_second']:.0f}" if result['rows_per_second'] is not None else '-'
+        print(f"{result['step']:<42} {result['rows']:>10} {result['seconds']:>11.2f} {rate:>11} "
+              f"{result['peak_rss_mb']:>9.1f}")
+    print(f"{'Total':<42} {sum(r['rows'] for r in measured):>10} "
+          f"{sum(r['seconds'] for r in measured):>11.2f}")
+
+    if output:
+        with open(output, mode='w', encoding='utf-8') as f:
+            json.dump(measured, f, indent=2)
+        print(f"\nResultados guardados en {output}")
+    return measured
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mide filas/s, tiempo y memoria de cada paso de la migración.")
+    parser.add_argument("--steps", nargs='+', help="Pasos a medir (por defecto, todos).")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados.")
+    parser.add_argument("--run-step", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_step:
+        run_single_step(args.run_step)
+    else:
+        run_benchmark(step_names=args.steps, output=args.output)
@@ -0,0 +1,213 @@
+# Carga masiva en PostgreSQL mediante COPY ... FROM STDIN.
+#
+# executemany envía un INSERT por fila; contra un servidor remoto ese ida y
+# vuelta domina el tiempo de la migración. bulk_load envía todas las filas
+# en un único flujo COPY y, cuando COPY no se puede usar, recurre a
+# execute_values, que agrupa muchas filas en cada INSERT.
+#
+# bulk_load_with_ids reserva además los ids de la secuencia antes de cargar
+# cada bloque, de modo que el paso conoce el id nuevo de cada fila sin
+# volver a leer la tabla.
+
+import datetime
+import decimal
+import json
+import os
+import psycopg2
+import psycopg2.errors
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+from run_metrics import record, step_phase
+
+# Permite forzar INSERT ... VALUES (por ejemplo, detrás de un pooler que no
+# admite COPY) con MIGRATION_BULK_METHOD=values.
+DEFAULT_METHOD = os.getenv("MIGRATION_BULK_METHOD", "copy")
+
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def format_copy_value(value):
+    """Convierte un valor de Python al formato de texto de COPY."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (int, float, decimal.Decimal)):
+        return str(value)
+    if isinstance(value, str):
+        return value.translate(COPY_ESCAPES)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return f"{value.total_seconds()} seconds"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        # bytea en formato hex; la barra se duplica por el escape de COPY
+        return '\\\\x' + bytes(value).hex()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str).translate(COPY_ESCAPES)
+    return str(value).translate(COPY_ESCAPES)
+
+
+class CopyStream:
+    """
+    Objeto tipo archivo que genera, a medida que psycopg2 lo lee, las
+    líneas de COPY a partir de un iterable de filas. Así no hace falta
+    construir todo el contenido en memoria.
+    """
+
+    def __init__(self, rows, column_count):
+        self._rows = iter(rows)
+        self._column_count = column_count
+        self._buffer = b''
+        self.rows_written = 0
+        self.bytes_written = 0
+
+    def _next_line(self):
+        row = next(self._rows)
+        if len(row) != self._column_count:
+            raise ValueError(
+                f"La fila {self.rows_written + 1} tiene {len(row)} valores; se esperaban {self._column_count}."
+            )
+        self.rows_written += 1
+        return ('\t'.join(map(format_copy_value, row)) + '\n').encode('utf-8')
+
+    def read(self, size=-1):
+        chunks = [self._buffer]
+        length = len(self._buffer)
+        try:
+            while size < 0 or length < size:
+                line = self._next_line()
+                chunks.append(line)
+                length += len(line)
+        except StopIteration:
+            pass
+        data = b''.join(chunks)
+        if size >= 0:
+            data, self._buffer = data[:size], data[size:]
+        else:
+            self._buffer = b''
+        self.bytes_written += len(data)
+        return data
+
+
+def _table_identifier(table):
+    return sql.SQL('.').join(sql.Identifier(part) for part in table.split('.'))
+
+
+def copy_rows(cursor, table, columns, rows):
+    """Envía las filas con COPY ... FROM STDIN y devuelve cuántas se cargaron."""
+    query = sql.SQL("COPY {} ({}) FROM STDIN").format(
+        _table_identifier(table),
+        sql.SQL(', ').join(sql.Identifier(column) for column in columns)
+    )
+    stream = CopyStream(rows, len(columns))
+    with step_phase('load'):
+        cursor.copy_expert(query.as_string(cursor), stream)
+    record(bytes_loaded=stream.bytes_written)
+    return stream.rows_written
+
+
+def insert_values(cursor, table, columns, rows, on_conflict=None, page_size=1000):
+    """
+    Inserta las filas con execute_values, agrupando page_size filas por
+    sentencia. on_conflict es el texto opcional de la cláusula ON CONFLICT.
+    """
+    query = sql.SQL("INSERT INTO {} ({}) VALUES %s").format(
+        _table_identifier(table),
+        sql.SQL(', ').join(sql.Identifier(column) for column in columns)
+    ).as_string(cursor)
+    if on_conflict:
+        query += f" ON CONFLICT {on_conflict}"
+
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= page_size:
+            with step_phase('load'):
+                execute_values(cursor, query, batch, page_size=page_size)
+            count += len(batch)
+            batch = []
+    if batch:
+        with step_phase('load'):
+            execute_values(cursor, query, batch, page_size=page_size)
+        count += len(batch)
+    return count
+
+
+def bulk_load(cursor, table, columns, rows, method=None, on_conflict=None, page_size=1000):
+    """
+    Carga las filas (cualquier iterable de tuplas en el orden de columns)
+    en la tabla y devuelve cuántas se cargaron. No hace commit.
+
+    Por defecto usa COPY. Usa execute_values cuando se indica on_conflict,
+    cuando method='values', o cuando el servidor rechaza COPY y las filas
+    están en una lista (un generador no se puede volver a recorrer).
+    """
+    method = method or DEFAULT_METHOD
+    if on_conflict or method == 'values':
+        count = insert_values(cursor, table, columns, rows, on_conflict=on_conflict, page_size=page_size)
+        record(rows_written=count)
+        return count
+
+    if not isinstance(rows, (list, tuple)):
+        count = copy_rows(cursor, table, columns, rows)
+        record(rows_written=count)
+        return count
+
+    if not rows:
+        return 0
+    cursor.execute("SAVEPOINT bulk_load_copy")
+    try:
+        count = copy_rows(cursor, table, columns, rows)
+    except (psycopg2.errors.FeatureNotSupported, psycopg2.errors.InsufficientPrivilege) as e:
+        print(f"  COPY no disponible para {table} ({e}); se usará INSERT ... VALUES.")
+        cursor.execute("ROLLBACK TO SAVEPOINT bulk_load_copy")
+        count = insert_values(cursor, table, columns, rows, page_size=page_size)
+    cursor.execute("RELEASE SAVEPOINT bulk_load_copy")
+    record(rows_written=count)
+    return count
+
+
+def reserve_ids(cursor, table, count, id_column='id'):
+    """Reserva count valores de la secuencia de table.id_column y los devuelve en orden."""
+    with step_phase('load'):
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+            (table, id_column, count)
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def bulk_load_with_ids(cursor, table, columns, rows, key_column, id_column='id',
+                       chunk_size=5000, method=None):
+    """
+    Carga las filas como bulk_load, pero asignando a cada una un id
+    reservado de antemano en la secuencia de id_column, y devuelve
+    {valor de key_column: id nuevo} (las filas con llave nula no se incluyen).
+
+    Las filas se procesan en bloques de chunk_size, así que rows puede ser
+    un generador sin que se cargue entero en memoria. No hace commit.
+    """
+    key_index = columns.index(key_column)
+    load_columns = [id_column] + list(columns)
+    mapping = {}
+
+    def load_chunk(chunk):
+        ids = reserve_ids(cursor, table, len(chunk), id_column)
+        with_ids = []
+        for new_id, row in zip(ids, chunk):
+            with_ids.append((new_id,) + tuple(row))
+            if row[key_index] is not None:
+                mapping[row[key_index]] = new_id
+        bulk_load(cursor, table, load_columns, with_ids, method=method)
+
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            load_chunk(chunk)
+            chunk = []
+    if chunk:
+        load_chunk(chunk)
+    return mapping
@@ -0,0 +1,248 @@
+# Conversión de los valores heredados de MySQL a los tipos del destino.
+#
+# Cada paso declara las columnas que necesitan limpieza con su tipo, por
+# ejemplo {'Estado': 'flag:A', 'FechaAsc': 'date'}, y Coercer compila una
+# vez por ejecución una función por columna. apply() convierte un lote de
+# filas (diccionarios, o listas si las claves son posiciones) en su lugar,
+# columna por columna, y cuenta por columna los valores que cambiaron
+# (coerced) y los que no se pudieron interpretar (invalid, que quedan en
+# NULL). Los contadores se suman al paso actual en run_metrics.
+#
+# Tipos:
+#   int             entero; acepta texto numérico.
+#   text            texto sin espacios en los extremos.
+#   text:raw        texto tal cual: sin recortar y sin marcadores, así que
+#                   la celda vacía sigue siendo '' (para los CSV ya limpios).
+#   flag:<valor>    1 si el valor es <valor> (p. ej. flag:A para Estado = 'A'), si no 0.
+#   bool            False para 0, '0', 'false', vacío o NULL; True para otro número o 'true'.
+#   date[:formato]  fecha; sin formato se espera AAAA-MM-DD (con o sin hora).
+#   datetime[:formato]
+#
+# En todos los tipos salvo flag, bool y text:raw, las celdas vacías, '*' y los
+# marcadores VACIO_... son NULL, igual que las fechas cero de MySQL
+# ('0000-00-00'). Las fechas en texto se repiten mucho (una misma fecha de
+# resolución para cientos de docentes), así que cada convertidor de fecha
+# recuerda las últimas DATE_MEMO_SIZE que interpretó.
+
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from itertools import islice
+
+from run_metrics import record_values
+
+DATE_MEMO_SIZE = int(os.getenv("MIGRATION_DATE_MEMO_SIZE", "4096"))
+
+PLACEHOLDERS = {'', '*'}
+PLACEHOLDER_PREFIXES = ('VACIO_',)
+ZERO_DATE = '0000-00-00'
+TRUE_TEXT = {'true', 't', 'yes', 'si', 'sí', 's', 'y'}
+FALSE_TEXT = {'false', 'f', 'no', 'n'}
+
+# Resultado de un convertidor cuando el valor no se puede interpretar
+INVALID = object()
+
+
+def _text_of(value):
+    if isinstance(value, (bytes, bytearray)):
+        value = bytes(value).decode('utf-8', errors='replace')
+    return str(value).strip()
+
+
+def _is_placeholder(text):
+    return text in PLACEHOLDERS or text.startswith(PLACEHOLDER_PREFIXES)
+
+
+def _int(argument):
+    def convert(value):
+        if value is None or type(value) is int:
+            return value
+        if isinstance(value, (bool, float, Decimal)):
+            return int(value) if value == int(value) else INVALID
+        text = _text_of(value)
+        if _is_placeholder(text):
+            return None
+        try:
+            return int(text)
+        except ValueError:
+            return INVALID
+    return convert
+
+
+def _text(argument):
+    if argument == 'raw':
+        return lambda value: value if value is None or isinstance(value, str) else _text_of(value)
+    if argument is not None:
+        raise ValueError(f"text no admite la opción '{argument}' (solo 'text:raw').")
+
+    def convert(value):
+        if value is None:
+            return None
+        text = value.strip() if isinstance(value, str) else _text_of(value)
+        return None if _is_placeholder(text) else text
+    return convert
+
+
+def _flag(argument):
+    if argument is None:
+        raise ValueError("flag necesita el valor que significa activo (p. ej. 'flag:A').")
+    return lambda value: 1 if value == argument else 0
+
+
+def _bool(argument):
+    def convert(value):
+        if value is None:
+            return False
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, (int, float, Decimal)):
+            return value != 0
+        text = _text_of(value)
+        if _is_placeholder(text):
+            return False
+        lowered = text.lower()
+        if lowered in TRUE_TEXT:
+            return True
+        if lowered in FALSE_TEXT:
+            return False
+        try:
+            return float(text) != 0
+        except ValueError:
+            return INVALID
+    return convert
+
+
+def _temporal(parse_default, to_kind, argument):
+    """Convertidor de fechas (o fechas y horas) con las interpretaciones de texto memorizadas."""
+    @lru_cache(maxsize=DATE_MEMO_SIZE)
+    def parse(text):
+        if _is_placeholder(text) or text.startswith(ZERO_DATE):
+            return None
+        try:
+            if argument:
+                return to_kind(datetime.strptime(text, argument))
+            return parse_default(text)
+        except ValueError:
+            return INVALID
+
+    def convert(value):
+        if value is None:
+            return None
+        if isinstance(value, date):
+            return to_kind(value)
+        return parse(_text_of(value))
+    return convert
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _as_datetime(value):
+    return value if isinstance(value, datetime) else datetime(value.year, value.month, value.day)
+
+
+def _date(argument):
+    return _temporal(lambda text: date.fromisoformat(text[:10]), _as_date, argument)
+
+
+def _datetime(argument):
+    return _temporal(lambda text: _as_datetime(datetime.fromisoformat(text)), _as_datetime, argument)
+
+
+CONVERTERS = {
+    'int': _int,
+    'text': _text,
+    'flag': _flag,
+    'bool': _bool,
+    'date': _date,
+    'datetime': _datetime,
+}
+
+
+def converter(declared):
+    """
+    Función que convierte un valor al tipo declared (p. ej. 'int' o
+    'flag:A'); devuelve INVALID si el valor no se puede interpretar.
+    """
+    kind, _, argument = declared.partition(':')
+    if kind not in CONVERTERS:
+        raise ValueError(f"tipo desconocido '{declared}'.")
+    return CONVERTERS[kind](argument or None)
+
+
+class ColumnCoercion:
+    """Convertidor compilado de una columna, con sus contadores."""
+
+    def __init__(self, key, declared):
+        try:
+            self.convert = converter(declared)
+        except ValueError as e:
+            raise ValueError(f"Columna {key!r}: {e}")
+        self.key = key
+        self.declared = declared
+        self.coerced = 0
+        self.invalid = 0
+
+    def apply(self, rows):
+        """
+        Convierte la columna en las filas (las que no la tienen quedan con
+        NULL); devuelve (cambiados, inválidos) del lote.
+        """
+        key, convert = self.key, self.convert
+        coerced = invalid = 0
+        for row in rows:
+            try:
+                value = row[key]
+            except KeyError:
+                value = row[key] = None
+            converted = convert(value)
+            if converted is value:
+                continue
+            if converted is INVALID:
+                converted = None
+                invalid += 1
+            else:
+                coerced += 1
+            row[key] = converted
+        self.coerced += coerced
+        self.invalid += invalid
+        return coerced, invalid
+
+
+class Coercer:
+    """
+    Conversión de las columnas de spec ({columna: tipo}) de las filas
+    de source (el nombre con que se reportan los contadores).
+    """
+
+    def __init__(self, source, spec):
+        self.source = source
+        self.columns = [ColumnCoercion(key, declared) for key, declared in spec.items()]
+
+    def apply(self, rows):
+        """Convierte en su lugar un lote de filas y lo devuelve."""
+        if not isinstance(rows, list):
+            rows = list(rows)
+        for column in self.columns:
+            coerced, invalid = column.apply(rows)
+            if coerced or invalid:
+                record_values(f"{self.source}.{column.key}", coerced, invalid)
+        return rows
+
+    def stream(self, rows, batch_size=1000):
+        """Genera las filas de un iterable, convirtiéndolas por lotes de batch_size."""
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            yield from self.apply(batch)
+
+    def print_counts(self):
+        """Muestra las columnas de source en las que hubo conversiones."""
+        for column in self.columns:
+            if column.coerced or column.invalid:
+                print(f"  {self.source}.{column.key} ({column.declared}): {column.coerced} valores convertidos, "
+                      f"{column.invalid} inválidos (cargados como NULL).")
@@ -0,0 +1,168 @@
+# Mapas de llaves antiguas -> ids nuevos compartidos entre pasos.
+#
+# Varios pasos necesitan los mismos mapas (id_antiguo de trámites y
+# docentes, DNI de usuarios) y cada uno los reconstruía con un SELECT de la
+# tabla completa. Crosswalk los construye una sola vez por ejecución, los
+# entrega a todos los pasos que los piden y los descarta cuando el paso
+# que carga la tabla vuelve a ejecutarse. Los pasos que cargan una tabla
+# publican el mapa que obtuvieron al insertar (publish), con lo que no hace
+# falta leerlo de PostgreSQL. Opcionalmente se guardan en disco
+# (MIGRATION_CROSSWALK_DIR) para que los scripts ejecutados por separado no
+# tengan que volver a leerlos.
+
+import json
+import os
+import threading
+
+import psycopg2
+
+CROSSWALK_DIR = os.getenv("MIGRATION_CROSSWALK_DIR")
+
+# Cada mapa indica los pasos que cargan su tabla ('owners') y la consulta
+# (llave, id) con que se reconstruye desde PostgreSQL.
+CROSSWALKS = {
+    'tramites_por_id_antiguo': {
+        'owners': ["migrate_tbl_tramites"],
+        'query': "SELECT id_antiguo, id FROM tbl_tramites WHERE id_antiguo IS NOT NULL",
+    },
+    'docentes_por_id_antiguo': {
+        'owners': ["populate_tbl_docentes"],
+        'query': "SELECT id_antiguo, id FROM tbl_docentes WHERE id_antiguo IS NOT NULL",
+    },
+    'usuarios_por_dni': {
+        'owners': ["migrate_docentes_with_placeholders", "migrate_tesistas_deduplicated", "add_system_user"],
+        'query': "SELECT num_doc_identidad, id FROM tbl_usuarios WHERE num_doc_identidad IS NOT NULL",
+    },
+}
+
+
+class Crosswalk:
+    """
+    Caché de los mapas definidos en CROSSWALKS. get() devuelve el mapa
+    desde memoria, lo arma con las partes publicadas por todos sus pasos
+    dueños, lo toma de disco o, si no, lo lee de PostgreSQL una sola vez
+    aunque varios pasos lo pidan a la vez. Los mapas devueltos
+    son compartidos y no deben modificarse.
+    """
+
+    def __init__(self, persist_dir=None):
+        self.persist_dir = persist_dir
+        self._maps = {}
+        self._parts = {name: {} for name in CROSSWALKS}
+        self._lock = threading.Lock()
+        self._name_locks = {name: threading.Lock() for name in CROSSWALKS}
+        self.stats = {'hits': 0, 'published': 0, 'disk': 0, 'queries': 0}
+
+    def get(self, name, conn):
+        """Devuelve el mapa name ({llave: id nuevo})."""
+        with self._name_locks[name]:
+            with self._lock:
+                if name in self._maps:
+                    self.stats['hits'] += 1
+                    return self._maps[name]
+                owners = CROSSWALKS[name]['owners']
+                parts = self._parts[name]
+                mapping = None
+                if all(owner in parts for owner in owners):
+                    mapping = {}
+                    for owner in owners:
+                        mapping.update(parts[owner])
+
+            stamp = self._stamp(conn, name)
+            if mapping is not None:
+                self.stats['published'] += 1
+                self._write_disk(name, stamp, mapping)
+            else:
+                mapping = self._read_disk(name, stamp)
+                if mapping is not None:
+                    self.stats['disk'] += 1
+                else:
+                    with conn.cursor() as cur:
+                        cur.execute(CROSSWALKS[name]['query'])
+                        mapping = dict(cur.fetchall())
+                    self.stats['queries'] += 1
+                    self._write_disk(name, stamp, mapping)
+
+            with self._lock:
+                self._maps[name] = mapping
+            return mapping
+
+    def publish(self, name, owner, mapping):
+        """Registra la parte del mapa name que cargó el paso owner."""
+        self.invalidate_owner(owner)
+        with self._lock:
+            self._parts[name][owner] = mapping
+
+    def invalidate_owner(self, owner):
+        """Descarta los mapas de las tablas que carga el paso owner."""
+        for name, definition in CROSSWALKS.items():
+            if owner in definition['owners']:
+                with self._lock:
+                    self._maps.pop(name, None)
+                    self._parts[name].pop(owner, None)
+                path = self._path(name)
+                if path and os.path.exists(path):
+                    os.remove(path)
+
+    def _path(self, name):
+        return os.path.join(self.persist_dir, f"{name}.json") if self.persist_dir else None
+
+    def _stamp(self, conn, name):
+        """
+        Marca de vigencia de un mapa guardado en disco: la ejecución y hora
+        de término de sus pasos dueños según public.migration_state, o None
+        si no se puede saber (sin la tabla o sin registro de los dueños).
+        La consulta va dentro de un SAVEPOINT para que, si falla, no se
+        pierda lo que el paso lleva hecho en su transacción.
+        """
+        if not self.persist_dir:
+            return None
+        in_transaction = not getattr(conn, 'autocommit', False)
+        with conn.cursor() as cur:
+            if in_transaction:
+                cur.execute("SAVEPOINT crosswalk_stamp")
+            try:
+                cur.execute(
+                    "SELECT step_name, run_id, finished_at::text FROM public.migration_state "
+                    "WHERE step_name = ANY(%s) ORDER BY step_name",
+                    (CROSSWALKS[name]['owners'],)
+                )
+                stamp = [list(row) for row in cur.fetchall()]
+            except psycopg2.Error:
+                if in_transaction:
+                    cur.execute("ROLLBACK TO SAVEPOINT crosswalk_stamp")
+                stamp = None
+            if in_transaction:
+                cur.execute("RELEASE SAVEPOINT crosswalk_stamp")
+        return stamp or None
+
+    def _read_disk(self, name, stamp):
+        path = self._path(name)
+        # Sin marca no hay cómo saber si el mapa guardado sigue vigente
+        if stamp is None or not path or not os.path.exists(path):
+            return None
+        with open(path, mode='r', encoding='utf-8') as f:
+            contents = json.load(f)
+        if contents.get('stamp') != stamp:
+            return None
+        return {key: value for key, value in contents['pairs']}
+
+    def _write_disk(self, name, stamp, mapping):
+        path = self._path(name)
+        if not path or stamp is None:
+            return
+        os.makedirs(self.persist_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, mode='w', encoding='utf-8') as f:
+            json.dump({'stamp': stamp, 'pairs': list(mapping.items())}, f)
+        os.replace(tmp_path, path)
+
+
+def get_crosswalk(session=None):
+    """
+    Devuelve el Crosswalk de la ejecución (el de la sesión, si lo tiene) o,
+    para un script ejecutado por separado, uno nuevo que usa la caché en disco.
+    """
+    if session is not None and session.crosswalk is not None:
+        return session.crosswalk
+    return Crosswalk(persist_dir=CROSSWALK_DIR)
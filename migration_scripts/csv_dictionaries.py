@@ -0,0 +1,229 @@
+# Carga declarativa de los diccionarios que vienen en archivos CSV.
+#
+# Cada diccionario se describe en DICTIONARIES: el archivo CSV (en la raíz
+# del repo), la tabla de destino, sus columnas con su tipo y la política
+# ante filas existentes. load_csv_dictionaries() los carga todos en una
+# sola transacción, en el orden de la lista (las tablas referenciadas van
+# antes), con un COPY por tabla, y al final ajusta la secuencia del id de
+# cada tabla al mayor id cargado, para que los INSERT posteriores que usan
+# la secuencia no choquen con los ids que vienen del CSV.
+#
+# Columnas: {'columna': 'tipo'}, con tipo int, text, bool o date; el
+# sufijo '?' la hace opcional (columna ausente -> NULL; en int, bool y date
+# también la celda vacía). Los valores se convierten con los convertidores
+# de coercion.py (CSV_TYPES), y uno que no se puede interpretar detiene la
+# carga. En las columnas text, opcionales o no, el texto se carga tal cual
+# (text:raw) y la celda vacía como '', igual que en los cargadores
+# anteriores. El
+# nombre de la columna en el CSV es el mismo que en la tabla; las columnas
+# del CSV que no se declaran se ignoran. 'constants' agrega columnas con
+# un valor fijo.
+#
+# Políticas ('on_conflict'):
+#   'replace'        vacía la tabla (TRUNCATE ... CASCADE) y carga el CSV.
+#   'skip_existing'  conserva las filas de la tabla y agrega solo las del
+#                    CSV que no coinciden con ninguna en alguna de las
+#                    columnas de 'match'; el id lo asigna la secuencia.
+
+import argparse
+import csv
+import os
+import psycopg2
+
+from bulk_loader import copy_rows
+from coercion import INVALID, converter
+from db_connections import get_postgres_connection
+from run_metrics import record, step_phase
+
+CSV_DIR = os.path.join(os.path.dirname(__file__), '..')
+
+DICTIONARIES = [
+    {'table': 'dic_especialidades', 'csv': 'dic_especialidades_rows.csv',
+     'columns': {'id': 'int', 'id_carrera': 'int?', 'nombre': 'text', 'estado_especialidad': 'int'}},
+    {'table': 'dic_sedes', 'csv': 'dic_sedes_rows.csv',
+     'columns': {'id': 'int', 'nombre': 'text'}},
+    {'table': 'tbl_estructura_academica', 'csv': 'tbl_estructura_academica_rows.csv',
+     'columns': {'id': 'int', 'nombre': 'text', 'id_especialidad': 'int', 'id_sede': 'int', 'estado_ea': 'int'}},
+    {'table': 'dic_denominaciones', 'csv': 'dic_denominaciones_rows.csv',
+     'columns': {'id': 'int', 'id_especialidad': 'int', 'nombre': 'text', 'denominacion_actual': 'int'}},
+    {'table': 'dic_etapas', 'csv': 'dic_etapas_rows.csv',
+     'columns': {'id': 'int', 'nombre': 'text', 'descripcion': 'text'}},
+    {'table': 'dic_modalidades', 'csv': 'dic_modalidades_rows.csv',
+     'columns': {'id': 'int', 'descripcion': 'text', 'ruta': 'text', 'estado_modalidad': 'int'}},
+    {'table': 'dic_tipo_trabajos', 'csv': 'dic_tipo_trabajos_rows.csv',
+     'columns': {'id': 'int', 'nombre': 'text', 'detalle': 'text', 'estado_tipo_trabajo': 'int'}},
+    {'table': 'dic_acciones', 'csv': 'dic_acciones_rows.csv',
+     'columns': {'id': 'int', 'nombre': 'text', 'descripcion': 'text', 'id_etapa_pertenencia': 'int?'}},
+    {'table': 'dic_servicios', 'csv': 'dic_servicios_rows.csv',
+     'columns': {'id': 'int', 'nombre': 'text', 'descripcion': 'text'}},
+    {'table': 'dic_tipo_archivo', 'csv': 'dic_tipo_archivo_rows.csv',
+     'columns': {'id': 'int', 'nombre': 'text', 'descripcion': 'text'}},
+    {'table': 'dic_visto_bueno', 'csv': 'dic_visto_bueno_rows.csv',
+     'columns': {'id': 'int', 'descripcion': 'text', 'id_etapa': 'int'}},
+    {'table': 'dic_universidades', 'csv': 'dic_universidades_rows.csv',
+     'columns': {'id': 'int', 'nombre': 'text', 'abreviatura': 'text', 'estado_dic_universidades': 'bool',
+                 'pais': 'text?', 'tipo_institucion': 'text?', 'tipo_gestion': 'text?'}},
+    {'table': 'dic_nivel_admins', 'csv': 'dic_nivel_admins_rows.csv',
+     'columns': {'id': 'int', 'nombre': 'text', 'descripcion': 'text'}},
+    {'table': 'dic_orden_jurado', 'csv': 'dic_orden_jurado_rows.csv',
+     'columns': {'id': 'int', 'nombre': 'text', 'abreviatura': 'text', 'estado': 'int'}},
+    {'table': 'dic_tipoevento_jurado', 'csv': 'dic_tipoevento_jurado_rows.csv',
+     'columns': {'id': 'int', 'nombre': 'text', 'estado': 'int'}},
+    {'table': 'dic_grados_academicos', 'csv': 'dic_grados_academicos_rows.csv',
+     'columns': {'nombre': 'text', 'abreviatura': 'text'},
+     'constants': {'estado_dic_grados_academicos': True},
+     'on_conflict': 'skip_existing', 'match': ['abreviatura', 'nombre']},
+    {'table': 'dic_obtencion_studios', 'csv': 'dic_obtencion_studios_rows.csv',
+     'columns': {'nombre': 'text', 'descripcion': 'text'},
+     'on_conflict': 'skip_existing', 'match': ['nombre']},
+]
+
+# Tipo de coercion.py de cada tipo de columna de los CSV
+CSV_TYPES = {
+    'int': 'int',
+    'text': 'text:raw',
+    'bool': 'bool',
+    'date': 'date',
+}
+
+
+def dictionary_tables(specs=DICTIONARIES):
+    return [spec['table'] for spec in specs]
+
+
+def dictionary_sources(specs=DICTIONARIES):
+    """Fuentes de los diccionarios en el formato de 'sources' de run_migrations.py."""
+    return [f"csv:{spec['csv']}" for spec in specs]
+
+
+def _column_types(spec):
+    """[(columna, tipo, opcional, convertidor)] de spec."""
+    columns = []
+    for column, declared in spec['columns'].items():
+        data_type = declared.rstrip('?')
+        if data_type not in CSV_TYPES:
+            raise ValueError(f"{spec['table']}.{column}: tipo desconocido '{declared}'.")
+        columns.append((column, data_type, declared.endswith('?'), converter(CSV_TYPES[data_type])))
+    return columns
+
+
+def read_rows(spec, csv_dir=CSV_DIR):
+    """Lee el CSV de spec y devuelve (columnas de destino, filas convertidas)."""
+    column_types = _column_types(spec)
+    constants = spec.get('constants', {})
+    path = os.path.join(csv_dir, spec['csv'])
+    rows = []
+    with open(path, mode='r', encoding='utf-8', newline='') as infile:
+        reader = csv.DictReader(infile)
+        header = set(reader.fieldnames or [])
+        for column, _, optional, _ in column_types:
+            if column not in header and not optional:
+                raise ValueError(f"{spec['csv']}: falta la columna obligatoria '{column}'.")
+        for row in reader:
+            values = []
+            for column, data_type, optional, convert in column_types:
+                text = row.get(column)
+                if text is None or (text == '' and data_type != 'text'):
+                    if not optional:
+                        raise ValueError(f"{spec['csv']}, línea {reader.line_num}: "
+                                         f"'{column}' no puede estar vacía.")
+                    values.append(None)
+                    continue
+                value = convert(text)
+                if value is INVALID:
+                    raise ValueError(f"{spec['csv']}, línea {reader.line_num}: '{column}': "
+                                     f"valor {data_type} no válido {text!r}.")
+                values.append(value)
+            rows.append(tuple(values) + tuple(constants.values()))
+    return [column for column, _, _, _ in column_types] + list(constants), rows
+
+
+def _insert_missing(cursor, spec, columns, rows):
+    """Política skip_existing: COPY a una tabla temporal y se insertan las filas nuevas."""
+    table, match = spec['table'], spec['match']
+    staging = f"_csv_{table}"
+    column_list = ', '.join(columns)
+    cursor.execute(f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS SELECT {column_list} FROM {table} WITH NO DATA")
+    cursor.execute(f"ALTER TABLE {staging} ADD COLUMN _orden serial")
+    copy_rows(cursor, staging, columns, rows)
+    existing = ' OR '.join(f"t.{column} = s.{column}" for column in match)
+    earlier = ' OR '.join(f"p.{column} = s.{column}" for column in match)
+    with step_phase('load'):
+        # Tampoco se repiten las filas del CSV que coinciden con una anterior
+        cursor.execute(f"""
+            INSERT INTO {table} ({column_list})
+            SELECT {', '.join(f's.{column}' for column in columns)} FROM {staging} s
+            WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE {existing})
+              AND NOT EXISTS (SELECT 1 FROM {staging} p WHERE p._orden < s._orden AND ({earlier}))
+            ORDER BY s._orden
+        """)
+    return cursor.rowcount
+
+
+def resync_sequence(cursor, table, column='id'):
+    """Deja la secuencia de table.column en el mayor valor cargado (si la columna usa una)."""
+    cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", (table, column))
+    sequence = cursor.fetchone()[0]
+    if sequence is None:
+        return None
+    cursor.execute(f"SELECT setval(%s, COALESCE(MAX({column}), 0) + 1, false) FROM {table}", (sequence,))
+    return cursor.fetchone()[0]
+
+
+def load_csv_dictionaries(session=None, tables=None, specs=DICTIONARIES):
+    """
+    Carga los diccionarios de specs (o solo los de tables) en una sola
+    transacción. Si un CSV tiene un valor no válido no se carga ninguno.
+    """
+    specs = [spec for spec in specs if tables is None or spec['table'] in tables]
+    postgres_conn = None
+    try:
+        postgres_conn = session.postgres() if session else get_postgres_connection()
+        if not postgres_conn:
+            raise Exception("No se pudo establecer la conexión a PostgreSQL.")
+
+        # Se leen y validan todos los CSV antes de tocar la base
+        with step_phase('extract'):
+            loaded = [(spec, *read_rows(spec)) for spec in specs]
+        for _, _, rows in loaded:
+            record(rows_read=len(rows))
+
+        with postgres_conn.cursor() as cur:
+            replaced = [spec['table'] for spec in specs if spec.get('on_conflict', 'replace') == 'replace']
+            if replaced:
+                with step_phase('load'):
+                    cur.execute(f"TRUNCATE TABLE {', '.join(replaced)} RESTART IDENTITY CASCADE;")
+
+            for spec, columns, rows in loaded:
+                if spec.get('on_conflict', 'replace') == 'replace':
+                    count = copy_rows(cur, spec['table'], columns, rows)
+                else:
+                    count = _insert_missing(cur, spec, columns, rows)
+                record(rows_written=count)
+                with step_phase('load'):
+                    next_id = resync_sequence(cur, spec['table'])
+                skipped = len(rows) - count
+                print(f"  {spec['table']}: {count} filas desde {spec['csv']}"
+                      + (f" ({skipped} ya existían)" if skipped else "")
+                      + (f", siguiente id {next_id}" if next_id is not None else "") + ".")
+        postgres_conn.commit()
+        print(f"Diccionarios CSV cargados: {len(loaded)} tablas.")
+
+    except (Exception, psycopg2.Error) as e:
+        print(f"Error durante la carga de los diccionarios CSV: {e}")
+        if postgres_conn:
+            postgres_conn.rollback()
+        raise e
+    finally:
+        if postgres_conn and session is None:
+            postgres_conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Carga los diccionarios que vienen en archivos CSV.")
+    parser.add_argument("tables", nargs='*', help="Tablas a cargar (por defecto, todas las de DICTIONARIES).")
+    args = parser.parse_args()
+    unknown = set(args.tables) - set(dictionary_tables())
+    if unknown:
+        parser.error(f"Tablas sin diccionario CSV: {', '.join(sorted(unknown))}")
+    load_csv_dictionaries(tables=args.tables or None)
@@ -7,27 +7,42 @@
 import mysql.connector
 import psycopg2
 import os
+import threading
 from dotenv import load_dotenv
+from source_adapter import DumpConnection
+from sql_trace import postgres_options, wrap_mysql
 
 # Cargar variables de entorno desde el archivo .env
 load_dotenv()
 
 # --- Configuración de Conexiones ---
 
+# Los valores por defecto corresponden al entorno local; las variables de
+# entorno permiten apuntar a otras instancias (por ejemplo, las bases de
+# prueba de benchmark_migrations.py).
+
 MYSQL_CONFIG_ABSMAIN = {
-    'user': 'root',
-    'password': '',
-    'host': '127.0.0.1',
-    'database': 'vriunap_absmain'
+    'user': os.getenv("MYSQL_USER", 'root'),
+    'password': os.getenv("MYSQL_PASSWORD", ''),
+    'host': os.getenv("MYSQL_HOST", '127.0.0.1'),
+    'port': int(os.getenv("MYSQL_PORT", "3306")),
+    'database': os.getenv("MYSQL_ABSMAIN_DB", 'vriunap_absmain')
 }
 
 MYSQL_CONFIG_PILAR3 = {
-    'user': 'root',
-    'password': '',
-    'host': '127.0.0.1',
-    'database': 'vriunap_pilar3'
+    'user': os.getenv("MYSQL_USER", 'root'),
+    'password': os.getenv("MYSQL_PASSWORD", ''),
+    'host': os.getenv("MYSQL_HOST", '127.0.0.1'),
+    'port': int(os.getenv("MYSQL_PORT", "3306")),
+    'database': os.getenv("MYSQL_PILAR3_DB", 'vriunap_pilar3')
 }
 
+# Volcados de mysqldump (.sql o .sql.gz) de los que leer cada base en lugar
+# del servidor; pueden ser el mismo archivo si se volcó con --databases.
+# Ver source_adapter.py.
+MYSQL_ABSMAIN_DUMP = os.getenv("MYSQL_ABSMAIN_DUMP")
+MYSQL_PILAR3_DUMP = os.getenv("MYSQL_PILAR3_DUMP")
+
 # --- Conexión a Supabase (Configuración Activa) ---
 # La configuración ahora se toma de la variable de entorno DATABASE_URL
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -36,21 +51,27 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 # --- Funciones de Conexión ---
 
 def get_mysql_absmain_connection():
-    """Devuelve una conexión a la base de datos vriunap_absmain en MySQL."""
+    """Devuelve una conexión a la base de datos vriunap_absmain en MySQL (o a su volcado)."""
+    if MYSQL_ABSMAIN_DUMP:
+        print(f"Leyendo vriunap_absmain desde el volcado {MYSQL_ABSMAIN_DUMP}.")
+        return wrap_mysql(DumpConnection(MYSQL_ABSMAIN_DUMP, MYSQL_CONFIG_ABSMAIN['database']), 'absmain')
     try:
         conn = mysql.connector.connect(**MYSQL_CONFIG_ABSMAIN)
         print("Conexión exitosa a MySQL (vriunap_absmain).")
-        return conn
+        return wrap_mysql(conn, 'absmain')
     except mysql.connector.Error as err:
         print(f"Error al conectar a MySQL (vriunap_absmain): {err}")
         return None
 
 def get_mysql_pilar3_connection():
-    """Devuelve una conexión a la base de datos vriunap_pilar3 en MySQL."""
+    """Devuelve una conexión a la base de datos vriunap_pilar3 en MySQL (o a su volcado)."""
+    if MYSQL_PILAR3_DUMP:
+        print(f"Leyendo vriunap_pilar3 desde el volcado {MYSQL_PILAR3_DUMP}.")
+        return wrap_mysql(DumpConnection(MYSQL_PILAR3_DUMP, MYSQL_CONFIG_PILAR3['database']), 'pilar3')
     try:
         conn = mysql.connector.connect(**MYSQL_CONFIG_PILAR3)
         print("Conexión exitosa a MySQL (vriunap_pilar3).")
-        return conn
+        return wrap_mysql(conn, 'pilar3')
     except mysql.connector.Error as err:
         print(f"Error al conectar a MySQL (vriunap_pilar3): {err}")
         return None
@@ -60,11 +81,12 @@ def get_postgres_connection():
     try:
         # --- Conexión a PostgreSQL Local ---
         conn = psycopg2.connect(
-            host="localhost",
-            port="5432",
-            user="admin",
-            password="admin123",
-            dbname="postgres"
+            host=os.getenv("PGHOST", "localhost"),
+            port=os.getenv("PGPORT", "5432"),
+            user=os.getenv("PGUSER", "admin"),
+            password=os.getenv("PGPASSWORD", "admin123"),
+            dbname=os.getenv("PGDATABASE", "postgres"),
+            **postgres_options()
         )
         print("Conexión exitosa a PostgreSQL Local.")
         return conn
@@ -72,6 +94,167 @@ def get_postgres_connection():
         print(f"Error al conectar a PostgreSQL Local: {err}")
         return None
 
+# --- Pool de Conexiones Compartido ---
+
+class ConnectionPoolManager:
+    """
+    Mantiene conexiones abiertas a vriunap_absmain, vriunap_pilar3 y
+    PostgreSQL para reutilizarlas entre pasos de la migración en lugar de
+    abrir y cerrar una conexión por paso.
+
+    Cada paso recibe una MigrationSession (ver session()) que toma del
+    pool, como máximo, una conexión por base de datos; así cada worker del
+    orquestador trabaja con sus propias conexiones y al terminar el paso
+    quedan libres para el siguiente.
+
+    Con search_path, las conexiones nuevas a PostgreSQL lo fijan para toda
+    la sesión (p. ej. para que los pasos carguen un esquema sombra).
+    """
+
+    FACTORIES = {
+        'postgres': get_postgres_connection,
+        'absmain': get_mysql_absmain_connection,
+        'pilar3': get_mysql_pilar3_connection,
+    }
+
+    def __init__(self, max_idle=8, search_path=None):
+        self.max_idle = max_idle
+        self.search_path = search_path
+        self._idle = {kind: [] for kind in self.FACTORIES}
+        self._in_use = {kind: 0 for kind in self.FACTORIES}
+        self._lock = threading.Lock()
+        self._stats = {
+            kind: {'created': 0, 'checkouts': 0, 'reused': 0, 'discarded': 0, 'peak_in_use': 0}
+            for kind in self.FACTORIES
+        }
+
+    def acquire(self, kind):
+        """Devuelve una conexión libre del pool o abre una nueva."""
+        with self._lock:
+            stats = self._stats[kind]
+            stats['checkouts'] += 1
+            conn = self._idle[kind].pop() if self._idle[kind] else None
+            if conn is not None:
+                stats['reused'] += 1
+            self._in_use[kind] += 1
+            stats['peak_in_use'] = max(stats['peak_in_use'], self._in_use[kind])
+
+        if conn is None:
+            conn = self.FACTORIES[kind]()
+            if conn is None:
+                with self._lock:
+                    self._in_use[kind] -= 1
+                raise Exception(f"No se pudo abrir una conexión para '{kind}'.")
+            if kind == 'postgres' and self.search_path:
+                with conn.cursor() as cur:
+                    cur.execute(f"SET search_path TO {self.search_path}")
+                conn.commit()
+            with self._lock:
+                self._stats[kind]['created'] += 1
+        return conn
+
+    def release(self, kind, conn):
+        """
+        Devuelve una conexión al pool, descartando cualquier transacción
+        pendiente. Las conexiones cerradas o rotas se descartan.
+        """
+        reusable = True
+        try:
+            if kind == 'postgres':
+                reusable = not conn.closed
+                if reusable:
+                    conn.rollback()
+            else:
+                reusable = conn.is_connected()
+                if reusable:
+                    conn.consume_results()
+                    conn.rollback()
+        except (psycopg2.Error, mysql.connector.Error):
+            reusable = False
+
+        with self._lock:
+            self._in_use[kind] -= 1
+            if reusable and len(self._idle[kind]) < self.max_idle:
+                self._idle[kind].append(conn)
+                return
+            self._stats[kind]['discarded'] += 1
+        try:
+            conn.close()
+        except (psycopg2.Error, mysql.connector.Error):
+            pass
+
+    def session(self, crosswalk=None):
+        """Crea una sesión que toma sus conexiones de este pool."""
+        return MigrationSession(self, crosswalk=crosswalk)
+
+    def close_all(self):
+        """Cierra todas las conexiones libres del pool."""
+        with self._lock:
+            idle = [(kind, conn) for kind, conns in self._idle.items() for conn in conns]
+            for conns in self._idle.values():
+                conns.clear()
+        for _, conn in idle:
+            try:
+                conn.close()
+            except (psycopg2.Error, mysql.connector.Error):
+                pass
+
+    def metrics(self):
+        """Devuelve las métricas de uso del pool por base de datos."""
+        with self._lock:
+            metrics = {kind: dict(stats) for kind, stats in self._stats.items()}
+        for stats in metrics.values():
+            stats['reuse_ratio'] = round(stats['reused'] / stats['checkouts'], 3) if stats['checkouts'] else 0.0
+        return metrics
+
+    def print_metrics(self):
+        print("--- Uso del pool de conexiones ---")
+        for kind, stats in self.metrics().items():
+            if stats['checkouts']:
+                print(f"  {kind}: {stats['created']} conexiones abiertas, {stats['checkouts']} préstamos, "
+                      f"{stats['reused']} reutilizadas ({stats['reuse_ratio']:.0%}), "
+                      f"máximo simultáneo {stats['peak_in_use']}.")
+
+
+class MigrationSession:
+    """
+    Conexiones de un paso de la migración. Cada conexión se toma del pool
+    la primera vez que se pide y se devuelve al cerrar la sesión, por lo
+    que los pasos que reciben una sesión no deben cerrar sus conexiones.
+    La sesión lleva además el Crosswalk compartido de la ejecución, si hay.
+    """
+
+    def __init__(self, manager, crosswalk=None):
+        self.manager = manager
+        self.crosswalk = crosswalk
+        self._conns = {}
+
+    def _get(self, kind):
+        if kind not in self._conns:
+            self._conns[kind] = self.manager.acquire(kind)
+        return self._conns[kind]
+
+    def postgres(self):
+        return self._get('postgres')
+
+    def mysql_absmain(self):
+        return self._get('absmain')
+
+    def mysql_pilar3(self):
+        return self._get('pilar3')
+
+    def close(self):
+        for kind, conn in self._conns.items():
+            self.manager.release(kind, conn)
+        self._conns.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
 # --- Conexión a Supabase (Desactivada) ---
 # def get_postgres_connection():
 #     """Devuelve una conexión a la base de datos de PostgreSQL usando DATABASE_URL."""
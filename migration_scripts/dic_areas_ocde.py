@@ -1,15 +1,16 @@
 
 from db_connections import get_mysql_absmain_connection, get_postgres_connection
+from bulk_loader import bulk_load
 
-def migrate_dic_areas_ocde():
+def migrate_dic_areas_ocde(session=None):
     """
     Migra datos de ocdeAreas (MySQL) a dic_areas_ocde (PostgreSQL).
     """
     mysql_conn = None
     postgres_conn = None
     try:
-        mysql_conn = get_mysql_absmain_connection()
-        postgres_conn = get_postgres_connection()
+        mysql_conn = session.mysql_absmain() if session else get_mysql_absmain_connection()
+        postgres_conn = session.postgres() if session else get_postgres_connection()
         if not all([mysql_conn, postgres_conn]):
             raise Exception("No se pudieron establecer todas las conexiones de base de datos.")
 
@@ -20,10 +21,7 @@ def migrate_dic_areas_ocde():
         
         records = mysql_cursor.fetchall()
         
-        postgres_cursor.executemany(
-            "INSERT INTO dic_areas_ocde (id, nombre, estado_area) VALUES (%s, %s, %s)",
-            records
-        )
+        bulk_load(postgres_cursor, 'dic_areas_ocde', ['id', 'nombre', 'estado_area'], records)
         
         postgres_conn.commit()
         print(f"Migrados {len(records)} registros a dic_areas_ocde.")
@@ -32,7 +30,7 @@ def migrate_dic_areas_ocde():
         print(f"Error en la migración de dic_areas_ocde: {e}")
         raise e
     finally:
-        if mysql_conn:
+        if mysql_conn and session is None:
             mysql_conn.close()
-        if postgres_conn:
+        if postgres_conn and session is None:
             postgres_conn.close()
\ No newline at end of file
@@ -1,15 +1,20 @@
 from db_connections import get_mysql_absmain_connection, get_postgres_connection
+from bulk_loader import bulk_load
+from row_hash_merge import merge_rows, print_merge_counts
 
-def migrate_dic_carreras():
+CARRERAS_COLUMNS = ['id', 'id_facultad', 'nombre', 'estado_carrera']
+
+def migrate_dic_carreras(session=None, incremental=False):
     """
     Migra datos de dicCarreras (MySQL) a dic_carreras (PostgreSQL),
     mapeando solo las columnas necesarias y estableciendo valores por defecto.
+    Con incremental=True solo aplica las diferencias por id (ver row_hash_merge.py).
     """
     mysql_conn = None
     postgres_conn = None
     try:
-        mysql_conn = get_mysql_absmain_connection()
-        postgres_conn = get_postgres_connection()
+        mysql_conn = session.mysql_absmain() if session else get_mysql_absmain_connection()
+        postgres_conn = session.postgres() if session else get_postgres_connection()
         if not all([mysql_conn, postgres_conn]):
             raise Exception("No se pudieron establecer todas las conexiones de base de datos.")
 
@@ -22,11 +27,15 @@ def migrate_dic_carreras():
         
         records = mysql_cursor.fetchall()
         
+        if incremental:
+            counts = merge_rows(postgres_cursor, 'dic_carreras', CARRERAS_COLUMNS, records, key_column='id',
+                                deactivate={'estado_carrera': 0})
+            postgres_conn.commit()
+            print_merge_counts('dic_carreras', counts)
+            return
+
         # 3. La sentencia INSERT ahora incluye las 4 columnas de destino requeridas.
-        postgres_cursor.executemany(
-            "INSERT INTO dic_carreras (id, id_facultad, nombre, estado_carrera) VALUES (%s, %s, %s, %s)",
-            records
-        )
+        bulk_load(postgres_cursor, 'dic_carreras', CARRERAS_COLUMNS, records)
         
         postgres_conn.commit()
         print(f"Migrados {len(records)} registros a dic_carreras.")
@@ -36,7 +45,7 @@ def migrate_dic_carreras():
         # 4. Re-lanzar la excepción para detener el script principal.
         raise e
     finally:
-        if mysql_conn:
+        if mysql_conn and session is None:
             mysql_conn.close()
-        if postgres_conn:
+        if postgres_conn and session is None:
             postgres_conn.close()
\ No newline at end of file
@@ -1,6 +1,7 @@
 from db_connections import get_mysql_absmain_connection, get_postgres_connection
+from bulk_loader import bulk_load
 
-def migrate_dic_categoria():
+def migrate_dic_categoria(session=None):
     """
     Migra datos de dicCategorias (MySQL) a dic_categoria (PostgreSQL),
     mapeando las columnas correctamente y estableciendo valores por defecto.
@@ -8,8 +9,8 @@ def migrate_dic_categoria():
     mysql_conn = None
     postgres_conn = None
     try:
-        mysql_conn = get_mysql_absmain_connection()
-        postgres_conn = get_postgres_connection()
+        mysql_conn = session.mysql_absmain() if session else get_mysql_absmain_connection()
+        postgres_conn = session.postgres() if session else get_postgres_connection()
         if not all([mysql_conn, postgres_conn]):
             raise Exception("No se pudieron establecer todas las conexiones de base de datos.")
 
@@ -23,8 +24,9 @@ def migrate_dic_categoria():
         records = mysql_cursor.fetchall()
         
         # 3. La sentencia INSERT ahora incluye todas las columnas de destino requeridas.
-        postgres_cursor.executemany(
-            "INSERT INTO dic_categoria (id, tipo, nombre, abreviatura, estado_categoria) VALUES (%s, %s, %s, %s, %s)",
+        bulk_load(
+            postgres_cursor, 'dic_categoria',
+            ['id', 'tipo', 'nombre', 'abreviatura', 'estado_categoria'],
             records
         )
         
@@ -36,7 +38,7 @@ def migrate_dic_categoria():
         # 4. Re-lanzar la excepción para detener el script principal.
         raise e
     finally:
-        if mysql_conn:
+        if mysql_conn and session is None:
             mysql_conn.close()
-        if postgres_conn:
+        if postgres_conn and session is None:
             postgres_conn.close()
\ No newline at end of file
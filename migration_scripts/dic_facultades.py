@@ -1,6 +1,7 @@
 from db_connections import get_mysql_absmain_connection, get_postgres_connection
+from bulk_loader import bulk_load
 
-def migrate_dic_facultades():
+def migrate_dic_facultades(session=None):
     """
     Migra datos de dicFacultades (MySQL) a dic_facultades (PostgreSQL),
     mapeando las columnas correctamente, estableciendo valores por defecto
@@ -9,8 +10,8 @@ def migrate_dic_facultades():
     mysql_conn = None
     postgres_conn = None
     try:
-        mysql_conn = get_mysql_absmain_connection()
-        postgres_conn = get_postgres_connection()
+        mysql_conn = session.mysql_absmain() if session else get_mysql_absmain_connection()
+        postgres_conn = session.postgres() if session else get_postgres_connection()
         if not all([mysql_conn, postgres_conn]):
             raise Exception("No se pudieron establecer todas las conexiones de base de datos.")
 
@@ -22,8 +23,9 @@ def migrate_dic_facultades():
         
         records = mysql_cursor.fetchall()
         
-        postgres_cursor.executemany(
-            "INSERT INTO dic_facultades (id, nombre, abreviatura, id_area, estado_facultad) VALUES (%s, %s, %s, %s, %s)",
+        bulk_load(
+            postgres_cursor, 'dic_facultades',
+            ['id', 'nombre', 'abreviatura', 'id_area', 'estado_facultad'],
             records
         )
         
@@ -34,7 +36,7 @@ def migrate_dic_facultades():
         print(f"Error en la migración de dic_facultades: {e}")
         raise e
     finally:
-        if mysql_conn:
+        if mysql_conn and session is None:
             mysql_conn.close()
-        if postgres_conn:
+        if postgres_conn and session is None:
             postgres_conn.close()
\ No newline at end of file
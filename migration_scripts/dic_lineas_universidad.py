@@ -1,6 +1,7 @@
 from db_connections import get_mysql_absmain_connection, get_postgres_connection
+from bulk_loader import bulk_load
 
-def migrate_dic_lineas_universidad():
+def migrate_dic_lineas_universidad(session=None):
     """
     Migra datos de dicLineasVRI (MySQL) a dic_lineas_universidad (PostgreSQL),
     estableciendo el estado por defecto en 1.
@@ -8,8 +9,8 @@ def migrate_dic_lineas_universidad():
     mysql_conn = None
     postgres_conn = None
     try:
-        mysql_conn = get_mysql_absmain_connection()
-        postgres_conn = get_postgres_connection()
+        mysql_conn = session.mysql_absmain() if session else get_mysql_absmain_connection()
+        postgres_conn = session.postgres() if session else get_postgres_connection()
         if not all([mysql_conn, postgres_conn]):
             raise Exception("No se pudieron establecer todas las conexiones de base de datos.")
 
@@ -22,10 +23,11 @@ def migrate_dic_lineas_universidad():
         # Preparar los datos para la inserción, añadiendo el estado por defecto
         records_to_insert = [(rec['Id'], rec['Nombre'], 1) for rec in records]
 
-        postgres_cursor.execute("TRUNCATE TABLE public.dic_lineas_universidad RESTART IDENTITY CASCADE;")
+        postgres_cursor.execute("TRUNCATE TABLE dic_lineas_universidad RESTART IDENTITY CASCADE;")
         
-        postgres_cursor.executemany(
-            "INSERT INTO dic_lineas_universidad (id, nombre, estado_linea_universidad) VALUES (%s, %s, %s)",
+        bulk_load(
+            postgres_cursor, 'dic_lineas_universidad',
+            ['id', 'nombre', 'estado_linea_universidad'],
             records_to_insert
         )
         
@@ -36,7 +38,7 @@ def migrate_dic_lineas_universidad():
         print(f"Error en la migración de dic_lineas_universidad: {e}")
         raise e
     finally:
-        if mysql_conn:
+        if mysql_conn and session is None:
             mysql_conn.close()
-        if postgres_conn:
+        if postgres_conn and session is None:
             postgres_conn.close()
@@ -1,16 +1,17 @@
 
 
 from db_connections import get_mysql_absmain_connection, get_postgres_connection
+from bulk_loader import bulk_load
 
-def migrate_dic_subareas_ocde():
+def migrate_dic_subareas_ocde(session=None):
     """
     Migra datos de ocdeSubAreas (MySQL) a dic_subareas_ocde (PostgreSQL).
     """
     mysql_conn = None
     postgres_conn = None
     try:
-        mysql_conn = get_mysql_absmain_connection()
-        postgres_conn = get_postgres_connection()
+        mysql_conn = session.mysql_absmain() if session else get_mysql_absmain_connection()
+        postgres_conn = session.postgres() if session else get_postgres_connection()
         if not all([mysql_conn, postgres_conn]):
             raise Exception("No se pudieron establecer todas las conexiones de base de datos.")
 
@@ -21,8 +22,9 @@ def migrate_dic_subareas_ocde():
         
         records = mysql_cursor.fetchall()
         
-        postgres_cursor.executemany(
-            "INSERT INTO dic_subareas_ocde (id, id_area, nombre, estado_subarea) VALUES (%s, %s, %s, %s)",
+        bulk_load(
+            postgres_cursor, 'dic_subareas_ocde',
+            ['id', 'id_area', 'nombre', 'estado_subarea'],
             records
         )
         
@@ -33,7 +35,7 @@ def migrate_dic_subareas_ocde():
         print(f"Error en la migración de dic_subareas_ocde: {e}")
         raise e
     finally:
-        if mysql_conn:
+        if mysql_conn and session is None:
             mysql_conn.close()
-        if postgres_conn:
+        if postgres_conn and session is None:
             postgres_conn.close()
\ No newline at end of file
@@ -0,0 +1,319 @@
+# Modo ELT: tablas de origen copiadas tal cual a PostgreSQL y pasos en SQL.
+#
+# Los pasos de trámites, jurados, docentes y tesistas leen MySQL y
+# transforman fila por fila en Python (remapeo de etapas, una fila por
+# jurado, contador de iteración por trámite, búsqueda de la conformación).
+# Con run_migrations.py --elt, land_staging() copia primero las tablas de
+# STAGED_TABLES sin transformar a STAGING_SCHEMA (tablas UNLOGGED cargadas
+# con COPY, en paralelo) y los pasos de ELT_STEPS se ejecutan como un
+# INSERT ... SELECT cada uno: las uniones, el ROW_NUMBER() de las
+# iteraciones y el unnest de las columnas de jurado los resuelve
+# PostgreSQL, y Python solo ordena los pasos. Cada transformación produce
+# las mismas filas que su paso en Python, con sus mismos descartes.
+#
+# En staging las tablas y columnas conservan el nombre de MySQL en
+# minúsculas (tesTramites.IdJurado1 -> staging.testramites.idjurado1). Las
+# tablas se reemplazan en cada ejecución y quedan disponibles para revisar
+# la migración.
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from bulk_loader import copy_rows
+from entity_resolution import load_merge_plan
+from incremental_sync import Watermark
+from migrate_tbl_tramites import ETAPA_MAP, export_unmapped
+from run_metrics import record, step_phase
+from source_extract import stream_rows
+
+STAGING_SCHEMA = os.getenv("MIGRATION_STAGING_SCHEMA", "staging")
+
+# Tabla de origen -> base MySQL de la que se copia
+STAGED_TABLES = {
+    'tesTramites': 'pilar3',
+    'logTramites': 'pilar3',
+    'tesJuCambios': 'pilar3',
+    'tblCorrects': 'pilar3',
+    'tblDocentes': 'absmain',
+    'tblTesistas': 'pilar3',
+}
+
+# Tipos de MySQL (information_schema.columns.data_type) -> PostgreSQL; el
+# resto se copia como text.
+PG_TYPES = {
+    'tinyint': 'integer', 'smallint': 'integer', 'mediumint': 'integer', 'int': 'integer',
+    'bigint': 'bigint', 'decimal': 'numeric', 'float': 'double precision', 'double': 'double precision',
+    'date': 'date', 'datetime': 'timestamp', 'timestamp': 'timestamp',
+    'blob': 'bytea', 'mediumblob': 'bytea', 'longblob': 'bytea', 'varbinary': 'bytea', 'binary': 'bytea',
+}
+
+SYSTEM_USER = "(SELECT id FROM tbl_usuarios WHERE correo = 'sistema@vriunap.pe')"
+
+
+def staging_table(table):
+    return f"{STAGING_SCHEMA}.{table.lower()}"
+
+
+def _source_columns(mysql_conn, table):
+    cursor = mysql_conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT COLUMN_NAME, DATA_TYPE FROM information_schema.columns "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s ORDER BY ORDINAL_POSITION", (table,)
+        )
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def land_table(pool, table):
+    """Copia la tabla de origen table, sin transformar, a su tabla de staging."""
+    kind = STAGED_TABLES[table]
+    with pool.session() as session:
+        mysql_conn = session.mysql_absmain() if kind == 'absmain' else session.mysql_pilar3()
+        pg_conn = session.postgres()
+        columns = _source_columns(mysql_conn, table)
+        if not columns:
+            raise Exception(f"No se encontró la tabla de origen {table}.")
+
+        definition = ', '.join(f"{name.lower()} {PG_TYPES.get(data_type.lower(), 'text')}"
+                               for name, data_type in columns)
+        select = ', '.join(f"`{name}`" for name, _ in columns)
+        target = staging_table(table)
+        with pg_conn.cursor() as cur:
+            cur.execute(f"CREATE SCHEMA IF NOT EXISTS {STAGING_SCHEMA}")
+            cur.execute(f"DROP TABLE IF EXISTS {target}")
+            cur.execute(f"CREATE UNLOGGED TABLE {target} ({definition})")
+            rows = copy_rows(cur, target, [name.lower() for name, _ in columns],
+                             stream_rows(mysql_conn, f"SELECT {select} FROM `{table}`", dictionary=False))
+            record(rows_written=rows)
+            with step_phase('load'):
+                cur.execute(f"ANALYZE {target}")
+        pg_conn.commit()
+    print(f"  {table} -> {target}: {rows} filas.")
+    return rows
+
+
+def land_staging(pool, metrics, max_workers=4, tables=None):
+    """Copia en paralelo las tablas de STAGED_TABLES (o tables) a staging."""
+    tables = tables or list(STAGED_TABLES)
+    print(f"--- Copiando {len(tables)} tablas de origen a {STAGING_SCHEMA} ---")
+
+    def land(table):
+        with metrics.step(f"staging:{table}"):
+            return land_table(pool, table)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for future in [executor.submit(land, table) for table in tables]:
+            future.result()
+
+
+def _execute(cur, query, params=None):
+    """Ejecuta una sentencia de transformación y devuelve las filas afectadas."""
+    with step_phase('load'):
+        cur.execute(query, params)
+    return cur.rowcount
+
+
+def _count(cur, query, params=None):
+    cur.execute(query, params)
+    return cur.fetchone()[0]
+
+
+def _run(session, name, transform):
+    """Ejecuta transform(cur) en una transacción de la conexión de la sesión."""
+    conn = session.postgres()
+    try:
+        with conn.cursor() as cur:
+            transform(cur)
+        conn.commit()
+    except Exception as e:
+        print(f"  ERROR CRÍTICO en {name} (ELT): {e}")
+        conn.rollback()
+        raise
+    print(f"--- {name} (ELT) completado ---")
+
+
+def elt_tbl_tramites(session):
+    etapas = ', '.join(f"({estado}, {etapa})" for estado, etapa in ETAPA_MAP.items())
+    source = staging_table('tesTramites')
+
+    def transform(cur):
+        cur.execute("TRUNCATE TABLE tbl_tramites RESTART IDENTITY CASCADE;")
+        inserted = _execute(cur, f"""
+            INSERT INTO tbl_tramites (id_antiguo, codigo_proyecto, id_etapa, id_sublinea_vri, id_modalidad,
+                                      id_tipo_trabajo, id_denominacion, fecha_registro, estado_tramite)
+            SELECT t.id, t.codigo, m.id_etapa, t.idlinea, 1, 1, 1, t.fechregproy, 1
+            FROM {source} t
+            JOIN (VALUES {etapas}) AS m(estado, id_etapa) ON m.estado = t.estado
+            ORDER BY t.id
+        """)
+        record(rows_written=inserted)
+        cur.execute(f"SELECT max(id), greatest(max(fechregproy), max(fechmodif)) FROM {source}")
+        Watermark('tbl_tramites', *cur.fetchone()).save(cur)
+
+        cur.execute(f"SELECT * FROM {source} t WHERE t.estado IS NULL OR t.estado NOT IN "
+                    f"(SELECT m.estado FROM (VALUES {etapas}) AS m(estado, id_etapa)) ORDER BY t.id")
+        columns = [desc[0] for desc in cur.description]
+        export_unmapped([dict(zip(columns, row)) for row in cur.fetchall()])
+        print(f"  Se insertaron {inserted} trámites.")
+
+    _run(session, 'migrate_tbl_tramites', transform)
+
+
+def elt_tbl_conformacion_jurados(session):
+    def transform(cur):
+        cur.execute("ALTER TABLE tbl_conformacion_jurados ALTER COLUMN id_asignacion DROP NOT NULL;")
+        cur.execute("ALTER TABLE tbl_conformacion_jurados ALTER COLUMN fecha_asignacion DROP NOT NULL;")
+        cur.execute("TRUNCATE TABLE tbl_conformacion_jurados RESTART IDENTITY CASCADE;")
+        # Como en el paso en Python, id_docente conserva el Id de tblDocentes
+        inserted = _execute(cur, f"""
+            INSERT INTO tbl_conformacion_jurados (id_tramite, id_docente, id_orden, id_etapa, id_usuario_asignador,
+                                                  id_asignacion, fecha_asignacion, estado_cj)
+            SELECT tr.id, j.id_docente, j.orden, 5, {SYSTEM_USER}, NULL, f.fecha_asignacion, 1
+            FROM {staging_table('tesTramites')} t
+            JOIN tbl_tramites tr ON tr.id_antiguo = t.id
+            CROSS JOIN LATERAL unnest(ARRAY[t.idjurado1, t.idjurado2, t.idjurado3, t.idjurado4])
+                WITH ORDINALITY AS j(id_docente, orden)
+            LEFT JOIN (
+                SELECT idtramite, max(fecha) AS fecha_asignacion
+                FROM {staging_table('logTramites')}
+                WHERE accion = 'Proyecto enviado a Revisión'
+                GROUP BY idtramite
+            ) f ON f.idtramite = t.id
+            WHERE j.id_docente > 0
+            ORDER BY t.id, j.orden
+        """)
+        record(rows_written=inserted)
+        print(f"  Se insertaron {inserted} registros.")
+
+    _run(session, 'migrate_tbl_conformacion_jurados', transform)
+
+
+def elt_tbl_asignacion_jurado(session):
+    source = staging_table('tesJuCambios')
+
+    def transform(cur):
+        # La iteración se numera solo entre los cambios de trámites migrados
+        cambios = f"""
+            SELECT tr.id AS tramite_id, c.fecha, c.idjurado1, c.idjurado2, c.idjurado3, c.idjurado4,
+                   row_number() OVER (PARTITION BY c.idtramite ORDER BY c.fecha, c.id) AS iteracion,
+                   CASE WHEN lower(c.motivo) LIKE '%intento%' THEN 1
+                        WHEN lower(c.motivo) LIKE '%sorteo%' THEN 4
+                        ELSE 7 END AS id_tipo_evento
+            FROM {source} c
+            JOIN tbl_tramites tr ON tr.id_antiguo = c.idtramite
+        """
+        jurados = f"""
+            FROM ({cambios}) c
+            CROSS JOIN LATERAL unnest(ARRAY[c.idjurado1, c.idjurado2, c.idjurado3, c.idjurado4])
+                WITH ORDINALITY AS j(id_docente, orden)
+            LEFT JOIN tbl_docentes d ON d.id_antiguo = j.id_docente
+            WHERE j.id_docente > 0
+        """
+        inserted = _execute(cur, f"""
+            INSERT INTO tbl_asignacion_jurado (tramite_id, id_etapa, id_orden, iteracion, id_tipo_evento,
+                                               docente_id, id_usuario_asignador, fecha_evento, estado)
+            SELECT c.tramite_id, 5, j.orden, c.iteracion, c.id_tipo_evento, d.id, {SYSTEM_USER}, c.fecha, 0
+            {jurados} AND d.id IS NOT NULL
+            ORDER BY c.tramite_id, c.iteracion, j.orden
+        """)
+        record(rows_written=inserted)
+        unmapped = _count(cur, f"SELECT count(*) {jurados} AND d.id IS NULL")
+        cur.execute(f"SELECT max(id), max(fecha) FROM {source}")
+        Watermark('tbl_asignacion_jurado', *cur.fetchone()).save(cur)
+
+        print(f"  Se insertaron {inserted} registros.")
+        if unmapped > 0:
+            print(f"  ADVERTENCIA: Se ignoraron {unmapped} jurados sin mapeo.")
+            record(rows_rejected=unmapped)
+
+    _run(session, 'migrate_tbl_asignacion_jurado', transform)
+
+
+def elt_tbl_correcciones_jurados(session):
+    source = staging_table('tblCorrects')
+
+    def transform(cur):
+        # Si un docente figura dos veces en la conformación de un trámite se
+        # usa la última, como el mapa (trámite, docente) del paso en Python
+        inserted = _execute(cur, f"""
+            INSERT INTO tbl_correcciones_jurados (id_conformacion_jurado, orden, mensaje_correccion,
+                                                  "Fecha_correccion", estado_correccion)
+            SELECT cj.id, cj.id_orden, c.mensaje, c.fecha, 1
+            FROM {source} c
+            JOIN tbl_tramites tr ON tr.id_antiguo = c.idtramite
+            JOIN tbl_docentes d ON d.id_antiguo = c.iddocente
+            CROSS JOIN LATERAL (
+                SELECT id, id_orden FROM tbl_conformacion_jurados
+                WHERE id_tramite = tr.id AND id_docente = d.id
+                ORDER BY id DESC LIMIT 1
+            ) cj
+        """)
+        record(rows_written=inserted)
+        unmatched = _count(cur, f"SELECT count(*) FROM {source}") - inserted
+        print(f"  Se insertaron {inserted} registros.")
+        print(f"  Se ignoraron {unmatched} correcciones sin coincidencia.")
+        record(rows_rejected=unmatched)
+
+    _run(session, 'migrate_tbl_correcciones_jurados', transform)
+
+
+def _load_dni_overrides(cur, session, source):
+    """Tabla temporal con el DNI del canónico de cada registro fusionado (ver entity_resolution.py)."""
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS elt_dni_overrides (id_antiguo integer PRIMARY KEY, dni text) "
+                "ON COMMIT DROP")
+    copy_rows(cur, 'elt_dni_overrides', ['id_antiguo', 'dni'],
+              load_merge_plan(session).dni_overrides(source))
+
+
+def _elt_users_table(session, name, target, source_table, source, columns, values):
+    """docentes y tesistas: una fila por registro de origen cuyo DNI tiene usuario."""
+    staged = staging_table(source_table)
+
+    def transform(cur):
+        _load_dni_overrides(cur, session, source)
+        cur.execute(f"TRUNCATE TABLE {target} RESTART IDENTITY CASCADE;")
+        inserted = _execute(cur, f"""
+            INSERT INTO {target} ({', '.join(columns)})
+            SELECT u.id, {values}
+            FROM {staged} s
+            LEFT JOIN elt_dni_overrides o ON o.id_antiguo = s.id
+            JOIN tbl_usuarios u ON u.num_doc_identidad = COALESCE(o.dni, s.dni)
+            ORDER BY s.id
+        """)
+        record(rows_written=inserted)
+        unmapped = _count(cur, f"SELECT count(*) FROM {staged}") - inserted
+        print(f"  Se insertaron {inserted} registros en {target}.")
+        if unmapped > 0:
+            print(f"  ADVERTENCIA: Se ignoraron {unmapped} registros porque su DNI no fue encontrado en tbl_usuarios.")
+            record(rows_rejected=unmapped)
+
+    _run(session, name, transform)
+
+
+def elt_tbl_docentes(session):
+    _elt_users_table(
+        session, 'populate_tbl_docentes', 'tbl_docentes', 'tblDocentes', 'docentes',
+        ['id_usuario', 'id_categoria', 'codigo_airhs', 'id_especialidad', 'estado_docente', 'id_antiguo'],
+        "s.idcategoria, s.codigo, s.idespecialidad, CASE WHEN s.estado = 'A' THEN 1 ELSE 0 END, s.id"
+    )
+
+
+def elt_tbl_tesistas(session):
+    _elt_users_table(
+        session, 'populate_tbl_tesistas', 'tbl_tesistas', 'tblTesistas', 'tesistas',
+        ['id_usuario', 'codigo_estudiante', 'id_estructura_academica', 'estado', 'id_antiguo'],
+        "s.codigo, s.idcarrera, CASE WHEN s.activo = 'A' THEN 1 ELSE 0 END, s.id"
+    )
+
+
+# Paso de MIGRATION_STEPS -> su versión en SQL sobre staging
+ELT_STEPS = {
+    'migrate_tbl_tramites': elt_tbl_tramites,
+    'populate_tbl_docentes': elt_tbl_docentes,
+    'populate_tbl_tesistas': elt_tbl_tesistas,
+    'migrate_tbl_conformacion_jurados': elt_tbl_conformacion_jurados,
+    'migrate_tbl_asignacion_jurado': elt_tbl_asignacion_jurado,
+    'migrate_tbl_correcciones_jurados': elt_tbl_correcciones_jurados,
+}
@@ -0,0 +1,440 @@
+# Resolución de entidades para los usuarios (docentes y tesistas).
+#
+# La deduplicación original solo comparaba "nombres apellidos" en
+# minúsculas, así que no detectaba tildes, eñes, nombres en otro orden ni
+# errores de tipeo, y fusionaba homónimos con DNI distinto. Esta etapa:
+#
+#   1. Normaliza los nombres (sin tildes ni eñe, mayúsculas, sin
+#      partículas como DE/LA/DEL), ordena sus palabras y calcula una llave
+#      fonética por palabra.
+#   2. Agrupa los registros en bloques por llaves exactas (DNI, correo,
+#      código, nombre normalizado, llave fonética). Solo se comparan pares
+#      dentro de un mismo bloque, con lo que el número de comparaciones
+#      crece casi linealmente; los bloques demasiado grandes (nombres muy
+#      comunes) se descartan.
+#   3. Puntúa cada par por similitud de nombre, DNI, correo y código.
+#   4. Une los pares que superan el umbral en grupos (clusters), sin juntar
+#      nunca dos DNI válidos distintos, y elige un registro canónico por
+#      grupo.
+#
+# El resultado (el plan de fusión) se guarda en MERGE_PLAN_PATH y lo usan
+# los pasos que cargan docentes y tesistas en tbl_usuarios y en sus tablas
+# propias. El plan guarda la versión de tblDocentes y tblTesistas (y los
+# umbrales) con que se calculó; si ya no coincide se vuelve a calcular. Lo
+# calcula el paso resolve_usuarios, del que dependen los que lo leen; el
+# cálculo y la lectura se hacen bajo un mismo candado y el archivo se
+# reemplaza de una vez (os.replace), así que los pasos que corren en
+# paralelo nunca leen un plan a medio escribir ni lo calculan dos veces.
+# Los grupos se exportan además a usuarios_clusters.csv, en el directorio
+# de reportes de run_metrics, para revisión, junto con los pares dudosos
+# que no se fusionaron.
+
+import csv
+import json
+import os
+import re
+import threading
+import unicodedata
+from difflib import SequenceMatcher
+
+from db_connections import get_mysql_absmain_connection, get_mysql_pilar3_connection
+from migration_state import table_version
+from run_metrics import REPORT_DIR
+from source_extract import stream_rows
+
+MERGE_PLAN_PATH = os.getenv(
+    "MIGRATION_MERGE_PLAN",
+    os.path.join(os.path.dirname(__file__), '..', 'usuarios_merge_plan.json')
+)
+# Tiene nombres y DNIs: va al directorio de reportes, fuera del repositorio
+# si se define MIGRATION_REPORT_DIR (ver .gitignore)
+REPORT_PATH = os.path.join(REPORT_DIR, 'usuarios_clusters.csv')
+
+# Cálculo y lectura del plan, uno a la vez por proceso
+_PLAN_LOCK = threading.Lock()
+
+MATCH_THRESHOLD = float(os.getenv("MIGRATION_ER_MATCH_THRESHOLD", "0.45"))
+REVIEW_THRESHOLD = float(os.getenv("MIGRATION_ER_REVIEW_THRESHOLD", "0.35"))
+MAX_BLOCK_SIZE = int(os.getenv("MIGRATION_ER_MAX_BLOCK", "50"))
+
+# Pesos de cada evidencia en la puntuación de un par
+WEIGHTS = {'nombre': 0.45, 'dni': 0.35, 'correo': 0.25, 'codigo': 0.15, 'dni_distinto': -0.35}
+
+# Orden de preferencia del registro canónico de un grupo
+SOURCE_PRIORITY = {'docentes': 0, 'tesistas': 1}
+
+PARTICLES = {'DE', 'DEL', 'LA', 'LAS', 'LOS', 'Y', 'DA', 'DI', 'VDA', 'VIUDA'}
+
+# Reglas fonéticas para el español, aplicadas en orden
+PHONETIC_RULES = [
+    (re.compile(r'CH'), 'X'),
+    (re.compile(r'LL'), 'Y'),
+    (re.compile(r'QU'), 'K'),
+    (re.compile(r'GU(?=[EI])'), 'G'),
+    (re.compile(r'G(?=[EI])'), 'J'),
+    (re.compile(r'C(?=[EI])'), 'S'),
+    (re.compile(r'C'), 'K'),
+    (re.compile(r'Z'), 'S'),
+    (re.compile(r'V'), 'B'),
+    (re.compile(r'W'), 'U'),
+    (re.compile(r'(?<!^)H|^H'), ''),
+    (re.compile(r'Y$'), 'I'),
+    (re.compile(r'(.)\1+'), r'\1'),
+]
+
+
+def normalize_text(value):
+    """Mayúsculas, sin tildes ni eñe (Ñ -> N), solo letras, dígitos y espacios simples."""
+    if not value:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(value).upper())
+    ascii_only = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(re.sub(r'[^A-Z0-9 ]', ' ', ascii_only).split())
+
+
+def name_tokens(nombres, apellidos):
+    """Palabras del nombre completo normalizadas, sin partículas y ordenadas."""
+    tokens = normalize_text(f"{nombres or ''} {apellidos or ''}").split()
+    return sorted(token for token in tokens if token not in PARTICLES)
+
+
+def phonetic_key(token):
+    """Llave fonética de una palabra: primera letra más el esqueleto consonántico."""
+    key = token
+    for pattern, replacement in PHONETIC_RULES:
+        key = pattern.sub(replacement, key)
+    if not key:
+        return ''
+    return key[0] + re.sub(r'[AEIOU]', '', key[1:])
+
+
+def valid_dni(dni):
+    """DNI peruano de 8 dígitos que no es un relleno (todos los dígitos iguales)."""
+    dni = (dni or '').strip()
+    return bool(re.fullmatch(r'\d{8}', dni)) and len(set(dni)) > 1
+
+
+def make_record(source, record):
+    """Convierte una fila de tblDocentes o tblTesistas al registro que usa la resolución."""
+    tokens = name_tokens(record.get('Nombres'), record.get('Apellidos'))
+    dni = (record.get('DNI') or '').strip()
+    correo = (record.get('Correo') or '').strip().lower()
+    return {
+        'key': f"{source}:{record['Id']}",
+        'source': source,
+        'id': record['Id'],
+        'dni': dni if valid_dni(dni) else None,
+        'dni_original': dni,
+        'correo': correo if '@' in correo else None,
+        'codigo': (str(record.get('Codigo') or '')).strip() or None,
+        'tokens': tokens,
+        'nombre': ' '.join(tokens),
+        'fonetico': sorted(phonetic_key(token) for token in tokens),
+        'apellidos': [phonetic_key(token) for token in name_tokens('', record.get('Apellidos'))],
+    }
+
+
+def blocking_keys(record):
+    """Llaves de bloque de un registro; dos registros se comparan si comparten alguna."""
+    keys = []
+    if record['dni']:
+        keys.append(f"dni:{record['dni']}")
+    if record['correo']:
+        keys.append(f"correo:{record['correo']}")
+    if record['codigo']:
+        # Los códigos de docentes y de tesistas son numeraciones distintas
+        keys.append(f"codigo:{record['source']}:{record['codigo']}")
+    if record['tokens']:
+        keys.append(f"nombre:{record['nombre']}")
+        keys.append(f"fonetico:{' '.join(record['fonetico'])}")
+    if record['apellidos'] and record['tokens']:
+        # Mismos apellidos y misma inicial: cubre un segundo nombre omitido
+        initials = sorted({token[0] for token in record['tokens']})
+        for initial in initials:
+            keys.append(f"apellidos:{' '.join(record['apellidos'])}:{initial}")
+    return keys
+
+
+def candidate_pairs(records, max_block_size=MAX_BLOCK_SIZE):
+    """
+    Genera los pares de índices (i, j), i < j, que comparten algún bloque,
+    sin repetidos. Devuelve (pares, estadísticas).
+    """
+    blocks = {}
+    for index, record in enumerate(records):
+        for key in blocking_keys(record):
+            blocks.setdefault(key, []).append(index)
+
+    pairs = set()
+    skipped = 0
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        if len(members) > max_block_size:
+            skipped += 1
+            continue
+        for a in range(len(members)):
+            for b in range(a + 1, len(members)):
+                pairs.add((members[a], members[b]))
+    stats = {'blocks': len(blocks), 'skipped_blocks': skipped, 'pairs': len(pairs)}
+    return pairs, stats
+
+
+def score_pair(a, b):
+    """Puntúa la probabilidad de que dos registros sean la misma persona."""
+    score = WEIGHTS['nombre'] * SequenceMatcher(None, a['nombre'], b['nombre']).ratio()
+    evidence = []
+    if a['dni'] and b['dni']:
+        if a['dni'] == b['dni']:
+            score += WEIGHTS['dni']
+            evidence.append('dni')
+        else:
+            score += WEIGHTS['dni_distinto']
+            evidence.append('dni_distinto')
+    if a['correo'] and a['correo'] == b['correo']:
+        score += WEIGHTS['correo']
+        evidence.append('correo')
+    if a['codigo'] and a['source'] == b['source'] and a['codigo'] == b['codigo']:
+        score += WEIGHTS['codigo']
+        evidence.append('codigo')
+    return round(score, 3), evidence
+
+
+def _canonical_order(record):
+    return (SOURCE_PRIORITY.get(record['source'], 99), record['dni'] is None,
+            record['correo'] is None, record['id'])
+
+
+def resolve(records, match_threshold=MATCH_THRESHOLD, review_threshold=REVIEW_THRESHOLD,
+            max_block_size=MAX_BLOCK_SIZE):
+    """
+    Resuelve las entidades de records (los dict de make_record) y devuelve
+    un dict con 'clusters' (listas de llaves, la canónica primero, solo los
+    grupos de más de un registro), 'scores' ({llave: puntuación con que se
+    unió}), 'review' (pares dudosos no fusionados) y 'stats'.
+    """
+    pairs, stats = candidate_pairs(records, max_block_size)
+    scored = []
+    review = []
+    for i, j in pairs:
+        score, evidence = score_pair(records[i], records[j])
+        if score >= match_threshold:
+            scored.append((score, i, j))
+        elif score >= review_threshold:
+            review.append({'a': records[i]['key'], 'b': records[j]['key'], 'score': score,
+                           'evidence': evidence})
+
+    # Unión por puntuación descendente; no se unen grupos con DNI válidos distintos
+    parent = list(range(len(records)))
+    dnis = [{record['dni']} if record['dni'] else set() for record in records]
+    best_score = {}
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    rejected = 0
+    for score, i, j in sorted(scored, reverse=True):
+        root_i, root_j = find(i), find(j)
+        if root_i == root_j:
+            continue
+        if dnis[root_i] and dnis[root_j] and dnis[root_i] != dnis[root_j]:
+            rejected += 1
+            continue
+        parent[root_j] = root_i
+        dnis[root_i] |= dnis[root_j]
+        for index in (i, j):
+            best_score[records[index]['key']] = max(best_score.get(records[index]['key'], 0), score)
+
+    groups = {}
+    for index in range(len(records)):
+        groups.setdefault(find(index), []).append(records[index])
+    clusters = [
+        [record['key'] for record in sorted(members, key=_canonical_order)]
+        for members in groups.values() if len(members) > 1
+    ]
+    stats.update({'records': len(records), 'matches': len(scored), 'rejected_by_dni': rejected,
+                  'clusters': len(clusters), 'merged': sum(len(c) - 1 for c in clusters),
+                  'review': len(review)})
+    return {'clusters': clusters, 'scores': best_score, 'review': review, 'stats': stats}
+
+
+class MergePlan:
+    """
+    Plan de fusión leído de MERGE_PLAN_PATH. Indica para cada registro de
+    origen si es un duplicado y de qué registro canónico, y con qué DNI
+    buscar el usuario en que terminó.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.canonical = {}
+        for cluster in data['clusters']:
+            for key in cluster[1:]:
+                self.canonical[key] = cluster[0]
+        self.dnis = data.get('dnis', {})
+
+    def duplicate_of(self, source, record_id):
+        """Llave del registro canónico si (source, record_id) es un duplicado, o None."""
+        return self.canonical.get(f"{source}:{record_id}")
+
+    def reason(self, source, record_id):
+        key = f"{source}:{record_id}"
+        return f"Duplicado de {self.canonical[key]} (puntuación {self.data['scores'].get(key)})"
+
+    def dni_for(self, source, record_id, default):
+        """DNI del usuario que representa al registro: el del canónico si fue fusionado."""
+        canonical = self.canonical.get(f"{source}:{record_id}")
+        if canonical is None:
+            return default
+        return self.dnis.get(canonical, default)
+
+    def dni_overrides(self, source):
+        """(Id, DNI) de los registros fusionados de source, con el DNI de su canónico."""
+        prefix = f"{source}:"
+        for key, canonical in self.canonical.items():
+            if key.startswith(prefix) and canonical in self.dnis:
+                yield int(key[len(prefix):]), self.dnis[canonical]
+
+
+def _source_connections(session):
+    absmain = session.mysql_absmain() if session else get_mysql_absmain_connection()
+    pilar3 = session.mysql_pilar3() if session else get_mysql_pilar3_connection()
+    return absmain, pilar3
+
+
+def _close_sources(session, absmain, pilar3):
+    if session is None:
+        if absmain:
+            absmain.close()
+        if pilar3:
+            pilar3.close()
+
+
+def read_sources(session=None):
+    """Lee docentes y tesistas de MySQL y los convierte con make_record."""
+    absmain, pilar3 = _source_connections(session)
+    try:
+        if not all([absmain, pilar3]):
+            raise Exception("No se pudieron establecer las conexiones a MySQL.")
+        columns = "Id, DNI, Codigo, Nombres, Apellidos, Correo"
+        records = [make_record('docentes', row)
+                   for row in stream_rows(absmain, f"SELECT {columns} FROM tblDocentes")]
+        records += [make_record('tesistas', row)
+                    for row in stream_rows(pilar3, f"SELECT {columns} FROM tblTesistas")]
+        return records
+    finally:
+        _close_sources(session, absmain, pilar3)
+
+
+def source_version(session=None):
+    """
+    Versión de las fuentes del plan (UPDATE_TIME y filas de tblDocentes y
+    tblTesistas) y de los umbrales con que se resuelve.
+    """
+    absmain, pilar3 = _source_connections(session)
+    try:
+        if not all([absmain, pilar3]):
+            raise Exception("No se pudieron establecer las conexiones a MySQL.")
+        return {
+            'tblDocentes': table_version(absmain, 'tblDocentes'),
+            'tblTesistas': table_version(pilar3, 'tblTesistas'),
+            'umbrales': [MATCH_THRESHOLD, REVIEW_THRESHOLD, MAX_BLOCK_SIZE],
+        }
+    finally:
+        _close_sources(session, absmain, pilar3)
+
+
+def write_report(records, result, path=REPORT_PATH):
+    """Exporta los grupos fusionados y los pares dudosos a CSV."""
+    by_key = {record['key']: record for record in records}
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['grupo', 'registro', 'canonico', 'dni', 'correo', 'nombre', 'puntuacion'])
+        for number, cluster in enumerate(result['clusters'], start=1):
+            for key in cluster:
+                record = by_key[key]
+                writer.writerow([number, key, key == cluster[0], record['dni'], record['correo'],
+                                 record['nombre'], result['scores'].get(key)])
+        for pair in result['review']:
+            for key in (pair['a'], pair['b']):
+                record = by_key[key]
+                writer.writerow(['revisar', key, '', record['dni'], record['correo'],
+                                 record['nombre'], pair['score']])
+
+
+def _write_plan(result):
+    """Guarda el plan en un archivo temporal y lo pone en MERGE_PLAN_PATH de una vez."""
+    tmp_path = f"{MERGE_PLAN_PATH}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+    os.replace(tmp_path, MERGE_PLAN_PATH)
+
+
+def _read_plan(version):
+    """El plan guardado, si se calculó con version; si no, None."""
+    if not os.path.exists(MERGE_PLAN_PATH):
+        return None
+    with open(MERGE_PLAN_PATH, encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('version') != version:
+        print("  El plan de fusión guardado no corresponde a los datos actuales; se recalcula.")
+        return None
+    return data
+
+
+def _compute_plan(session, version):
+    print("--- Resolviendo duplicados entre docentes y tesistas ---")
+    records = read_sources(session)
+    result = resolve(records)
+    # DNI de origen de los registros canónicos, para ubicar su usuario
+    by_key = {record['key']: record for record in records}
+    result['dnis'] = {cluster[0]: by_key[cluster[0]]['dni_original'] for cluster in result['clusters']}
+    result['version'] = version
+
+    _write_plan(result)
+    write_report(records, result)
+    stats = result['stats']
+    print(f"  {stats['records']} registros, {stats['pairs']} pares candidatos en {stats['blocks']} bloques "
+          f"({stats['skipped_blocks']} bloques omitidos por tamaño).")
+    print(f"  {stats['clusters']} grupos, {stats['merged']} registros fusionados, "
+          f"{stats['review']} pares para revisión. Reporte: {REPORT_PATH}")
+    return result
+
+
+def resolve_usuarios(session=None, incremental=False):
+    """
+    Paso de migración: resuelve las entidades de docentes y tesistas y
+    guarda el plan de fusión que usan los pasos de carga de usuarios. Con
+    incremental=True conserva el plan guardado si sigue vigente.
+    """
+    with _PLAN_LOCK:
+        # La versión se toma antes de leer: un cambio durante la lectura deja
+        # el plan desactualizado en vez de darlo por vigente
+        version = source_version(session)
+        if incremental:
+            data = _read_plan(version)
+            if data is not None:
+                print("--- El plan de fusión de usuarios sigue vigente ---")
+                return data
+        return _compute_plan(session, version)
+
+
+def load_merge_plan(session=None):
+    """
+    Devuelve el MergePlan guardado si se calculó con la versión actual de
+    las fuentes; si no existe o está desactualizado (un script ejecutado
+    sin resolve_usuarios), lo vuelve a calcular.
+    """
+    with _PLAN_LOCK:
+        version = source_version(session)
+        data = _read_plan(version)
+        if data is None:
+            data = _compute_plan(session, version)
+        return MergePlan(data)
+
+
+if __name__ == '__main__':
+    resolve_usuarios()
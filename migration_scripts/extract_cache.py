@@ -0,0 +1,366 @@
+# Caché local de las lecturas del origen en archivos columnares.
+#
+# Al ajustar un mapeo se ejecuta el mismo script (p. ej. python
+# migrate_tbl_asignacion_jurado.py) muchas veces seguidas, y cada vez se
+# vuelven a traer las tablas completas de MySQL. Con
+# MIGRATION_EXTRACT_CACHE_DIR, stream_rows y stream_partitioned (ver
+# source_extract.py) guardan el resultado de cada consulta en un archivo
+# de ese directorio y en las ejecuciones siguientes lo leen de ahí,
+# mientras la tabla de origen no cambie.
+#
+# Cada archivo corresponde a una consulta: su nombre es un hash de la base,
+# el texto de la consulta, sus parámetros y el formato de las filas, y
+# guarda la versión de la tabla de origen con que se creó (UPDATE_TIME de
+# information_schema.tables y número de filas, la misma que usa
+# migration_state.py; no se recorre la tabla). Si al consultar la versión
+# ya no coincide, la consulta vuelve a MySQL y el archivo se reemplaza.
+# Las consultas que no leen una sola tabla no se guardan.
+#
+# Esa versión no ve todos los cambios: un UPDATE que no cambia el número de
+# filas solo cambia UPDATE_TIME, y en InnoDB UPDATE_TIME es NULL o se
+# pierde al reiniciar el servidor. Por eso un snapshot además vence a los
+# EXTRACT_CACHE_TTL_MINUTES de creado (0: sin vencimiento), y cuando la
+# tabla no informa UPDATE_TIME se avisa que los UPDATE solo se notarán al
+# vencer. La caché solo se usa si se define MIGRATION_EXTRACT_CACHE_DIR.
+#
+# El formato es columnar: por columna, un byte de NULL por fila y sus
+# valores, de 8 bytes (enteros, float, timedelta en microsegundos) o de
+# largo variable (texto, Decimal, fechas, bytes) con una tabla de
+# posiciones, y al final un índice JSON con la posición de cada bloque. El
+# archivo se abre con mmap y se lee por medio de memoryview sin copiarlo a
+# memoria; cada valor se decodifica recién al armar su fila.
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from array import array
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from migration_state import table_version
+from run_metrics import record, step_phase
+
+EXTRACT_CACHE_DIR = os.getenv("MIGRATION_EXTRACT_CACHE_DIR")
+EXTRACT_CACHE_TTL_MINUTES = float(os.getenv("MIGRATION_EXTRACT_CACHE_TTL_MINUTES", "60"))
+
+MAGIC = b'MXC1'
+FOOTER = struct.Struct('<Q4s')
+ALIGNMENT = 8
+
+SINGLE_TABLE = re.compile(r"\bFROM\s+`?(\w+)`?", re.IGNORECASE)
+JOIN = re.compile(r"\bJOIN\b|\bFROM\s+`?\w+`?\s*,|information_schema", re.IGNORECASE)
+
+# Tipos de ancho fijo -> código de array de sus valores
+FIXED_KINDS = {'int': 'q', 'float': 'd', 'time': 'q'}
+VARIABLE_DECODERS = {
+    'str': lambda raw: str(raw, 'utf-8'),
+    'bytes': bytes,
+    'decimal': lambda raw: Decimal(str(raw, 'ascii')),
+    'date': lambda raw: date.fromisoformat(str(raw, 'ascii')),
+    'datetime': lambda raw: datetime.fromisoformat(str(raw, 'ascii')),
+}
+FIXED_DECODERS = {
+    'int': None,
+    'float': None,
+    'time': lambda value: timedelta(microseconds=value),
+}
+
+
+class UnsupportedValue(Exception):
+    """Un valor no se puede guardar en la columna de un snapshot."""
+
+
+def _kind(value):
+    if isinstance(value, bool):
+        raise UnsupportedValue(value)
+    if isinstance(value, int):
+        return 'int'
+    if isinstance(value, float):
+        return 'float'
+    if isinstance(value, str):
+        return 'str'
+    if isinstance(value, (bytes, bytearray)):
+        return 'bytes'
+    if isinstance(value, Decimal):
+        return 'decimal'
+    if isinstance(value, datetime):
+        return 'datetime'
+    if isinstance(value, date):
+        return 'date'
+    if isinstance(value, timedelta):
+        return 'time'
+    raise UnsupportedValue(value)
+
+
+def _encode(kind, value):
+    if kind == 'str':
+        return value.encode('utf-8')
+    if kind == 'bytes':
+        return bytes(value)
+    if kind == 'time':
+        return (value.days * 86400 + value.seconds) * 1000000 + value.microseconds
+    if kind in ('date', 'datetime', 'decimal'):
+        return (value.isoformat() if kind != 'decimal' else str(value)).encode('ascii')
+    return value
+
+
+class _ColumnBuffer:
+    """Valores de una columna mientras se escribe el snapshot."""
+
+    def __init__(self):
+        self.kind = None
+        self.nulls = bytearray()
+        self.values = None
+        self.offsets = None
+        self.data = None
+
+    def _start(self, kind):
+        self.kind = kind
+        pending = len(self.nulls)
+        if kind in FIXED_KINDS:
+            self.values = array(FIXED_KINDS[kind], [0]) * pending
+        else:
+            self.offsets = array('Q', [0]) * (pending + 1)
+            self.data = bytearray()
+
+    def add(self, value):
+        if value is None:
+            self.nulls.append(1)
+            if self.kind in FIXED_KINDS:
+                self.values.append(0)
+            elif self.kind is not None:
+                self.offsets.append(len(self.data))
+            return
+        kind = _kind(value)
+        if self.kind is None:
+            self._start(kind)
+        elif kind != self.kind:
+            raise UnsupportedValue(value)
+        encoded = _encode(kind, value)
+        self.nulls.append(0)
+        if kind in FIXED_KINDS:
+            try:
+                self.values.append(encoded)
+            except OverflowError:
+                raise UnsupportedValue(value)
+        else:
+            self.data += encoded
+            self.offsets.append(len(self.data))
+
+    def blocks(self):
+        """Bloques (nombre, bytes) de la columna."""
+        yield 'nulls', bytes(self.nulls)
+        if self.kind in FIXED_KINDS:
+            yield 'values', self.values.tobytes()
+        elif self.kind is not None:
+            yield 'offsets', self.offsets.tobytes()
+            yield 'data', bytes(self.data)
+
+
+class SnapshotWriter:
+    """
+    Arma un snapshot a medida que pasan las filas (tuplas o diccionarios).
+    Si una columna trae un valor que no se puede guardar, el snapshot se
+    descarta sin afectar la lectura.
+    """
+
+    def __init__(self, path, meta):
+        self.path = path
+        self.meta = meta
+        self.names = None
+        self.columns = None
+        self.rows = 0
+        self.failed = False
+
+    def add(self, row):
+        if self.failed:
+            return
+        if self.columns is None:
+            self.names = list(row) if isinstance(row, dict) else None
+            self.columns = [_ColumnBuffer() for _ in range(len(row))]
+        values = row.values() if isinstance(row, dict) else row
+        try:
+            for column, value in zip(self.columns, values):
+                column.add(value)
+        except UnsupportedValue:
+            self.failed = True
+            self.columns = None
+            return
+        self.rows += 1
+
+    def finish(self):
+        """Escribe el snapshot (de forma atómica) si no se descartó."""
+        if self.failed:
+            return False
+        index = dict(self.meta, rows=self.rows, names=self.names, columns=[])
+        temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(MAGIC)
+            for column in self.columns or []:
+                entry = {'kind': column.kind}
+                for name, block in column.blocks():
+                    f.write(b'\0' * (-f.tell() % ALIGNMENT))
+                    entry[name] = [f.tell(), len(block)]
+                    f.write(block)
+                index['columns'].append(entry)
+            f.write(b'\0' * (-f.tell() % ALIGNMENT))
+            encoded = json.dumps(index).encode('utf-8')
+            f.write(encoded)
+            f.write(FOOTER.pack(len(encoded), MAGIC))
+        os.replace(temp_path, self.path)
+        return True
+
+
+def read_index(path):
+    """Índice (JSON) de un snapshot, o None si el archivo no es válido."""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size < len(MAGIC) + FOOTER.size:
+                return None
+            f.seek(size - FOOTER.size)
+            length, magic = FOOTER.unpack(f.read(FOOTER.size))
+            if magic != MAGIC or length > size:
+                return None
+            f.seek(size - FOOTER.size - length)
+            return json.loads(f.read(length))
+    except (OSError, ValueError):
+        return None
+
+
+def _column_reader(buffer, entry, views):
+    """Función fila -> valor de una columna, sobre memoryviews del archivo."""
+    kind = entry['kind']
+
+    def view(name, fmt=None):
+        offset, length = entry[name]
+        block = buffer[offset:offset + length]
+        views.append(block)
+        if fmt:
+            block = block.cast(fmt)
+            views.append(block)
+        return block
+
+    nulls = view('nulls')
+    if kind is None:
+        return lambda i: None
+    if kind in FIXED_KINDS:
+        values = view('values', FIXED_KINDS[kind])
+        decode = FIXED_DECODERS[kind]
+        if decode is None:
+            return lambda i: None if nulls[i] else values[i]
+        return lambda i: None if nulls[i] else decode(values[i])
+    offsets = view('offsets', 'Q')
+    data = view('data')
+    decode = VARIABLE_DECODERS[kind]
+    return lambda i: None if nulls[i] else decode(data[offsets[i]:offsets[i + 1]])
+
+
+def read_snapshot(path, index, dictionary=True):
+    """Genera las filas del snapshot path (índice ya leído), leyéndolo con mmap."""
+    if not index['rows']:
+        return
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    buffer = memoryview(mapped)
+    views = []
+    try:
+        readers = [_column_reader(buffer, entry, views) for entry in index['columns']]
+        names = index['names']
+        for i in range(index['rows']):
+            values = tuple(reader(i) for reader in readers)
+            yield dict(zip(names, values)) if dictionary else values
+    finally:
+        readers = None
+        for view in reversed(views):
+            view.release()
+        buffer.release()
+        mapped.close()
+
+
+def source_table(query):
+    """Tabla que lee query, o None si no lee exactamente una tabla."""
+    tables = SINGLE_TABLE.findall(query)
+    if len(tables) != 1 or JOIN.search(query):
+        return None
+    return tables[0]
+
+
+def snapshot_path(database, query, params, dictionary):
+    key = json.dumps([database, ' '.join(query.split()), [str(p) for p in params or ()], dictionary])
+    return os.path.join(EXTRACT_CACHE_DIR, hashlib.sha256(key.encode('utf-8')).hexdigest() + '.mxc')
+
+
+# Tablas (base, tabla) sin UPDATE_TIME de las que ya se avisó
+_warned_tables = set()
+_warned_lock = threading.Lock()
+
+
+def _warn_without_update_time(database, table, version):
+    """Avisa una vez por tabla si su versión no trae UPDATE_TIME."""
+    if version.split('|', 1)[0] != 'None':
+        return
+    with _warned_lock:
+        if (database, table) in _warned_tables:
+            return
+        _warned_tables.add((database, table))
+    expiry = (f"al vencer el snapshot ({EXTRACT_CACHE_TTL_MINUTES:g} minutos)"
+              if EXTRACT_CACHE_TTL_MINUTES > 0 else "nunca (MIGRATION_EXTRACT_CACHE_TTL_MINUTES=0)")
+    print(f"  ADVERTENCIA: {table} no informa UPDATE_TIME; la caché de extracción solo notará "
+          f"los UPDATE que no cambian el número de filas {expiry}.")
+
+
+def _is_current(index, version):
+    if index is None or index.get('version') != version:
+        return False
+    if EXTRACT_CACHE_TTL_MINUTES <= 0:
+        return True
+    return time.time() - index.get('created', 0) < EXTRACT_CACHE_TTL_MINUTES * 60
+
+
+def cached_rows(conn, query, params, dictionary, read, batch_size):
+    """
+    Filas de query sobre la conexión MySQL conn: desde su snapshot si la
+    tabla de origen no cambió desde que se guardó y el snapshot no venció,
+    o desde read() (un iterable de filas de MySQL), guardando el snapshot
+    al terminar. Sin MIGRATION_EXTRACT_CACHE_DIR, simplemente read().
+    """
+    table = source_table(query) if EXTRACT_CACHE_DIR else None
+    if table is None:
+        yield from read()
+        return
+
+    database = getattr(conn, 'database', None)
+    with step_phase('extract'):
+        version = table_version(conn, table)
+    _warn_without_update_time(database, table, version)
+    path = snapshot_path(database, query, params, dictionary)
+    index = read_index(path) if os.path.exists(path) else None
+    if _is_current(index, version):
+        rows = read_snapshot(path, index, dictionary)
+        try:
+            while True:
+                with step_phase('extract'):
+                    batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                record(rows_read=len(batch))
+                yield from batch
+        finally:
+            rows.close()
+        return
+
+    os.makedirs(EXTRACT_CACHE_DIR, exist_ok=True)
+    writer = SnapshotWriter(path, {'database': database, 'table': table, 'query': query, 'version': version,
+                                   'created': time.time()})
+    for row in read():
+        writer.add(row)
+        yield row
+    writer.finish()
@@ -0,0 +1,124 @@
+# Sincronización incremental por marcas de agua (high-water marks).
+#
+# Mientras PILAR y la nueva plataforma funcionan en paralelo la migración
+# se repite seguido, y vaciar y recargar cada tabla obliga a leer todo el
+# origen cada vez. En modo incremental (run_migrations.py --incremental)
+# los pasos que lo admiten leen solo las filas del origen nuevas o
+# modificadas desde la última ejecución y las aplican con un upsert por
+# id_antiguo, sin TRUNCATE.
+#
+# La marca de cada tabla de destino se guarda en public.migration_watermarks:
+# el mayor Id leído del origen y la mayor fecha de sus columnas de
+# modificación (WATERMARK_SOURCES). Cada carga, completa o incremental,
+# la actualiza en la misma transacción que las filas, así que una
+# ejecución interrumpida no avanza la marca. Las fechas se releen con un
+# margen (WATERMARK_OVERLAP_MINUTES) por las filas que se confirman en
+# MySQL después de otras con fecha posterior; como el upsert es
+# idempotente, releerlas no tiene efecto.
+
+import os
+from datetime import timedelta
+
+WATERMARK_OVERLAP_MINUTES = int(os.getenv("MIGRATION_WATERMARK_OVERLAP_MINUTES", "10"))
+
+WATERMARK_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS public.migration_watermarks (
+        table_name text PRIMARY KEY,
+        source_table text NOT NULL,
+        last_id bigint,
+        last_changed timestamp,
+        updated_at timestamptz NOT NULL DEFAULT now()
+    );
+"""
+
+# Tabla de origen de cada tabla de destino, su llave creciente y las
+# columnas de fecha que cambian al crear o modificar una fila. Las tablas
+# de origen sin fecha de modificación usan row_hash_merge.py.
+WATERMARK_SOURCES = {
+    'tbl_tramites': {'source': 'tesTramites', 'key': 'Id', 'changed': ['FechRegProy', 'FechModif']},
+    'tbl_asignacion_jurado': {'source': 'tesJuCambios', 'key': 'Id', 'changed': ['Fecha']},
+}
+
+
+class Watermark:
+    """Marca de agua de una tabla de destino; observe() la avanza con cada fila leída."""
+
+    def __init__(self, table, last_id=None, last_changed=None):
+        definition = WATERMARK_SOURCES[table]
+        self.table = table
+        self.source = definition['source']
+        self.key = definition['key']
+        self.changed = definition['changed']
+        self.last_id = last_id
+        self.last_changed = last_changed
+
+    def condition(self):
+        """
+        Condición SQL (MySQL) y parámetros que seleccionan las filas del
+        origen nuevas o modificadas desde la marca; sin marca, todas.
+        """
+        conditions, params = [], []
+        if self.last_id is not None:
+            conditions.append(f"`{self.key}` > %s")
+            params.append(self.last_id)
+        if self.last_changed is not None:
+            since = self.last_changed - timedelta(minutes=WATERMARK_OVERLAP_MINUTES)
+            for column in self.changed:
+                conditions.append(f"`{column}` >= %s")
+                params.append(since)
+        if not conditions:
+            return '1 = 1', ()
+        return '(' + ' OR '.join(conditions) + ')', tuple(params)
+
+    def observe(self, row):
+        """Avanza la marca con los valores de una fila del origen (diccionario)."""
+        value = row.get(self.key)
+        if value is not None and (self.last_id is None or value > self.last_id):
+            self.last_id = value
+        for column in self.changed:
+            value = row.get(column)
+            if value is not None and (self.last_changed is None or value > self.last_changed):
+                self.last_changed = value
+
+    def save(self, cursor):
+        """Guarda la marca; no hace commit, para confirmarla junto con las filas."""
+        cursor.execute("""
+            INSERT INTO public.migration_watermarks (table_name, source_table, last_id, last_changed)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (table_name) DO UPDATE SET
+                source_table = EXCLUDED.source_table, last_id = EXCLUDED.last_id,
+                last_changed = EXCLUDED.last_changed, updated_at = now()
+        """, (self.table, self.source, self.last_id, self.last_changed))
+
+
+def load_watermark(conn, table, incremental=True):
+    """
+    Devuelve la Watermark de table. Con incremental=False (carga completa)
+    empieza vacía, así la carga lee todo el origen y deja la marca al día.
+    """
+    with conn.cursor() as cur:
+        cur.execute(WATERMARK_TABLE_DDL)
+        row = None
+        if incremental:
+            cur.execute("SELECT last_id, last_changed FROM public.migration_watermarks WHERE table_name = %s",
+                        (table,))
+            row = cur.fetchone()
+    conn.commit()
+    return Watermark(table, *row) if row else Watermark(table)
+
+
+def ensure_upsert_key(cursor, table, column='id_antiguo'):
+    """Crea, si no existe, el índice único sobre column que necesita ON CONFLICT."""
+    cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {table}_{column}_key ON {table} ({column})")
+
+
+def upsert_clause(table, columns, key='id_antiguo'):
+    """
+    Cláusula ON CONFLICT (para bulk_load) que actualiza las filas cuyo key
+    ya existe, solo si alguno de sus valores cambió.
+    """
+    updated = [column for column in columns if column != key]
+    assignments = ', '.join(f"{column} = EXCLUDED.{column}" for column in updated)
+    current = ', '.join(f"{table}.{column}" for column in updated)
+    incoming = ', '.join(f"EXCLUDED.{column}" for column in updated)
+    return f"({key}) DO UPDATE SET {assignments} WHERE ({current}) IS DISTINCT FROM ({incoming})"
@@ -0,0 +1,270 @@
+# Índices secundarios y llaves foráneas diferidos durante la carga.
+#
+# Mientras se carga, PostgreSQL mantiene cada índice y comprueba cada FOREIGN
+# KEY fila por fila. LoadPhaseManager guarda la definición de los índices
+# secundarios y las FK de las tablas que se van a cargar, los elimina, y al
+# terminar la carga reconstruye los índices en paralelo (un CREATE INDEX
+# ordena la tabla una sola vez) y vuelve a crear las FK como NOT VALID para
+# validarlas después con VALIDATE CONSTRAINT, que revisa la tabla completa en
+# una sola pasada.
+#
+# Las definiciones se guardan en public.migration_deferred_objects antes de
+# eliminar nada, así que si la migración se interrumpe la siguiente ejecución
+# las vuelve a crear. Con schema distinto de public (la carga en un esquema
+# sombra, ver shadow_schema.py) la tabla se registra como "esquema.tabla".
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+MAINTENANCE_WORK_MEM = os.getenv("MIGRATION_MAINTENANCE_WORK_MEM", "256MB")
+
+DEFERRED_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS public.migration_deferred_objects (
+        kind text NOT NULL,
+        name text NOT NULL,
+        table_name text NOT NULL,
+        definition text NOT NULL,
+        PRIMARY KEY (kind, table_name, name)
+    );
+"""
+
+# Índices que no respaldan una PRIMARY KEY, UNIQUE ni otra restricción; los
+# únicos se conservan porque los pasos dependen de ellos (ON CONFLICT).
+SECONDARY_INDEXES_QUERY = """
+    SELECT ic.relname, t.relname, pg_get_indexdef(i.indexrelid)
+    FROM pg_index i
+    JOIN pg_class ic ON ic.oid = i.indexrelid
+    JOIN pg_class t ON t.oid = i.indrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    WHERE n.nspname = %s
+      AND t.relname = ANY(%s)
+      AND NOT i.indisprimary
+      AND NOT i.indisunique
+      AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+    ORDER BY t.relname, ic.relname
+"""
+
+# FK cuya tabla hija se carga en la migración. Las FK de tablas que no se
+# cargan se mantienen: de ellas depende el TRUNCATE ... CASCADE de sus padres.
+FOREIGN_KEYS_QUERY = """
+    SELECT c.conname, t.relname, pg_get_constraintdef(c.oid)
+    FROM pg_constraint c
+    JOIN pg_class t ON t.oid = c.conrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    WHERE n.nspname = %s
+      AND c.contype = 'f'
+      AND t.relname = ANY(%s)
+    ORDER BY t.relname, c.conname
+"""
+
+
+class LoadPhaseManager:
+    """
+    Difiere los índices secundarios y las FK de las tablas indicadas
+    durante la carga y los reconstruye al final, midiendo el tiempo de
+    cada fase (ver phase() y print_report()).
+    """
+
+    def __init__(self, pool, tables, schema='public'):
+        self.pool = pool
+        self.tables = sorted(set(tables))
+        self.schema = schema
+        self.timings = {}
+
+    def _key(self, table):
+        """Nombre con que se registra la tabla en migration_deferred_objects."""
+        return table if self.schema == 'public' else f"{self.schema}.{table}"
+
+    def _qualified(self, table):
+        return f'"{self.schema}"."{table}"'
+
+    @contextmanager
+    def phase(self, name):
+        """Mide el tiempo de un bloque y lo acumula en la fase name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def defer(self):
+        """Guarda las definiciones y elimina los índices secundarios y las FK."""
+        with self.phase('diferir índices y FK'):
+            conn = self.pool.acquire('postgres')
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(DEFERRED_TABLE_DDL)
+                    # Definiciones con nombres calificados, sea cual sea el search_path
+                    cur.execute("SET LOCAL search_path TO pg_catalog")
+                    cur.execute(SECONDARY_INDEXES_QUERY, (self.schema, self.tables))
+                    indexes = cur.fetchall()
+                    cur.execute(FOREIGN_KEYS_QUERY, (self.schema, self.tables))
+                    foreign_keys = cur.fetchall()
+
+                    for kind, rows in (('index', indexes), ('fk', foreign_keys)):
+                        for name, table, definition in rows:
+                            self._register(cur, kind, name, table, definition)
+                    conn.commit()
+
+                    for name, table, _ in foreign_keys:
+                        cur.execute(f'ALTER TABLE {self._qualified(table)} DROP CONSTRAINT IF EXISTS "{name}"')
+                    for name, _, _ in indexes:
+                        cur.execute(f'DROP INDEX IF EXISTS "{self.schema}"."{name}"')
+                    conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self.pool.release('postgres', conn)
+
+        print(f"--- Diferidos {len(indexes)} índices secundarios y {len(foreign_keys)} llaves foráneas ---")
+
+    def _register(self, cur, kind, name, table, definition):
+        cur.execute(
+            "INSERT INTO public.migration_deferred_objects (kind, name, table_name, definition) "
+            "VALUES (%s, %s, %s, %s) ON CONFLICT (kind, table_name, name) DO NOTHING",
+            (kind, name, self._key(table), definition)
+        )
+
+    def register(self, objects):
+        """
+        Registra objetos que se crearán en restore() sin haberlos eliminado
+        antes: tuplas (kind, nombre, tabla, definición) con kind 'index' o 'fk'.
+        """
+        conn = self.pool.acquire('postgres')
+        try:
+            with conn.cursor() as cur:
+                cur.execute(DEFERRED_TABLE_DDL)
+                for kind, name, table, definition in objects:
+                    self._register(cur, kind, name, table, definition)
+            conn.commit()
+        finally:
+            self.pool.release('postgres', conn)
+
+    def _schema_filter(self):
+        if self.schema == 'public':
+            return "position('.' in table_name) = 0", ()
+        return "table_name LIKE %s", (f"{self.schema}.%",)
+
+    def pending(self):
+        """
+        Devuelve los objetos diferidos de este esquema que aún no se han
+        restaurado, como (kind, nombre, tabla, definición).
+        """
+        condition, params = self._schema_filter()
+        conn = self.pool.acquire('postgres')
+        try:
+            with conn.cursor() as cur:
+                cur.execute(DEFERRED_TABLE_DDL)
+                cur.execute("SELECT kind, name, table_name, definition FROM public.migration_deferred_objects "
+                            f"WHERE {condition}", params)
+                rows = cur.fetchall()
+            conn.commit()
+            return [(kind, name, table.split('.', 1)[-1], definition) for kind, name, table, definition in rows]
+        finally:
+            self.pool.release('postgres', conn)
+
+    def discard_pending(self):
+        """Olvida los objetos diferidos de este esquema (p. ej. si se vuelve a crear)."""
+        condition, params = self._schema_filter()
+        conn = self.pool.acquire('postgres')
+        try:
+            with conn.cursor() as cur:
+                cur.execute(DEFERRED_TABLE_DDL)
+                cur.execute(f"DELETE FROM public.migration_deferred_objects WHERE {condition}", params)
+            conn.commit()
+        finally:
+            self.pool.release('postgres', conn)
+
+    def restore(self, max_workers=4):
+        """
+        Vuelve a crear los índices (en paralelo, una sesión por worker) y
+        las FK como NOT VALID, y luego las valida en paralelo. Cada objeto
+        se borra del registro en cuanto queda restaurado.
+        """
+        pending = self.pending()
+        indexes = [row for row in pending if row[0] == 'index']
+        foreign_keys = [row for row in pending if row[0] == 'fk']
+        if not pending:
+            return
+
+        with self.phase('reconstruir índices'):
+            self._run_parallel(self._create_index, indexes, max_workers)
+
+        with self.phase('crear FK NOT VALID'):
+            conn = self.pool.acquire('postgres')
+            try:
+                for row in foreign_keys:
+                    self._add_foreign_key(conn, row)
+            finally:
+                self.pool.release('postgres', conn)
+
+        # Un VALIDATE bloquea su tabla hija frente a otro VALIDATE, así que
+        # las FK de una misma tabla se validan en el mismo worker.
+        by_table = {}
+        for row in foreign_keys:
+            by_table.setdefault(row[2], []).append(row)
+        with self.phase('validar FK'):
+            self._run_parallel(self._validate_table, list(by_table.values()), max_workers)
+
+        print(f"--- Restaurados {len(indexes)} índices y {len(foreign_keys)} llaves foráneas ---")
+
+    def _run_parallel(self, func, items, max_workers):
+        if not items:
+            return
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            for future in [executor.submit(self._with_connection, func, item) for item in items]:
+                future.result()
+
+    def _with_connection(self, func, item):
+        conn = self.pool.acquire('postgres')
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SET maintenance_work_mem = %s", (MAINTENANCE_WORK_MEM,))
+            func(conn, item)
+        finally:
+            if not conn.closed:
+                conn.rollback()
+                with conn.cursor() as cur:
+                    cur.execute("RESET maintenance_work_mem")
+                conn.commit()
+            self.pool.release('postgres', conn)
+
+    def _forget(self, cur, kind, table, name):
+        cur.execute(
+            "DELETE FROM public.migration_deferred_objects WHERE kind = %s AND table_name = %s AND name = %s",
+            (kind, self._key(table), name)
+        )
+
+    def _create_index(self, conn, row):
+        _, name, table, definition = row
+        with conn.cursor() as cur:
+            cur.execute(definition.replace("CREATE INDEX ", "CREATE INDEX IF NOT EXISTS ", 1))
+            self._forget(cur, 'index', table, name)
+        conn.commit()
+
+    def _add_foreign_key(self, conn, row):
+        _, name, table, definition = row
+        definition = definition.replace(" NOT VALID", "")
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1 FROM pg_constraint WHERE conname = %s AND conrelid = %s::regclass",
+                        (name, self._qualified(table)))
+            if cur.fetchone() is None:
+                cur.execute(f'ALTER TABLE {self._qualified(table)} ADD CONSTRAINT "{name}" {definition} NOT VALID')
+        conn.commit()
+
+    def _validate_table(self, conn, rows):
+        for _, name, table, _ in rows:
+            with conn.cursor() as cur:
+                cur.execute(f'ALTER TABLE {self._qualified(table)} VALIDATE CONSTRAINT "{name}"')
+                self._forget(cur, 'fk', table, name)
+            conn.commit()
+
+    def print_report(self):
+        if not self.timings:
+            return
+        print("--- Tiempo por fase ---")
+        for name, seconds in self.timings.items():
+            print(f"  {name}: {seconds:.2f} s")
@@ -1,6 +1,7 @@
 from db_connections import get_mysql_absmain_connection, get_postgres_connection
+from bulk_loader import bulk_load
 
-def migrate_dic_disciplinas():
+def migrate_dic_disciplinas(session=None):
     """
     Migra datos de ocdeDisciplinas (MySQL) a dic_disciplinas (PostgreSQL),
     estableciendo el estado por defecto en 1.
@@ -8,8 +9,8 @@ def migrate_dic_disciplinas():
     mysql_conn = None
     postgres_conn = None
     try:
-        mysql_conn = get_mysql_absmain_connection()
-        postgres_conn = get_postgres_connection()
+        mysql_conn = session.mysql_absmain() if session else get_mysql_absmain_connection()
+        postgres_conn = session.postgres() if session else get_postgres_connection()
         if not all([mysql_conn, postgres_conn]):
             raise Exception("No se pudieron establecer las conexiones.")
 
@@ -21,10 +22,11 @@ def migrate_dic_disciplinas():
         
         records_to_insert = [(rec['Id'], rec['IdSubArea'], rec['Nombre'], 1) for rec in records]
 
-        postgres_cursor.execute("TRUNCATE TABLE public.dic_disciplinas RESTART IDENTITY CASCADE;")
+        postgres_cursor.execute("TRUNCATE TABLE dic_disciplinas RESTART IDENTITY CASCADE;")
         
-        postgres_cursor.executemany(
-            "INSERT INTO dic_disciplinas (id, id_subarea, nombre, estado_disciplina) VALUES (%s, %s, %s, %s)",
+        bulk_load(
+            postgres_cursor, 'dic_disciplinas',
+            ['id', 'id_subarea', 'nombre', 'estado_disciplina'],
             records_to_insert
         )
         
@@ -35,7 +37,7 @@ def migrate_dic_disciplinas():
         print(f"Error en la migración de dic_disciplinas: {e}")
         raise e
     finally:
-        if mysql_conn:
+        if mysql_conn and session is None:
             mysql_conn.close()
-        if postgres_conn:
+        if postgres_conn and session is None:
             postgres_conn.close()
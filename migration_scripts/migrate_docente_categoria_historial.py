@@ -2,8 +2,13 @@
 import psycopg2
 import mysql.connector
 from db_connections import get_mysql_absmain_connection, get_postgres_connection
+from bulk_loader import bulk_load
+from coercion import Coercer
 
-def migrate_docente_categoria_historial():
+# Activo es numérico (0 = inactivo); FechaAsc trae fechas cero
+HISTORIAL_VALUES = {'FechaAsc': 'date', 'Activo': 'bool'}
+
+def migrate_docente_categoria_historial(session=None):
     """
     Migra el historial de categorías de docentes desde la tabla tblDocentes de MySQL
     a la tabla tbl_docente_categoria_historial de PostgreSQL.
@@ -16,8 +21,8 @@ def migrate_docente_categoria_historial():
     
     try:
         # 1. Establecer conexiones a las bases de datos
-        postgres_conn = get_postgres_connection()
-        mysql_conn = get_mysql_absmain_connection()
+        postgres_conn = session.postgres() if session else get_postgres_connection()
+        mysql_conn = session.mysql_absmain() if session else get_mysql_absmain_connection()
 
         if not all([postgres_conn, mysql_conn]):
             raise Exception("No se pudieron establecer todas las conexiones necesarias.")
@@ -27,7 +32,7 @@ def migrate_docente_categoria_historial():
 
         # 2. Obtener la lista de IDs de docentes válidos desde PostgreSQL
         print("Paso 1: Obteniendo la lista de docentes válidos desde PostgreSQL...")
-        pg_cursor.execute("SELECT id FROM public.tbl_docentes")
+        pg_cursor.execute("SELECT id FROM tbl_docentes")
         # Usamos un set para una búsqueda mucho más rápida (O(1) en promedio)
         valid_docente_ids = {row[0] for row in pg_cursor.fetchall()}
         print(f"Se encontraron {len(valid_docente_ids)} docentes válidos en PostgreSQL.")
@@ -35,7 +40,8 @@ def migrate_docente_categoria_historial():
         # 3. Leer todos los registros de la tabla de docentes original en MySQL
         print("\nPaso 2: Leyendo todos los docentes desde MySQL...")
         mysql_cursor.execute("SELECT Id, IdCategoria, FechaAsc, ResolAsc, Activo FROM tblDocentes")
-        all_mysql_docentes = mysql_cursor.fetchall()
+        values = Coercer('tblDocentes', HISTORIAL_VALUES)
+        all_mysql_docentes = values.apply(mysql_cursor.fetchall())
         print(f"Se encontraron {len(all_mysql_docentes)} registros en la tabla de origen.")
 
         # 4. Cruzar, mapear y filtrar los datos
@@ -53,24 +59,24 @@ def migrate_docente_categoria_historial():
                     docente.get('IdCategoria'),
                     docente.get('FechaAsc'),
                     docente.get('ResolAsc'),
-                    bool(docente.get('Activo')) # Convertir a booleano (0=False, cualquier otro número=True)
+                    docente.get('Activo')
                 )
                 historial_to_insert.append(mapped_record)
         
         print(f"Se prepararon {len(historial_to_insert)} registros de historial para insertar.")
+        values.print_counts()
 
         # 5. Limpiar la tabla de destino e insertar los nuevos datos
         if historial_to_insert:
             print("\nPaso 4: Limpiando la tabla de destino (tbl_docente_categoria_historial)...")
-            pg_cursor.execute("TRUNCATE TABLE public.tbl_docente_categoria_historial RESTART IDENTITY;")
+            pg_cursor.execute("TRUNCATE TABLE tbl_docente_categoria_historial RESTART IDENTITY;")
             
             print(f"Paso 5: Insertando {len(historial_to_insert)} registros en la tabla de destino...")
-            insert_query = """
-                INSERT INTO public.tbl_docente_categoria_historial 
-                (id_docente, id_categoria, fecha_resolucion, resolucion, estado) 
-                VALUES (%s, %s, %s, %s, %s)
-            """
-            pg_cursor.executemany(insert_query, historial_to_insert)
+            bulk_load(
+                pg_cursor, 'tbl_docente_categoria_historial',
+                ['id_docente', 'id_categoria', 'fecha_resolucion', 'resolucion', 'estado'],
+                historial_to_insert
+            )
             
             # Confirmar la transacción
             postgres_conn.commit()
@@ -82,12 +88,13 @@ def migrate_docente_categoria_historial():
         print(f"\nERROR: Ocurrió un problema durante la migración: {e}")
         if postgres_conn:
             postgres_conn.rollback() # Revertir cambios en caso de error
+        raise e
     finally:
         # 6. Cerrar conexiones
         print("\nCerrando conexiones a las bases de datos.")
-        if postgres_conn:
+        if postgres_conn and session is None:
             postgres_conn.close()
-        if mysql_conn:
+        if mysql_conn and session is None:
             mysql_conn.close()
 
 if __name__ == "__main__":
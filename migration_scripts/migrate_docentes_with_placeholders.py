@@ -2,18 +2,37 @@
 import psycopg2
 import mysql.connector
 from db_connections import get_mysql_absmain_connection, get_postgres_connection
+from bulk_loader import bulk_load, bulk_load_with_ids
+from coercion import Coercer
+from crosswalk import get_crosswalk
+from entity_resolution import load_merge_plan
+from incremental_sync import ensure_upsert_key, upsert_clause
+from run_metrics import record
 
-def migrate_docentes_with_placeholders():
+# FechaNac trae fechas cero y Direccion el marcador '*'
+USUARIOS_VALUES = {'FechaNac': 'date', 'Direccion': 'text'}
+
+USUARIOS_COLUMNS = ['nombres', 'apellidos', 'tipo_doc_identidad', 'num_doc_identidad', 'correo',
+                    'correo_google', 'telefono', 'pais', 'direccion', 'sexo', 'fecha_nacimiento',
+                    'contrasenia', 'ruta_foto', 'estado']
+
+def migrate_docentes_with_placeholders(session=None, incremental=False):
     """
     Migra datos de tblDocentes a tbl_usuarios, generando correos electrónicos
-    de marcador de posición para los registros que no tienen uno.
+    de marcador de posición para los registros que no tienen uno. Los
+    docentes duplicados según el plan de fusión de entity_resolution.py se
+    omiten.
+
+    Con incremental=True no se asume la tabla vacía: los usuarios se
+    insertan o actualizan por num_doc_identidad, así los docentes nuevos
+    tienen usuario antes de que populate_tbl_docentes los busque por DNI.
     """
     mysql_conn = None
     postgres_conn = None
     
     try:
-        mysql_conn = get_mysql_absmain_connection()
-        postgres_conn = get_postgres_connection()
+        mysql_conn = session.mysql_absmain() if session else get_mysql_absmain_connection()
+        postgres_conn = session.postgres() if session else get_postgres_connection()
 
         if not all([mysql_conn, postgres_conn]):
             raise Exception("No se pudieron establecer las conexiones a la base de datos.")
@@ -23,15 +42,21 @@ def migrate_docentes_with_placeholders():
 
         print("Leyendo registros de tblDocentes desde MySQL...")
         mysql_cursor.execute("SELECT * FROM tblDocentes")
-        docentes_records = mysql_cursor.fetchall()
+        values = Coercer('tblDocentes', USUARIOS_VALUES)
+        docentes_records = values.apply(mysql_cursor.fetchall())
         print(f"Se encontraron {len(docentes_records)} registros de docentes.")
 
+        merge_plan = load_merge_plan(session)
         usuarios_to_insert = []
         emails_used = set()
         
-        for record in docentes_records:
-            email = record.get('Correo')
-            dni = record.get('DNI')
+        for docente in docentes_records:
+            if merge_plan.duplicate_of('docentes', docente.get('Id')):
+                print(f"AVISO: Omitiendo docente Id {docente.get('Id')}: {merge_plan.reason('docentes', docente.get('Id'))}.")
+                continue
+
+            email = docente.get('Correo')
+            dni = docente.get('DNI')
 
             # Si el correo está vacío o es nulo, generar un marcador de posición
             if not email or not email.strip():
@@ -39,49 +64,58 @@ def migrate_docentes_with_placeholders():
                     email = f"dni.{dni.strip()}@unap.edu.pe"
                 else:
                     # Si no hay DNI, no podemos generar un correo único, así que omitimos
-                    print(f"AVISO: Omitiendo docente Id {record.get('Id')} por no tener DNI ni correo.")
+                    print(f"AVISO: Omitiendo docente Id {docente.get('Id')} por no tener DNI ni correo.")
                     continue
             
             # Verificar si el correo ya ha sido usado en este lote
             if email in emails_used:
-                print(f"AVISO: Correo duplicado '{email}' encontrado para docente Id {record.get('Id')}. Omitiendo registro.")
+                print(f"AVISO: Correo duplicado '{email}' encontrado para docente Id {docente.get('Id')}. Omitiendo registro.")
                 continue
             
             emails_used.add(email)
 
             # Mapear los campos
             mapped_record = (
-                record.get('Nombres'),
-                record.get('Apellidos'),
+                docente.get('Nombres'),
+                docente.get('Apellidos'),
                 'DNI', # tipo_doc_identidad
                 dni,
                 email,
                 None,  # correo_google
-                record.get('NroCelular'),
+                docente.get('NroCelular'),
                 None,  # pais
-                record.get('Direccion'),
-                record.get('Sexo'),
-                record.get('FechaNac'),
-                record.get('Clave'),
+                docente.get('Direccion'),
+                docente.get('Sexo'),
+                docente.get('FechaNac'),
+                docente.get('Clave'),
                 None,  # ruta_foto
-                record.get('Activo')
+                docente.get('Activo')
             )
             usuarios_to_insert.append(mapped_record)
 
+        record(rows_rejected=len(docentes_records) - len(usuarios_to_insert))
+        values.print_counts()
+
+        if incremental:
+            ensure_upsert_key(postgres_cursor, 'tbl_usuarios', 'num_doc_identidad')
+            if usuarios_to_insert:
+                bulk_load(postgres_cursor, 'tbl_usuarios', USUARIOS_COLUMNS, usuarios_to_insert,
+                          on_conflict=upsert_clause('tbl_usuarios', USUARIOS_COLUMNS, 'num_doc_identidad'))
+            postgres_conn.commit()
+            # Sin los ids nuevos, el mapa de DNIs se vuelve a leer de PostgreSQL
+            get_crosswalk(session).invalidate_owner('migrate_docentes_with_placeholders')
+            print(f"Sincronizados {len(usuarios_to_insert)} docentes en tbl_usuarios.")
+            return
+
         # Insertar los registros en tbl_usuarios
         if usuarios_to_insert:
             print(f"Insertando {len(usuarios_to_insert)} registros de docentes en tbl_usuarios...")
             
-            insert_query = """
-                INSERT INTO tbl_usuarios (
-                    nombres, apellidos, tipo_doc_identidad, num_doc_identidad, 
-                    correo, correo_google, telefono, pais, direccion, sexo, 
-                    fecha_nacimiento, contrasenia, ruta_foto, estado
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            
-            postgres_cursor.executemany(insert_query, usuarios_to_insert)
+            usuarios_map = bulk_load_with_ids(
+                postgres_cursor, 'tbl_usuarios', USUARIOS_COLUMNS, usuarios_to_insert, key_column='num_doc_identidad'
+            )
             postgres_conn.commit()
+            get_crosswalk(session).publish('usuarios_por_dni', 'migrate_docentes_with_placeholders', usuarios_map)
             print("Migración de docentes a usuarios completada exitosamente.")
         else:
             print("No se encontraron registros de docentes válidos para migrar.")
@@ -92,7 +126,7 @@ def migrate_docentes_with_placeholders():
             postgres_conn.rollback()
         raise e
     finally:
-        if mysql_conn:
+        if mysql_conn and session is None:
             mysql_conn.close()
-        if postgres_conn:
+        if postgres_conn and session is None:
             postgres_conn.close()
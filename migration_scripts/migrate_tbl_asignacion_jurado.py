@@ -1,6 +1,14 @@
 
 import psycopg2
 from db_connections import get_postgres_connection, get_mysql_pilar3_connection
+from bulk_loader import bulk_load
+from crosswalk import get_crosswalk
+from incremental_sync import load_watermark
+from run_metrics import record
+from source_extract import mysql_connector, stream_partitioned, stream_rows
+
+# Trámites por consulta al releer su historial en modo incremental
+TRAMITES_PER_QUERY = 1000
 
 def get_tipo_evento(motivo):
     motivo_lower = motivo.lower()
@@ -8,91 +16,135 @@ def get_tipo_evento(motivo):
     if 'sorteo' in motivo_lower: return 4
     return 7
 
-def migrate_tbl_asignacion_jurado():
+def changed_tramites(mysql_conn, watermark):
+    """
+    Ids antiguos de los trámites con cambios de jurado nuevos o modificados
+    desde la marca, que avanza con el mayor Id y Fecha de esos cambios.
+    """
+    condition, params = watermark.condition()
+    tramites = []
+    for row in stream_rows(
+        mysql_conn,
+        f"SELECT IdTramite, MAX(Id) AS Id, MAX(Fecha) AS Fecha FROM tesJuCambios "
+        f"WHERE {condition} GROUP BY IdTramite", params
+    ):
+        watermark.observe(row)
+        tramites.append(row['IdTramite'])
+    return tramites
+
+def stream_tramites_history(mysql_conn, tramites):
+    """Historial completo de cambios de jurado de los trámites indicados."""
+    tramites = sorted(tramites)
+    for start in range(0, len(tramites), TRAMITES_PER_QUERY):
+        chunk = tramites[start:start + TRAMITES_PER_QUERY]
+        placeholders = ', '.join(['%s'] * len(chunk))
+        yield from stream_rows(
+            mysql_conn,
+            f"SELECT * FROM tesJuCambios WHERE IdTramite IN ({placeholders}) ORDER BY IdTramite, Fecha ASC",
+            tuple(chunk)
+        )
+
+def migrate_tbl_asignacion_jurado(session=None, incremental=False):
     """
     Migra el historial de cambios de jurado desde tesJuCambios, usando
     mapeo de id_antiguo para docentes y trámites.
+
+    Con incremental=True solo se reemplaza el historial de los trámites con
+    cambios nuevos o modificados desde la última carga (ver
+    incremental_sync.py): la iteración se numera sobre todo el historial
+    del trámite, así que se vuelve a leer completo.
     """
     print("--- Iniciando migración de tbl_asignacion_jurado (Lógica ID Antiguo) ---")
     pg_conn = None
     mysql_conn = None
     try:
-        pg_conn = get_postgres_connection()
-        mysql_conn = get_mysql_pilar3_connection()
+        pg_conn = session.postgres() if session else get_postgres_connection()
+        mysql_conn = session.mysql_pilar3() if session else get_mysql_pilar3_connection()
 
         if pg_conn is None or mysql_conn is None:
             raise Exception("No se pudo conectar a una de las bases de datos.")
 
         pg_cur = pg_conn.cursor()
-        mysql_cur = mysql_conn.cursor(dictionary=True)
 
-        # 1. Crear mapas de IDs nuevos
-        pg_cur.execute("SELECT id, id_antiguo FROM tbl_docentes WHERE id_antiguo IS NOT NULL")
-        docente_map = {row[1]: row[0] for row in pg_cur.fetchall()}
+        # 1. Obtener mapas de IDs nuevos
+        crosswalk = get_crosswalk(session)
+        docente_map = crosswalk.get('docentes_por_id_antiguo', pg_conn)
         print(f"  Se mapearon {len(docente_map)} docentes por id_antiguo.")
 
-        pg_cur.execute("SELECT id, id_antiguo FROM tbl_tramites WHERE id_antiguo IS NOT NULL")
-        tramites_map = {row[1]: row[0] for row in pg_cur.fetchall()}
+        tramites_map = crosswalk.get('tramites_por_id_antiguo', pg_conn)
 
         pg_cur.execute("SELECT id FROM tbl_usuarios WHERE correo = 'sistema@vriunap.pe'")
         system_user_id = pg_cur.fetchone()[0]
 
-        # 2. Leer datos de origen, ordenados para la lógica de iteración
-        mysql_cur.execute("SELECT * FROM tesJuCambios ORDER BY IdTramite, Fecha ASC")
-        source_data = mysql_cur.fetchall()
+        watermark = load_watermark(pg_conn, 'tbl_asignacion_jurado', incremental)
+        if incremental:
+            tramites = changed_tramites(mysql_conn, watermark)
+            print(f"  {len(tramites)} trámites con cambios de jurado nuevos o modificados.")
+            new_tramite_ids = [tramites_map[t] for t in tramites if t in tramites_map]
+            pg_cur.execute("DELETE FROM tbl_asignacion_jurado WHERE tramite_id = ANY(%s)", (new_tramite_ids,))
+            source_data = stream_tramites_history(mysql_conn, tramites)
+        else:
+            # 2. Leer datos de origen en paralelo por rangos de IdTramite; los rangos
+            # se entregan en orden, así que se conserva el orden para la lógica de iteración
+            source_data = stream_partitioned(
+                mysql_conn, mysql_connector(session, 'pilar3'),
+                "SELECT * FROM tesJuCambios WHERE {range} ORDER BY IdTramite, Fecha ASC",
+                'tesJuCambios', 'IdTramite', ordered=True
+            )
 
         # 3. Procesar y preparar datos para la inserción
-        data_to_insert = []
         iteracion_tracker = {}
-        unmapped_jurados = 0
+        unmapped = {'jurados': 0}
         jurado_fields = ['IdJurado1', 'IdJurado2', 'IdJurado3', 'IdJurado4']
 
-        for row in source_data:
-            id_tramite_antiguo = row['IdTramite']
-            new_tramite_id = tramites_map.get(id_tramite_antiguo)
-            if not new_tramite_id:
-                continue
-
-            current_iteracion = iteracion_tracker.get(id_tramite_antiguo, 0) + 1
-            iteracion_tracker[id_tramite_antiguo] = current_iteracion
-            id_tipo_evento = get_tipo_evento(row['Motivo'])
-
-            for i, field in enumerate(jurado_fields):
-                old_docente_id = row[field]
-                if old_docente_id and old_docente_id > 0:
-                    new_docente_id = docente_map.get(old_docente_id)
-                    if new_docente_id:
-                        data_to_insert.append((
-                            new_tramite_id, 5, i + 1, current_iteracion, id_tipo_evento,
-                            new_docente_id, system_user_id, row['Fecha'], 0
-                        ))
-                    else:
-                        unmapped_jurados += 1
-        
-        print(f"  Se prepararon {len(data_to_insert)} registros para insertar.")
-        if unmapped_jurados > 0:
-            print(f"  ADVERTENCIA: Se ignoraron {unmapped_jurados} jurados sin mapeo.")
-
-        # 4. Insertar los datos
-        if data_to_insert:
-            insert_query = """
-            INSERT INTO tbl_asignacion_jurado (
-                tramite_id, id_etapa, id_orden, iteracion, id_tipo_evento,
-                docente_id, id_usuario_asignador, fecha_evento, estado
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            pg_cur.executemany(insert_query, data_to_insert)
-            pg_conn.commit()
-            print(f"  Se insertaron {len(data_to_insert)} registros.")
+        def data_to_insert():
+            for row in source_data:
+                if not incremental:
+                    watermark.observe(row)
+                id_tramite_antiguo = row['IdTramite']
+                new_tramite_id = tramites_map.get(id_tramite_antiguo)
+                if not new_tramite_id:
+                    continue
+
+                current_iteracion = iteracion_tracker.get(id_tramite_antiguo, 0) + 1
+                iteracion_tracker[id_tramite_antiguo] = current_iteracion
+                id_tipo_evento = get_tipo_evento(row['Motivo'])
+
+                for i, field in enumerate(jurado_fields):
+                    old_docente_id = row[field]
+                    if old_docente_id and old_docente_id > 0:
+                        new_docente_id = docente_map.get(old_docente_id)
+                        if new_docente_id:
+                            yield (
+                                new_tramite_id, 5, i + 1, current_iteracion, id_tipo_evento,
+                                new_docente_id, system_user_id, row['Fecha'], 0
+                            )
+                        else:
+                            unmapped['jurados'] += 1
+
+        # 4. Insertar los datos a medida que se procesan
+        inserted = bulk_load(
+            pg_cur, 'tbl_asignacion_jurado',
+            ['tramite_id', 'id_etapa', 'id_orden', 'iteracion', 'id_tipo_evento', 'docente_id',
+             'id_usuario_asignador', 'fecha_evento', 'estado'],
+            data_to_insert()
+        )
+        watermark.save(pg_cur)
+        pg_conn.commit()
+        print(f"  Se insertaron {inserted} registros.")
+        if unmapped['jurados'] > 0:
+            print(f"  ADVERTENCIA: Se ignoraron {unmapped['jurados']} jurados sin mapeo.")
+            record(rows_rejected=unmapped['jurados'])
 
         print("--- Migración de tbl_asignacion_jurado completada ---")
 
     except Exception as e:
         print(f"  ERROR CRÍTICO en migración de asignación de jurados: {e}")
         if pg_conn: pg_conn.rollback()
+        raise e
     finally:
-        if pg_conn: pg_conn.close()
-        if mysql_conn: mysql_conn.close()
+        if pg_conn and session is None: pg_conn.close()
+        if mysql_conn and session is None: mysql_conn.close()
 
 if __name__ == '__main__':
     migrate_tbl_asignacion_jurado()
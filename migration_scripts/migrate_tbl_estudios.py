@@ -1,13 +1,11 @@
 import csv
 import os
-import sys
 from datetime import datetime
 
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from db_connections import get_postgres_connection
+from bulk_loader import bulk_load
 
-from migration_scripts.db_connections import get_postgres_connection
-
-def migrate_tbl_estudios():
+def migrate_tbl_estudios(session=None):
     """
     Migrates studies data from a CSV file to the tbl_estudios table in PostgreSQL,
     filtering for records with a valid university ID (<= 33).
@@ -20,7 +18,7 @@ def migrate_tbl_estudios():
 
     conn = None
     try:
-        conn = get_postgres_connection()
+        conn = session.postgres() if session else get_postgres_connection()
         cur = conn.cursor()
         print("Connected to PostgreSQL. Starting migration for tbl_estudios...")
 
@@ -53,15 +51,14 @@ def migrate_tbl_estudios():
                 print(f"Found {len(records_to_insert)} records to insert after filtering.")
                 
                 # Truncate before inserting
-                cur.execute("TRUNCATE TABLE public.tbl_estudios RESTART IDENTITY CASCADE;")
+                cur.execute("TRUNCATE TABLE tbl_estudios RESTART IDENTITY CASCADE;")
 
-                insert_query = """
-                    INSERT INTO tbl_estudios (
-                        id_usuario, id_universidad, id_grado_academico, titulo_profesional,
-                        especialidad, fecha_emision, resolucion, id_tipo_obtencion
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
-                """
-                cur.executemany(insert_query, records_to_insert)
+                bulk_load(
+                    cur, 'tbl_estudios',
+                    ['id_usuario', 'id_universidad', 'id_grado_academico', 'titulo_profesional',
+                     'especialidad', 'fecha_emision', 'resolucion', 'id_tipo_obtencion'],
+                    records_to_insert
+                )
                 conn.commit()
                 print("Migration for tbl_estudios completed successfully.")
             else:
@@ -71,8 +68,9 @@ def migrate_tbl_estudios():
         print(f"An error occurred during tbl_estudios migration: {e}")
         if conn:
             conn.rollback()
+        raise e
     finally:
-        if conn:
+        if conn and session is None:
             conn.close()
             print("PostgreSQL connection closed.")
 
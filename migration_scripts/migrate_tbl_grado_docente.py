@@ -1,13 +1,9 @@
-import os
-import sys
 import psycopg2
 
-# Add parent directory to Python path to allow module imports
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from db_connections import get_postgres_connection, get_mysql_absmain_connection
+from bulk_loader import bulk_load
 
-from migration_scripts.db_connections import get_postgres_connection, get_mysql_absmain_connection
-
-def migrate_tbl_grado_docente():
+def migrate_tbl_grado_docente(session=None):
     """
     Populates the tbl_grado_docente table by combining data from PostgreSQL
     (tbl_docentes, tbl_estudios) and MySQL (tblDocentes).
@@ -15,8 +11,8 @@ def migrate_tbl_grado_docente():
     pg_conn = None
     mysql_conn = None
     try:
-        pg_conn = get_postgres_connection()
-        mysql_conn = get_mysql_absmain_connection()
+        pg_conn = session.postgres() if session else get_postgres_connection()
+        mysql_conn = session.mysql_absmain() if session else get_mysql_absmain_connection()
         
         if not pg_conn or not mysql_conn:
             raise Exception("Database connection failed.")
@@ -87,15 +83,14 @@ def migrate_tbl_grado_docente():
         # 6. Insert all records into the target table
         if records_to_insert:
             print(f"Prepared {len(records_to_insert)} records for insertion.")
-            pg_cursor.execute("TRUNCATE TABLE public.tbl_grado_docente RESTART IDENTITY CASCADE;")
+            pg_cursor.execute("TRUNCATE TABLE tbl_grado_docente RESTART IDENTITY CASCADE;")
             
-            insert_query = """
-                INSERT INTO tbl_grado_docente (
-                    id_docente, grado_academico, categoria_descripcion, 
-                    antiguedad_categoria, estado_tbl_grado_docente
-                ) VALUES (%s, %s, %s, %s, %s)
-            """
-            pg_cursor.executemany(insert_query, records_to_insert)
+            bulk_load(
+                pg_cursor, 'tbl_grado_docente',
+                ['id_docente', 'grado_academico', 'categoria_descripcion', 'antiguedad_categoria',
+                 'estado_tbl_grado_docente'],
+                records_to_insert
+            )
             pg_conn.commit()
             print("Migration for tbl_grado_docente completed successfully.")
         else:
@@ -106,9 +101,9 @@ def migrate_tbl_grado_docente():
         if pg_conn:
             pg_conn.rollback()
     finally:
-        if pg_conn:
+        if pg_conn and session is None:
             pg_conn.close()
-        if mysql_conn:
+        if mysql_conn and session is None:
             mysql_conn.close()
         print("Database connections closed.")
 
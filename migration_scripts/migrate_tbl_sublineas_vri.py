@@ -1,14 +1,20 @@
 from db_connections import get_mysql_absmain_connection, get_postgres_connection
+from bulk_loader import bulk_load
+from row_hash_merge import merge_rows, print_merge_counts
 
-def migrate_tbl_sublineas_vri():
+SUBLINEAS_COLUMNS = ['id', 'id_linea_universidad', 'nombre', 'id_disciplina', 'id_carrera', 'fecha_registro',
+                     'fecha_modificacion', 'estado_sublinea_vri']
+
+def migrate_tbl_sublineas_vri(session=None, incremental=False):
     """
     Migra datos de tblLineas (MySQL) a tbl_sublineas_vri (PostgreSQL).
+    Con incremental=True solo aplica las diferencias por id (ver row_hash_merge.py).
     """
     mysql_conn = None
     postgres_conn = None
     try:
-        mysql_conn = get_mysql_absmain_connection()
-        postgres_conn = get_postgres_connection()
+        mysql_conn = session.mysql_absmain() if session else get_mysql_absmain_connection()
+        postgres_conn = session.postgres() if session else get_postgres_connection()
         if not all([mysql_conn, postgres_conn]):
             raise Exception("No se pudieron establecer las conexiones.")
 
@@ -31,15 +37,16 @@ def migrate_tbl_sublineas_vri():
                 rec['Estado']
             ))
 
-        postgres_cursor.execute("TRUNCATE TABLE public.tbl_sublineas_vri RESTART IDENTITY CASCADE;")
+        if incremental:
+            counts = merge_rows(postgres_cursor, 'tbl_sublineas_vri', SUBLINEAS_COLUMNS, records_to_insert,
+                                key_column='id', deactivate={'estado_sublinea_vri': 0})
+            postgres_conn.commit()
+            print_merge_counts('tbl_sublineas_vri', counts)
+            return
+
+        postgres_cursor.execute("TRUNCATE TABLE tbl_sublineas_vri RESTART IDENTITY CASCADE;")
         
-        postgres_cursor.executemany(
-            """INSERT INTO tbl_sublineas_vri (
-                id, id_linea_universidad, nombre, id_disciplina, id_carrera, 
-                fecha_registro, fecha_modificacion, estado_sublinea_vri
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)""",
-            records_to_insert
-        )
+        bulk_load(postgres_cursor, 'tbl_sublineas_vri', SUBLINEAS_COLUMNS, records_to_insert)
         
         postgres_conn.commit()
         print(f"Migrados {len(records_to_insert)} registros a tbl_sublineas_vri.")
@@ -48,7 +55,7 @@ def migrate_tbl_sublineas_vri():
         print(f"Error en la migración de tbl_sublineas_vri: {e}")
         raise e
     finally:
-        if mysql_conn:
+        if mysql_conn and session is None:
             mysql_conn.close()
-        if postgres_conn:
+        if postgres_conn and session is None:
             postgres_conn.close()
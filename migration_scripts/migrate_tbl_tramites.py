@@ -3,96 +3,134 @@ import os
 import psycopg2
 import mysql.connector
 from db_connections import get_mysql_pilar3_connection, get_postgres_connection
+from bulk_loader import bulk_load, bulk_load_with_ids
+from crosswalk import get_crosswalk
+from incremental_sync import ensure_upsert_key, load_watermark, upsert_clause
+from source_extract import RowCounter, mysql_connector, stream_partitioned, stream_rows
 
-def migrate_tbl_tramites():
+TRAMITES_COLUMNS = ['id_antiguo', 'codigo_proyecto', 'id_etapa', 'id_sublinea_vri', 'id_modalidad',
+                    'id_tipo_trabajo', 'id_denominacion', 'fecha_registro', 'estado_tramite']
+
+# Mapa de remapeo para el campo Estado -> id_etapa
+# La tabla de origen tiene estados de 0 a 14.
+ETAPA_MAP = {
+    0: 1,   # Regla especial: Estado 0 se convierte en etapa 1
+    1: 1,
+    2: 2,   # Sin equivalente explícito, se mapea a sí mismo
+    3: 2,
+    4: 4,   # Sin equivalente explícito, se mapea a sí mismo
+    5: 3,
+    6: 4,
+    7: 5,
+    8: 8,   # Sin equivalente explícito, se mapea a sí mismo
+    9: 10,
+    10: 11,
+    11: 11,  # Sin equivalente explícito, se mapea a sí mismo
+    12: 12,
+    13: 13,
+    14: 14   # Sin equivalente explícito, se mapea a sí mismo
+}
+
+UNMAPPED_REPORT_PATH = os.path.join(os.path.dirname(__file__), '..', 'tramites_no_mapeados.csv')
+
+def export_unmapped(tramites_no_mapeados):
+    """Exporta a un CSV los trámites (diccionarios) cuyo Estado no tiene etapa."""
+    if not tramites_no_mapeados:
+        return
+    print(f"\nExportando {len(tramites_no_mapeados)} trámites no mapeados a: {UNMAPPED_REPORT_PATH}")
+
+    with open(UNMAPPED_REPORT_PATH, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=tramites_no_mapeados[0].keys())
+        writer.writeheader()
+        writer.writerows(tramites_no_mapeados)
+    print("Reporte de trámites no mapeados creado.")
+
+def migrate_tbl_tramites(session=None, incremental=False):
     """
     Migra los datos de tesTramites (MySQL) a tbl_tramites (PostgreSQL),
     aplicando reglas de remapeo para el campo 'id_etapa'.
+
+    Con incremental=True no vacía la tabla: lee solo los trámites nuevos o
+    modificados desde la última carga (ver incremental_sync.py) y los
+    inserta o actualiza por id_antiguo.
     """
     mysql_conn = None
     postgres_conn = None
     
     try:
-        mysql_conn = get_mysql_pilar3_connection()
-        postgres_conn = get_postgres_connection()
+        mysql_conn = session.mysql_pilar3() if session else get_mysql_pilar3_connection()
+        postgres_conn = session.postgres() if session else get_postgres_connection()
         if not all([mysql_conn, postgres_conn]):
             raise Exception("No se pudieron establecer las conexiones.")
 
-        mysql_cursor = mysql_conn.cursor(dictionary=True)
         postgres_cursor = postgres_conn.cursor()
 
-        # Mapa de remapeo para el campo Estado -> id_etapa
-        # La tabla de origen tiene estados de 0 a 14.
-        etapa_map = {
-            0: 1,   # Regla especial: Estado 0 se convierte en etapa 1
-            1: 1,
-            2: 2,   # Sin equivalente explícito, se mapea a sí mismo
-            3: 2,
-            4: 4,   # Sin equivalente explícito, se mapea a sí mismo
-            5: 3,
-            6: 4,
-            7: 5,
-            8: 8,   # Sin equivalente explícito, se mapea a sí mismo
-            9: 10,
-            10: 11,
-            11: 11,  # Sin equivalente explícito, se mapea a sí mismo
-            12: 12,
-            13: 13,
-            14: 14   # Sin equivalente explícito, se mapea a sí mismo
-        }
-
-        mysql_cursor.execute("SELECT * FROM tesTramites")
-        tramites_records = mysql_cursor.fetchall()
-        print(f"Se encontraron {len(tramites_records)} trámites en MySQL.")
-
-        tramites_to_insert = []
+        watermark = load_watermark(postgres_conn, 'tbl_tramites', incremental)
+        if incremental:
+            condition, params = watermark.condition()
+            tramites_records = RowCounter(stream_rows(
+                mysql_conn, f"SELECT * FROM tesTramites WHERE {condition} ORDER BY Id", params
+            ))
+        else:
+            # Lectura en paralelo por rangos de Id, conservando el orden por Id
+            tramites_records = RowCounter(stream_partitioned(
+                mysql_conn, mysql_connector(session, 'pilar3'),
+                "SELECT * FROM tesTramites WHERE {range} ORDER BY Id", 'tesTramites', 'Id', ordered=True
+            ))
         tramites_no_mapeados = []
 
-        for tramite in tramites_records:
-            estado_antiguo = tramite.get('Estado')
-            id_etapa_nuevo = etapa_map.get(estado_antiguo)
+        def mapped_tramites():
+            for tramite in tramites_records:
+                watermark.observe(tramite)
+                estado_antiguo = tramite.get('Estado')
+                id_etapa_nuevo = ETAPA_MAP.get(estado_antiguo)
 
-            if id_etapa_nuevo is not None:
-                mapped_tramite = (
-                    tramite.get('Id'),
-                    tramite.get('Codigo'),
-                    id_etapa_nuevo,
-                    tramite.get('IdLinea'),
-                    1, # id_modalidad (defecto)
-                    1, # id_tipo_trabajo (defecto)
-                    1, # id_denominacion (defecto)
-                    tramite.get('FechRegProy'),
-                    1  # estado_tramite (defecto)
-                )
-                tramites_to_insert.append(mapped_tramite)
-            else:
-                tramites_no_mapeados.append(tramite)
+                if id_etapa_nuevo is not None:
+                    yield (
+                        tramite.get('Id'),
+                        tramite.get('Codigo'),
+                        id_etapa_nuevo,
+                        tramite.get('IdLinea'),
+                        1, # id_modalidad (defecto)
+                        1, # id_tipo_trabajo (defecto)
+                        1, # id_denominacion (defecto)
+                        tramite.get('FechRegProy'),
+                        1  # estado_tramite (defecto)
+                    )
+                else:
+                    tramites_no_mapeados.append(tramite)
 
-        # Insertar los registros mapeados
-        if tramites_to_insert:
-            print(f"Insertando {len(tramites_to_insert)} trámites mapeados en tbl_tramites...")
-            postgres_cursor.execute("TRUNCATE TABLE public.tbl_tramites RESTART IDENTITY CASCADE;")
-            
-            insert_query = """
-                INSERT INTO tbl_tramites (
-                    id_antiguo, codigo_proyecto, id_etapa, id_sublinea_vri, id_modalidad,
-                    id_tipo_trabajo, id_denominacion, fecha_registro, estado_tramite
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            postgres_cursor.executemany(insert_query, tramites_to_insert)
+        if incremental:
+            # Los trámites existentes se actualizan y los nuevos toman su id de la secuencia
+            print("Aplicando trámites nuevos o modificados en tbl_tramites...")
+            ensure_upsert_key(postgres_cursor, 'tbl_tramites')
+            applied = bulk_load(
+                postgres_cursor, 'tbl_tramites', TRAMITES_COLUMNS, mapped_tramites(),
+                on_conflict=upsert_clause('tbl_tramites', TRAMITES_COLUMNS)
+            )
+            watermark.save(postgres_cursor)
             postgres_conn.commit()
-            print("Migración de tbl_tramites completada.")
+            print(f"Se encontraron {tramites_records.count} trámites nuevos o modificados en MySQL.")
+            print(f"Sincronización de tbl_tramites completada: {applied} trámites aplicados.")
+        else:
+            # Leer, mapear e insertar en un mismo flujo, sin cargar la tabla en memoria
+            print("Insertando trámites mapeados en tbl_tramites...")
+            postgres_cursor.execute("TRUNCATE TABLE tbl_tramites RESTART IDENTITY CASCADE;")
+
+            # Los ids se reservan antes de cargar, así se obtiene id_antiguo -> id
+            # sin volver a leer tbl_tramites
+            tramites_map = bulk_load_with_ids(
+                postgres_cursor, 'tbl_tramites', TRAMITES_COLUMNS, mapped_tramites(),
+                key_column='id_antiguo'
+            )
+            watermark.save(postgres_cursor)
+            postgres_conn.commit()
+            get_crosswalk(session).publish('tramites_por_id_antiguo', 'migrate_tbl_tramites', tramites_map)
+            print(f"Se encontraron {tramites_records.count} trámites en MySQL.")
+            print(f"Migración de tbl_tramites completada: {len(tramites_map)} trámites mapeados.")
 
         # Exportar los no mapeados a un CSV
-        if tramites_no_mapeados:
-            report_path = os.path.join(os.path.dirname(__file__), '..', 'tramites_no_mapeados.csv')
-            print(f"\nExportando {len(tramites_no_mapeados)} trámites no mapeados a: {report_path}")
-            
-            with open(report_path, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=tramites_no_mapeados[0].keys())
-                writer.writeheader()
-                writer.writerows(tramites_no_mapeados)
-            print("Reporte de trámites no mapeados creado.")
+        export_unmapped(tramites_no_mapeados)
 
     except (Exception, psycopg2.Error, mysql.connector.Error) as e:
         print(f"Error durante la migración de tbl_tramites: {e}")
@@ -100,7 +138,7 @@ def migrate_tbl_tramites():
             postgres_conn.rollback()
         raise e
     finally:
-        if mysql_conn:
+        if mysql_conn and session is None:
             mysql_conn.close()
-        if postgres_conn:
+        if postgres_conn and session is None:
             postgres_conn.close()
@@ -3,113 +3,139 @@ import os
 import psycopg2
 import mysql.connector
 from db_connections import get_mysql_pilar3_connection, get_postgres_connection
+from bulk_loader import bulk_load, bulk_load_with_ids
+from crosswalk import get_crosswalk
+from entity_resolution import load_merge_plan
+from incremental_sync import ensure_upsert_key, upsert_clause
+from run_metrics import record
+from source_extract import RowCounter, stream_rows
 
-def migrate_tesistas_deduplicated():
+USUARIOS_COLUMNS = ['nombres', 'apellidos', 'tipo_doc_identidad', 'num_doc_identidad', 'correo',
+                    'correo_google', 'telefono', 'pais', 'direccion', 'sexo', 'fecha_nacimiento',
+                    'contrasenia', 'ruta_foto', 'estado']
+
+def migrate_tesistas_deduplicated(session=None, incremental=False):
     """
-    Migra tesistas a usuarios, deduplicando por nombre completo.
-    Maneja DNIs duplicados modificándolos y exporta reportes en CSV.
+    Migra tesistas a usuarios, omitiendo los duplicados según el plan de
+    fusión de entity_resolution.py. Maneja DNIs duplicados modificándolos y
+    exporta reportes en CSV.
+
+    Con incremental=True tbl_usuarios ya tiene a los tesistas de cargas
+    anteriores: se omiten los tesistas cuyo DNI ya tiene usuario y solo se
+    insertan (con upsert por num_doc_identidad) los DNIs nuevos, para que
+    populate_tbl_tesistas los encuentre.
     """
     postgres_conn = None
     mysql_conn = None
     
     try:
-        postgres_conn = get_postgres_connection()
-        mysql_conn = get_mysql_pilar3_connection()
+        postgres_conn = session.postgres() if session else get_postgres_connection()
+        mysql_conn = session.mysql_pilar3() if session else get_mysql_pilar3_connection()
 
         if not all([postgres_conn, mysql_conn]):
             raise Exception("No se pudieron establecer todas las conexiones.")
 
         pg_cursor = postgres_conn.cursor()
-        mysql_cursor = mysql_conn.cursor(dictionary=True)
 
         # 1. Obtener usuarios existentes (docentes)
         print("Leyendo usuarios existentes desde PostgreSQL...")
-        pg_cursor.execute("SELECT lower(trim(nombres) || ' ' || trim(apellidos)), correo, num_doc_identidad FROM tbl_usuarios")
+        pg_cursor.execute("SELECT correo, num_doc_identidad FROM tbl_usuarios")
         existing_users_raw = pg_cursor.fetchall()
         
-        existing_names = {row[0] for row in existing_users_raw}
-        existing_emails = {row[1] for row in existing_users_raw if row[1]}
-        existing_dnis = {row[2] for row in existing_users_raw if row[2]}
-        print(f"Se encontraron {len(existing_names)} usuarios existentes.")
+        existing_emails = {row[0] for row in existing_users_raw if row[0]}
+        existing_dnis = {row[1] for row in existing_users_raw if row[1]}
+        print(f"Se encontraron {len(existing_users_raw)} usuarios existentes.")
+
+        merge_plan = load_merge_plan(session)
 
-        # 2. Leer todos los registros de tblTesistas
+        # 2. Leer los registros de tblTesistas en flujo
         print("Leyendo registros de tblTesistas desde MySQL...")
-        mysql_cursor.execute("SELECT * FROM tblTesistas")
-        tesistas_records = mysql_cursor.fetchall()
-        print(f"Se encontraron {len(tesistas_records)} registros de tesistas para procesar.")
+        tesistas_records = RowCounter(stream_rows(mysql_conn, "SELECT * FROM tblTesistas"))
+        source_columns = []
 
         # 3. Procesar, deduplicar y manejar conflictos
-        tesistas_to_insert = []
         skipped_by_name = []
         modified_dni_records = []
+        already_loaded = []
         
-        processed_full_names = set()
         processed_dnis = set(existing_dnis)
 
-        for record in tesistas_records:
-            nombres = record.get('Nombres', '').strip()
-            apellidos = record.get('Apellidos', '').strip()
-            
-            if not nombres or not apellidos:
-                continue
-
-            full_name_key = f"{nombres.lower()} {apellidos.lower()}"
-            
-            # Omitir si el nombre completo es duplicado
-            if full_name_key in processed_full_names or full_name_key in existing_names:
-                skipped_by_name.append({**record, 'motivo_omitido': 'Nombre completo duplicado'})
-                continue
-            
-            processed_full_names.add(full_name_key)
-            
-            # Manejar DNI
-            dni = record.get('DNI', '').strip()
-            original_dni = dni
-            if not dni:
-                dni = f"dd_{full_name_key.replace(' ','_')}"[:12] # Usar nombre para DNI vacío
-                record_with_mod_dni = {**record, 'dni_modificado': dni}
-                modified_dni_records.append(record_with_mod_dni)
-            elif dni in processed_dnis:
-                dni = f"dd{original_dni}"
-                record_with_mod_dni = {**record, 'dni_modificado': dni}
-                modified_dni_records.append(record_with_mod_dni)
-            
-            processed_dnis.add(dni)
-
-            # Manejar Correo
-            email = record.get('Correo', '').strip()
-            if not email or email in existing_emails:
-                email = f"dni.{original_dni or full_name_key.replace(' ','_')}@unap.edu.pe"
-            
-            existing_emails.add(email)
-
-            # Mapear para la inserción
-            mapped_record = (
-                nombres, apellidos, None, dni, email, None, record.get('NroCelular'),
-                None, record.get('Direccion'), record.get('Sexo'), None,
-                record.get('Clave'), None, 1
+        def tesistas_to_insert():
+            for tesista in tesistas_records:
+                if not source_columns:
+                    source_columns.extend(tesista.keys())
+
+                nombres = tesista.get('Nombres', '').strip()
+                apellidos = tesista.get('Apellidos', '').strip()
+                
+                if not nombres or not apellidos:
+                    continue
+
+                full_name_key = f"{nombres.lower()} {apellidos.lower()}"
+                
+                # Omitir si es la misma persona que un docente u otro tesista
+                if merge_plan.duplicate_of('tesistas', tesista['Id']):
+                    skipped_by_name.append({**tesista, 'motivo_omitido': merge_plan.reason('tesistas', tesista['Id'])})
+                    continue
+                
+                # Manejar DNI
+                dni = tesista.get('DNI', '').strip()
+                original_dni = dni
+                if incremental and (dni or f"dd_{full_name_key.replace(' ','_')}"[:12]) in existing_dnis:
+                    already_loaded.append(tesista['Id'])
+                    continue
+                if not dni:
+                    dni = f"dd_{full_name_key.replace(' ','_')}"[:12] # Usar nombre para DNI vacío
+                    record_with_mod_dni = {**tesista, 'dni_modificado': dni}
+                    modified_dni_records.append(record_with_mod_dni)
+                elif dni in processed_dnis:
+                    dni = f"dd{original_dni}"
+                    record_with_mod_dni = {**tesista, 'dni_modificado': dni}
+                    modified_dni_records.append(record_with_mod_dni)
+                
+                processed_dnis.add(dni)
+
+                # Manejar Correo
+                email = tesista.get('Correo', '').strip()
+                if not email or email in existing_emails:
+                    email = f"dni.{original_dni or full_name_key.replace(' ','_')}@unap.edu.pe"
+                
+                existing_emails.add(email)
+
+                # Mapear para la inserción
+                yield (
+                    nombres, apellidos, None, dni, email, None, tesista.get('NroCelular'),
+                    None, tesista.get('Direccion'), tesista.get('Sexo'), None,
+                    tesista.get('Clave'), None, 1
+                )
+
+        # 4. Insertar los nuevos registros a medida que se leen
+        print("\nInsertando nuevos registros de tesistas en tbl_usuarios...")
+        if incremental:
+            ensure_upsert_key(pg_cursor, 'tbl_usuarios', 'num_doc_identidad')
+            inserted = bulk_load(pg_cursor, 'tbl_usuarios', USUARIOS_COLUMNS, tesistas_to_insert(),
+                                 on_conflict=upsert_clause('tbl_usuarios', USUARIOS_COLUMNS, 'num_doc_identidad'))
+            postgres_conn.commit()
+            # Sin los ids nuevos, el mapa de DNIs se vuelve a leer de PostgreSQL
+            get_crosswalk(session).invalidate_owner('migrate_tesistas_deduplicated')
+            print(f"Se procesaron {tesistas_records.count} registros de tesistas: {inserted} usuarios nuevos, "
+                  f"{len(already_loaded)} ya tenían usuario.")
+            record(rows_rejected=tesistas_records.count - inserted - len(already_loaded))
+        else:
+            usuarios_map = bulk_load_with_ids(
+                pg_cursor, 'tbl_usuarios', USUARIOS_COLUMNS, tesistas_to_insert(), key_column='num_doc_identidad'
             )
-            tesistas_to_insert.append(mapped_record)
-
-        # 4. Insertar los nuevos registros
-        if tesistas_to_insert:
-            print(f"\nInsertando {len(tesistas_to_insert)} nuevos registros de tesistas en tbl_usuarios...")
-            insert_query = """
-                INSERT INTO tbl_usuarios (
-                    nombres, apellidos, tipo_doc_identidad, num_doc_identidad, correo,
-                    correo_google, telefono, pais, direccion, sexo, fecha_nacimiento,
-                    contrasenia, ruta_foto, estado
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            pg_cursor.executemany(insert_query, tesistas_to_insert)
             postgres_conn.commit()
-            print("Migración de tesistas completada.")
+            get_crosswalk(session).publish('usuarios_por_dni', 'migrate_tesistas_deduplicated', usuarios_map)
+            print(f"Se procesaron {tesistas_records.count} registros de tesistas.")
+            print(f"Migración de tesistas completada: {len(usuarios_map)} registros insertados.")
+            record(rows_rejected=tesistas_records.count - len(usuarios_map))
 
         # 5. Exportar reportes CSV
         if skipped_by_name:
             report_path = os.path.join(os.path.dirname(__file__), '..', 'tesistas_duplicados_por_nombre.csv')
             print(f"\nExportando {len(skipped_by_name)} duplicados por nombre a: {report_path}")
-            fieldnames = list(tesistas_records[0].keys()) + ['motivo_omitido']
+            fieldnames = source_columns + ['motivo_omitido']
             with open(report_path, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
                 writer.writeheader()
@@ -118,7 +144,7 @@ def migrate_tesistas_deduplicated():
         if modified_dni_records:
             report_path = os.path.join(os.path.dirname(__file__), '..', 'tesistas_con_dni_modificado.csv')
             print(f"Exportando {len(modified_dni_records)} registros con DNI modificado a: {report_path}")
-            fieldnames = list(tesistas_records[0].keys()) + ['dni_modificado']
+            fieldnames = source_columns + ['dni_modificado']
             with open(report_path, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
                 writer.writeheader()
@@ -130,7 +156,7 @@ def migrate_tesistas_deduplicated():
             postgres_conn.rollback()
         raise e
     finally:
-        if postgres_conn:
+        if postgres_conn and session is None:
             postgres_conn.close()
-        if mysql_conn:
+        if mysql_conn and session is None:
             mysql_conn.close()
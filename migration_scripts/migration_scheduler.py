@@ -0,0 +1,172 @@
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+SCHEMA_DUMP_PATH = os.path.join(os.path.dirname(__file__), '..', 'schema_dump.sql')
+
+FK_PATTERN = re.compile(
+    r"ALTER TABLE ONLY public\.(\w+)\s+ADD CONSTRAINT \w+ FOREIGN KEY \([^)]*\) REFERENCES public\.(\w+)\(",
+    re.MULTILINE
+)
+
+
+def parse_foreign_keys(schema_path=SCHEMA_DUMP_PATH):
+    """
+    Lee el volcado del esquema y devuelve un diccionario
+    {tabla: {tablas referenciadas}} a partir de sus FOREIGN KEY.
+    """
+    with open(schema_path, mode='r', encoding='utf-8') as f:
+        contents = f.read()
+
+    fk_graph = {}
+    for table, referenced in FK_PATTERN.findall(contents):
+        if table != referenced:
+            fk_graph.setdefault(table, set()).add(referenced)
+    return fk_graph
+
+
+def build_dependencies(steps, fk_graph):
+    """
+    Calcula las dependencias de cada paso: las declaradas en 'depends_on'
+    más las deducidas del grafo de llaves foráneas (un paso que carga una
+    tabla depende de todos los pasos que cargan las tablas que referencia).
+    """
+    owners = {}
+    for step in steps:
+        for table in step.get('tables', []):
+            owners.setdefault(table, []).append(step['name'])
+
+    names = {step['name'] for step in steps}
+    dependencies = {}
+    for step in steps:
+        deps = set(step.get('depends_on', []))
+        unknown = deps - names
+        if unknown:
+            raise ValueError(f"El paso '{step['name']}' depende de pasos inexistentes: {sorted(unknown)}")
+
+        for table in step.get('tables', []):
+            for referenced in fk_graph.get(table, ()):
+                deps.update(owners.get(referenced, []))
+        deps.discard(step['name'])
+        dependencies[step['name']] = deps
+
+    _check_acyclic(dependencies)
+    return dependencies
+
+
+def _check_acyclic(dependencies):
+    """Lanza ValueError si el grafo de dependencias contiene un ciclo."""
+    visiting, done = set(), set()
+
+    def visit(name, path):
+        if name in done:
+            return
+        if name in visiting:
+            cycle = path[path.index(name):] + [name]
+            raise ValueError(f"Ciclo de dependencias entre pasos: {' -> '.join(cycle)}")
+        visiting.add(name)
+        for dep in dependencies[name]:
+            visit(dep, path + [name])
+        visiting.discard(name)
+        done.add(name)
+
+    for name in dependencies:
+        visit(name, [])
+
+
+def critical_path_lengths(dependencies, weights=None):
+    """
+    Devuelve, para cada paso, la longitud del camino más largo desde ese
+    paso hasta el final del grafo. Sirve para priorizar los pasos que
+    están en la ruta crítica cuando hay más pasos listos que workers.
+    """
+    weights = weights or {}
+    dependents = {name: set() for name in dependencies}
+    for name, deps in dependencies.items():
+        for dep in deps:
+            dependents[dep].add(name)
+
+    lengths = {}
+
+    def length(name):
+        if name not in lengths:
+            tail = max((length(child) for child in dependents[name]), default=0)
+            lengths[name] = weights.get(name, 1) + tail
+        return lengths[name]
+
+    for name in dependencies:
+        length(name)
+    return lengths
+
+
+def run_steps(steps, max_workers=4, fk_graph=None, run_step=None, completed=None):
+    """
+    Ejecuta los pasos respetando sus dependencias, lanzando en paralelo
+    (hasta max_workers) todos los que ya tienen sus dependencias completas.
+
+    Cada paso es un diccionario con 'name', 'func', 'tables' (tablas que
+    carga) y opcionalmente 'depends_on'. Si se indica run_step, se usa
+    run_step(step) en lugar de step['func'](). Los pasos cuyos nombres
+    están en completed se dan por terminados y no se ejecutan.
+
+    Si un paso falla, no se lanzan pasos nuevos, se espera a los que ya
+    están en ejecución y se relanza el primer error.
+    """
+    if fk_graph is None:
+        fk_graph = parse_foreign_keys()
+    if run_step is None:
+        run_step = lambda step: step['func']()
+
+    dependencies = build_dependencies(steps, fk_graph)
+    priority = critical_path_lengths(dependencies)
+    order = {step['name']: index for index, step in enumerate(steps)}
+    by_name = {step['name']: step for step in steps}
+
+    completed = set(completed or ())
+    pending = set(by_name) - completed
+    durations = {}
+    running = {}
+    failure = None
+    run_start = time.perf_counter()
+
+    def timed(step):
+        start = time.perf_counter()
+        run_step(step)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        while pending or running:
+            if failure is None:
+                ready = [name for name in pending if dependencies[name] <= completed]
+                ready.sort(key=lambda name: (-priority[name], order[name]))
+                for name in ready[:max(0, max_workers - len(running))]:
+                    print(f"--- Ejecutando migración para: {name} ---")
+                    pending.discard(name)
+                    running[executor.submit(timed, by_name[name])] = name
+
+            if not running:
+                if failure is None and pending:
+                    raise Exception(f"No hay pasos listos para ejecutar: {sorted(pending)}")
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    durations[name] = future.result()
+                    completed.add(name)
+                    print(f"--- Paso '{name}' completado en {durations[name]:.2f} s ---")
+                except Exception as e:
+                    print(f"--- Paso '{name}' falló: {e} ---")
+                    if failure is None:
+                        failure = (name, e)
+
+    if failure is not None:
+        name, error = failure
+        raise Exception(f"Falló el paso '{name}': {error}") from error
+
+    wall_time = time.perf_counter() - run_start
+    print(f"--- {len(durations)} pasos completados en {wall_time:.2f} s "
+          f"(suma secuencial: {sum(durations.values()):.2f} s, workers: {max_workers}) ---")
+    return durations
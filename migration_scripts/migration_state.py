@@ -0,0 +1,199 @@
+import hashlib
+import inspect
+import os
+import threading
+from datetime import datetime, timezone
+
+from psycopg2.extras import Json
+
+BASE_DIR = os.path.join(os.path.dirname(__file__), '..')
+
+STATE_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS public.migration_state (
+        step_name text PRIMARY KEY,
+        run_id text NOT NULL,
+        status text NOT NULL,
+        input_fingerprint text,
+        row_counts jsonb,
+        started_at timestamptz,
+        finished_at timestamptz,
+        duration_seconds numeric(12, 3),
+        error text
+    );
+"""
+
+
+def file_sha256(path):
+    """Devuelve el SHA-256 del contenido de un archivo."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def table_version(conn, table):
+    """
+    Versión de una tabla MySQL: su UPDATE_TIME en information_schema.tables
+    y su número de filas. A diferencia de CHECKSUM TABLE no recorre las
+    filas de la tabla (COUNT(*) usa el índice más pequeño).
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT UPDATE_TIME FROM information_schema.tables "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", (table,)
+        )
+        info = cursor.fetchall()
+        if not info:
+            return 'missing'
+        cursor.execute(f"SELECT COUNT(*) FROM `{table}`")
+        count = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+    return f"{info[0][0]}|{count}"
+
+
+def source_version(source, session):
+    """
+    Calcula la huella de una fuente declarada en un paso:
+      'csv:<archivo>'       -> SHA-256 del archivo (relativo a la raíz del repo)
+      'absmain:<tabla>'     -> table_version en vriunap_absmain
+      'pilar3:<tabla>'      -> table_version en vriunap_pilar3
+    """
+    kind, name = source.split(':', 1)
+    if kind == 'csv':
+        path = os.path.join(BASE_DIR, name)
+        return file_sha256(path) if os.path.exists(path) else 'missing'
+
+    conn = session.mysql_absmain() if kind == 'absmain' else session.mysql_pilar3()
+    return table_version(conn, name)
+
+
+def step_fingerprint(step, session, cache=None):
+    """
+    Huella de las entradas de un paso: el código del módulo que lo
+    implementa y la huella de cada una de sus fuentes ('sources').
+    Si cambia, el paso debe volver a ejecutarse aunque figure completado.
+    cache evita recalcular la huella de una fuente compartida por varios pasos.
+    """
+    cache = {} if cache is None else cache
+    digest = hashlib.sha256(step['name'].encode('utf-8'))
+    source_file = inspect.getsourcefile(step['func'])
+    if source_file:
+        digest.update(file_sha256(source_file).encode('utf-8'))
+    for source in sorted(step.get('sources', [])):
+        if source not in cache:
+            cache[source] = source_version(source, session)
+        digest.update(f"{source}={cache[source]}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def count_rows(conn, tables):
+    """Devuelve {tabla: número de filas} para las tablas indicadas."""
+    counts = {}
+    with conn.cursor() as cur:
+        for table in tables:
+            cur.execute(f"SELECT count(*) FROM {table}")
+            counts[table] = cur.fetchone()[0]
+    conn.commit()
+    return counts
+
+
+class MigrationStateStore:
+    """
+    Registro persistente del avance de la migración en la tabla
+    public.migration_state: una fila por paso con su estado (running,
+    completed, failed), la huella de sus entradas, las filas cargadas y
+    los tiempos. Es seguro usarlo desde varios workers a la vez.
+    """
+
+    def __init__(self, conn, run_id=None):
+        self.conn = conn
+        self.run_id = run_id or datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        self._lock = threading.Lock()
+        with self._lock, conn.cursor() as cur:
+            cur.execute(STATE_TABLE_DDL)
+            conn.commit()
+
+    def load(self):
+        """Devuelve {step_name: {status, input_fingerprint, ...}}."""
+        with self._lock, self.conn.cursor() as cur:
+            cur.execute("""
+                SELECT step_name, run_id, status, input_fingerprint, row_counts,
+                       started_at, finished_at, duration_seconds, error
+                FROM public.migration_state
+            """)
+            columns = [desc[0] for desc in cur.description]
+            states = {row[0]: dict(zip(columns, row)) for row in cur.fetchall()}
+            self.conn.commit()
+        return states
+
+    def reset(self):
+        """Borra el registro; se usa al iniciar una migración completa."""
+        self._execute("DELETE FROM public.migration_state")
+
+    def mark_running(self, step_name, fingerprint):
+        self._execute("""
+            INSERT INTO public.migration_state (step_name, run_id, status, input_fingerprint, started_at)
+            VALUES (%s, %s, 'running', %s, now())
+            ON CONFLICT (step_name) DO UPDATE SET
+                run_id = EXCLUDED.run_id, status = 'running',
+                input_fingerprint = EXCLUDED.input_fingerprint, row_counts = NULL,
+                started_at = now(), finished_at = NULL, duration_seconds = NULL, error = NULL
+        """, (step_name, self.run_id, fingerprint))
+
+    def mark_completed(self, step_name, row_counts, duration):
+        self._execute("""
+            UPDATE public.migration_state
+            SET status = 'completed', row_counts = %s, finished_at = now(), duration_seconds = %s
+            WHERE step_name = %s
+        """, (Json(row_counts), round(duration, 3), step_name))
+
+    def mark_failed(self, step_name, error, duration):
+        self._execute("""
+            UPDATE public.migration_state
+            SET status = 'failed', error = %s, finished_at = now(), duration_seconds = %s
+            WHERE step_name = %s
+        """, (str(error), round(duration, 3), step_name))
+
+    def _execute(self, query, params=None):
+        with self._lock, self.conn.cursor() as cur:
+            cur.execute(query, params)
+            self.conn.commit()
+
+
+def steps_to_rerun(steps, dependencies, states, fingerprints):
+    """
+    Decide qué pasos deben ejecutarse en un --resume: los que no están
+    completados o cuya huella cambió, más todos los que dependen de ellos
+    y los que cargan alguna de sus mismas tablas (al limpiar una tabla
+    compartida se pierden también las filas de los otros pasos).
+    """
+    rerun = {
+        step['name'] for step in steps
+        if states.get(step['name'], {}).get('status') != 'completed'
+        or states[step['name']].get('input_fingerprint') != fingerprints.get(step['name'])
+    }
+
+    dependents = {name: set() for name in dependencies}
+    for name, deps in dependencies.items():
+        for dep in deps:
+            dependents[dep].add(name)
+    owners = {}
+    for step in steps:
+        for table in step.get('tables', []):
+            owners.setdefault(table, set()).add(step['name'])
+    tables_of = {step['name']: step.get('tables', []) for step in steps}
+
+    queue = list(rerun)
+    while queue:
+        name = queue.pop()
+        related = set(dependents[name])
+        for table in tables_of[name]:
+            related |= owners[table]
+        for other in related - rerun:
+            rerun.add(other)
+            queue.append(other)
+    return rerun
+
@@ -0,0 +1,334 @@
+# Lectura en flujo de volcados de mysqldump (.sql o .sql.gz).
+#
+# Para ensayar la migración hoy hay que restaurar vriunap_absmain y
+# vriunap_pilar3 en un MySQL local, lo que toma bastante tiempo. MySQLDump
+# lee las filas directamente del archivo del volcado, sin importarlo: la
+# primera vez recorre el archivo y arma un índice con las columnas de cada
+# tabla (de su CREATE TABLE) y los tramos del archivo con sus INSERT; luego
+# rows(tabla) vuelve solo a esos tramos y entrega las filas una por una,
+# sin cargar la tabla en memoria.
+#
+# Se interpreta lo que escribe mysqldump: INSERT extendidos (muchas tuplas
+# por sentencia, en una o varias líneas), cadenas con escapes de barra
+# invertida o comillas dobladas, NULL, números, literales 0x... y el
+# prefijo _binary. Los valores se convierten según el tipo de su columna,
+# como lo haría mysql.connector: enteros, Decimal, float, date, datetime y
+# timedelta; las fechas cero ('0000-00-00') o inválidas se devuelven como
+# None. Las columnas binarias guardadas como cadena se devuelven como bytes
+# de su texto; para conservarlas exactas conviene volcar con --hex-blob.
+#
+# Un mismo archivo puede traer varias bases (mysqldump --databases): las
+# tablas se asocian a la base del último USE; sin USE, a ninguna.
+
+import gzip
+import re
+import threading
+import zlib
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+DUMP_ENCODING = 'utf-8'
+
+INTEGER_TYPES = {'tinyint', 'smallint', 'mediumint', 'int', 'integer', 'bigint', 'year'}
+DECIMAL_TYPES = {'decimal', 'numeric'}
+FLOAT_TYPES = {'float', 'double', 'real'}
+BINARY_TYPES = {'binary', 'varbinary', 'tinyblob', 'blob', 'mediumblob', 'longblob'}
+
+INSERT_HEADER = re.compile(
+    r"\s*(?:INSERT|REPLACE)(?:\s+(?:LOW_PRIORITY|DELAYED|HIGH_PRIORITY|IGNORE))*\s+INTO\s+"
+    r"(?:`([^`]+)`|(\w+))(?:\.(?:`([^`]+)`|(\w+)))?\s*(?:\(([^)]*)\))?\s*VALUES\s*",
+    re.IGNORECASE
+)
+CREATE_HEADER = re.compile(
+    r"\s*CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(?:`([^`]+)`|(\w+))(?:\.(?:`([^`]+)`|(\w+)))?\s*\(",
+    re.IGNORECASE
+)
+COLUMN_DEFINITION = re.compile(r"^\s*`([^`]+)`\s+([A-Za-z]+)", re.MULTILINE)
+USE_STATEMENT = re.compile(r"\s*USE\s+`?([^`;\s]+)`?", re.IGNORECASE)
+
+# Un valor dentro de VALUES (...), (...);
+VALUE_TOKEN = re.compile(
+    r"\s*(?:(?P<open>\()|(?P<close>\))|(?P<comma>,)|(?P<end>;)"
+    r"|(?:_\w+\s*)?'(?P<string>(?:[^'\\]|\\.|'')*)'"
+    r"|(?P<null>NULL)\b"
+    r"|0x(?P<hex>[0-9A-Fa-f]*)"
+    r"|(?P<number>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?))",
+    re.DOTALL | re.IGNORECASE
+)
+ESCAPE = re.compile(r"\\(.)|''", re.DOTALL)
+ESCAPES = {'0': '\0', 'b': '\b', 'n': '\n', 'r': '\r', 't': '\t', 'Z': '\x1a'}
+STATEMENT_KINDS = (b'INSERT', b'REPLACE', b'CREATE', b'USE')
+
+
+def unescape(text):
+    if '\\' not in text and "''" not in text:
+        return text
+    return ESCAPE.sub(lambda m: "'" if m.group(1) is None else ESCAPES.get(m.group(1), m.group(1)), text)
+
+
+def _balanced(statement):
+    """True si statement (bytes) no termina dentro de una cadena."""
+    return re.sub(rb'\\.', b'', statement, flags=re.DOTALL).count(b"'") % 2 == 0
+
+
+def _parse_date(text):
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        return None
+
+
+def _parse_datetime(text):
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return None
+
+
+def _parse_time(text):
+    negative = text.startswith('-')
+    hours, minutes, seconds = (text.lstrip('-').split(':') + ['0', '0'])[:3]
+    value = timedelta(hours=int(hours), minutes=int(minutes), seconds=float(seconds))
+    return -value if negative else value
+
+
+def convert_value(token, data_type):
+    """
+    Convierte un valor del volcado (str de una cadena o de un número, bytes
+    de un literal 0x o None) al tipo de Python de su columna MySQL.
+    """
+    kind, value = token
+    if value is None:
+        return None
+    if kind == 'hex':
+        return value
+    if kind == 'number':
+        if data_type in INTEGER_TYPES:
+            return int(value)
+        if data_type in FLOAT_TYPES:
+            return float(value)
+        if data_type in DECIMAL_TYPES or data_type is None and ('.' in value or 'e' in value.lower()):
+            return Decimal(value)
+        return int(value) if data_type is None else value
+    if data_type == 'date':
+        return _parse_date(value)
+    if data_type in ('datetime', 'timestamp'):
+        return _parse_datetime(value)
+    if data_type == 'time':
+        return _parse_time(value)
+    if data_type in BINARY_TYPES:
+        return value.encode(DUMP_ENCODING)
+    if data_type in INTEGER_TYPES:
+        return int(value) if value.lstrip('-').isdigit() else value
+    if data_type in DECIMAL_TYPES:
+        return Decimal(value)
+    if data_type in FLOAT_TYPES:
+        return float(value)
+    return value
+
+
+def parse_values(text, pos=0):
+    """
+    Genera las tuplas de la lista VALUES (...), (...) que empieza en
+    text[pos:], como listas de pares (tipo, valor) sin convertir.
+    """
+    match = VALUE_TOKEN.match
+    row = None
+    while True:
+        m = match(text, pos)
+        if m is None:
+            if not text[pos:].strip():
+                return
+            raise ValueError(f"Valor no reconocido en el volcado: {text[pos:pos + 60]!r}")
+        pos = m.end()
+        kind = m.lastgroup
+        if kind == 'open':
+            row = []
+        elif kind == 'close':
+            yield row
+            row = None
+        elif kind == 'end':
+            return
+        elif kind == 'comma':
+            continue
+        elif kind == 'string':
+            row.append(('string', unescape(m.group('string'))))
+        elif kind == 'null':
+            row.append(('null', None))
+        elif kind == 'number':
+            row.append(('number', m.group('number')))
+        else:
+            row.append(('hex', bytes.fromhex(m.group('hex'))))
+
+
+def _name(groups):
+    """(base, tabla) de los grupos `a`.`b` / a.b de un encabezado."""
+    first = groups[0] or groups[1]
+    second = groups[2] or groups[3]
+    return (first, second) if second else (None, first)
+
+
+class DumpTable:
+    """Columnas de una tabla del volcado y los tramos del archivo con sus filas."""
+
+    def __init__(self, database, name):
+        self.database = database
+        self.name = name
+        self.columns = []
+        self.ranges = []
+
+    def column_names(self):
+        return [name for name, _ in self.columns]
+
+
+class MySQLDump:
+    """
+    Volcado de mysqldump leído en flujo. El índice se arma la primera vez
+    que se consulta y se comparte entre hilos; cada lectura abre su propio
+    manejador del archivo.
+    """
+
+    def __init__(self, path, encoding=DUMP_ENCODING):
+        self.path = path
+        self.encoding = encoding
+        self._tables = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if self.path.endswith('.gz'):
+            return gzip.open(self.path, 'rb')
+        return open(self.path, 'rb')
+
+    def _statements(self, handle, start=0, end=None):
+        """Genera (inicio, fin, sentencia en bytes) desde start hasta end."""
+        handle.seek(start)
+        offset = start
+        buffer = []
+        statement_start = start
+        while end is None or offset < end:
+            line = handle.readline()
+            if not line:
+                break
+            if not buffer:
+                statement_start = offset
+            offset += len(line)
+            if not buffer and (line.startswith(b'--') or not line.strip()):
+                continue
+            buffer.append(line)
+            if line.rstrip().endswith(b';'):
+                statement = b''.join(buffer) if len(buffer) > 1 else line
+                if _balanced(statement):
+                    buffer = []
+                    yield statement_start, offset, statement
+
+    def _build_index(self):
+        tables = {}
+        database = None
+        with self._open() as handle:
+            for start, end, statement in self._statements(handle):
+                head = statement.lstrip()[:7].upper()
+                if not head.startswith(STATEMENT_KINDS):
+                    continue
+                head_text = statement[:512].decode(self.encoding, errors='replace')
+                if head.startswith(b'USE'):
+                    m = USE_STATEMENT.match(head_text)
+                    if m:
+                        database = m.group(1)
+                elif head.startswith(b'CREATE'):
+                    m = CREATE_HEADER.match(head_text)
+                    if m:
+                        schema, name = _name(m.groups())
+                        table = DumpTable(schema or database, name)
+                        body = statement.decode(self.encoding, errors='replace')
+                        table.columns = [(column, data_type.lower())
+                                         for column, data_type in COLUMN_DEFINITION.findall(body)]
+                        tables[(table.database, name.lower())] = table
+                else:
+                    m = INSERT_HEADER.match(head_text)
+                    if m:
+                        schema, name = _name(m.groups()[:4])
+                        key = (schema or database, name.lower())
+                        table = tables.setdefault(key, DumpTable(key[0], name))
+                        if table.ranges and table.ranges[-1][1] == start:
+                            table.ranges[-1] = (table.ranges[-1][0], end)
+                        else:
+                            table.ranges.append((start, end))
+        return tables
+
+    def tables(self):
+        """{(base, tabla en minúsculas): DumpTable} de todo el volcado."""
+        with self._lock:
+            if self._tables is None:
+                self._tables = self._build_index()
+            return self._tables
+
+    def table(self, name, database=None):
+        """DumpTable de name en database (o en el volcado sin USE), o None."""
+        tables = self.tables()
+        return tables.get((database, name.lower())) or tables.get((None, name.lower()))
+
+    def tables_in(self, database=None):
+        return [table for (schema, _), table in self.tables().items() if schema in (database, None)]
+
+    def _raw_rows(self, table):
+        """Genera (columnas del INSERT, valores sin convertir) de table."""
+        with self._open() as handle:
+            for start, end in table.ranges:
+                for _, _, statement in self._statements(handle, start, end):
+                    text = statement.decode(self.encoding, errors='replace')
+                    m = INSERT_HEADER.match(text)
+                    if not m:
+                        continue
+                    columns = None
+                    if m.group(5):
+                        columns = [column.strip().strip('`') for column in m.group(5).split(',')]
+                    for values in parse_values(text, m.end()):
+                        yield columns, values
+
+    def rows(self, name, database=None):
+        """
+        Genera las filas de la tabla name como tuplas en el orden de sus
+        columnas (DumpTable.columns), con los valores ya convertidos.
+        """
+        table = self.table(name, database)
+        if table is None:
+            raise Exception(f"La tabla {name} no está en el volcado {self.path}.")
+        types = {column.lower(): data_type for column, data_type in table.columns}
+        order = [column.lower() for column in table.column_names()]
+        for columns, values in self._raw_rows(table):
+            if columns is None:
+                if not order:
+                    yield tuple(convert_value(token, None) for token in values)
+                    continue
+                if len(values) != len(order):
+                    raise ValueError(f"{name}: una fila tiene {len(values)} valores y la tabla "
+                                     f"{len(order)} columnas.")
+                yield tuple(convert_value(token, types[column]) for column, token in zip(order, values))
+            else:
+                given = dict(zip((column.lower() for column in columns), values))
+                yield tuple(convert_value(given.get(column, ('null', None)), types.get(column))
+                            for column in order or given)
+
+    def checksum(self, name, database=None):
+        """CRC32 del texto de los INSERT de la tabla (cambia si cambian sus filas)."""
+        table = self.table(name, database)
+        if table is None:
+            return None
+        crc = 0
+        with self._open() as handle:
+            for start, end in table.ranges:
+                for _, _, statement in self._statements(handle, start, end):
+                    crc = zlib.crc32(statement, crc)
+        return crc
+
+
+_DUMPS = {}
+_DUMPS_LOCK = threading.Lock()
+
+
+def open_dump(path):
+    """Devuelve el MySQLDump de path, compartido para reutilizar su índice."""
+    with _DUMPS_LOCK:
+        if path not in _DUMPS:
+            _DUMPS[path] = MySQLDump(path)
+        return _DUMPS[path]
@@ -1,23 +1,137 @@
-import requests
+import argparse
+import logging
 import os
-import sys
-from datetime import datetime
 
-# Add the parent directory to the Python path for module resolution
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from psycopg2.extras import execute_values
 
-from migration_scripts.db_connections import get_postgres_connection
+from bulk_loader import bulk_load
+from coercion import Coercer
+from db_connections import get_postgres_connection
+from sunedu_cache import SuneduCache
+from sunedu_client import DEFAULT_CONCURRENCY, DEFAULT_RATE, SuneduClient
 
-# --- Configuration ---
-API_BASE_URL = "https://service7.unap.edu.pe/api/v1/sunedu/consulta/{dni}"
-API_TOKEN = "1|xrpNWzmI8EdDfvnKQpURERHiO4RraB4WmcIr810MjapBmmjXKWNGczJGTY"
+REFRESH_MODES = ('stale', 'all', 'none')
+DEFAULT_BATCH_SIZE = int(os.getenv("SUNEDU_BATCH_SIZE", "200"))  # users per transaction
 
-def populate_estudios_from_sunedu():
+ESTUDIOS_COLUMNS = [
+    'id_usuario', 'id_universidad', 'id_grado_academico', 'titulo_profesional',
+    'especialidad', 'fecha_emision', 'resolucion', 'id_tipo_obtencion'
+]
+DEGREE_VALUES = {'fechaEmision': 'date:%d/%m/%Y'}
+
+logger = logging.getLogger(__name__)
+
+def lookup_degrees(client, cache, dnis, refresh='stale'):
+    """
+    Yields a SuneduResult per DNI. With refresh='stale' fresh cache entries
+    are reused and only new or expired DNIs are queried; 'all' queries every
+    DNI and 'none' works offline, skipping DNIs that are not cached.
+    New results are stored in the cache.
+    """
+    cached = cache.get_many(dnis) if refresh != 'all' else {}
+    print(f"💾 {len(cached)} DNI(s) served from the cache ({cache.path}).")
+    for result in cached.values():
+        yield result
+
+    if refresh == 'none':
+        return
+    missing = [dni for dni in dnis if dni not in cached]
+    print(f"🌐 {len(missing)} DNI(s) to query from the SUNEDU API.")
+    for result in client.fetch_many(missing):
+        cache.put(result)
+        yield result
+
+def ensure_university_name_index(cur):
+    """Creates (if missing) the unique index on dic_universidades.nombre used by the upsert."""
+    cur.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS dic_universidades_nombre_key "
+        "ON public.dic_universidades (nombre)"
+    )
+
+def upsert_universities(cur, degrees_by_name, university_ids):
+    """
+    Resolves the ids of the universities named in a batch with a single
+    INSERT ... ON CONFLICT ... RETURNING. Only names missing from
+    university_ids are sent; university_ids is updated in place.
+    """
+    new_rows = [
+        (name, degree.get('pais'), degree.get('tipoInstitucion'), degree.get('tipoGestion'), True)
+        for name, degree in degrees_by_name.items() if name not in university_ids
+    ]
+    if not new_rows:
+        return 0
+    # DO UPDATE (instead of DO NOTHING) so that existing rows also return their id
+    returned = execute_values(
+        cur,
+        """
+        INSERT INTO dic_universidades (nombre, pais, tipo_institucion, tipo_gestion, estado_dic_universidades)
+        VALUES %s
+        ON CONFLICT (nombre) DO UPDATE SET nombre = EXCLUDED.nombre
+        RETURNING nombre, id
+        """,
+        new_rows, page_size=len(new_rows), fetch=True
+    )
+    for name, uni_id in returned:
+        university_ids[name] = uni_id
+    logger.debug("Resolved %d new universities.", len(returned))
+    return len(returned)
+
+def write_batch(conn, batch, grados_map, api_obtencion_id, university_ids, degree_values):
+    """
+    Writes the degrees of a batch of (user_id, SuneduResult) pairs:
+    universities first (one upsert), then tbl_estudios through COPY,
+    all in one transaction. degree_values (a Coercer) converts the
+    degrees' fields in place. Returns the number of degrees inserted.
+    """
+    degree_values.apply([degree for _, result in batch for degree in result.degrees])
+    degrees_by_name = {}
+    for _, result in batch:
+        for degree in result.degrees:
+            if degree.get('universidad'):
+                degrees_by_name.setdefault(degree['universidad'], degree)
+
+    rows = []
+    with conn.cursor() as cur:
+        upsert_universities(cur, degrees_by_name, university_ids)
+
+        for user_id, result in batch:
+            for degree in result.degrees:
+                uni_name = degree.get('universidad')
+                if not uni_name:
+                    continue
+                grado_abbr = degree.get('abreviaturaTitulo')
+                if grado_abbr not in grados_map:
+                    logger.debug("DNI %s: skipping degree with unknown abbreviation '%s'", result.dni, grado_abbr)
+                    continue
+
+                rows.append((
+                    user_id,
+                    university_ids[uni_name],
+                    grados_map[grado_abbr],
+                    degree.get('tituloProfesional'),
+                    degree.get('especialidad'),
+                    degree.get('fechaEmision'),
+                    degree.get('resolucion'),
+                    api_obtencion_id
+                ))
+                logger.debug("DNI %s: %s", result.dni, degree.get('tituloProfesional'))
+
+        bulk_load(cur, 'public.tbl_estudios', ESTUDIOS_COLUMNS, rows)
+    conn.commit()
+    return len(rows)
+
+def populate_estudios_from_sunedu(concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE, refresh='stale',
+                                  batch_size=DEFAULT_BATCH_SIZE):
     """
     Fetches academic degrees from the SUNEDU API for each user in tbl_usuarios
     and populates the tbl_estudios and dic_universidades tables.
+    Lookups run concurrently (see sunedu_client.py) and are cached on disk
+    (see sunedu_cache.py). Results are collected into batches of
+    `batch_size` users; each batch is written in one transaction.
     """
     conn = None
+    client = SuneduClient(concurrency=concurrency, rate=rate)
+    cache = SuneduCache()
     try:
         conn = get_postgres_connection()
         cur = conn.cursor()
@@ -27,6 +141,8 @@ def populate_estudios_from_sunedu():
         print("🧹 Clearing tbl_estudios and dic_universidades for a fresh start...")
         cur.execute("TRUNCATE TABLE public.tbl_estudios RESTART IDENTITY CASCADE;")
         cur.execute("TRUNCATE TABLE public.dic_universidades RESTART IDENTITY CASCADE;")
+        ensure_university_name_index(cur)
+        conn.commit()
         print("   Tables cleared successfully.")
 
         # 2. Pre-load dictionaries from the database for efficiency
@@ -42,108 +158,79 @@ def populate_estudios_from_sunedu():
         cur.execute("SELECT id, num_doc_identidad FROM tbl_usuarios WHERE num_doc_identidad ~ '^[0-9]{8}$'")
         users = cur.fetchall()
         total_users = len(users)
+        user_ids = {dni: user_id for user_id, dni in users}
         print(f"👥 Found {total_users} users with valid DNIs to process.")
 
-        university_cache = {} # Cache to avoid redundant DB queries for universities
+        university_ids = {} # Universities resolved so far, by name
+        degree_values = Coercer('sunedu', DEGREE_VALUES)
+        stats = {'processed': 0, 'with_degrees': 0, 'without_degrees': 0, 'api_errors': 0,
+                 'degrees_inserted': 0, 'failed_batches': 0}
+        batch = []
 
-        # 4. Iterate over each user, query the API, and populate the database
-        for i, (user_id, dni) in enumerate(users):
-            print(f"\n--- Processing user {i+1}/{total_users} (DNI: {dni}) ---")
-            
+        def flush():
             try:
-                headers = {'Authorization': f'Bearer {API_TOKEN}'}
-                response = requests.get(API_BASE_URL.format(dni=dni), headers=headers, timeout=10)
-
-                if response.status_code != 200:
-                    print(f"   ❌ API Error: Received status code {response.status_code}")
-                    continue
-
-                data = response.json().get('data', {}).get('gtPersona', [])
-                if not data:
-                    print("   ℹ️ No academic degrees found for this DNI.")
-                    continue
-                
-                print(f"   ✅ Found {len(data)} academic degree(s).")
-
-                for degree in data:
-                    # 5. Find or Create University
-                    uni_name = degree.get('universidad')
-                    if not uni_name:
-                        continue
-
-                    if uni_name in university_cache:
-                        uni_id = university_cache[uni_name]
-                    else:
-                        cur.execute("SELECT id FROM dic_universidades WHERE nombre = %s", (uni_name,))
-                        result = cur.fetchone()
-                        if result:
-                            uni_id = result[0]
-                        else:
-                            print(f"      -> New University: '{uni_name}'. Adding to dictionary.")
-                            cur.execute(
-                                """
-                                INSERT INTO dic_universidades (nombre, pais, tipo_institucion, tipo_gestion, estado_dic_universidades)
-                                VALUES (%s, %s, %s, %s, %s) RETURNING id;
-                                """,
-                                (
-                                    uni_name,
-                                    degree.get('pais'),
-                                    degree.get('tipoInstitucion'),
-                                    degree.get('tipoGestion'),
-                                    True
-                                )
-                            )
-                            uni_id = cur.fetchone()[0]
-                        university_cache[uni_name] = uni_id
-
-                    # 6. Map data and insert into tbl_estudios
-                    grado_abbr = degree.get('abreviaturaTitulo')
-                    if grado_abbr not in grados_map:
-                        print(f"      ⚠️ Skipping degree: Unknown abbreviation '{grado_abbr}'")
-                        continue
-                    
-                    # Format date from DD/MM/YYYY to YYYY-MM-DD
-                    try:
-                        fecha_emision = datetime.strptime(degree.get('fechaEmision'), '%d/%m/%Y').strftime('%Y-%m-%d')
-                    except (ValueError, TypeError):
-                        fecha_emision = None
-
-                    cur.execute(
-                        """
-                        INSERT INTO tbl_estudios (
-                            id_usuario, id_universidad, id_grado_academico, titulo_profesional,
-                            especialidad, fecha_emision, resolucion, id_tipo_obtencion
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
-                        """,
-                        (
-                            user_id,
-                            uni_id,
-                            grados_map[grado_abbr],
-                            degree.get('tituloProfesional'),
-                            degree.get('especialidad'),
-                            fecha_emision,
-                            degree.get('resolucion'),
-                            api_obtencion_id
-                        )
-                    )
-                    print(f"      -> Inserted: {degree.get('tituloProfesional')}")
-
-                conn.commit()
-
-            except requests.exceptions.RequestException as e:
-                print(f"   ❌ Network Error: {e}")
+                stats['degrees_inserted'] += write_batch(conn, batch, grados_map, api_obtencion_id, university_ids,
+                                                       degree_values)
             except Exception as e:
-                print(f"   ❌ An unexpected error occurred: {e}")
                 conn.rollback()
+                # Universities upserted by the failed batch were rolled back too
+                university_ids.clear()
+                stats['failed_batches'] += 1
+                print(f"   ❌ Failed to write a batch of {len(batch)} users: {e}")
+            batch.clear()
+            print(f"   Progress: {stats['processed']}/{total_users} users, "
+                  f"{stats['degrees_inserted']} degrees inserted.")
+
+        # 4. Query the API concurrently and write the results in batches
+        for result in lookup_degrees(client, cache, list(user_ids), refresh):
+            stats['processed'] += 1
+            if result.status == 'error':
+                stats['api_errors'] += 1
+                logger.warning("DNI %s: API error: %s (after %d attempt(s))",
+                               result.dni, result.error, result.attempts)
+                continue
+            if not result.degrees:
+                stats['without_degrees'] += 1
+                logger.debug("DNI %s: no academic degrees found.", result.dni)
+                continue
+
+            stats['with_degrees'] += 1
+            logger.debug("DNI %s: found %d academic degree(s).", result.dni, len(result.degrees))
+            batch.append((user_ids[result.dni], result))
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
 
         print("\n🎉 Process completed successfully!")
+        print(f"📊 Summary: {stats}, {len(university_ids)} universities")
+        print(f"📊 API stats: {client.stats}")
+        degree_values.print_counts()
 
     except Exception as e:
         print(f"A critical error occurred: {e}")
     finally:
+        client.close()
+        cache.close()
         if conn:
             conn.close()
             print("PostgreSQL connection closed.")
 
 if __name__ == "__main__":
-    populate_estudios_from_sunedu()
+    parser = argparse.ArgumentParser(description="Populate tbl_estudios from the SUNEDU API.")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Maximum simultaneous API requests (default: %(default)s).")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help="Maximum API requests per second, 0 for no limit (default: %(default)s).")
+    parser.add_argument("--refresh", choices=REFRESH_MODES, default='stale',
+                        help="Which DNIs to query from the API: 'stale' (not cached or expired), "
+                             "'all', or 'none' to use only the cache (default: %(default)s).")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Users with degrees written per transaction (default: %(default)s).")
+    parser.add_argument("--log-level", default=os.getenv("SUNEDU_LOG_LEVEL", "INFO"),
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help="DEBUG also logs every user and degree (default: %(default)s).")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level, format='   %(levelname)s %(message)s')
+    populate_estudios_from_sunedu(concurrency=args.concurrency, rate=args.rate, refresh=args.refresh,
+                                  batch_size=args.batch_size)
@@ -3,18 +3,33 @@ import csv
 import os
 import psycopg2
 from db_connections import get_postgres_connection, get_mysql_absmain_connection
+from bulk_loader import bulk_load_with_ids
+from coercion import Coercer
+from crosswalk import get_crosswalk
+from entity_resolution import load_merge_plan
+from incremental_sync import ensure_upsert_key
+from row_hash_merge import merge_rows, print_merge_counts
+from run_metrics import record
 
-def populate_tbl_docentes():
+DOCENTES_COLUMNS = ['id_usuario', 'id_categoria', 'codigo_airhs', 'id_especialidad', 'estado_docente',
+                    'id_antiguo']
+DOCENTES_VALUES = {'Estado': 'flag:A'}
+
+def populate_tbl_docentes(session=None, incremental=False):
     """
     Puebla la tabla tbl_docentes en PostgreSQL a partir de tblDocentes en MySQL,
     asegurándose de incluir el id_antiguo para el mapeo.
+
+    Con incremental=True no vacía la tabla: tblDocentes no tiene fecha de
+    modificación, así que se lee completa y solo se aplican las diferencias
+    con lo ya cargado (ver row_hash_merge.py).
     """
     print("--- Poblando tbl_docentes (con id_antiguo) ---")
     pg_conn = None
     mysql_conn = None
     try:
-        pg_conn = get_postgres_connection()
-        mysql_conn = get_mysql_absmain_connection()
+        pg_conn = session.postgres() if session else get_postgres_connection()
+        mysql_conn = session.mysql_absmain() if session else get_mysql_absmain_connection()
 
         if pg_conn is None or mysql_conn is None:
             raise Exception("No se pudo conectar a una de las bases de datos.")
@@ -23,20 +38,21 @@ def populate_tbl_docentes():
         mysql_cur = mysql_conn.cursor(dictionary=True)
 
         # 1. Obtener mapeo de DNI a id_usuario nuevo de PostgreSQL
-        pg_cur.execute("SELECT id, num_doc_identidad FROM tbl_usuarios WHERE num_doc_identidad IS NOT NULL")
-        user_map = {row[1]: row[0] for row in pg_cur.fetchall()}
+        user_map = get_crosswalk(session).get('usuarios_por_dni', pg_conn)
+        merge_plan = load_merge_plan(session)
         print(f"  Se mapearon {len(user_map)} usuarios desde PostgreSQL por DNI.")
 
         # 2. Leer docentes de MySQL
         mysql_cur.execute("SELECT Id, DNI, IdCategoria, Codigo, IdEspecialidad, Estado FROM tblDocentes")
-        source_docentes = mysql_cur.fetchall()
+        source_docentes = Coercer('tblDocentes', DOCENTES_VALUES).apply(mysql_cur.fetchall())
         print(f"  Se encontraron {len(source_docentes)} docentes en la tabla de origen.")
 
         # 3. Preparar los datos para la inserción
         docentes_to_insert = []
-        unmapped_users = 0
+        unmapped_ids = []
         for doc in source_docentes:
-            dni = doc['DNI']
+            # Los docentes fusionados se asocian al usuario del registro canónico
+            dni = merge_plan.dni_for('docentes', doc['Id'], doc['DNI'])
             id_usuario = user_map.get(dni)
             
             if id_usuario:
@@ -45,28 +61,38 @@ def populate_tbl_docentes():
                     doc['IdCategoria'],
                     doc['Codigo'],
                     doc['IdEspecialidad'],
-                    1 if doc['Estado'] == 'A' else 0,
+                    doc['Estado'],
                     doc['Id']  # id_antiguo
                 ))
             else:
-                unmapped_users += 1
+                unmapped_ids.append(doc['Id'])
         
         print(f"  Se prepararon {len(docentes_to_insert)} registros de docentes para insertar.")
-        if unmapped_users > 0:
-            print(f"  ADVERTENCIA: Se ignoraron {unmapped_users} docentes porque su DNI no fue encontrado en tbl_usuarios.")
+        if unmapped_ids:
+            print(f"  ADVERTENCIA: Se ignoraron {len(unmapped_ids)} docentes porque su DNI no fue encontrado en tbl_usuarios.")
+            # En una sincronización siguen en el origen: no se rechazan ni se desactivan
+            if not incremental:
+                record(rows_rejected=len(unmapped_ids))
 
         # 4. Limpiar e insertar los datos en PostgreSQL
+        if incremental:
+            ensure_upsert_key(pg_cur, 'tbl_docentes')
+            counts = merge_rows(pg_cur, 'tbl_docentes', DOCENTES_COLUMNS, docentes_to_insert,
+                                keep_keys=unmapped_ids, deactivate={'estado_docente': 0})
+            pg_conn.commit()
+            print_merge_counts('tbl_docentes', counts)
+            print("--- Sincronización de tbl_docentes completada. ---")
+            return
+
         print("  Limpiando la tabla tbl_docentes...")
-        pg_cur.execute("TRUNCATE TABLE public.tbl_docentes RESTART IDENTITY CASCADE;")
+        pg_cur.execute("TRUNCATE TABLE tbl_docentes RESTART IDENTITY CASCADE;")
         
         if docentes_to_insert:
-            insert_query = """
-            INSERT INTO tbl_docentes (
-                id_usuario, id_categoria, codigo_airhs, id_especialidad, estado_docente, id_antiguo
-            ) VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            pg_cur.executemany(insert_query, docentes_to_insert)
+            docente_map = bulk_load_with_ids(
+                pg_cur, 'tbl_docentes', DOCENTES_COLUMNS, docentes_to_insert, key_column='id_antiguo'
+            )
             pg_conn.commit()
+            get_crosswalk(session).publish('docentes_por_id_antiguo', 'populate_tbl_docentes', docente_map)
             print(f"  Se insertaron {len(docentes_to_insert)} registros en tbl_docentes.")
 
         print("--- Poblado de tbl_docentes completado. ---")
@@ -75,9 +101,10 @@ def populate_tbl_docentes():
         print(f"  ERROR CRÍTICO durante el poblado de tbl_docentes: {e}")
         if pg_conn:
             pg_conn.rollback()
+        raise e
     finally:
-        if pg_conn: pg_conn.close()
-        if mysql_conn: mysql_conn.close()
+        if pg_conn and session is None: pg_conn.close()
+        if mysql_conn and session is None: mysql_conn.close()
 
 if __name__ == '__main__':
     populate_tbl_docentes()
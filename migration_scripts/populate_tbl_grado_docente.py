@@ -2,7 +2,7 @@
 import psycopg2
 from db_connections import get_postgres_connection
 
-def populate_tbl_grado_docente():
+def populate_tbl_grado_docente(session=None):
     """
     Populates the tbl_grado_docente table based on data from tbl_estudios
     and tbl_docente_categoria_historial.
@@ -10,15 +10,15 @@ def populate_tbl_grado_docente():
     conn = None
     try:
         print("Connecting to the PostgreSQL database...")
-        conn = get_postgres_connection()
+        conn = session.postgres() if session else get_postgres_connection()
         cur = conn.cursor()
 
         print("Truncating tbl_grado_docente table...")
-        cur.execute("TRUNCATE TABLE public.tbl_grado_docente RESTART IDENTITY;")
+        cur.execute("TRUNCATE TABLE tbl_grado_docente RESTART IDENTITY;")
 
         print("Populating tbl_grado_docente with processed data...")
         sql_query = """
-        INSERT INTO public.tbl_grado_docente (
+        INSERT INTO tbl_grado_docente (
             id_docente,
             grado_academico,
             categoria_descripcion,
@@ -42,9 +42,9 @@ def populate_tbl_grado_docente():
                     END
                 ) as rn_grado
             FROM
-                public.tbl_estudios e
+                tbl_estudios e
             JOIN
-                public.dic_grados_academicos ga ON e.id_grado_academico = ga.id
+                dic_grados_academicos ga ON e.id_grado_academico = ga.id
         ),
         -- CTE to get the most recent category for each docent
         CategoriasRecientes AS (
@@ -55,7 +55,7 @@ def populate_tbl_grado_docente():
                 -- Assign a rank based on the resolution date to get the most recent one
                 ROW_NUMBER() OVER(PARTITION BY dch.id_docente ORDER BY dch.fecha_resolucion DESC) as rn_categoria
             FROM
-                public.tbl_docente_categoria_historial dch
+                tbl_docente_categoria_historial dch
             WHERE
                 dch.fecha_resolucion IS NOT NULL
         ),
@@ -65,9 +65,9 @@ def populate_tbl_grado_docente():
                 d.id AS id_docente,
                 d.id_usuario
             FROM
-                public.tbl_docentes d
+                tbl_docentes d
             INNER JOIN
-                public.tbl_estudios e ON d.id_usuario = e.id_usuario
+                tbl_estudios e ON d.id_usuario = e.id_usuario
         )
         -- Final query that joins the information
         SELECT
@@ -83,7 +83,7 @@ def populate_tbl_grado_docente():
         LEFT JOIN
             CategoriasRecientes cr ON de.id_docente = cr.id_docente AND cr.rn_categoria = 1 -- Only the most recent category
         LEFT JOIN
-            public.dic_categoria cat ON cr.id_categoria = cat.id;
+            dic_categoria cat ON cr.id_categoria = cat.id;
         """
         cur.execute(sql_query)
 
@@ -94,8 +94,9 @@ def populate_tbl_grado_docente():
         print(f"Error: {error}")
         if conn is not None:
             conn.rollback()
+        raise error
     finally:
-        if conn is not None:
+        if conn is not None and session is None:
             conn.close()
             print("Database connection closed.")
 
@@ -2,18 +2,31 @@ import csv
 import os
 import psycopg2
 from db_connections import get_postgres_connection, get_mysql_pilar3_connection
+from bulk_loader import bulk_load
+from coercion import Coercer
+from crosswalk import get_crosswalk
+from entity_resolution import load_merge_plan
+from incremental_sync import ensure_upsert_key
+from row_hash_merge import merge_rows, print_merge_counts
+from run_metrics import record
 
-def populate_tbl_tesistas():
+TESISTAS_COLUMNS = ['id_usuario', 'codigo_estudiante', 'id_estructura_academica', 'estado', 'id_antiguo']
+TESISTAS_VALUES = {'Activo': 'flag:A'}
+
+def populate_tbl_tesistas(session=None, incremental=False):
     """
     Puebla la tabla tbl_tesistas en PostgreSQL a partir de tblTesistas en MySQL,
     asegurándose de incluir el id_antiguo para el mapeo.
+
+    Con incremental=True no vacía la tabla: solo aplica las diferencias con
+    lo ya cargado (ver row_hash_merge.py).
     """
     print("--- Poblando tbl_tesistas (con id_antiguo) ---")
     pg_conn = None
     mysql_conn = None
     try:
-        pg_conn = get_postgres_connection()
-        mysql_conn = get_mysql_pilar3_connection()
+        pg_conn = session.postgres() if session else get_postgres_connection()
+        mysql_conn = session.mysql_pilar3() if session else get_mysql_pilar3_connection()
 
         if pg_conn is None or mysql_conn is None:
             raise Exception("No se pudo conectar a una de las bases de datos.")
@@ -22,20 +35,21 @@ def populate_tbl_tesistas():
         mysql_cur = mysql_conn.cursor(dictionary=True)
 
         # 1. Obtener mapeo de DNI a id_usuario nuevo de PostgreSQL
-        pg_cur.execute("SELECT id, num_doc_identidad FROM tbl_usuarios WHERE num_doc_identidad IS NOT NULL")
-        user_map = {row[1]: row[0] for row in pg_cur.fetchall()}
+        user_map = get_crosswalk(session).get('usuarios_por_dni', pg_conn)
+        merge_plan = load_merge_plan(session)
         print(f"  Se mapearon {len(user_map)} usuarios desde PostgreSQL por DNI.")
 
         # 2. Leer tesistas de MySQL
         mysql_cur.execute("SELECT Id, DNI, Codigo, IdCarrera, Activo FROM tblTesistas")
-        source_tesistas = mysql_cur.fetchall()
+        source_tesistas = Coercer('tblTesistas', TESISTAS_VALUES).apply(mysql_cur.fetchall())
         print(f"  Se encontraron {len(source_tesistas)} tesistas en la tabla de origen.")
 
         # 3. Preparar los datos para la inserción
         tesistas_to_insert = []
-        unmapped_users = 0
+        unmapped_ids = []
         for tesista in source_tesistas:
-            dni = tesista['DNI']
+            # Los tesistas fusionados se asocian al usuario del registro canónico
+            dni = merge_plan.dni_for('tesistas', tesista['Id'], tesista['DNI'])
             id_usuario = user_map.get(dni)
             
             if id_usuario:
@@ -43,27 +57,34 @@ def populate_tbl_tesistas():
                     id_usuario,
                     tesista['Codigo'],
                     tesista['IdCarrera'],
-                    1 if tesista['Activo'] == 'A' else 0,
+                    tesista['Activo'],
                     tesista['Id']  # id_antiguo
                 ))
             else:
-                unmapped_users += 1
+                unmapped_ids.append(tesista['Id'])
         
         print(f"  Se prepararon {len(tesistas_to_insert)} registros de tesistas para insertar.")
-        if unmapped_users > 0:
-            print(f"  ADVERTENCIA: Se ignoraron {unmapped_users} tesistas porque su DNI no fue encontrado en tbl_usuarios.")
+        if unmapped_ids:
+            print(f"  ADVERTENCIA: Se ignoraron {len(unmapped_ids)} tesistas porque su DNI no fue encontrado en tbl_usuarios.")
+            # En una sincronización siguen en el origen: no se rechazan ni se desactivan
+            if not incremental:
+                record(rows_rejected=len(unmapped_ids))
 
         # 4. Limpiar e insertar los datos en PostgreSQL
+        if incremental:
+            ensure_upsert_key(pg_cur, 'tbl_tesistas')
+            counts = merge_rows(pg_cur, 'tbl_tesistas', TESISTAS_COLUMNS, tesistas_to_insert,
+                                keep_keys=unmapped_ids, deactivate={'estado': 0})
+            pg_conn.commit()
+            print_merge_counts('tbl_tesistas', counts)
+            print("--- Sincronización de tbl_tesistas completada. ---")
+            return
+
         print("  Limpiando la tabla tbl_tesistas...")
-        pg_cur.execute("TRUNCATE TABLE public.tbl_tesistas RESTART IDENTITY CASCADE;")
+        pg_cur.execute("TRUNCATE TABLE tbl_tesistas RESTART IDENTITY CASCADE;")
         
         if tesistas_to_insert:
-            insert_query = """
-            INSERT INTO tbl_tesistas (
-                id_usuario, codigo_estudiante, id_estructura_academica, estado, id_antiguo
-            ) VALUES (%s, %s, %s, %s, %s)
-            """
-            pg_cur.executemany(insert_query, tesistas_to_insert)
+            bulk_load(pg_cur, 'tbl_tesistas', TESISTAS_COLUMNS, tesistas_to_insert)
             pg_conn.commit()
             print(f"  Se insertaron {len(tesistas_to_insert)} registros en tbl_tesistas.")
 
@@ -73,9 +94,10 @@ def populate_tbl_tesistas():
         print(f"  ERROR CRÍTICO durante el poblado de tbl_tesistas: {e}")
         if pg_conn:
             pg_conn.rollback()
+        raise e
     finally:
-        if pg_conn: pg_conn.close()
-        if mysql_conn: mysql_conn.close()
+        if pg_conn and session is None: pg_conn.close()
+        if mysql_conn and session is None: mysql_conn.close()
 
 if __name__ == '__main__':
     populate_tbl_tesistas()
@@ -0,0 +1,155 @@
+# Carga por diferencias con hash de cada fila (merge).
+#
+# tblDocentes, tblTesistas, dicCarreras y tblLineas no tienen una fecha de
+# modificación confiable, así que no sirven para una marca de agua (ver
+# incremental_sync.py). En su modo incremental, merge_rows calcula un hash
+# de cada fila ya mapeada (las tuplas que el paso cargaría) y lo compara
+# con el hash guardado en public.migration_row_hashes para la misma llave
+# (id_antiguo o el id natural). Solo se envían a PostgreSQL las filas
+# nuevas o cambiadas (un upsert por la llave); una resincronización sin
+# cambios cuesta una lectura del origen y de las llaves del destino, sin
+# TRUNCATE ni la cascada de tbl_docentes a tbl_conformacion_jurados y
+# tbl_correcciones_jurados.
+#
+# Las llaves que ya no vienen del origen no se borran por defecto: las
+# tablas que usan el merge están referenciadas por llaves foráneas sin
+# ON DELETE (jurados, historial, grados, sublíneas), así que un DELETE
+# abortaría la sincronización en cuanto una fila tenga referencias. Cada
+# paso indica cómo desactivarlas (p. ej. estado_docente = 0); sin eso solo
+# se reportan. El borrado se habilita por tabla con MIGRATION_MERGE_DELETE
+# (lista separada por comas) y solo alcanza a las filas sin referencias.
+#
+# Un hash guardado solo vale si la llave sigue en el destino: las llaves
+# se leen en cada merge, de modo que tras un TRUNCATE (una migración
+# completa) las filas se vuelven a enviar.
+
+import hashlib
+import os
+
+from psycopg2.extras import execute_values
+
+from bulk_loader import bulk_load, format_copy_value
+from incremental_sync import upsert_clause
+from run_metrics import step_phase
+
+HASH_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS public.migration_row_hashes (
+        table_name text NOT NULL,
+        row_key text NOT NULL,
+        row_hash text NOT NULL,
+        PRIMARY KEY (table_name, row_key)
+    );
+"""
+
+# Tablas en las que las llaves que desaparecen del origen se eliminan
+DELETE_REMOVED_TABLES = {name.strip() for name in os.getenv("MIGRATION_MERGE_DELETE", "").split(',') if name.strip()}
+
+# Llaves que desaparecen que se muestran en el reporte
+REMOVED_KEYS_SHOWN = 20
+
+# Separador entre valores: el de COPY, que format_copy_value escapa dentro
+# de los valores, así que dos filas distintas no dan el mismo texto
+FIELD_SEPARATOR = '\t'
+
+
+def row_hash(row):
+    """Hash estable de una fila, sobre la representación de COPY de cada valor."""
+    text = FIELD_SEPARATOR.join(map(format_copy_value, row))
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _target_keys(cursor, table, key_column):
+    """{llave como texto: llave} de las filas del destino."""
+    with step_phase('load'):
+        cursor.execute(f"SELECT {key_column} FROM {table} WHERE {key_column} IS NOT NULL")
+        return {str(row[0]): row[0] for row in cursor.fetchall()}
+
+
+def _stored_hashes(cursor, table):
+    cursor.execute(HASH_TABLE_DDL)
+    with step_phase('load'):
+        cursor.execute("SELECT row_key, row_hash FROM public.migration_row_hashes WHERE table_name = %s",
+                       (table,))
+        return dict(cursor.fetchall())
+
+
+def merge_rows(cursor, table, columns, rows, key_column='id_antiguo', deactivate=None, keep_keys=()):
+    """
+    Aplica en table solo las diferencias entre rows (tuplas en el orden de
+    columns) y el destino: inserta las llaves nuevas y actualiza las filas
+    cuyo hash cambió. key_column debe tener un índice único. No hace commit.
+
+    Las llaves del destino que ya no vienen en rows se desactivan con
+    deactivate ({columna: valor}) si se indica, se eliminan si table está
+    en MIGRATION_MERGE_DELETE, y si no solo se reportan. keep_keys son
+    llaves que siguen en el origen aunque el paso no pudo preparar su fila
+    (p. ej. sin usuario todavía): no cuentan como desaparecidas.
+
+    Devuelve {'inserted', 'updated', 'removed', 'unchanged', 'removed_keys',
+    'removed_action'}.
+    """
+    key_index = columns.index(key_column)
+    stored = _stored_hashes(cursor, table)
+    target = _target_keys(cursor, table, key_column)
+
+    changed = []
+    hashes = {}
+    seen = {str(key) for key in keep_keys}
+    counts = {'inserted': 0, 'updated': 0, 'removed': 0, 'unchanged': 0}
+    for row in rows:
+        if row[key_index] is None:
+            continue
+        key = str(row[key_index])
+        digest = row_hash(row)
+        seen.add(key)
+        if key in target and stored.get(key) == digest:
+            counts['unchanged'] += 1
+            continue
+        counts['updated' if key in target else 'inserted'] += 1
+        changed.append(row)
+        hashes[key] = digest
+
+    removed = sorted(target[key] for key in target.keys() - seen)
+    counts['removed'] = len(removed)
+    counts['removed_keys'] = removed
+    counts['removed_action'] = None
+
+    if changed:
+        bulk_load(cursor, table, columns, changed, on_conflict=upsert_clause(table, columns, key_column))
+    if removed:
+        with step_phase('load'):
+            if table in DELETE_REMOVED_TABLES:
+                cursor.execute(f"DELETE FROM {table} WHERE {key_column} = ANY(%s)", (removed,))
+                counts['removed_action'] = 'eliminadas'
+            elif deactivate:
+                assignments = ', '.join(f"{column} = %s" for column in deactivate)
+                cursor.execute(f"UPDATE {table} SET {assignments} WHERE {key_column} = ANY(%s)",
+                               (*deactivate.values(), removed))
+                counts['removed_action'] = 'desactivadas'
+
+    # Las llaves vistas quedan con su hash vigente; las demás se vuelven a
+    # enviar si reaparecen (así se reactivan las desactivadas)
+    stale = [key for key in stored if key not in seen]
+    with step_phase('load'):
+        if stale:
+            cursor.execute("DELETE FROM public.migration_row_hashes WHERE table_name = %s AND row_key = ANY(%s)",
+                           (table, stale))
+        if hashes:
+            execute_values(
+                cursor,
+                "INSERT INTO public.migration_row_hashes (table_name, row_key, row_hash) VALUES %s "
+                "ON CONFLICT (table_name, row_key) DO UPDATE SET row_hash = EXCLUDED.row_hash",
+                [(table, key, digest) for key, digest in hashes.items()], page_size=1000
+            )
+    return counts
+
+
+def print_merge_counts(table, counts):
+    removed = counts['removed']
+    action = counts['removed_action'] or 'conservadas'
+    print(f"  {table}: {counts['inserted']} insertadas, {counts['updated']} actualizadas, "
+          f"{counts['unchanged']} sin cambios, {removed} ya no están en el origen ({action}).")
+    if removed and not counts['removed_action']:
+        shown = ', '.join(map(str, counts['removed_keys'][:REMOVED_KEYS_SHOWN]))
+        more = f" y {removed - REMOVED_KEYS_SHOWN} más" if removed > REMOVED_KEYS_SHOWN else ''
+        print(f"  ADVERTENCIA: llaves de {table} que ya no están en el origen: {shown}{more}.")
@@ -0,0 +1,276 @@
+# Métricas por paso de la migración y reporte de la ejecución.
+#
+# RunMetrics.step() marca el hilo que ejecuta un paso; mientras tanto,
+# source_extract.py y bulk_loader.py anotan en ese paso el tiempo que
+# pasan leyendo de MySQL (extract) y escribiendo en PostgreSQL (load), las
+# filas leídas y escritas y los bytes enviados por COPY. Los pasos anotan
+# además las filas descartadas con record(rows_rejected=...) y, con
+# record_values(), los valores que coercion.py convirtió o no pudo
+# interpretar en cada columna de origen. El tiempo
+# de transformación es el resto del tiempo del paso. Las fases se miden
+# como tiempo exclusivo: la lectura que ocurre mientras COPY consume un
+# generador cuenta como extract y no como load.
+#
+# La memoria se mide con un muestreo periódico del RSS del proceso; como
+# los pasos pueden ejecutarse en paralelo, el pico de un paso es el del
+# proceso completo mientras ese paso estaba activo.
+#
+# Al terminar, write_reports() guarda un reporte JSON y una instantánea en
+# formato de texto de Prometheus (apta para el textfile collector de
+# node_exporter).
+
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+REPORT_DIR = os.getenv("MIGRATION_REPORT_DIR", os.path.join(os.path.dirname(__file__), '..'))
+REPORT_NAME = "migration_report.json"
+PROMETHEUS_NAME = "migration_metrics.prom"
+SAMPLE_INTERVAL = float(os.getenv("MIGRATION_RSS_SAMPLE_INTERVAL", "0.5"))
+
+_local = threading.local()
+
+
+def current_rss_bytes():
+    """RSS actual del proceso; si /proc no está disponible, el pico histórico."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss está en KiB en Linux y en bytes en macOS
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class StepMetrics:
+    """Métricas acumuladas de un paso."""
+
+    def __init__(self, name):
+        self.name = name
+        self.status = 'running'
+        self.error = None
+        self.started_at = time.time()
+        self.seconds = 0.0
+        self.phases = {'extract': 0.0, 'transform': 0.0, 'load': 0.0}
+        self.rows = {'read': 0, 'written': 0, 'rejected': 0}
+        self.bytes_loaded = 0
+        self.peak_rss_bytes = 0
+        self.table_rows = {}
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def add(self, rows_read=0, rows_written=0, rows_rejected=0, bytes_loaded=0):
+        with self._lock:
+            self.rows['read'] += rows_read
+            self.rows['written'] += rows_written
+            self.rows['rejected'] += rows_rejected
+            self.bytes_loaded += bytes_loaded
+
+    def add_values(self, column, coerced=0, invalid=0):
+        with self._lock:
+            counts = self.values.setdefault(column, {'coerced': 0, 'invalid': 0})
+            counts['coerced'] += coerced
+            counts['invalid'] += invalid
+
+    def to_dict(self):
+        return {
+            'step': self.name,
+            'status': self.status,
+            'error': self.error,
+            'started_at': self.started_at,
+            'seconds': round(self.seconds, 3),
+            'phases': {phase: round(value, 3) for phase, value in self.phases.items()},
+            'rows': dict(self.rows),
+            'table_rows': self.table_rows,
+            'values': self.values,
+            'bytes_loaded': self.bytes_loaded,
+            'peak_rss_mb': round(self.peak_rss_bytes / (1024 * 1024), 1),
+        }
+
+
+def current_step():
+    """StepMetrics del paso que se ejecuta en este hilo, o None."""
+    return getattr(_local, 'step', None)
+
+
+def record(rows_read=0, rows_written=0, rows_rejected=0, bytes_loaded=0):
+    """Suma contadores al paso actual; no hace nada fuera de un paso."""
+    step = current_step()
+    if step is not None:
+        step.add(rows_read, rows_written, rows_rejected, bytes_loaded)
+
+
+def record_values(column, coerced=0, invalid=0):
+    """Suma al paso actual los valores convertidos e inválidos de column ('tabla.columna')."""
+    step = current_step()
+    if step is not None:
+        step.add_values(column, coerced, invalid)
+
+
+@contextmanager
+def step_phase(name):
+    """
+    Mide el bloque como fase name ('extract' o 'load') del paso actual.
+    Las fases anidadas se descuentan de la fase que las contiene. No debe
+    abarcar un yield, porque el tiempo del consumidor se contaría aquí.
+    """
+    step = current_step()
+    if step is None:
+        yield
+        return
+    stack = _local.phase_stack
+    frame = [time.perf_counter(), 0.0]
+    stack.append(frame)
+    try:
+        yield
+    finally:
+        stack.pop()
+        elapsed = time.perf_counter() - frame[0]
+        with step._lock:
+            step.phases[name] += elapsed - frame[1]
+        if stack:
+            stack[-1][1] += elapsed
+
+
+class RunMetrics:
+    """Métricas de una ejecución completa de la migración."""
+
+    def __init__(self, sample_interval=SAMPLE_INTERVAL):
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.seconds = None
+        self.steps = {}
+        self._running = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, args=(sample_interval,), daemon=True)
+        self._sampler.start()
+
+    def _update_peaks(self):
+        rss = current_rss_bytes()
+        with self._lock:
+            for step in self._running:
+                step.peak_rss_bytes = max(step.peak_rss_bytes, rss)
+
+    def _sample(self, interval):
+        while not self._stop.wait(interval):
+            self._update_peaks()
+
+    @contextmanager
+    def step(self, name):
+        """Registra las métricas del paso name ejecutado dentro del bloque."""
+        metrics = StepMetrics(name)
+        with self._lock:
+            self.steps[name] = metrics
+            self._running.add(metrics)
+        _local.step = metrics
+        _local.phase_stack = []
+        self._update_peaks()
+        start = time.perf_counter()
+        try:
+            yield metrics
+            metrics.status = 'completed'
+        except Exception as e:
+            metrics.status = 'failed'
+            metrics.error = str(e)
+            raise
+        finally:
+            metrics.seconds = time.perf_counter() - start
+            metrics.phases['transform'] = max(
+                0.0, metrics.seconds - metrics.phases['extract'] - metrics.phases['load']
+            )
+            self._update_peaks()
+            with self._lock:
+                self._running.discard(metrics)
+            _local.step = None
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self._start
+        self._stop.set()
+
+    def report(self):
+        """Reporte de la ejecución como dict, con los pasos de mayor a menor duración."""
+        steps = sorted(self.steps.values(), key=lambda step: step.seconds, reverse=True)
+        seconds = self.seconds if self.seconds is not None else time.perf_counter() - self._start
+        return {
+            'started_at': self.started_at,
+            'seconds': round(seconds, 3),
+            'steps_completed': sum(1 for step in steps if step.status == 'completed'),
+            'steps_failed': sum(1 for step in steps if step.status == 'failed'),
+            'rows': {kind: sum(step.rows[kind] for step in steps) for kind in ('read', 'written', 'rejected')},
+            'bytes_loaded': sum(step.bytes_loaded for step in steps),
+            'steps': [step.to_dict() for step in steps],
+        }
+
+    def prometheus_text(self):
+        """Instantánea de las métricas en formato de texto de Prometheus."""
+        report = self.report()
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{_escape_label(val)}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        steps = report['steps']
+        metric("migration_run_timestamp_seconds", "Inicio de la ejecución (epoch).",
+               [({}, report['started_at'])])
+        metric("migration_run_duration_seconds", "Duración total de la ejecución.",
+               [({}, report['seconds'])])
+        metric("migration_step_success", "1 si el paso terminó bien, 0 si falló.",
+               [({'step': s['step']}, 1 if s['status'] == 'completed' else 0) for s in steps])
+        metric("migration_step_duration_seconds", "Duración de cada paso.",
+               [({'step': s['step']}, s['seconds']) for s in steps])
+        metric("migration_step_phase_seconds", "Tiempo de cada fase (extract, transform, load) por paso.",
+               [({'step': s['step'], 'phase': phase}, value)
+                for s in steps for phase, value in s['phases'].items()])
+        metric("migration_step_rows", "Filas leídas, escritas y descartadas por paso.",
+               [({'step': s['step'], 'kind': kind}, value)
+                for s in steps for kind, value in s['rows'].items()])
+        metric("migration_step_values", "Valores convertidos e inválidos por columna de origen y paso.",
+               [({'step': s['step'], 'column': column, 'kind': kind}, value)
+                for s in steps for column, counts in s['values'].items() for kind, value in counts.items()])
+        metric("migration_step_bytes_loaded", "Bytes enviados a PostgreSQL por COPY en cada paso.",
+               [({'step': s['step']}, s['bytes_loaded']) for s in steps])
+        metric("migration_step_peak_rss_bytes", "RSS máximo del proceso mientras el paso se ejecutaba.",
+               [({'step': s['step']}, self.steps[s['step']].peak_rss_bytes) for s in steps])
+        return '\n'.join(lines) + '\n'
+
+    def write_reports(self, directory=REPORT_DIR):
+        """Guarda el reporte JSON y la instantánea de Prometheus; devuelve sus rutas."""
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, REPORT_NAME)
+        prom_path = os.path.join(directory, PROMETHEUS_NAME)
+        _write_atomic(json_path, json.dumps(self.report(), indent=2, ensure_ascii=False))
+        _write_atomic(prom_path, self.prometheus_text())
+        return json_path, prom_path
+
+    def print_summary(self, top=10):
+        """Muestra los pasos que más tiempo tomaron."""
+        report = self.report()
+        print(f"\n--- Pasos más lentos (de {len(report['steps'])}, total {report['seconds']:.1f} s) ---")
+        print(f"{'Paso':<42} {'Total (s)':>9} {'Extr.':>7} {'Transf.':>7} {'Carga':>7} "
+              f"{'Leídas':>9} {'Escritas':>9} {'Desc.':>7} {'RSS MB':>7}")
+        for step in report['steps'][:top]:
+            phases, rows = step['phases'], step['rows']
+            print(f"{step['step']:<42} {step['seconds']:>9.2f} {phases['extract']:>7.2f} "
+                  f"{phases['transform']:>7.2f} {phases['load']:>7.2f} {rows['read']:>9} "
+                  f"{rows['written']:>9} {rows['rejected']:>7} {step['peak_rss_mb']:>7.1f}")
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _write_atomic(path, text):
+    """Escribe en un archivo temporal y lo renombra, para no dejar archivos a medias."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
@@ -1,37 +1,34 @@
+import argparse
+import os
 import psycopg2
-from db_connections import get_postgres_connection
+import time
+from crosswalk import CROSSWALK_DIR, Crosswalk
+from elt_staging import ELT_STEPS, land_staging
+from entity_resolution import resolve_usuarios
+from db_connections import ConnectionPoolManager
+from load_phase import LoadPhaseManager
+from shadow_schema import SHADOW_SCHEMA, ShadowSchema, search_path as shadow_search_path
+from migration_scheduler import build_dependencies, parse_foreign_keys, run_steps
+from migration_state import MigrationStateStore, count_rows, step_fingerprint, steps_to_rerun
+from run_metrics import REPORT_DIR, RunMetrics
+import sql_trace
 
 # Importar las funciones de migración
 from migrate_docentes_with_placeholders import migrate_docentes_with_placeholders
 from migrate_tesistas_deduplicated import migrate_tesistas_deduplicated
-from migrate_estructura_academica import migrate_estructura_academica
 from populate_tbl_docentes import populate_tbl_docentes
 from populate_tbl_tesistas import populate_tbl_tesistas
-from migrate_dic_areas_ocde import migrate_dic_areas_ocde
-from migrate_dic_subareas_ocde import migrate_dic_subareas_ocde
-from migrate_dic_facultades import migrate_dic_facultades
-from migrate_dic_categoria import migrate_dic_categoria
-from migrate_dic_lineas_universidad import migrate_dic_lineas_universidad
-from migrate_dic_carreras import migrate_dic_carreras
-from migrate_dic_especialidades import migrate_dic_especialidades
-from migrate_dic_sedes import migrate_dic_sedes
+from dic_areas_ocde import migrate_dic_areas_ocde
+from dic_subareas_ocde import migrate_dic_subareas_ocde
+from dic_facultades import migrate_dic_facultades
+from dic_categoria import migrate_dic_categoria
+from dic_lineas_universidad import migrate_dic_lineas_universidad
+from dic_carreras import migrate_dic_carreras
+from csv_dictionaries import dictionary_sources, dictionary_tables, load_csv_dictionaries
 from migrate_dic_disciplinas import migrate_dic_disciplinas
 from migrate_tbl_sublineas_vri import migrate_tbl_sublineas_vri
-from migrate_dic_denominaciones import migrate_dic_denominaciones
-from migrate_dic_etapas import migrate_dic_etapas
-from migrate_dic_modalidades import migrate_dic_modalidades
-from migrate_dic_tipo_trabajos import migrate_dic_tipo_trabajos
 from migrate_tbl_tramites import migrate_tbl_tramites
-from migrate_dic_acciones import migrate_dic_acciones
-from migrate_dic_servicios import migrate_dic_servicios
-from migrate_dic_tipo_archivo import migrate_dic_tipo_archivo
-from migrate_dic_visto_bueno import migrate_dic_visto_bueno
-from migrate_dic_universidades import migrate_dic_universidades
-from migrate_dic_nivel_admins import migrate_dic_nivel_admins
-from migrate_dic_orden_jurado import migrate_dic_orden_jurado
 from migrate_docente_categoria_historial import migrate_docente_categoria_historial
-from migrate_dic_grados_academicos import migrate_dic_grados_academicos
-from migrate_dic_obtencion_studios import migrate_dic_obtencion_studios
 from migrate_tbl_estudios import migrate_tbl_estudios
 from populate_tbl_grado_docente import populate_tbl_grado_docente
 from add_system_user import add_system_user
@@ -39,8 +36,6 @@ from migrate_tbl_conformacion_jurados import migrate_tbl_conformacion_jurados_co
 from migrate_tbl_asignacion_jurado import migrate_tbl_asignacion_jurado
 from migrate_tbl_correcciones_jurados import migrate_tbl_correcciones_jurados
 
-from migrate_dic_tipoevento_jurado import migrate_dic_tipoevento_jurado
-
 def prepare_destination_tables(conn):
     """
     Añade las columnas 'id_antiguo' necesarias para el mapeo.
@@ -49,8 +44,8 @@ def prepare_destination_tables(conn):
     print("--- Preparando tablas de destino (añadiendo columnas si es necesario) ---")
     try:
         with conn.cursor() as cur:
-            cur.execute("ALTER TABLE public.tbl_docentes ADD COLUMN IF NOT EXISTS id_antiguo INTEGER;")
-            cur.execute("ALTER TABLE public.tbl_tesistas ADD COLUMN IF NOT EXISTS id_antiguo INTEGER;")
+            cur.execute("ALTER TABLE tbl_docentes ADD COLUMN IF NOT EXISTS id_antiguo INTEGER;")
+            cur.execute("ALTER TABLE tbl_tesistas ADD COLUMN IF NOT EXISTS id_antiguo INTEGER;")
             conn.commit()
         print("--- Tablas preparadas exitosamente ---")
         return True
@@ -59,9 +54,10 @@ def prepare_destination_tables(conn):
         conn.rollback()
         return False
 
-def clean_destination_tables(conn):
+def clean_destination_tables(conn, only=None):
     """
     Vacía las tablas de destino en PostgreSQL antes de la migración.
+    Si se indica only, solo se vacían las tablas de ese conjunto.
     """
     print("--- Limpiando las tablas de destino en PostgreSQL ---")
     try:
@@ -80,8 +76,10 @@ def clean_destination_tables(conn):
                 "dic_obtencion_studios"
             ]
             for table in reversed(tables_to_clean):
+                if only is not None and table not in only:
+                    continue
                 print(f"  Limpiando tabla: {table}...")
-                cur.execute(f"TRUNCATE TABLE public.{table} RESTART IDENTITY CASCADE;")
+                cur.execute(f"TRUNCATE TABLE {table} RESTART IDENTITY CASCADE;")
             conn.commit()
         print("--- Limpieza completada exitosamente ---")
         return True
@@ -90,73 +88,300 @@ def clean_destination_tables(conn):
         conn.rollback()
         return False
 
-def run_all_migrations():
+# Pasos de la migración. 'tables' son las tablas que carga cada paso; las
+# dependencias entre pasos se completan con las llaves foráneas de
+# schema_dump.sql, por lo que 'depends_on' solo declara las que no se
+# deducen de ahí (lecturas de tablas sin FK entre ellas). 'sources' son
+# las entradas del paso, usadas para detectar cambios en un --resume.
+# 'incremental' marca los pasos que se ejecutan con --incremental (ver
+# incremental_sync.py y row_hash_merge.py).
+MIGRATION_STEPS = [
+    {'name': "resolve_usuarios", 'func': resolve_usuarios, 'tables': [],
+     'sources': ["absmain:tblDocentes", "pilar3:tblTesistas"], 'incremental': True},
+    {'name': "migrate_docentes_with_placeholders", 'func': migrate_docentes_with_placeholders,
+     'tables': ["tbl_usuarios"],
+     'sources': ["absmain:tblDocentes"], 'depends_on': ["resolve_usuarios"], 'incremental': True},
+    {'name': "migrate_tesistas_deduplicated", 'func': migrate_tesistas_deduplicated,
+     'tables': ["tbl_usuarios"],
+     'sources': ["pilar3:tblTesistas"], 'depends_on': ["migrate_docentes_with_placeholders", "resolve_usuarios"],
+     'incremental': True},
+    {'name': "dic_areas_ocde", 'func': migrate_dic_areas_ocde, 'tables': ["dic_areas_ocde"],
+     'sources': ["absmain:ocdeAreas"]},
+    {'name': "dic_subareas_ocde", 'func': migrate_dic_subareas_ocde, 'tables': ["dic_subareas_ocde"],
+     'sources': ["absmain:ocdeSubAreas"]},
+    {'name': "dic_facultades", 'func': migrate_dic_facultades, 'tables': ["dic_facultades"],
+     'sources': ["absmain:dicFacultades"]},
+    {'name': "dic_categoria", 'func': migrate_dic_categoria, 'tables': ["dic_categoria"],
+     'sources': ["absmain:dicCategorias"]},
+    {'name': "dic_lineas_universidad", 'func': migrate_dic_lineas_universidad, 'tables': ["dic_lineas_universidad"],
+     'sources': ["absmain:dicLineasVRI"]},
+    {'name': "dic_carreras", 'func': migrate_dic_carreras, 'tables': ["dic_carreras"],
+     'sources': ["absmain:dicCarreras"], 'incremental': True},
+    {'name': "load_csv_dictionaries", 'func': load_csv_dictionaries, 'tables': dictionary_tables(),
+     'sources': dictionary_sources()},
+    {'name': "migrate_dic_disciplinas", 'func': migrate_dic_disciplinas, 'tables': ["dic_disciplinas"],
+     'sources': ["absmain:ocdeDisciplinas"]},
+    {'name': "populate_tbl_docentes", 'func': populate_tbl_docentes, 'tables': ["tbl_docentes"],
+     'sources': ["absmain:tblDocentes"], 'incremental': True},
+    {'name': "populate_tbl_tesistas", 'func': populate_tbl_tesistas, 'tables': ["tbl_tesistas"],
+     'sources': ["pilar3:tblTesistas"], 'incremental': True},
+    {'name': "migrate_docente_categoria_historial", 'func': migrate_docente_categoria_historial,
+     'tables': ["tbl_docente_categoria_historial"],
+     'sources': ["absmain:tblDocentes"]},
+    {'name': "migrate_tbl_sublineas_vri", 'func': migrate_tbl_sublineas_vri, 'tables': ["tbl_sublineas_vri"],
+     'sources': ["absmain:tblLineas"], 'incremental': True},
+    {'name': "migrate_tbl_tramites", 'func': migrate_tbl_tramites, 'tables': ["tbl_tramites"],
+     'sources': ["pilar3:tesTramites"], 'incremental': True},
+    {'name': "migrate_tbl_estudios", 'func': migrate_tbl_estudios, 'tables': ["tbl_estudios"],
+     'sources': ["csv:tbl_estudios_rows.csv"]},
+    {'name': "populate_tbl_grado_docente", 'func': populate_tbl_grado_docente, 'tables': ["tbl_grado_docente"],
+     'depends_on': ["migrate_tbl_estudios", "migrate_docente_categoria_historial",
+                    "load_csv_dictionaries", "dic_categoria"]},
+    {'name': "add_system_user", 'func': add_system_user,
+     'tables': ["tbl_usuarios"], 'depends_on': ["migrate_tesistas_deduplicated"]},
+    {'name': "migrate_tbl_conformacion_jurados", 'func': migrate_tbl_conformacion_jurados_combined,
+     'tables': ["tbl_conformacion_jurados"],
+     'sources': ["pilar3:tesTramites", "pilar3:logTramites"]},
+    {'name': "migrate_tbl_asignacion_jurado", 'func': migrate_tbl_asignacion_jurado,
+     'tables': ["tbl_asignacion_jurado"],
+     'sources': ["pilar3:tesJuCambios"], 'incremental': True},
+    {'name': "migrate_tbl_correcciones_jurados", 'func': migrate_tbl_correcciones_jurados,
+     'tables': ["tbl_correcciones_jurados"],
+     'sources': ["pilar3:tblCorrects"]},
+]
+
+DEFAULT_WORKERS = int(os.getenv("MIGRATION_WORKERS", "4"))
+
+def run_all_migrations(max_workers=DEFAULT_WORKERS, resume=False, defer_constraints=False,
+                       report_dir=REPORT_DIR, shadow=False, elt=False):
     """
-    Ejecuta todas las migraciones en un orden específico.
+    Ejecuta todas las migraciones respetando sus dependencias. Los pasos
+    independientes entre sí se ejecutan en paralelo con hasta max_workers
+    hilos; con max_workers=1 la ejecución es secuencial.
+
+    Todas las conexiones salen de un mismo pool: cada paso recibe una
+    sesión con sus propias conexiones, que se reutilizan en los pasos
+    siguientes en lugar de abrir una conexión nueva por paso. Los mapas
+    de ids compartidos (ver crosswalk.py) se construyen una vez por ejecución.
+
+    El avance de cada paso queda registrado en public.migration_state.
+    Con resume=True solo se vuelven a ejecutar los pasos que no terminaron
+    o cuyas entradas cambiaron (y los que dependen de ellos); solo se
+    limpian las tablas de esos pasos.
+
+    Con defer_constraints=True los índices secundarios y las llaves
+    foráneas de las tablas a cargar se eliminan antes de la carga y se
+    reconstruyen al final (ver load_phase.py).
+
+    Con shadow=True no se vacían las tablas de public: los pasos cargan un
+    esquema sombra, que al terminar reemplaza a public en una transacción
+    corta (ver shadow_schema.py). Los índices y las FK de la sombra se
+    crean siempre después de la carga. Con resume=True se continúa la carga
+    del esquema sombra existente, si lo hay.
+
+    Con elt=True las tablas de origen se copian sin transformar al esquema
+    staging y los pasos de ELT_STEPS se ejecutan como INSERT ... SELECT
+    sobre ellas (ver elt_staging.py).
+
+    Las métricas de cada paso (tiempos de extracción, transformación y
+    carga, filas, bytes y memoria; ver run_metrics.py) se guardan al final
+    en report_dir como reporte JSON y en formato de Prometheus.
     """
-    conn = None
+    all_tables = {table for step in MIGRATION_STEPS for table in step.get('tables', [])}
+    pool = ConnectionPoolManager(max_idle=max_workers, search_path=shadow_search_path() if shadow else None)
+    shadow_schema = ShadowSchema(pool, all_tables) if shadow else None
+    metrics = RunMetrics()
+    crosswalk = Crosswalk(persist_dir=CROSSWALK_DIR)
+    state_conn = None
+    phases = None
+
     try:
-        conn = get_postgres_connection()
-        if conn is None:
-            raise Exception("No se pudo conectar a PostgreSQL.")
-
-        if not prepare_destination_tables(conn):
-            raise Exception("Falló la preparación de las tablas.")
-
-        if not clean_destination_tables(conn):
-            raise Exception("Falló la limpieza de las tablas.")
-        
-        migrations = [
-            ("migrate_docentes_with_placeholders", migrate_docentes_with_placeholders),
-            ("migrate_tesistas_deduplicated", migrate_tesistas_deduplicated),
-            ("dic_areas_ocde", migrate_dic_areas_ocde),
-            ("dic_subareas_ocde", migrate_dic_subareas_ocde),
-            ("dic_facultades", migrate_dic_facultades),
-            ("dic_categoria", migrate_dic_categoria),
-            ("dic_lineas_universidad", migrate_dic_lineas_universidad),
-            ("dic_carreras", migrate_dic_carreras),
-            ("dic_especialidades", migrate_dic_especialidades),
-            ("migrate_dic_sedes", migrate_dic_sedes),
-            ("migrate_dic_disciplinas", migrate_dic_disciplinas),
-            ("migrate_estructura_academica", migrate_estructura_academica),
-            ("migrate_dic_denominaciones", migrate_dic_denominaciones),
-            ("migrate_dic_etapas", migrate_dic_etapas),
-            ("migrate_dic_modalidades", migrate_dic_modalidades),
-            ("migrate_dic_tipo_trabajos", migrate_dic_tipo_trabajos),
-            ("populate_tbl_docentes", populate_tbl_docentes),
-            ("populate_tbl_tesistas", populate_tbl_tesistas),
-            ("migrate_docente_categoria_historial", migrate_docente_categoria_historial),
-            ("migrate_tbl_sublineas_vri", migrate_tbl_sublineas_vri),
-            ("migrate_tbl_tramites", migrate_tbl_tramites),
-            ("migrate_dic_acciones", migrate_dic_acciones),
-            ("migrate_dic_servicios", migrate_dic_servicios),
-            ("migrate_dic_tipo_archivo", migrate_dic_tipo_archivo),
-            ("migrate_dic_visto_bueno", migrate_dic_visto_bueno),
-            ("migrate_dic_universidades", migrate_dic_universidades),
-            ("migrate_dic_nivel_admins", migrate_dic_nivel_admins),
-            ("migrate_dic_orden_jurado", migrate_dic_orden_jurado),
-            ("migrate_dic_tipoevento_jurado", migrate_dic_tipoevento_jurado),
-            ("migrate_dic_grados_academicos", migrate_dic_grados_academicos),
-            ("migrate_dic_obtencion_studios", migrate_dic_obtencion_studios),
-            ("migrate_tbl_estudios", migrate_tbl_estudios),
-            ("populate_tbl_grado_docente", populate_tbl_grado_docente),
-            ("add_system_user", add_system_user),
-            ("migrate_tbl_conformacion_jurados", migrate_tbl_conformacion_jurados_combined),
-            ("migrate_tbl_asignacion_jurado", migrate_tbl_asignacion_jurado),
-            ("migrate_tbl_correcciones_jurados", migrate_tbl_correcciones_jurados),
-        ]
-
-        for name, migrate_function in migrations:
-            print(f"--- Ejecutando migración para: {name} ---")
-            migrate_function()
+        if shadow:
+            phases = LoadPhaseManager(pool, all_tables, schema=SHADOW_SCHEMA)
+            with phases.phase('crear esquema sombra'):
+                if not shadow_schema.create(phases, reuse=resume) and resume:
+                    print("--- No hay un esquema sombra que continuar; se ejecutan todos los pasos ---")
+                    resume = False
+
+        state_conn = pool.acquire('postgres')
+        store = MigrationStateStore(state_conn)
+
+        # Las huellas solo hacen falta por adelantado para decidir qué
+        # reanudar; si no, cada paso calcula la suya al empezar.
+        fingerprint_cache = {}
+        fingerprints = {}
+        completed = set()
+        tables_to_clean = None
+        if resume:
+            with pool.session() as session:
+                fingerprints = {
+                    step['name']: step_fingerprint(step, session, fingerprint_cache)
+                    for step in MIGRATION_STEPS
+                }
+            dependencies = build_dependencies(MIGRATION_STEPS, parse_foreign_keys())
+            rerun = steps_to_rerun(MIGRATION_STEPS, dependencies, store.load(), fingerprints)
+            completed = {step['name'] for step in MIGRATION_STEPS} - rerun
+            tables_to_clean = {table for step in MIGRATION_STEPS if step['name'] in rerun
+                               for table in step.get('tables', [])}
+            print(f"--- Reanudando: {len(completed)} pasos ya completados, {len(rerun)} por ejecutar ---")
+            if not rerun and not shadow:
+                print("\n--- No hay pasos pendientes ---")
+                return
+        else:
+            store.reset()
+
+        if not shadow:
+            phases = LoadPhaseManager(pool, tables_to_clean or all_tables)
+
+        with phases.phase('preparación'), pool.session() as session:
+            conn = session.postgres()
+
+            if not prepare_destination_tables(conn):
+                raise Exception("Falló la preparación de las tablas.")
+
+            # Con shadow, el search_path hace que se vacíen las tablas sombra
+            if not clean_destination_tables(conn, only=tables_to_clean):
+                raise Exception("Falló la limpieza de las tablas.")
+
+        if defer_constraints and not shadow:
+            phases.defer()
+        elif not shadow and phases.pending():
+            # Objetos diferidos por una ejecución anterior que no terminó
+            print("--- Restaurando índices y llaves foráneas diferidos en una ejecución anterior ---")
+            phases.restore(max_workers=max_workers)
+
+        if elt:
+            with phases.phase('staging'):
+                land_staging(pool, metrics, max_workers=max_workers)
+
+        def run_step(step):
+            fingerprint = fingerprints.get(step['name'])
+            if fingerprint is None:
+                with pool.session() as session:
+                    fingerprint = step_fingerprint(step, session, fingerprint_cache)
+            store.mark_running(step['name'], fingerprint)
+            crosswalk.invalidate_owner(step['name'])
+            start = time.perf_counter()
+            try:
+                with metrics.step(step['name']) as step_metrics, pool.session(crosswalk=crosswalk) as session:
+                    if elt and step['name'] in ELT_STEPS:
+                        ELT_STEPS[step['name']](session)
+                    else:
+                        step['func'](session=session)
+                    counts = count_rows(session.postgres(), step.get('tables', []))
+                    step_metrics.table_rows = counts
+            except Exception as e:
+                store.mark_failed(step['name'], e, time.perf_counter() - start)
+                raise
+            store.mark_completed(step['name'], counts, time.perf_counter() - start)
+
+        with phases.phase('carga'):
+            run_steps(MIGRATION_STEPS, max_workers=max_workers, run_step=run_step, completed=completed)
+
+        if defer_constraints or shadow:
+            phases.restore(max_workers=max_workers)
+
+        if shadow:
+            with phases.phase('cambio a public'):
+                shadow_schema.swap()
 
         print("\n--- Todas las migraciones se han completado exitosamente ---")
 
     except Exception as e:
         print(f"\nLa migración no se ejecutó debido a un error: {e}")
     finally:
-        if conn:
-            conn.close()
+        if state_conn is not None:
+            pool.release('postgres', state_conn)
+        if phases is not None:
+            phases.print_report()
+        pool.print_metrics()
+        print(f"--- Crosswalk: {crosswalk.stats['published']} mapas obtenidos al cargar, "
+              f"{crosswalk.stats['queries']} leídos de PostgreSQL, {crosswalk.stats['disk']} desde disco, "
+              f"{crosswalk.stats['hits']} reutilizados ---")
+        pool.close_all()
+        metrics.finish()
+        metrics.print_summary()
+        try:
+            json_path, prom_path = metrics.write_reports(report_dir)
+            print(f"--- Métricas guardadas en {json_path} y {prom_path} ---")
+        except OSError as e:
+            print(f"  No se pudieron guardar las métricas: {e}")
+        if sql_trace.enabled():
+            sql_trace.TRACER.print_report()
+
+def run_incremental_sync(max_workers=DEFAULT_WORKERS, report_dir=REPORT_DIR):
+    """
+    Sincroniza las tablas de los pasos marcados como 'incremental' sin
+    vaciarlas: cada paso lee solo las filas del origen nuevas o modificadas
+    desde la última carga y las aplica por id_antiguo (los usuarios, por
+    num_doc_identidad). Los demás pasos no
+    se ejecutan ni se toca public.migration_state, así que un --resume
+    posterior sigue refiriéndose a la última migración completa.
+    """
+    pool = ConnectionPoolManager(max_idle=max_workers)
+    metrics = RunMetrics()
+    crosswalk = Crosswalk(persist_dir=CROSSWALK_DIR)
+    incremental_steps = [step['name'] for step in MIGRATION_STEPS if step.get('incremental')]
+    print(f"--- Sincronización incremental de {len(incremental_steps)} pasos ---")
+
+    def run_step(step):
+        crosswalk.invalidate_owner(step['name'])
+        with metrics.step(step['name']) as step_metrics, pool.session(crosswalk=crosswalk) as session:
+            step['func'](session=session, incremental=True)
+            step_metrics.table_rows = count_rows(session.postgres(), step.get('tables', []))
+
+    try:
+        with pool.session() as session:
+            if not prepare_destination_tables(session.postgres()):
+                raise Exception("Falló la preparación de las tablas.")
+        completed = {step['name'] for step in MIGRATION_STEPS} - set(incremental_steps)
+        run_steps(MIGRATION_STEPS, max_workers=max_workers, run_step=run_step, completed=completed)
+        print("\n--- Sincronización incremental completada exitosamente ---")
+    except Exception as e:
+        print(f"\nLa sincronización no se completó debido a un error: {e}")
+    finally:
+        pool.print_metrics()
+        pool.close_all()
+        metrics.finish()
+        metrics.print_summary()
+        try:
+            json_path, prom_path = metrics.write_reports(report_dir)
+            print(f"--- Métricas guardadas en {json_path} y {prom_path} ---")
+        except OSError as e:
+            print(f"  No se pudieron guardar las métricas: {e}")
+        if sql_trace.enabled():
+            sql_trace.TRACER.print_report()
 
 if __name__ == '__main__':
-    run_all_migrations()
+    parser = argparse.ArgumentParser(description="Ejecuta la migración completa de MySQL a PostgreSQL.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Número de pasos que se ejecutan en paralelo (por defecto: %(default)s).")
+    parser.add_argument("--resume", action="store_true",
+                        help="Retoma la última migración, ejecutando solo los pasos pendientes o con entradas modificadas.")
+    parser.add_argument("--defer-constraints", action="store_true",
+                        help="Elimina índices secundarios y llaves foráneas durante la carga y los reconstruye al final.")
+    parser.add_argument("--report-dir", default=REPORT_DIR,
+                        help="Directorio del reporte JSON y de las métricas de Prometheus (por defecto: %(default)s).")
+    parser.add_argument("--trace-sql", action="store_true",
+                        help="Registra cada sentencia SQL y muestra al final las más lentas "
+                             "(equivale a MIGRATION_SQL_TRACE=1).")
+    parser.add_argument("--shadow", action="store_true",
+                        help="Carga un esquema sombra y lo cambia por public al final, sin vaciar "
+                             "public durante la migración.")
+    parser.add_argument("--elt", action="store_true",
+                        help="Copia las tablas de origen a un esquema staging y ejecuta los pasos de trámites, "
+                             "jurados, docentes y tesistas como SQL en PostgreSQL.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Sin vaciar las tablas, aplica solo las filas nuevas o modificadas desde la "
+                             "última carga en los pasos que lo admiten.")
+    args = parser.parse_args()
+    if args.incremental and (args.resume or args.shadow or args.defer_constraints or args.elt):
+        parser.error("--incremental no se puede combinar con --resume, --shadow, --defer-constraints ni --elt.")
+    if args.trace_sql:
+        sql_trace.enable()
+    if args.incremental:
+        run_incremental_sync(max_workers=args.workers, report_dir=args.report_dir)
+    else:
+        run_all_migrations(max_workers=args.workers, resume=args.resume,
+                           defer_constraints=args.defer_constraints, report_dir=args.report_dir,
+                           shadow=args.shadow, elt=args.elt)
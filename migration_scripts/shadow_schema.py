@@ -0,0 +1,296 @@
+# Carga en un esquema sombra y cambio atómico a public.
+#
+# clean_destination_tables vacía las tablas de public con TRUNCATE ...
+# CASCADE, que toma un ACCESS EXCLUSIVE, y la aplicación ve las tablas
+# vacías mientras dura toda la migración. En el modo sombra:
+#
+#   1. create() crea SHADOW_SCHEMA con una copia vacía de cada tabla a
+#      cargar (LIKE ... INCLUDING ALL, con secuencias propias) y registra
+#      en LoadPhaseManager sus índices secundarios y sus FK, que se crean
+#      después de la carga.
+#   2. Los pasos cargan ese esquema: las conexiones del pool usan
+#      search_path "SHADOW_SCHEMA, public", así que los nombres sin
+#      esquema apuntan a las tablas sombra.
+#   3. Tras reconstruir índices y validar FK, swap() copia permisos,
+#      dueños y triggers, ejecuta ANALYZE y, en una sola transacción
+#      corta, mueve las tablas de public a OLD_SCHEMA y las sombra a
+#      public, vuelve a crear las vistas y las FK de otras tablas que
+#      apuntaban a las tablas cargadas.
+#
+# Las tablas anteriores quedan en OLD_SCHEMA para poder volver atrás; se
+# eliminan al hacer el siguiente cambio.
+
+import os
+import re
+import time
+
+SHADOW_SCHEMA = os.getenv("MIGRATION_SHADOW_SCHEMA", "migration_shadow")
+OLD_SCHEMA = os.getenv("MIGRATION_OLD_SCHEMA", "migration_old")
+
+# Tiempo máximo que el cambio espera los bloqueos de las tablas de public;
+# si la aplicación los retiene más, el cambio falla en lugar de bloquearla.
+SWAP_LOCK_TIMEOUT = os.getenv("MIGRATION_SWAP_LOCK_TIMEOUT", "10s")
+
+# Secuencias de columnas serial (OWNED BY); las identity se copian con LIKE
+OWNED_SEQUENCES_QUERY = """
+    SELECT a.attname, s.relname, format_type(q.seqtypid, NULL), q.seqincrement, q.seqstart
+    FROM pg_depend d
+    JOIN pg_class s ON s.oid = d.objid AND s.relkind = 'S'
+    JOIN pg_sequence q ON q.seqrelid = s.oid
+    JOIN pg_attribute a ON a.attrelid = d.refobjid AND a.attnum = d.refobjsubid
+    WHERE d.classid = 'pg_class'::regclass
+      AND d.refclassid = 'pg_class'::regclass
+      AND d.refobjid = %s::regclass
+      AND d.deptype = 'a'
+"""
+
+FOREIGN_KEYS_QUERY = """
+    SELECT c.conname, t.relname, pg_get_constraintdef(c.oid)
+    FROM pg_constraint c
+    JOIN pg_class t ON t.oid = c.conrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    WHERE n.nspname = 'public' AND c.contype = 'f' AND t.relname = ANY(%s)
+    ORDER BY t.relname, c.conname
+"""
+
+# FK de tablas que no se cargan hacia tablas que sí
+EXTERNAL_FOREIGN_KEYS_QUERY = """
+    SELECT n.nspname, t.relname, c.conname, pg_get_constraintdef(c.oid)
+    FROM pg_constraint c
+    JOIN pg_class t ON t.oid = c.conrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    JOIN pg_class r ON r.oid = c.confrelid
+    JOIN pg_namespace rn ON rn.oid = r.relnamespace
+    WHERE c.contype = 'f'
+      AND rn.nspname = 'public' AND r.relname = ANY(%s)
+      AND NOT (n.nspname = 'public' AND t.relname = ANY(%s))
+"""
+
+DEPENDENT_VIEWS_QUERY = """
+    SELECT DISTINCT v.oid, vn.nspname, v.relname, v.relkind, pg_get_viewdef(v.oid)
+    FROM pg_depend d
+    JOIN pg_rewrite w ON w.oid = d.objid
+    JOIN pg_class v ON v.oid = w.ev_class
+    JOIN pg_namespace vn ON vn.oid = v.relnamespace
+    JOIN pg_class t ON t.oid = d.refobjid
+    JOIN pg_namespace tn ON tn.oid = t.relnamespace
+    WHERE d.classid = 'pg_rewrite'::regclass
+      AND tn.nspname = 'public' AND t.relname = ANY(%s)
+      AND v.oid <> t.oid
+    ORDER BY v.oid
+"""
+
+TRIGGERS_QUERY = """
+    SELECT t.relname, g.tgname, pg_get_triggerdef(g.oid)
+    FROM pg_trigger g
+    JOIN pg_class t ON t.oid = g.tgrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    WHERE n.nspname = 'public' AND t.relname = ANY(%s) AND NOT g.tgisinternal
+"""
+
+GRANTS_QUERY = """
+    SELECT c.relname, c.relkind, a.privilege_type,
+           CASE WHEN a.grantee = 0 THEN 'PUBLIC' ELSE quote_ident(pg_get_userbyid(a.grantee)) END
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    CROSS JOIN LATERAL aclexplode(c.relacl) a
+    WHERE n.nspname = 'public' AND c.relname = ANY(%s)
+"""
+
+OWNERS_QUERY = """
+    SELECT c.relname, pg_get_userbyid(c.relowner)
+    FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = 'public' AND c.relname = ANY(%s) AND pg_get_userbyid(c.relowner) <> current_user
+"""
+
+
+def _ident(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def search_path(schema=SHADOW_SCHEMA):
+    """search_path con que los pasos deben cargar el esquema sombra schema."""
+    return f"{_ident(schema)}, public"
+
+
+class ShadowSchema:
+    """Esquema sombra con las tablas tables, y su cambio a public (ver swap())."""
+
+    def __init__(self, pool, tables, schema=SHADOW_SCHEMA, old_schema=OLD_SCHEMA):
+        self.pool = pool
+        self.requested_tables = sorted(set(tables))
+        self.tables = []
+        self.schema = schema
+        self.old_schema = old_schema
+
+    def search_path(self):
+        return search_path(self.schema)
+
+    def _shadow(self, table):
+        return f"{_ident(self.schema)}.{_ident(table)}"
+
+    def _existing_tables(self, cur, schema):
+        cur.execute(
+            "SELECT c.relname FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = %s AND c.relkind IN ('r', 'p') AND c.relname = ANY(%s)",
+            (schema, self.requested_tables)
+        )
+        return sorted(row[0] for row in cur.fetchall())
+
+    def create(self, phases, reuse=False):
+        """
+        Crea el esquema sombra (borrando uno anterior) y registra en phases
+        (un LoadPhaseManager sobre este esquema) los índices secundarios y
+        las FK que se crearán tras la carga. Con reuse=True y un esquema
+        sombra ya existente lo conserva, para continuar una carga con
+        --resume. Devuelve True si se reutilizó.
+        """
+        conn = self.pool.acquire('postgres')
+        try:
+            with conn.cursor() as cur:
+                if reuse:
+                    self.tables = self._existing_tables(cur, self.schema)
+                    if self.tables:
+                        conn.commit()
+                        print(f"--- Se reutiliza el esquema sombra {self.schema} ({len(self.tables)} tablas) ---")
+                        return True
+
+                self.tables = self._existing_tables(cur, 'public')
+                missing = set(self.requested_tables) - set(self.tables)
+                if missing:
+                    print(f"  AVISO: no existen en public y no se cargarán en la sombra: {sorted(missing)}")
+
+                cur.execute(f"DROP SCHEMA IF EXISTS {_ident(self.schema)} CASCADE")
+                cur.execute(f"CREATE SCHEMA {_ident(self.schema)}")
+                for table in self.tables:
+                    cur.execute(f"CREATE TABLE {self._shadow(table)} (LIKE public.{_ident(table)} INCLUDING ALL)")
+                    self._clone_sequences(cur, table)
+
+                # FK entre tablas cargadas apuntan a la sombra; las demás, a public
+                cur.execute("SET LOCAL search_path TO pg_catalog")
+                cur.execute(FOREIGN_KEYS_QUERY, (self.tables,))
+                foreign_keys = []
+                for name, table, definition in cur.fetchall():
+                    foreign_keys.append(('fk', name, table, self._retarget(definition)))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.pool.release('postgres', conn)
+
+        print(f"--- Esquema sombra {self.schema} creado con {len(self.tables)} tablas ---")
+        phases.discard_pending()
+        phases.defer()
+        phases.register(foreign_keys)
+        return False
+
+    def _clone_sequences(self, cur, table):
+        """Da a la tabla sombra secuencias propias en lugar de las de public."""
+        cur.execute(OWNED_SEQUENCES_QUERY, (f"public.{_ident(table)}",))
+        for column, sequence, data_type, increment, start in cur.fetchall():
+            shadow_sequence = f"{_ident(self.schema)}.{_ident(sequence)}"
+            cur.execute(f"CREATE SEQUENCE {shadow_sequence} AS {data_type} INCREMENT BY {increment} "
+                        f"START WITH {start} OWNED BY {self._shadow(table)}.{_ident(column)}")
+            cur.execute(f"ALTER TABLE {self._shadow(table)} ALTER COLUMN {_ident(column)} "
+                        f"SET DEFAULT nextval(%s::regclass)", (shadow_sequence,))
+
+    def _retarget(self, definition):
+        """Cambia REFERENCES public.tabla por la tabla sombra si esa tabla se carga."""
+        def replace(match):
+            table = match.group(2)
+            if table in self.tables:
+                return f"REFERENCES {self._shadow(table)}("
+            return match.group(0)
+        return re.sub(r'REFERENCES public\.("?)(\w+)\1\(', replace, definition)
+
+    def swap(self):
+        """
+        Reemplaza las tablas de public por las del esquema sombra. Solo la
+        transacción final bloquea las tablas de public; dura lo que tardan
+        los ALTER ... SET SCHEMA y el reemplazo de vistas y FK externas.
+        """
+        conn = self.pool.acquire('postgres')
+        try:
+            with conn.cursor() as cur:
+                # Definiciones con nombres calificados, sea cual sea el search_path
+                cur.execute("SET LOCAL search_path TO pg_catalog")
+                self.tables = self._existing_tables(cur, self.schema)
+                cur.execute(EXTERNAL_FOREIGN_KEYS_QUERY, (self.tables, self.tables))
+                external_fks = cur.fetchall()
+                cur.execute(DEPENDENT_VIEWS_QUERY, (self.tables,))
+                views = cur.fetchall()
+                cur.execute(TRIGGERS_QUERY, (self.tables,))
+                triggers = cur.fetchall()
+                cur.execute(
+                    "SELECT c.relname FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+                    "WHERE n.nspname = %s AND c.relkind = 'S'", (self.schema,)
+                )
+                sequences = [row[0] for row in cur.fetchall()]
+                cur.execute(GRANTS_QUERY, (self.tables + sequences,))
+                grants = cur.fetchall()
+                cur.execute(OWNERS_QUERY, (self.tables,))
+                owners = cur.fetchall()
+                cur.execute(
+                    "SELECT count(*) FROM pg_policy p JOIN pg_class t ON t.oid = p.polrelid "
+                    "JOIN pg_namespace n ON n.oid = t.relnamespace WHERE n.nspname = 'public' AND t.relname = ANY(%s)",
+                    (self.tables,)
+                )
+                policies = cur.fetchone()[0]
+            conn.commit()
+
+            materialized = [f"{schema}.{name}" for _, schema, name, kind, _ in views if kind == 'm']
+            if materialized or policies:
+                raise Exception(
+                    f"El cambio no copia vistas materializadas ({materialized}) ni políticas RLS "
+                    f"({policies}); se debe hacer a mano."
+                )
+
+            # 1. Preparar las tablas sombra fuera de la transacción del cambio
+            with conn.cursor() as cur:
+                for relname, relkind, privilege, grantee in grants:
+                    object_type = 'SEQUENCE' if relkind == 'S' else 'TABLE'
+                    cur.execute(f"GRANT {privilege} ON {object_type} {self._shadow(relname)} TO {grantee}")
+                for table, owner in owners:
+                    cur.execute(f"ALTER TABLE {self._shadow(table)} OWNER TO {_ident(owner)}")
+                for table, _, definition in triggers:
+                    cur.execute(definition.replace(f" ON public.{table} ", f" ON {self._shadow(table)} ", 1)
+                                          .replace(f' ON public."{table}" ', f" ON {self._shadow(table)} ", 1))
+                for table in self.tables:
+                    cur.execute(f"ANALYZE {self._shadow(table)}")
+                cur.execute(f"DROP SCHEMA IF EXISTS {_ident(self.old_schema)} CASCADE")
+            conn.commit()
+
+            # 2. El cambio, en una sola transacción
+            start = time.perf_counter()
+            with conn.cursor() as cur:
+                cur.execute("SET LOCAL lock_timeout = %s", (SWAP_LOCK_TIMEOUT,))
+                cur.execute(f"CREATE SCHEMA {_ident(self.old_schema)}")
+                for schema, table, name, _ in external_fks:
+                    cur.execute(f"ALTER TABLE {_ident(schema)}.{_ident(table)} DROP CONSTRAINT {_ident(name)}")
+                for table in self.tables:
+                    cur.execute(f"ALTER TABLE public.{_ident(table)} SET SCHEMA {_ident(self.old_schema)}")
+                for table in self.tables:
+                    cur.execute(f"ALTER TABLE {self._shadow(table)} SET SCHEMA public")
+                for _, schema, name, _, definition in views:
+                    cur.execute(f"CREATE OR REPLACE VIEW {_ident(schema)}.{_ident(name)} AS {definition}")
+                for schema, table, name, definition in external_fks:
+                    cur.execute(f"ALTER TABLE {_ident(schema)}.{_ident(table)} "
+                                f"ADD CONSTRAINT {_ident(name)} {definition.replace(' NOT VALID', '')} NOT VALID")
+                cur.execute(f"DROP SCHEMA {_ident(self.schema)}")
+            conn.commit()
+            elapsed = time.perf_counter() - start
+            print(f"--- Cambio atómico completado: {len(self.tables)} tablas en {elapsed * 1000:.0f} ms; "
+                  f"las tablas anteriores quedaron en {self.old_schema} ---")
+
+            # 3. Validar las FK externas sin bloquear escrituras
+            for schema, table, name, _ in external_fks:
+                with conn.cursor() as cur:
+                    cur.execute(f"ALTER TABLE {_ident(schema)}.{_ident(table)} VALIDATE CONSTRAINT {_ident(name)}")
+                conn.commit()
+            return elapsed
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.pool.release('postgres', conn)
@@ -0,0 +1,768 @@
+# Fuentes de origen sin servidor MySQL: conexiones sobre volcados.
+#
+# Los pasos leen el origen con una conexión de mysql.connector (cursor,
+# execute, fetchall/fetchmany). Con MYSQL_ABSMAIN_DUMP o MYSQL_PILAR3_DUMP
+# apuntando a un volcado .sql o .sql.gz, db_connections.py entrega en su
+# lugar una DumpConnection sobre ese archivo (ver mysql_dump.py), con la
+# misma interfaz, así que los pasos, stream_rows y el pool funcionan igual
+# y un ensayo de la migración no necesita restaurar las bases.
+#
+# DumpConnection resuelve las consultas de lectura de una sola tabla que
+# usan los pasos y verify_migration.py: SELECT de columnas, *, literales,
+# alias, aritmética (+, -, *, /, DIV), CASE, MAX/MIN/COUNT/SUM,
+# IFNULL/COALESCE, CAST, MD5, CONCAT/CONCAT_WS, SUBSTRING y CONV, WHERE
+# con comparaciones, IN, IS [NOT] NULL, AND/OR/NOT y parámetros %s,
+# GROUP BY (también por posición), ORDER BY y LIMIT/OFFSET. También
+# responde information_schema.columns (con las columnas del CREATE TABLE),
+# information_schema.tables (con la fecha de modificación del archivo como
+# UPDATE_TIME) y CHECKSUM TABLE (un CRC de las filas del volcado). Las comparaciones de
+# texto no distinguen mayúsculas, como la colación por defecto de MySQL.
+# Las consultas sin ORDER BY ni agregados se leen en flujo; las demás
+# reúnen antes las filas de la tabla que cumplen el WHERE. Cualquier otra
+# sentencia (uniones, escrituras) lanza UnsupportedQuery: los pasos que la
+# necesiten requieren el servidor.
+
+import hashlib
+import os
+import re
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from mysql_dump import open_dump, unescape
+
+# Las tablas de un volcado se leen completas en cada consulta; dividirlas
+# en rangos (source_extract.stream_partitioned) solo repetiría la lectura.
+SUPPORTS_PARTITIONS = False
+
+SQL_TOKEN = re.compile(
+    r"\s*(?:(?P<param>%s)"
+    r"|(?P<number>\d+(?:\.\d+)?)"
+    r"|'(?P<string>(?:[^'\\]|\\.|'')*)'"
+    r"|`(?P<quoted>[^`]+)`"
+    r"|(?P<name>[A-Za-z_][A-Za-z0-9_$]*)"
+    r"|(?P<op><=>|<=|>=|<>|!=|[=<>(),.*+\-/]))",
+    re.DOTALL
+)
+NO_OP_STATEMENTS = ('SET', 'START', 'BEGIN', 'COMMIT', 'ROLLBACK')
+AGGREGATES = {'MAX', 'MIN', 'COUNT', 'SUM'}
+KEYWORDS = {'FROM', 'WHERE', 'GROUP', 'ORDER', 'LIMIT', 'AS', 'AND', 'OR', 'NOT', 'IN', 'IS',
+            'NULL', 'ASC', 'DESC', 'BY', 'OFFSET', 'DIV', 'CASE', 'WHEN', 'THEN', 'ELSE', 'END'}
+DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+INFORMATION_COLUMNS = ['TABLE_SCHEMA', 'TABLE_NAME', 'COLUMN_NAME', 'DATA_TYPE', 'ORDINAL_POSITION']
+INFORMATION_TABLES = ['TABLE_SCHEMA', 'TABLE_NAME', 'TABLE_ROWS', 'UPDATE_TIME']
+
+
+class UnsupportedQuery(Exception):
+    """La consulta no se puede resolver sobre un volcado."""
+
+
+# --- Valores con la semántica de MySQL ---
+
+def _comparable(a, b):
+    """Lleva a y b a tipos comparables, como MySQL al comparar columnas y literales."""
+    numbers = (int, float, Decimal)
+    if isinstance(a, str) and isinstance(b, str):
+        return a.casefold(), b.casefold()
+    if isinstance(a, str) and isinstance(b, numbers):
+        return _to_number(a), b
+    if isinstance(b, str) and isinstance(a, numbers):
+        return a, _to_number(b)
+    if isinstance(a, date) and isinstance(b, date) and isinstance(a, datetime) != isinstance(b, datetime):
+        promote = lambda value: value if isinstance(value, datetime) else datetime(value.year, value.month, value.day)
+        return promote(a), promote(b)
+    if isinstance(a, date) and isinstance(b, str):
+        return a, datetime.fromisoformat(b) if isinstance(a, datetime) else date.fromisoformat(b[:10])
+    if isinstance(b, date) and isinstance(a, str):
+        return datetime.fromisoformat(a) if isinstance(b, datetime) else date.fromisoformat(a[:10]), b
+    return a, b
+
+
+def _to_number(text):
+    match = re.match(r"\s*[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?", text)
+    return Decimal(match.group(0).strip()) if match else 0
+
+
+COMPARISONS = {
+    '=': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '<>': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+}
+
+
+def _compare(op, a, b):
+    if a is None or b is None:
+        return None
+    return COMPARISONS[op](*_comparable(a, b))
+
+
+def _number(value):
+    """Valor como número, como MySQL en una operación aritmética."""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float, Decimal)):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        value = bytes(value).decode('utf-8', errors='replace')
+    return _to_number(str(value))
+
+
+def _arithmetic(op, a, b):
+    if a is None or b is None:
+        return None
+    a, b = _number(a), _number(b)
+    if isinstance(a, float) != isinstance(b, float):
+        a, b = float(a), float(b)
+    if op == '+':
+        return a + b
+    if op == '-':
+        return a - b
+    if op == '*':
+        return a * b
+    if b == 0:
+        return None
+    if op == 'DIV':
+        quotient = abs(a) // abs(b)
+        return int(quotient if (a < 0) == (b < 0) else -quotient)
+    return Decimal(a) / Decimal(b) if not isinstance(a, float) else a / b
+
+
+def _text(value):
+    """Valor como texto, con el formato con que MySQL lo concatena."""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, Decimal):
+        return format(value, 'f')
+    if isinstance(value, datetime):
+        return value.isoformat(' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        seconds = int(value.total_seconds())
+        sign, seconds = ('-' if seconds < 0 else ''), abs(seconds)
+        return f"{sign}{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value).decode('utf-8', errors='replace')
+    return str(value)
+
+
+def _cast(value, target):
+    if value is None:
+        return None
+    if target in ('UNSIGNED', 'SIGNED'):
+        return int(_number(value))
+    if target == 'CHAR':
+        return _text(value)
+    if target in ('DATE', 'DATETIME'):
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value) if len(value) > 10 else date.fromisoformat(value)
+        if target == 'DATE':
+            return value.date() if isinstance(value, datetime) else value
+        return value if isinstance(value, datetime) else datetime(value.year, value.month, value.day)
+    raise UnsupportedQuery(f"CAST a {target} no está disponible sobre un volcado.")
+
+
+def _substring(text, start, length=None):
+    if text is None or start is None:
+        return None
+    text, start = _text(text), int(_number(start))
+    if start == 0:
+        return ''
+    begin = start - 1 if start > 0 else len(text) + start
+    if begin < 0:
+        return ''
+    return text[begin:] if length is None else text[begin:begin + max(int(_number(length)), 0)]
+
+
+def _conv(value, from_base, to_base):
+    if value is None:
+        return None
+    number = int(_text(value), int(from_base))
+    digits = ''
+    while True:
+        number, digit = divmod(number, int(to_base))
+        digits = DIGITS[digit] + digits
+        if not number:
+            return digits
+
+
+def _md5(value):
+    if value is None:
+        return None
+    data = bytes(value) if isinstance(value, (bytes, bytearray)) else _text(value).encode('utf-8')
+    return hashlib.md5(data).hexdigest()
+
+
+# Funciones escalares: nombre -> f(*argumentos)
+SCALAR_FUNCTIONS = {
+    'MD5': _md5,
+    'SUBSTRING': _substring,
+    'SUBSTR': _substring,
+    'CONV': _conv,
+    'CONCAT': lambda *values: None if None in values else ''.join(map(_text, values)),
+    'CONCAT_WS': lambda separator, *values: None if separator is None else _text(separator).join(
+        _text(value) for value in values if value is not None),
+}
+
+
+def _sort_key(value):
+    """Clave de orden: NULL primero y texto sin distinguir mayúsculas."""
+    if value is None:
+        return (0, 0)
+    return (1, value.casefold() if isinstance(value, str) else value)
+
+
+# --- Análisis de la consulta ---
+
+class _Parser:
+    """
+    Analizador descendente de un SELECT de una tabla. Cada expresión se
+    compila a una función f(fila, grupo): fila es un diccionario con las
+    columnas en minúsculas y grupo la lista de filas de su GROUP BY, que
+    usan los agregados.
+    """
+
+    def __init__(self, query, params, database):
+        self.query = query
+        self.database = database
+        self.tokens = []
+        params = list(params or ())
+        length = len(query.rstrip().rstrip(';'))
+        pos = 0
+        while pos < length:
+            m = SQL_TOKEN.match(query, pos)
+            if m is None:
+                raise UnsupportedQuery(f"No se reconoce la consulta cerca de: {query[pos:pos + 40]!r}")
+            kind = m.lastgroup
+            value = m.group(kind)
+            start = m.end() - len(m.group(0).lstrip())
+            if kind == 'param':
+                if not params:
+                    raise UnsupportedQuery("Faltan parámetros para la consulta.")
+                kind, value = 'value', params.pop(0)
+            elif kind == 'number':
+                kind, value = 'value', Decimal(value) if '.' in value else int(value)
+            elif kind == 'string':
+                kind, value = 'value', unescape(value)
+            self.tokens.append((kind, value, start, m.end()))
+            pos = m.end()
+        self.tokens.append(('end', None, len(query), len(query)))
+        self.pos = 0
+        self.has_aggregate = False
+
+    def peek(self, offset=0):
+        return self.tokens[self.pos + offset]
+
+    def keyword(self, *words):
+        kind, value = self.peek()[:2]
+        return kind == 'name' and value.upper() in words
+
+    def accept(self, *words):
+        if self.keyword(*words):
+            self.pos += 1
+            return True
+        return False
+
+    def accept_op(self, op):
+        kind, value = self.peek()[:2]
+        if kind == 'op' and value == op:
+            self.pos += 1
+            return True
+        return False
+
+    def expect_op(self, op):
+        if not self.accept_op(op):
+            raise UnsupportedQuery(f"Se esperaba '{op}' en: {self.query}")
+
+    def expect(self, word):
+        if not self.accept(word):
+            raise UnsupportedQuery(f"Se esperaba {word} en: {self.query}")
+
+    def identifier(self):
+        kind, value = self.peek()[:2]
+        if kind not in ('name', 'quoted'):
+            raise UnsupportedQuery(f"Se esperaba un nombre en: {self.query}")
+        self.pos += 1
+        return value
+
+    # Expresiones, de menor a mayor precedencia
+
+    def expression(self):
+        left = self.conjunction()
+        while self.accept('OR'):
+            parts = [left, self.conjunction()]
+            left = lambda row, group, parts=parts: _or(part(row, group) for part in parts)
+        return left
+
+    def conjunction(self):
+        left = self.negation()
+        while self.accept('AND'):
+            parts = [left, self.negation()]
+            left = lambda row, group, parts=parts: _and(part(row, group) for part in parts)
+        return left
+
+    def negation(self):
+        if self.accept('NOT'):
+            inner = self.negation()
+            return lambda row, group: _not(inner(row, group))
+        return self.comparison()
+
+    def comparison(self):
+        left = self.additive()
+        kind, value = self.peek()[:2]
+        if kind == 'op' and value in COMPARISONS:
+            self.pos += 1
+            right = self.additive()
+            return lambda row, group: _compare(value, left(row, group), right(row, group))
+        if self.accept('IS'):
+            negated = self.accept('NOT')
+            self.expect('NULL')
+            return lambda row, group: (left(row, group) is None) != negated
+        negated = self.accept('NOT')
+        if self.accept('IN'):
+            self.expect_op('(')
+            items = [self.primary()]
+            while self.accept_op(','):
+                items.append(self.primary())
+            self.expect_op(')')
+
+            def contains(row, group):
+                current = left(row, group)
+                if current is None:
+                    return None
+                found = any(_compare('=', current, item(row, group)) for item in items)
+                return found != negated
+            return contains
+        if negated:
+            raise UnsupportedQuery(f"NOT sin IN no soportado en: {self.query}")
+        return left
+
+    def additive(self):
+        left = self.term()
+        while True:
+            kind, value = self.peek()[:2]
+            if kind != 'op' or value not in ('+', '-'):
+                return left
+            self.pos += 1
+            operands = [left, self.term()]
+            left = lambda row, group, op=value, operands=operands: _arithmetic(
+                op, operands[0](row, group), operands[1](row, group))
+
+    def term(self):
+        left = self.unary()
+        while True:
+            kind, value = self.peek()[:2]
+            if kind == 'op' and value in ('*', '/'):
+                self.pos += 1
+                op = value
+            elif self.accept('DIV'):
+                op = 'DIV'
+            else:
+                return left
+            operands = [left, self.unary()]
+            left = lambda row, group, op=op, operands=operands: _arithmetic(
+                op, operands[0](row, group), operands[1](row, group))
+
+    def unary(self):
+        if self.accept_op('-'):
+            inner = self.unary()
+            return lambda row, group: _arithmetic('-', 0, inner(row, group))
+        return self.primary()
+
+    def case(self):
+        """CASE [valor] WHEN ... THEN ... [ELSE ...] END."""
+        subject = None if self.keyword('WHEN') else self.expression()
+        branches = []
+        while self.accept('WHEN'):
+            condition = self.expression()
+            self.expect('THEN')
+            branches.append((condition, self.expression()))
+        if not branches:
+            raise UnsupportedQuery(f"CASE sin WHEN en: {self.query}")
+        default = self.expression() if self.accept('ELSE') else (lambda row, group: None)
+        self.expect('END')
+
+        def evaluate(row, group):
+            current = subject(row, group) if subject else None
+            for condition, result in branches:
+                matched = _compare('=', current, condition(row, group)) if subject else condition(row, group)
+                if matched:
+                    return result(row, group)
+            return default(row, group)
+        return evaluate
+
+    def primary(self):
+        kind, value = self.peek()[:2]
+        if kind == 'value':
+            self.pos += 1
+            return lambda row, group: value
+        if self.accept_op('('):
+            inner = self.expression()
+            self.expect_op(')')
+            return inner
+        if kind == 'name' and value.upper() == 'NULL':
+            self.pos += 1
+            return lambda row, group: None
+        if self.accept('CASE'):
+            return self.case()
+        if kind == 'name' and self.peek(1)[0] == 'op' and self.peek(1)[1] == '(':
+            return self.function()
+        name = self.identifier()
+        if self.accept_op('.'):
+            name = self.identifier()
+        column = name.lower()
+
+        def lookup(row, group):
+            try:
+                return row[column]
+            except KeyError:
+                raise UnsupportedQuery(f"Columna desconocida {name} en: {self.query}")
+        return lookup
+
+    def function(self):
+        name = self.identifier().upper()
+        self.expect_op('(')
+        if name == 'COUNT' and self.accept_op('*'):
+            self.expect_op(')')
+            self.has_aggregate = True
+            return lambda row, group: len(group)
+        if name == 'CAST':
+            argument = self.expression()
+            self.expect('AS')
+            target = self.identifier().upper()
+            if target in ('UNSIGNED', 'SIGNED'):
+                self.accept('INTEGER', 'INT')
+            self.expect_op(')')
+            return lambda row, group: _cast(argument(row, group), target)
+        arguments = []
+        if not self.accept_op(')'):
+            arguments.append(self.expression())
+            while self.accept_op(','):
+                arguments.append(self.expression())
+            self.expect_op(')')
+
+        if name in AGGREGATES:
+            self.has_aggregate = True
+            argument = arguments[0]
+
+            def aggregate(row, group):
+                values = [v for v in (argument(r, group) for r in group) if v is not None]
+                if name == 'COUNT':
+                    return len(values)
+                if not values:
+                    return None
+                if name == 'SUM':
+                    return sum(values)
+                keys = [_sort_key(v) for v in values]
+                pick = max if name == 'MAX' else min
+                return values[keys.index(pick(keys))]
+            return aggregate
+        if name in ('IFNULL', 'COALESCE'):
+            return lambda row, group: next(
+                (v for v in (argument(row, group) for argument in arguments) if v is not None), None)
+        if name == 'DATABASE':
+            return lambda row, group: self.database
+        if name in SCALAR_FUNCTIONS:
+            function = SCALAR_FUNCTIONS[name]
+            return lambda row, group: function(*(argument(row, group) for argument in arguments))
+        raise UnsupportedQuery(f"La función {name} no está disponible sobre un volcado.")
+
+    # Sentencia
+
+    def group_expression(self, items):
+        """Expresión de GROUP BY; un entero solo (GROUP BY 1) nombra la columna del SELECT."""
+        kind, value = self.peek()[:2]
+        following = self.peek(1)
+        is_position = (kind == 'value' and type(value) is int
+                       and (following[0] == 'end' or following[1] == ',' or self._keyword_at(following)))
+        if not is_position:
+            return self.expression()
+        if not 1 <= value <= len(items) or items[value - 1][1] is None:
+            raise UnsupportedQuery(f"GROUP BY {value} no corresponde a una columna en: {self.query}")
+        self.pos += 1
+        return items[value - 1][1]
+
+    @staticmethod
+    def _keyword_at(token):
+        return token[0] == 'name' and token[1].upper() in KEYWORDS
+
+    def select(self):
+        self.expect('SELECT')
+        items = []
+        while True:
+            if self.accept_op('*'):
+                items.append(('*', None))
+            else:
+                start = self.peek()[2]
+                expression = self.expression()
+                label = self.query[start:self.tokens[self.pos - 1][3]].strip()
+                if self.accept('AS'):
+                    label = self.identifier()
+                elif self.peek()[0] in ('name', 'quoted') and not self.keyword(*KEYWORDS):
+                    label = self.identifier()
+                items.append((label, expression))
+            if not self.accept_op(','):
+                break
+
+        self.expect('FROM')
+        table = self.identifier()
+        schema = None
+        if self.accept_op('.'):
+            schema, table = table, self.identifier()
+        if self.peek()[0] in ('name', 'quoted') and not self.keyword(*KEYWORDS):
+            self.identifier()  # alias de la tabla
+
+        where = None
+        if self.accept('WHERE'):
+            where = self.expression()
+        group_by = []
+        if self.accept('GROUP'):
+            self.expect('BY')
+            group_by.append(self.group_expression(items))
+            while self.accept_op(','):
+                group_by.append(self.group_expression(items))
+        order_by = []
+        if self.accept('ORDER'):
+            self.expect('BY')
+            while True:
+                expression = self.expression()
+                descending = self.accept('DESC')
+                if not descending:
+                    self.accept('ASC')
+                order_by.append((expression, descending))
+                if not self.accept_op(','):
+                    break
+        limit = offset = None
+        if self.accept('LIMIT'):
+            limit = self.primary()(None, None)
+            if self.accept_op(','):
+                offset, limit = limit, self.primary()(None, None)
+            elif self.accept('OFFSET'):
+                offset = self.primary()(None, None)
+        if self.peek()[0] != 'end':
+            raise UnsupportedQuery(f"Consulta no soportada sobre un volcado: {self.query}")
+        return {
+            'schema': schema, 'table': table, 'items': items, 'where': where, 'group_by': group_by,
+            'order_by': order_by, 'limit': limit, 'offset': offset, 'aggregate': self.has_aggregate,
+        }
+
+
+def _not(value):
+    return None if value is None else not value
+
+
+def _and(values):
+    result = True
+    for value in values:
+        if value is None:
+            result = None
+        elif not value:
+            return False
+    return result
+
+
+def _or(values):
+    result = False
+    for value in values:
+        if value is None:
+            result = None
+        elif value:
+            return True
+    return result
+
+
+# --- Conexión ---
+
+class DumpCursor:
+    """Cursor de solo lectura sobre un volcado, con la interfaz de mysql.connector."""
+
+    def __init__(self, connection, dictionary=False):
+        self._connection = connection
+        self._dictionary = dictionary
+        self._rows = iter(())
+        self.column_names = ()
+        self.rowcount = -1
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        self.close()
+        statement = operation.strip()
+        head = statement.split(None, 1)[0].upper() if statement else ''
+        self.rowcount = -1
+        if head in NO_OP_STATEMENTS:
+            self.column_names = ()
+            self._rows = iter(())
+        elif head == 'CHECKSUM':
+            self._checksum(statement)
+        elif head == 'SELECT':
+            self._select(statement, params)
+        else:
+            raise UnsupportedQuery(f"Sobre un volcado solo se pueden ejecutar consultas: {statement[:80]}")
+
+    def _checksum(self, statement):
+        m = re.match(r"CHECKSUM\s+TABLE\s+`?([^`;\s]+)`?", statement, re.IGNORECASE)
+        if m is None:
+            raise UnsupportedQuery(f"Consulta no soportada sobre un volcado: {statement}")
+        name = m.group(1)
+        self.column_names = ('Table', 'Checksum')
+        self._rows = iter([(f"{self._connection.database}.{name}",
+                            self._connection.dump.checksum(name, self._connection.database))])
+
+    def _source(self, plan):
+        """(columnas, filas) de la tabla del FROM."""
+        dump, database = self._connection.dump, self._connection.database
+        if (plan['schema'] or '').lower() == 'information_schema':
+            if plan['table'].lower() == 'columns':
+                rows = [
+                    (table.database or database, table.name, column, data_type, position)
+                    for table in dump.tables_in(database)
+                    for position, (column, data_type) in enumerate(table.columns, start=1)
+                ]
+                return INFORMATION_COLUMNS, iter(rows)
+            if plan['table'].lower() == 'tables':
+                updated = datetime.fromtimestamp(os.path.getmtime(dump.path)).replace(microsecond=0)
+                rows = [(table.database or database, table.name, None, updated)
+                        for table in dump.tables_in(database)]
+                return INFORMATION_TABLES, iter(rows)
+        table = dump.table(plan['table'], database)
+        if table is None:
+            raise UnsupportedQuery(f"La tabla {plan['table']} no está en el volcado {dump.path}.")
+        if not table.columns:
+            raise UnsupportedQuery(f"El volcado no trae el CREATE TABLE de {plan['table']}.")
+        return table.column_names(), dump.rows(plan['table'], database)
+
+    def _select(self, statement, params):
+        plan = _Parser(statement, params, self._connection.database).select()
+        columns, source = self._source(plan)
+        keys = [column.lower() for column in columns]
+
+        labels = []
+        for label, expression in plan['items']:
+            labels.extend(columns if expression is None else [label])
+        self.column_names = tuple(labels)
+
+        def project(row, group):
+            values = []
+            for _, expression in plan['items']:
+                if expression is None:
+                    values.extend(row[key] for key in keys)
+                else:
+                    values.append(expression(row, group))
+            return values
+
+        def matching():
+            for values in source:
+                row = dict(zip(keys, values))
+                if plan['where'] is None or plan['where'](row, None):
+                    yield row
+
+        def results():
+            if plan['group_by'] or plan['aggregate']:
+                groups = {}
+                for row in matching():
+                    key = tuple(_sort_key(expression(row, None)) for expression in plan['group_by'])
+                    groups.setdefault(key, []).append(row)
+                if not groups and not plan['group_by']:
+                    groups[()] = []
+                outputs = []
+                for rows in groups.values():
+                    first = rows[0] if rows else dict.fromkeys(keys)
+                    values = project(first, rows)
+                    # ORDER BY puede nombrar un alias o una columna de la tabla
+                    context = dict(first)
+                    context.update((label.lower(), value) for label, value in zip(labels, values))
+                    outputs.append((context, values))
+            elif plan['order_by']:
+                outputs = [(row, None) for row in matching()]
+            else:
+                yield from (project(row, None) for row in _limited(matching(), plan['offset'], plan['limit']))
+                return
+
+            for expression, descending in reversed(plan['order_by']):
+                outputs.sort(key=lambda item: _sort_key(expression(item[0], None)), reverse=descending)
+            for context, values in _limited(iter(outputs), plan['offset'], plan['limit']):
+                yield values if values is not None else project(context, None)
+
+        self._rows = results()
+
+    def _format(self, values):
+        if self._dictionary:
+            return dict(zip(self.column_names, values))
+        return tuple(values)
+
+    def fetchone(self):
+        values = next(self._rows, None)
+        return None if values is None else self._format(values)
+
+    def fetchmany(self, size=1):
+        batch = []
+        for values in self._rows:
+            batch.append(self._format(values))
+            if len(batch) >= size:
+                break
+        return batch
+
+    def fetchall(self):
+        return [self._format(values) for values in self._rows]
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        close = getattr(self._rows, 'close', None)
+        if close is not None:
+            close()
+        self._rows = iter(())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _limited(rows, offset, limit):
+    offset = offset or 0
+    for index, row in enumerate(rows):
+        if index < offset:
+            continue
+        if limit is not None and index >= offset + limit:
+            return
+        yield row
+
+
+class DumpConnection:
+    """
+    Conexión de solo lectura a la base database dentro del volcado path,
+    con la parte de la interfaz de mysql.connector que usan los pasos.
+    """
+
+    supports_partitions = SUPPORTS_PARTITIONS
+    unread_result = False
+
+    def __init__(self, path, database):
+        self.dump = open_dump(path)
+        self.database = database
+        self._open = True
+
+    def cursor(self, dictionary=False, buffered=None, **kwargs):
+        return DumpCursor(self, dictionary=dictionary)
+
+    def is_connected(self):
+        return self._open
+
+    def consume_results(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self._open = False
@@ -0,0 +1,272 @@
+# Lectura en flujo de las tablas de origen en MySQL.
+#
+# fetchall() trae la tabla completa a memoria antes de procesar la primera
+# fila y los pasos luego construyen una segunda lista con las tuplas a
+# insertar. stream_rows usa un cursor no bufferizado (el servidor envía las
+# filas a medida que se leen) y las entrega por lotes de fetchmany, de modo
+# que, encadenado con un generador de tuplas y bulk_load, la memoria usada
+# no depende del tamaño de la tabla.
+#
+# stream_partitioned divide además una tabla grande en rangos de su llave y
+# lee cada rango en paralelo por su propia conexión, para que la lectura no
+# quede limitada a un solo cursor. Las conexiones a un volcado (ver
+# source_adapter.py) se leen siempre en un solo rango.
+#
+# Con MIGRATION_EXTRACT_CACHE_DIR, ambas guardan el resultado de cada
+# consulta de una tabla y lo reutilizan mientras la tabla no cambie (ver
+# extract_cache.py).
+
+import os
+import queue
+import threading
+from db_connections import ConnectionPoolManager
+from extract_cache import cached_rows
+from run_metrics import record, step_phase
+
+DEFAULT_BATCH_SIZE = int(os.getenv("MIGRATION_FETCH_SIZE", "5000"))
+
+# Con un cursor no bufferizado MySQL espera a que el cliente lea cada
+# paquete; si la carga en PostgreSQL se demora, el valor por defecto
+# (60 s) puede cortar la conexión a mitad de la lectura.
+NET_WRITE_TIMEOUT = int(os.getenv("MIGRATION_NET_WRITE_TIMEOUT", "600"))
+
+# Número de rangos (y de conexiones) con que se lee una tabla particionada
+# y cuántos lotes puede adelantar cada rango antes de esperar al consumidor.
+DEFAULT_PARTITIONS = int(os.getenv("MIGRATION_EXTRACT_PARTITIONS", "4"))
+QUEUE_BATCHES = int(os.getenv("MIGRATION_EXTRACT_QUEUE", "8"))
+
+
+class RowCounter:
+    """Cuenta las filas que pasan por un iterable sin materializarlo."""
+
+    def __init__(self, rows):
+        self._rows = rows
+        self.count = 0
+
+    def __iter__(self):
+        for row in self._rows:
+            self.count += 1
+            yield row
+
+
+def _fetch_batches(conn, query, params=None, batch_size=None, dictionary=True):
+    """Ejecuta query con un cursor no bufferizado y entrega sus filas por lotes."""
+    batch_size = batch_size or DEFAULT_BATCH_SIZE
+
+    setup = conn.cursor()
+    try:
+        setup.execute(f"SET SESSION net_write_timeout = {NET_WRITE_TIMEOUT}")
+    finally:
+        setup.close()
+
+    cursor = conn.cursor(dictionary=dictionary, buffered=False)
+    try:
+        with step_phase('extract'):
+            cursor.execute(query, params)
+        while True:
+            with step_phase('extract'):
+                batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            record(rows_read=len(batch))
+            yield batch
+    finally:
+        if conn.unread_result:
+            conn.consume_results()
+        cursor.close()
+
+
+def stream_rows(conn, query, params=None, batch_size=None, dictionary=True):
+    """
+    Ejecuta query en la conexión MySQL y devuelve un generador con sus
+    filas (diccionarios si dictionary=True), leídas en lotes de batch_size.
+
+    La conexión queda ocupada hasta que el generador se agota o se cierra;
+    si se abandona antes, los resultados pendientes se descartan.
+    """
+    def read():
+        for batch in _fetch_batches(conn, query, params, batch_size, dictionary):
+            yield from batch
+
+    yield from cached_rows(conn, query, params, dictionary, read, batch_size or DEFAULT_BATCH_SIZE)
+
+
+def mysql_connector(session, kind):
+    """
+    Devuelve el par (abrir, liberar) para obtener conexiones adicionales a
+    la base MySQL kind ('absmain' o 'pilar3'): del pool de la sesión si se
+    recibe una, o conexiones nuevas que se cierran al liberarlas si no.
+    """
+    if session is not None:
+        return (lambda: session.manager.acquire(kind),
+                lambda conn: session.manager.release(kind, conn))
+
+    factory = ConnectionPoolManager.FACTORIES[kind]
+
+    def open_connection():
+        conn = factory()
+        if conn is None:
+            raise Exception(f"No se pudo abrir una conexión para '{kind}'.")
+        return conn
+
+    return open_connection, lambda conn: conn.close()
+
+
+def key_ranges(conn, table, key, partitions, sampled=False):
+    """
+    Divide la tabla en hasta partitions rangos [desde, hasta) de la llave
+    numérica key. Por defecto reparte por igual el intervalo MIN..MAX; con
+    sampled=True toma los límites de la distribución real de la llave
+    (útil cuando hay grandes huecos entre Ids). El primer rango no tiene
+    límite inferior y el último no tiene límite superior.
+    """
+    cursor = conn.cursor()
+    try:
+        if sampled:
+            cursor.execute(f"SELECT COUNT(*) FROM `{table}`")
+            total = cursor.fetchone()[0]
+            boundaries = []
+            for i in range(1, partitions):
+                cursor.execute(
+                    f"SELECT `{key}` FROM `{table}` WHERE `{key}` IS NOT NULL "
+                    f"ORDER BY `{key}` LIMIT 1 OFFSET %s", (total * i // partitions,)
+                )
+                row = cursor.fetchone()
+                if row:
+                    boundaries.append(row[0])
+        else:
+            cursor.execute(f"SELECT MIN(`{key}`), MAX(`{key}`) FROM `{table}`")
+            low, high = cursor.fetchone()
+            boundaries = []
+            if low is not None:
+                step = (high - low + 1) / partitions
+                boundaries = [low + int(step * i) for i in range(1, partitions)]
+    finally:
+        cursor.close()
+
+    boundaries = sorted(set(boundaries))
+    limits = [None] + boundaries + [None]
+    return list(zip(limits[:-1], limits[1:]))
+
+
+def _range_condition(key, low, high):
+    """Condición SQL y parámetros de un rango; el primero incluye los NULL."""
+    conditions, params = [], []
+    if low is not None:
+        conditions.append(f"`{key}` >= %s")
+        params.append(low)
+    if high is not None:
+        conditions.append(f"`{key}` < %s")
+        params.append(high)
+    condition = ' AND '.join(conditions) or '1 = 1'
+    if low is None:
+        condition = f"({condition} OR `{key}` IS NULL)"
+    return condition, tuple(params)
+
+
+def stream_partitioned(conn, connector, query, table, key, partitions=None,
+                       ordered=False, sampled=False, batch_size=None, dictionary=True):
+    """
+    Lee query en paralelo dividiendo table en rangos de key (ver key_ranges)
+    y devuelve un generador con las filas de todos los rangos.
+
+    query debe contener el marcador {range}, que se reemplaza por la
+    condición de cada rango, p. ej. "SELECT * FROM tesJuCambios WHERE
+    {range} ORDER BY IdTramite, Fecha". conn se usa para calcular los
+    rangos y connector es el par (abrir, liberar) de mysql_connector, del
+    que cada rango toma su propia conexión.
+
+    Con ordered=True las filas se entregan rango por rango en orden de la
+    llave, de modo que si query ordena primero por key el resultado conserva
+    el orden global; los demás rangos se van leyendo mientras tanto, hasta
+    QUEUE_BATCHES lotes cada uno. Con ordered=False se entrega cada lote en
+    cuanto está listo. Si la lectura de un rango falla, se relanza el error.
+    """
+    partitions = partitions or DEFAULT_PARTITIONS
+    condition, params = _range_condition(key, None, None)
+    if partitions <= 1 or not getattr(conn, 'supports_partitions', True):
+        yield from stream_rows(conn, query.format(range=condition), params, batch_size, dictionary)
+        return
+
+    # En la caché se guarda como la consulta de la tabla completa
+    yield from cached_rows(
+        conn, query.format(range=condition), params, dictionary,
+        lambda: _read_partitioned(conn, connector, query, table, key, partitions,
+                                  ordered, sampled, batch_size, dictionary),
+        batch_size or DEFAULT_BATCH_SIZE
+    )
+
+
+def _read_partitioned(conn, connector, query, table, key, partitions, ordered, sampled, batch_size, dictionary):
+    ranges = key_ranges(conn, table, key, partitions, sampled=sampled)
+    open_connection, release_connection = connector
+    done = object()
+    stop = threading.Event()
+    if ordered:
+        queues = [queue.Queue(maxsize=QUEUE_BATCHES) for _ in ranges]
+    else:
+        queues = [queue.Queue(maxsize=QUEUE_BATCHES * len(ranges))] * len(ranges)
+
+    def put(index, item):
+        while not stop.is_set():
+            try:
+                queues[index].put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read_range(index, low, high):
+        condition, params = _range_condition(key, low, high)
+        part_conn = None
+        try:
+            part_conn = open_connection()
+            batches = _fetch_batches(part_conn, query.format(range=condition), params, batch_size, dictionary)
+            try:
+                for batch in batches:
+                    if not put(index, batch):
+                        return
+            finally:
+                batches.close()
+            put(index, done)
+        except Exception as e:
+            put(index, e)
+        finally:
+            if part_conn is not None:
+                release_connection(part_conn)
+
+    threads = [
+        threading.Thread(target=read_range, args=(index, low, high), daemon=True)
+        for index, (low, high) in enumerate(ranges)
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        if ordered:
+            for index in range(len(ranges)):
+                while True:
+                    with step_phase('extract'):
+                        item = queues[index].get()
+                    if item is done:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    record(rows_read=len(item))
+                    yield from item
+        else:
+            pending = len(ranges)
+            while pending:
+                with step_phase('extract'):
+                    item = queues[0].get()
+                if item is done:
+                    pending -= 1
+                    continue
+                if isinstance(item, Exception):
+                    raise item
+                record(rows_read=len(item))
+                yield from item
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
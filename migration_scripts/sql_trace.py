@@ -0,0 +1,261 @@
+# Traza de las sentencias SQL ejecutadas durante la migración.
+#
+# Cuando está activada (MIGRATION_SQL_TRACE=1 o enable()), las conexiones
+# que crea db_connections.py registran cada sentencia: su texto
+# normalizado (literales reemplazados por ?, listas IN y VALUES
+# colapsadas), el número de parámetros, la duración y las filas. Las
+# sentencias con el mismo texto normalizado se acumulan, de modo que una
+# consulta ejecutada una vez por fila (p. ej. un SELECT por docente)
+# aparece como una sola entrada con muchas llamadas. print_report()
+# muestra las de mayor tiempo total.
+#
+# En PostgreSQL se usa un cursor_factory (el cursor sigue siendo un cursor
+# de psycopg2). En MySQL la conexión se envuelve en un proxy cuyos
+# cursores miden execute y fetch*, porque con cursores no bufferizados el
+# tiempo de la consulta se reparte entre ambos. Desactivada no tiene costo:
+# las conexiones se crean como siempre.
+
+import os
+import re
+import threading
+import time
+
+import psycopg2.extensions
+
+ENABLED = os.getenv("MIGRATION_SQL_TRACE", "").lower() in ('1', 'true', 'yes')
+TOP_N = int(os.getenv("MIGRATION_SQL_TRACE_TOP", "20"))
+
+# Más allá de este largo solo se normaliza el comienzo de la sentencia
+# (los INSERT de execute_values llevan todos los valores en el texto).
+MAX_NORMALIZE_LENGTH = 4000
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"\bVALUES\s*\(.*", re.IGNORECASE | re.DOTALL)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(statement):
+    """Texto normalizado de una sentencia, usado para agruparlas."""
+    if isinstance(statement, bytes):
+        statement = statement.decode('utf-8', errors='replace')
+    elif not isinstance(statement, str):
+        statement = str(statement)
+    statement = statement[:MAX_NORMALIZE_LENGTH]
+    statement = _STRING.sub('?', statement)
+    statement = _PLACEHOLDER.sub('?', statement)
+    statement = _NUMBER.sub('?', statement)
+    statement = _IN_LIST.sub('IN (...)', statement)
+    statement = _VALUES_LIST.sub('VALUES (...)', statement)
+    return _WHITESPACE.sub(' ', statement).strip()
+
+
+def _param_count(params):
+    if params is None:
+        return 0
+    if isinstance(params, (list, tuple, dict)):
+        return len(params)
+    return 1
+
+
+class SqlTracer:
+    """Acumula llamadas, tiempo y filas por (base de datos, sentencia normalizada)."""
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, database, statement, params, seconds, rows):
+        """Registra una ejecución y devuelve la llave de la sentencia."""
+        key = (database, normalize(statement))
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = {
+                    'database': database, 'statement': key[1], 'calls': 0, 'seconds': 0.0,
+                    'max_seconds': 0.0, 'rows': 0, 'params': _param_count(params), 'steps': set(),
+                }
+            stats['calls'] += 1
+            stats['seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+            if rows and rows > 0:
+                stats['rows'] += rows
+            step = _current_step_name()
+            if step:
+                stats['steps'].add(step)
+        return key
+
+    def add_time(self, key, seconds, rows):
+        """Suma tiempo y filas (de un fetch) a la sentencia de llave key."""
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is not None:
+                stats['seconds'] += seconds
+                stats['rows'] += rows
+
+    def report(self, top=TOP_N):
+        """Las top sentencias de mayor tiempo total, como lista de dicts."""
+        with self._lock:
+            entries = [dict(stats, steps=sorted(stats['steps'])) for stats in self._stats.values()]
+        entries.sort(key=lambda stats: stats['seconds'], reverse=True)
+        return entries[:top]
+
+    def print_report(self, top=TOP_N):
+        entries = self.report(top)
+        if not entries:
+            return
+        print(f"\n--- Sentencias SQL más lentas (top {len(entries)} por tiempo total) ---")
+        print(f"{'BD':<9} {'Llamadas':>9} {'Total (s)':>10} {'Prom. (ms)':>10} {'Máx. (ms)':>10} "
+              f"{'Filas':>10} {'Parám.':>6}  Sentencia")
+        for stats in entries:
+            average = stats['seconds'] / stats['calls'] * 1000
+            statement = stats['statement'] if len(stats['statement']) <= 120 else stats['statement'][:117] + '...'
+            print(f"{stats['database']:<9} {stats['calls']:>9} {stats['seconds']:>10.3f} {average:>10.2f} "
+                  f"{stats['max_seconds'] * 1000:>10.2f} {stats['rows']:>10} {stats['params']:>6}  {statement}")
+            if stats['steps']:
+                print(f"{'':<9} pasos: {', '.join(stats['steps'])}")
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+TRACER = SqlTracer()
+
+
+def _current_step_name():
+    # Import diferido: run_metrics es opcional para los scripts sueltos
+    try:
+        from run_metrics import current_step
+    except ImportError:
+        return None
+    step = current_step()
+    return step.name if step is not None else None
+
+
+def enable():
+    """Activa la traza para las conexiones que se abran desde ahora."""
+    global ENABLED
+    ENABLED = True
+
+
+def enabled():
+    return ENABLED
+
+
+# --- PostgreSQL ---
+
+class TracingCursor(psycopg2.extensions.cursor):
+    """Cursor de psycopg2 que registra cada sentencia en TRACER."""
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            TRACER.record('postgres', query, vars, time.perf_counter() - start, self.rowcount)
+
+    def executemany(self, query, vars_list):
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            TRACER.record('postgres', query, None, time.perf_counter() - start, self.rowcount)
+
+    def copy_expert(self, sql, file, size=8192):
+        start = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            TRACER.record('postgres', sql, None, time.perf_counter() - start, self.rowcount)
+
+
+# --- MySQL ---
+
+class TracingMySQLCursor:
+    """Envuelve un cursor de mysql.connector y registra sus sentencias y lecturas."""
+
+    def __init__(self, cursor, database):
+        self._cursor = cursor
+        self._database = database
+        self._key = None
+        self._rows_known = False
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cursor.close()
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            # Bufferizado, rowcount ya trae las filas; sin buffer se cuentan al leer
+            self._rows_known = self._cursor.rowcount > 0
+            self._key = TRACER.record(self._database, operation, params, time.perf_counter() - start,
+                                      self._cursor.rowcount)
+
+    def executemany(self, operation, seq_params):
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params)
+        finally:
+            self._rows_known = True
+            self._key = TRACER.record(self._database, operation, None, time.perf_counter() - start,
+                                      self._cursor.rowcount)
+
+    def _timed_fetch(self, method, *args):
+        start = time.perf_counter()
+        result = method(*args)
+        if self._key is not None:
+            if isinstance(result, list):
+                rows = len(result)
+            else:
+                rows = 0 if result is None else 1
+            TRACER.add_time(self._key, time.perf_counter() - start, 0 if self._rows_known else rows)
+        return result
+
+    def fetchone(self):
+        return self._timed_fetch(self._cursor.fetchone)
+
+    def fetchmany(self, size=1):
+        return self._timed_fetch(self._cursor.fetchmany, size)
+
+    def fetchall(self):
+        return self._timed_fetch(self._cursor.fetchall)
+
+
+class TracingMySQLConnection:
+    """Envuelve una conexión de mysql.connector para que sus cursores registren las sentencias."""
+
+    def __init__(self, conn, database):
+        self._conn = conn
+        self._database = database
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return TracingMySQLCursor(self._conn.cursor(*args, **kwargs), self._database)
+
+
+def wrap_mysql(conn, database):
+    """Devuelve conn envuelta si la traza está activa; si no, la misma conexión."""
+    if conn is None or not ENABLED:
+        return conn
+    return TracingMySQLConnection(conn, database)
+
+
+def postgres_options():
+    """Argumentos extra para psycopg2.connect según si la traza está activa."""
+    return {'cursor_factory': TracingCursor} if ENABLED else {}
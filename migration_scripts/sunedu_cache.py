@@ -0,0 +1,91 @@
+"""
+Persistent cache of SUNEDU lookups, keyed by DNI.
+
+Academic degrees rarely change, so results are kept in a local SQLite file
+and reused until they expire. DNIs with no registered degrees are cached
+too ("negative" results), with a shorter lifetime. Failed lookups are never
+cached, so they are retried on the next run.
+"""
+
+import json
+import os
+import sqlite3
+import time
+
+from sunedu_client import SuneduResult
+
+DEFAULT_CACHE_PATH = os.getenv(
+    "SUNEDU_CACHE_PATH",
+    os.path.join(os.path.dirname(__file__), '..', 'sunedu_cache.sqlite3')
+)
+DEFAULT_TTL_DAYS = float(os.getenv("SUNEDU_CACHE_TTL_DAYS", "180"))
+DEFAULT_NEGATIVE_TTL_DAYS = float(os.getenv("SUNEDU_CACHE_NEGATIVE_TTL_DAYS", "30"))
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sunedu_lookups (
+        dni TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        degrees TEXT NOT NULL,
+        fetched_at REAL NOT NULL
+    )
+"""
+
+
+class SuneduCache:
+    """
+    SQLite-backed cache of SuneduResult objects. Entries with status 'ok'
+    live for ttl_days and 'not_found' entries for negative_ttl_days.
+    Intended to be used from a single thread.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_days=DEFAULT_TTL_DAYS,
+                 negative_ttl_days=DEFAULT_NEGATIVE_TTL_DAYS, commit_every=500):
+        self.path = path
+        self.ttl = ttl_days * 86400
+        self.negative_ttl = negative_ttl_days * 86400
+        self.commit_every = commit_every
+        self._uncommitted = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(SCHEMA)
+        self.conn.commit()
+
+    def _is_fresh(self, status, fetched_at, now):
+        ttl = self.ttl if status == 'ok' else self.negative_ttl
+        return now - fetched_at < ttl
+
+    def get_many(self, dnis):
+        """Returns {dni: SuneduResult} for the DNIs with a fresh cache entry."""
+        now = time.time()
+        fresh = {}
+        dnis = list(dnis)
+        for start in range(0, len(dnis), 900):
+            chunk = dnis[start:start + 900]
+            rows = self.conn.execute(
+                f"SELECT dni, status, degrees, fetched_at FROM sunedu_lookups "
+                f"WHERE dni IN ({', '.join('?' * len(chunk))})", chunk
+            )
+            for dni, status, degrees, fetched_at in rows:
+                if self._is_fresh(status, fetched_at, now):
+                    fresh[dni] = SuneduResult(dni, status, json.loads(degrees), attempts=0)
+        return fresh
+
+    def put(self, result):
+        """Stores a successful or negative result; errors are ignored."""
+        if result.status not in ('ok', 'not_found'):
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sunedu_lookups (dni, status, degrees, fetched_at) VALUES (?, ?, ?, ?)",
+            (result.dni, result.status, json.dumps(result.degrees), time.time())
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self.flush()
+
+    def flush(self):
+        self.conn.commit()
+        self._uncommitted = 0
+
+    def close(self):
+        self.flush()
+        self.conn.close()
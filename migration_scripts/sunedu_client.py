@@ -0,0 +1,165 @@
+"""
+Concurrent client for the SUNEDU degree lookup API.
+
+Requests for many DNIs are spread over a thread pool that shares one HTTP
+session (and its keep-alive connections). A token bucket caps the request
+rate across all threads. Responses with status 429 or 5xx, and network
+errors, are retried with exponential backoff plus jitter, honouring
+Retry-After when the server sends it.
+"""
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_BASE_URL = os.getenv("SUNEDU_API_URL", "https://service7.unap.edu.pe/api/v1/sunedu/consulta/{dni}")
+API_TOKEN = os.getenv("SUNEDU_API_TOKEN", "1|xrpNWzmI8EdDfvnKQpURERHiO4RraB4WmcIr810MjapBmmjXKWNGczJGTY")
+
+DEFAULT_CONCURRENCY = int(os.getenv("SUNEDU_CONCURRENCY", "8"))
+DEFAULT_RATE = float(os.getenv("SUNEDU_RATE", "10"))  # requests per second, 0 = unlimited
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available."""
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+
+class SuneduResult:
+    """Outcome of one lookup: status is 'ok', 'not_found' or 'error'."""
+
+    def __init__(self, dni, status, degrees=None, error=None, attempts=1):
+        self.dni = dni
+        self.status = status
+        self.degrees = degrees or []
+        self.error = error
+        self.attempts = attempts
+
+
+class SuneduClient:
+    """
+    Fetches academic degrees by DNI with at most `concurrency` requests in
+    flight and at most `rate` requests per second overall.
+    """
+
+    def __init__(self, base_url=API_BASE_URL, token=API_TOKEN, concurrency=DEFAULT_CONCURRENCY,
+                 rate=DEFAULT_RATE, burst=None, max_retries=5, backoff_base=0.5, backoff_max=30.0,
+                 timeout=10):
+        self.base_url = base_url
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate, burst)
+
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f'Bearer {token}'
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'retries': 0, 'ok': 0, 'not_found': 0, 'errors': 0}
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _backoff(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    def fetch(self, dni):
+        """Looks up one DNI, retrying transient failures."""
+        url = self.base_url.format(dni=dni)
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count('retries')
+            self.bucket.acquire()
+            self._count('requests')
+            response = None
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                last_error = f"Network error: {e}"
+            else:
+                if response.status_code == 200:
+                    try:
+                        degrees = (response.json().get('data') or {}).get('gtPersona') or []
+                    except ValueError:
+                        self._count('errors')
+                        return SuneduResult(dni, 'error', error="Invalid JSON response", attempts=attempt + 1)
+                    status = 'ok' if degrees else 'not_found'
+                    self._count(status)
+                    return SuneduResult(dni, status, degrees, attempts=attempt + 1)
+                if response.status_code not in RETRY_STATUSES:
+                    self._count('errors')
+                    return SuneduResult(dni, 'error', error=f"HTTP {response.status_code}",
+                                        attempts=attempt + 1)
+                last_error = f"HTTP {response.status_code}"
+
+            if attempt < self.max_retries:
+                time.sleep(self._backoff(attempt, response))
+
+        self._count('errors')
+        return SuneduResult(dni, 'error', error=last_error, attempts=self.max_retries + 1)
+
+    def fetch_many(self, dnis):
+        """
+        Yields a SuneduResult per DNI in completion order. Only a bounded
+        number of lookups is queued at a time, so `dnis` may be a generator.
+        """
+        dnis = iter(dnis)
+        max_pending = self.concurrency * 2
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            pending = set()
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < max_pending:
+                    try:
+                        pending.add(executor.submit(self.fetch, next(dnis)))
+                    except StopIteration:
+                        exhausted = True
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    def close(self):
+        self.session.close()
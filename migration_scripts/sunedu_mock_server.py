@@ -0,0 +1,170 @@
+"""
+Local stand-in for the SUNEDU degree lookup API, for offline benchmarks.
+
+Serves GET /api/v1/sunedu/consulta/<dni> with the same JSON shape as the
+real service. Degrees are derived from the DNI, so results are repeatable.
+Latency, a rate limit (answered with 429) and a random 503 error rate can
+be configured to exercise the client's concurrency and retry logic.
+
+Usage:
+    python sunedu_mock_server.py --port 8099 --latency 0.2 --error-rate 0.05
+    python sunedu_mock_server.py --benchmark 2000 --concurrency 16 --rate 50
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+UNIVERSITIES = [
+    ('UNIVERSIDAD NACIONAL DEL ALTIPLANO', 'PUBLICA'),
+    ('UNIVERSIDAD NACIONAL DE SAN AGUSTIN DE AREQUIPA', 'PUBLICA'),
+    ('UNIVERSIDAD NACIONAL MAYOR DE SAN MARCOS', 'PUBLICA'),
+    ('UNIVERSIDAD ANDINA NESTOR CACERES VELASQUEZ', 'PRIVADA'),
+    ('UNIVERSIDAD CATOLICA DE SANTA MARIA', 'PRIVADA'),
+]
+DEGREES = [
+    ('B', 'BACHILLER EN CIENCIAS CONTABLES'),
+    ('T', 'LICENCIADO EN EDUCACION'),
+    ('M', 'MAESTRO EN CIENCIAS'),
+    ('D', 'DOCTOR EN CIENCIAS DE LA EDUCACION'),
+]
+
+
+def degrees_for(dni):
+    """Repeatable list of degrees for a DNI; about 20 % of DNIs have none."""
+    seed = int(hashlib.sha256(dni.encode('utf-8')).hexdigest()[:8], 16)
+    rng = random.Random(seed)
+    if rng.random() < 0.2:
+        return []
+    degrees = []
+    for _ in range(rng.randint(1, 3)):
+        universidad, gestion = rng.choice(UNIVERSITIES)
+        abreviatura, titulo = rng.choice(DEGREES)
+        degrees.append({
+            'universidad': universidad,
+            'pais': 'PERU',
+            'tipoInstitucion': 'UNIVERSIDAD',
+            'tipoGestion': gestion,
+            'abreviaturaTitulo': abreviatura,
+            'tituloProfesional': titulo,
+            'especialidad': None,
+            'fechaEmision': f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(1990, 2024)}",
+            'resolucion': f"R.R. {rng.randint(100, 9999)}-{rng.randint(1990, 2024)}",
+        })
+    return degrees
+
+
+class MockSuneduServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, error_rate=0.0, rate_limit=0):
+        super().__init__(address, MockSuneduHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.lock = threading.Lock()
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        self.stats = {'requests': 0, 'throttled': 0, 'failed': 0}
+
+    def admit(self):
+        """Returns the status to answer with: 200, 429 or 503."""
+        with self.lock:
+            self.stats['requests'] += 1
+            if self.rate_limit:
+                now = time.monotonic()
+                if now - self.window_start >= 1:
+                    self.window_start, self.window_count = now, 0
+                self.window_count += 1
+                if self.window_count > self.rate_limit:
+                    self.stats['throttled'] += 1
+                    return 429
+            if self.error_rate and random.random() < self.error_rate:
+                self.stats['failed'] += 1
+                return 503
+        return 200
+
+
+class MockSuneduHandler(BaseHTTPRequestHandler):
+    PREFIX = '/api/v1/sunedu/consulta/'
+
+    def do_GET(self):
+        if not self.path.startswith(self.PREFIX):
+            self._reply(404, {'message': 'Not found'})
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        status = self.server.admit()
+        if status == 429:
+            self._reply(429, {'message': 'Too Many Requests'}, {'Retry-After': '1'})
+        elif status == 503:
+            self._reply(503, {'message': 'Service Unavailable'})
+        else:
+            dni = self.path[len(self.PREFIX):].strip('/')
+            self._reply(200, {'data': {'gtPersona': degrees_for(dni)}})
+
+    def _reply(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(port=0, **options):
+    """Starts the mock server in a background thread and returns it."""
+    server = MockSuneduServer(('127.0.0.1', port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_benchmark(count, concurrency, rate, **options):
+    """Runs the client against a local mock server and prints throughput and retries."""
+    from sunedu_client import SuneduClient
+
+    server = start_server(**options)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}{MockSuneduHandler.PREFIX}{{dni}}"
+    client = SuneduClient(base_url=base_url, token='mock', concurrency=concurrency, rate=rate,
+                          backoff_base=0.05)
+    dnis = (f"{40000000 + i}" for i in range(count))
+    start = time.perf_counter()
+    try:
+        for _ in client.fetch_many(dnis):
+            pass
+    finally:
+        client.close()
+        server.shutdown()
+    elapsed = time.perf_counter() - start
+    print(f"{count} DNIs in {elapsed:.2f} s ({count / elapsed:.1f} DNIs/s)")
+    print(f"Client: {client.stats}")
+    print(f"Server: {server.stats}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mock SUNEDU API for offline testing and benchmarks.")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds added to every response.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503.")
+    parser.add_argument("--rate-limit", type=int, default=0, help="Requests per second before answering 429.")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="Run the client against N DNIs and exit.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=0, help="Client rate limit (requests per second).")
+    args = parser.parse_args()
+
+    options = {'latency': args.latency, 'error_rate': args.error_rate, 'rate_limit': args.rate_limit}
+    if args.benchmark:
+        run_benchmark(args.benchmark, args.concurrency, args.rate, **options)
+    else:
+        server = MockSuneduServer(('127.0.0.1', args.port), **options)
+        print(f"Mock SUNEDU API on http://127.0.0.1:{args.port}{MockSuneduHandler.PREFIX}<dni>")
+        server.serve_forever()
@@ -0,0 +1,526 @@
+# Generador de datos sintéticos para medir la migración a distintas escalas.
+#
+# Crea en las bases MySQL configuradas (ver db_connections.py; pensado para
+# instancias de prueba, nunca para las de producción) las tablas de origen
+# que leen los pasos de run_migrations.py:
+#
+#   - vriunap_absmain: tblDocentes y los diccionarios ocdeAreas,
+#     ocdeSubAreas, ocdeDisciplinas, dicFacultades, dicCarreras,
+#     dicCategorias, dicLineasVRI y tblLineas.
+#   - vriunap_pilar3: tblTesistas, tesTramites, logTramites, tesJuCambios y
+#     tblCorrects.
+#
+# Las columnas de tblDocentes, tblTesistas y tesTramites son las de las
+# muestras reales del repositorio (tblDocentesBak2.csv, tesistas_*.csv y
+# tramites_no_mapeados.csv), y las proporciones de sus valores se tomaron de
+# esas muestras: Activo numérico (6, 0, 5, -100...), fechas cero
+# ('0000-00-00'), DNI de relleno ('0', '000020438'), direcciones '*',
+# estados de trámite sin etapa (-1, 30), etc. Los datos son coherentes entre
+# sí: carreras, categorías y líneas apuntan a los diccionarios generados,
+# los jurados a docentes existentes, y los cambios de jurado, correcciones y
+# registros de log a trámites que llegaron a la etapa correspondiente (las
+# correcciones las hace, salvo unas pocas, un jurado del trámite).
+#
+# Uso (--replace confirma que se pueden reemplazar esas tablas):
+#   MYSQL_ABSMAIN_DB=bench_absmain MYSQL_PILAR3_DB=bench_pilar3 \
+#       python synthetic_data.py --scale 10x --replace
+
+import argparse
+import random
+from datetime import date, datetime, timedelta
+
+from db_connections import get_mysql_absmain_connection, get_mysql_pilar3_connection
+
+# Filas por tabla a escala 1x (aproximadamente el tamaño de los datos reales).
+# Los diccionarios no se escalan.
+BASE_ROWS = {
+    'tblDocentes': 1550,
+    'tblTesistas': 20000,
+    'tesTramites': 8000,
+    'logTramites': 60000,
+    'tesJuCambios': 12000,
+    'tblCorrects': 30000,
+}
+
+SCALES = {'1x': 1, '10x': 10, '100x': 100}
+
+BATCH_SIZE = 2000
+
+ZERO_DATE = '0000-00-00'
+
+NOMBRES = ['JUAN', 'MARIA', 'JOSE', 'ROSA', 'LUIS', 'CARMEN', 'CARLOS', 'ANA', 'JORGE', 'ELENA',
+           'MIGUEL', 'LUCIA', 'PEDRO', 'SONIA', 'VICTOR', 'NANCY', 'EDGAR', 'YENY', 'RUBEN', 'NOEMI']
+APELLIDOS = ['QUISPE', 'MAMANI', 'CONDORI', 'FLORES', 'APAZA', 'CHOQUE', 'RAMOS', 'TICONA', 'CALLA',
+             'PARI', 'HUANCA', 'COAQUIRA', 'LIMACHI', 'SUCASACA', 'ARO', 'VILCA', 'CCALLO', 'ROQUE']
+CALLES = ['Jr. Lima', 'Jr. Puno', 'Av. El Sol', 'Av. Floral', 'Jr. Moquegua', 'Av. Simón Bolívar']
+CICLOS = ['DECIMO', 'QUINTO', 'NOVENO', 'SEGUNDO', 'SEPTIMO', 'DECIMO SEGUNDO']
+
+# --- Proporciones de tblDocentesBak2.csv (1551 docentes) ---
+DOCENTE_ACTIVO = {6: 1015, 0: 307, 1: 89, 5: 64, 3: 50, -100: 9, -99: 6, 4: 5, 7: 4, 2: 2}
+DOCENTE_SEXO = {'M': 1006, 'F': 343, '': 202}
+DOCENTE_CATEGORIA = {8: 354, 1: 349, 16: 211, 5: 198, 15: 163, 2: 125, 9: 65, 4: 42, 6: 17, 17: 10,
+                     3: 7, 14: 3, 11: 2, 13: 2, 10: 1, 18: 1}
+# IdCatPrev = 0: sin categoría previa
+DOCENTE_CATEGORIA_PREVIA = {1: 350, 16: 299, 15: 238, 8: 197, 5: 150, 0: 120, 2: 73, 4: 51, 6: 20,
+                            9: 19, 17: 15, 3: 6, 14: 5, 13: 3, 11: 2, 18: 2, 10: 1}
+DOCENTE_SUBCAT = {'': 1270, 'B1 (32 Hrs)': 174, 'B2 (16 Hrs)': 28, 'A1 (32 Hrs)': 27, 'B2': 12, 'B1': 6}
+# Dígitos del Codigo; '*' es el relleno de los docentes sin código
+DOCENTE_CODIGO = {7: 755, 6: 335, 5: 294, 8: 146, 4: 10, '*': 4}
+DOCENTE_RESOLUCION = {'corta': 902, '': 305, '-': 178, 'larga': 65, '*': 33}
+DOCENTE_RENACYT = {'0': 1331, '1': 71}
+# Docentes por carrera (IdCarrera: docentes)
+DOCENTES_POR_CARRERA = {
+    20: 90, 29: 77, 4: 71, 7: 70, 5: 69, 21: 60, 1: 58, 22: 55, 32: 52, 28: 51, 25: 46, 6: 45,
+    16: 44, 9: 42, 10: 39, 40: 39, 11: 37, 30: 37, 8: 36, 13: 36, 35: 36, 12: 35, 23: 35, 33: 35,
+    34: 34, 15: 33, 24: 33, 26: 33, 31: 31, 14: 30, 19: 29, 17: 28, 2: 27, 3: 27, 27: 25, 18: 22,
+}
+# Fracción de fechas cero ('0000-00-00') por columna
+DOCENTE_FECHAS_CERO = {'FechaCon': 0.504, 'FechaIn': 0.059, 'FechaAsc': 0.33, 'FechaNac': 0.001}
+DOCENTE_DNI_RELLENO = 0.002
+CORREO_DOMINIOS = {'hotmail.com': 581, 'gmail.com': 317, 'unap.edu.pe': 316, 'yahoo.es': 61,
+                   'yahoo.com': 27, 'unap.pe': 12}
+
+# --- Proporciones de tesistas_con_codigo_largo.csv, tesistas_con_dni_modificado.csv
+# y tesistas_duplicados_por_nombre.csv (608 tesistas) ---
+TESISTA_ACTIVO = {2: 606, 0: 1, 1: 1}
+TESISTA_SEXO = {1: 399, 2: 209}
+TESISTA_ESPECIALIDAD = {0: 544, 3: 16, 1: 9, 2: 8, 4: 6}
+TESISTA_SIN_SEMESTRE = 0.085
+TESISTA_SIN_DIRECCION = 0.12
+# DNI vacíos, '0', cortos, largos o con espacios; y DNI repetidos entre tesistas
+TESISTA_DNI_RARO = 0.01
+TESISTA_DNI_REPETIDO = 0.002
+TESISTA_CODIGO_LARGO = 0.001
+TESISTA_NOMBRE_REPETIDO = 0.03
+# Tesistas que luego fueron docentes (mismo DNI y nombre), para la resolución de entidades
+TESISTA_ES_DOCENTE = 0.01
+
+# Carreras (IdCarrera: IdFacultad) de los pares de tblDocentesBak2.csv
+CARRERAS = {
+    1: 1, 2: 1, 3: 1, 4: 2, 5: 3, 6: 4, 7: 4, 8: 5, 9: 6, 10: 7, 11: 7, 12: 7, 13: 7, 14: 7, 40: 7,
+    15: 8, 16: 9, 17: 10, 18: 10, 19: 10, 20: 10, 21: 11, 22: 12, 23: 13, 24: 14, 25: 14, 26: 15,
+    27: 15, 28: 16, 29: 16, 30: 16, 31: 17, 32: 18, 33: 19, 34: 19, 35: 19,
+}
+OCDE_AREAS = ['Ciencias Naturales', 'Ingeniería y Tecnología', 'Ciencias Médicas y de la Salud',
+              'Ciencias Agrícolas', 'Ciencias Sociales', 'Humanidades']
+SUBAREAS_POR_AREA = 7
+DISCIPLINAS_POR_SUBAREA = 5
+LINEAS_VRI = 12
+SUBLINEAS = 250
+CATEGORIAS = {'P': 'PRINCIPAL', 'A': 'ASOCIADO', 'X': 'AUXILIAR', 'C': 'CONTRATADO', 'J': 'JEFE DE PRACTICA',
+              'E': 'EXTRAORDINARIO'}
+
+# --- tesTramites (tramites_no_mapeados.csv y ETAPA_MAP de migrate_tbl_tramites.py) ---
+# Estados sin etapa equivalente: -1 (anulado) y 30
+TRAMITE_ESTADOS_SIN_ETAPA = [-1, 30]
+TRAMITE_SIN_ETAPA = 0.001
+# Desde este estado el trámite tiene jurados sorteados
+ESTADO_CON_JURADOS = 5
+# Desde este estado el trámite tiene borrador
+ESTADO_CON_BORRADOR = 10
+
+# Acciones de logTramites y estado mínimo del trámite en que aparecen;
+# migrate_tbl_conformacion_jurados busca exactamente 'Proyecto enviado a Revisión'
+ACCIONES = {
+    'Proyecto registrado': 0,
+    'Proyecto enviado a Revisión': 2,
+    'Formato aprobado': 3,
+    'Sorteo de jurados': ESTADO_CON_JURADOS,
+    'Dictamen de jurado': 6,
+    'Borrador enviado': ESTADO_CON_BORRADOR,
+    'Sustentación programada': 12,
+}
+# Acciones que registran al docente (jurado) que las hizo
+ACCIONES_DE_JURADO = {'Dictamen de jurado'}
+# migrate_tbl_asignacion_jurado clasifica el cambio por 'intento' y 'sorteo' en el motivo
+MOTIVOS = {'Sorteo de jurados': 5, 'Intento de sorteo': 2, 'Cambio de jurado por licencia': 2,
+           'Reconformación': 1}
+# Correcciones de un docente que no es jurado del trámite (no tienen conformación)
+CORRECCION_SIN_JURADO = 0.03
+
+# Columnas de cada tabla (nombre, tipo MySQL) y la base en que se crea
+TABLES = {
+    'ocdeAreas': ('absmain', [('Id', 'INT PRIMARY KEY'), ('Nombre', 'VARCHAR(120)')]),
+    'ocdeSubAreas': ('absmain', [('Id', 'INT PRIMARY KEY'), ('IdArea', 'INT'), ('Nombre', 'VARCHAR(120)')]),
+    'ocdeDisciplinas': ('absmain', [('Id', 'INT PRIMARY KEY'), ('IdSubArea', 'INT'), ('Nombre', 'VARCHAR(120)')]),
+    'dicFacultades': ('absmain', [('Id', 'INT PRIMARY KEY'), ('Nombre', 'VARCHAR(120)'), ('Abrev', 'VARCHAR(10)'),
+                                  ('IdArea', 'INT')]),
+    'dicCarreras': ('absmain', [('Id', 'INT PRIMARY KEY'), ('IdFacultad', 'INT'), ('Nombre', 'VARCHAR(120)')]),
+    'dicCategorias': ('absmain', [('Id', 'INT PRIMARY KEY'), ('Tipo', 'CHAR(1)'), ('Nombre', 'VARCHAR(60)'),
+                                  ('Abrev', 'VARCHAR(10)')]),
+    'dicLineasVRI': ('absmain', [('Id', 'INT PRIMARY KEY'), ('Nombre', 'VARCHAR(200)')]),
+    'tblLineas': ('absmain', [('Id', 'INT PRIMARY KEY'), ('id_lineaV', 'INT'), ('Nombre', 'VARCHAR(200)'),
+                              ('IdDiscip', 'INT'), ('IdCarrera', 'INT'), ('fecha', 'DATETIME'), ('Estado', 'INT')]),
+    'tblDocentes': ('absmain', [
+        ('Id', 'INT PRIMARY KEY'), ('Activo', 'INT'), ('DNI', 'VARCHAR(12)'), ('Sexo', 'VARCHAR(1)'),
+        ('Codigo', 'VARCHAR(10)'), ('IdCategoria', 'INT'), ('IdCatPrev', 'INT'), ('SubCat', 'VARCHAR(20)'),
+        ('IdFacultad', 'INT'), ('IdCarrera', 'INT'), ('Apellidos', 'VARCHAR(90)'), ('Nombres', 'VARCHAR(90)'),
+        ('FechaCon', 'DATE'), ('ResolCon', 'VARCHAR(60)'), ('FechaIn', 'DATE'), ('FechaAsc', 'DATE'),
+        ('ResolAsc', 'VARCHAR(60)'), ('Resolucion', 'VARCHAR(60)'), ('FechaNac', 'DATE'),
+        ('Direccion', 'VARCHAR(120)'), ('NroCelular', 'VARCHAR(15)'), ('Renacyt', 'VARCHAR(20)'),
+        ('Correo', 'VARCHAR(120)'), ('Clave', 'VARCHAR(64)'),
+    ]),
+    'tblTesistas': ('pilar3', [
+        ('Id', 'INT PRIMARY KEY'), ('Activo', 'INT'), ('DNI', 'VARCHAR(12)'), ('Sexo', 'INT'),
+        ('Codigo', 'VARCHAR(10)'), ('IdFacultad', 'INT'), ('IdCarrera', 'INT'), ('IdEspec', 'INT'),
+        ('Apellidos', 'VARCHAR(90)'), ('Nombres', 'VARCHAR(90)'), ('FechaReg', 'DATETIME'),
+        ('SemReg', 'VARCHAR(30)'), ('Direccion', 'VARCHAR(120)'), ('NroCelular', 'VARCHAR(15)'),
+        ('Correo', 'VARCHAR(120)'), ('Clave', 'VARCHAR(64)'),
+    ]),
+    'tesTramites': ('pilar3', [
+        ('Id', 'INT PRIMARY KEY'), ('Tipo', 'INT'), ('Codigo', 'VARCHAR(12)'), ('Anio', 'INT'), ('Orden', 'INT'),
+        ('IdCarrera', 'INT'), ('Estado', 'INT'), ('SuEst', 'INT'), ('IdTesista1', 'INT'), ('IdTesista2', 'INT'),
+        ('IdLinea', 'INT'), ('IdLinAlte', 'INT'), ('IdJurado1', 'INT'), ('IdJurado2', 'INT'),
+        ('IdJurado3', 'INT'), ('IdJurado4', 'INT'), ('IdJurado5', 'INT'), ('FechRegProy', 'DATETIME'),
+        ('FechActBorr', 'DATETIME'), ('_T_', 'VARCHAR(10)'), ('FechModif', 'DATETIME'),
+    ]),
+    'logTramites': ('pilar3', [
+        ('Id', 'INT PRIMARY KEY'), ('IdTramite', 'INT'), ('IdDocente', 'INT'), ('Accion', 'VARCHAR(120)'),
+        ('Fecha', 'DATETIME'), ('KEY', '(IdTramite)'),
+    ]),
+    'tesJuCambios': ('pilar3', [
+        ('Id', 'INT PRIMARY KEY'), ('IdTramite', 'INT'), ('IdJurado1', 'INT'), ('IdJurado2', 'INT'),
+        ('IdJurado3', 'INT'), ('IdJurado4', 'INT'), ('Motivo', 'VARCHAR(200)'), ('Fecha', 'DATETIME'),
+        ('KEY', '(IdTramite)'),
+    ]),
+    'tblCorrects': ('pilar3', [
+        ('Id', 'INT PRIMARY KEY'), ('IdTramite', 'INT'), ('IdDocente', 'INT'), ('Fecha', 'DATETIME'),
+        ('Mensaje', 'TEXT'), ('KEY', '(IdTramite)'),
+    ]),
+}
+
+
+def table_columns(table):
+    """Nombres de las columnas de table (sin los índices)."""
+    return [name for name, _ in TABLES[table][1] if name != 'KEY']
+
+
+def create_statement(table):
+    definition = ', '.join(f"`{name}` {kind}" if name != 'KEY' else f"KEY {kind}"
+                           for name, kind in TABLES[table][1])
+    return f"CREATE TABLE `{table}` ({definition})"
+
+
+def pick(rng, weights):
+    """Valor de weights ({valor: peso}) elegido según su peso."""
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def random_datetime(rng, start=datetime(2016, 4, 20), end=datetime(2025, 8, 31)):
+    return start + timedelta(seconds=rng.randrange(int((end - start).total_seconds())))
+
+
+def random_date(rng, start_year, end_year):
+    return date(start_year, 1, 1) + timedelta(days=rng.randrange((date(end_year, 12, 31) - date(start_year, 1, 1)).days))
+
+
+def maybe_zero(rng, value, zero_rate):
+    return ZERO_DATE if rng.random() < zero_rate else value
+
+
+def random_name(rng):
+    return (f"{rng.choice(NOMBRES)} {rng.choice(NOMBRES)}",
+            f"{rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}")
+
+
+def random_correo(rng, nombres, apellidos, number):
+    user = f"{nombres.split()[0]}.{apellidos.split()[0]}{number}".lower()
+    return f"{user}@{pick(rng, CORREO_DOMINIOS)}"
+
+
+def random_celular(rng):
+    return f"9{rng.randrange(10**7, 10**8)}"
+
+
+def random_clave(rng):
+    return f"*{rng.getrandbits(160):040X}"
+
+
+def generate_ocde():
+    """Filas de ocdeAreas, ocdeSubAreas y ocdeDisciplinas."""
+    areas = [(area_id, nombre) for area_id, nombre in enumerate(OCDE_AREAS, start=1)]
+    subareas = [(subarea_id, (subarea_id - 1) // SUBAREAS_POR_AREA + 1, f"Subárea OCDE {subarea_id}")
+                for subarea_id in range(1, len(areas) * SUBAREAS_POR_AREA + 1)]
+    disciplinas = [(disciplina_id, (disciplina_id - 1) // DISCIPLINAS_POR_SUBAREA + 1, f"Disciplina OCDE {disciplina_id}")
+                   for disciplina_id in range(1, len(subareas) * DISCIPLINAS_POR_SUBAREA + 1)]
+    return areas, subareas, disciplinas
+
+
+def generate_facultades(rng):
+    facultades = [(facultad_id, f"FACULTAD {facultad_id}", f"FAC{facultad_id:02d}", rng.randint(1, len(OCDE_AREAS)))
+                  for facultad_id in sorted(set(CARRERAS.values()))]
+    # Facultad sin área: dic_facultades la descarta (WHERE IdArea != 0)
+    facultades.append((max(CARRERAS.values()) + 1, "VICERRECTORADO DE INVESTIGACION", "VRI", 0))
+    return facultades
+
+
+def generate_carreras():
+    return [(carrera_id, facultad_id, f"ESCUELA PROFESIONAL {carrera_id}")
+            for carrera_id, facultad_id in sorted(CARRERAS.items())]
+
+
+def generate_categorias():
+    categorias = sorted((set(DOCENTE_CATEGORIA) | set(DOCENTE_CATEGORIA_PREVIA)) - {0})
+    tipos = list(CATEGORIAS.items())
+    rows = []
+    for categoria_id in categorias:
+        tipo, nombre = tipos[(categoria_id - 1) % len(tipos)]
+        rows.append((categoria_id, tipo, f"{nombre} {categoria_id}", f"{tipo}{categoria_id}"))
+    return rows
+
+
+def generate_lineas(rng, disciplinas):
+    lineas_vri = [(linea_id, f"LINEA DE INVESTIGACION {linea_id}") for linea_id in range(1, LINEAS_VRI + 1)]
+    sublineas = [
+        (sublinea_id, rng.randint(1, LINEAS_VRI), f"SUBLINEA {sublinea_id}", rng.randint(1, disciplinas),
+         rng.choice(list(CARRERAS)), random_datetime(rng, datetime(2016, 1, 1), datetime(2019, 12, 31)),
+         0 if rng.random() < 0.05 else 1)
+        for sublinea_id in range(1, SUBLINEAS + 1)
+    ]
+    return lineas_vri, sublineas
+
+
+def resolucion(rng, kind, year):
+    if kind == 'corta':
+        return f"R.R.:{rng.randrange(10000):04d}-{year % 100:02d}"
+    if kind == 'larga':
+        return f"R.R.:{rng.randrange(10000):04d}-{year}"
+    return kind
+
+
+def docente_dni(rng):
+    if rng.random() < DOCENTE_DNI_RELLENO:
+        return rng.choice(['0', f"000{rng.randrange(10**6):06d}"])
+    # DNI de Puno: muchos empiezan con 0 (01321331)
+    return f"{rng.randrange(1000000, 49999999):08d}"
+
+
+def generate_docentes(rng, count, docentes):
+    """Filas de tblDocentes; guarda en docentes el (DNI, nombres, apellidos) de cada uno."""
+    for doc_id in range(1, count + 1):
+        nombres, apellidos = random_name(rng)
+        dni = docente_dni(rng)
+        docentes.append((dni, nombres, apellidos))
+        carrera = pick(rng, DOCENTES_POR_CARRERA)
+        digitos = pick(rng, DOCENTE_CODIGO)
+        codigo = '*' if digitos == '*' else f"{rng.randrange(10 ** (digitos - 1), 10 ** digitos)}"
+
+        ingreso = random_date(rng, 1975, 2023)
+        ascenso = ingreso + timedelta(days=rng.randrange(365, 365 * 15))
+        contrato = random_date(rng, 2008, 2022)
+        fecha_con = maybe_zero(rng, contrato, DOCENTE_FECHAS_CERO['FechaCon'])
+        resol_con = '' if fecha_con == ZERO_DATE else f"R.R. Nro {rng.randrange(10000):04d}-{contrato.year}-R-UNA"
+        resol_asc = resolucion(rng, pick(rng, DOCENTE_RESOLUCION), ascenso.year)
+        correo = '' if rng.random() < 0.027 else random_correo(rng, nombres, apellidos, doc_id)
+        yield (
+            doc_id, pick(rng, DOCENTE_ACTIVO), dni, pick(rng, DOCENTE_SEXO), codigo,
+            pick(rng, DOCENTE_CATEGORIA), pick(rng, DOCENTE_CATEGORIA_PREVIA), pick(rng, DOCENTE_SUBCAT),
+            CARRERAS[carrera], carrera, apellidos, nombres,
+            fecha_con, resol_con,
+            maybe_zero(rng, ingreso, DOCENTE_FECHAS_CERO['FechaIn']),
+            maybe_zero(rng, ascenso, DOCENTE_FECHAS_CERO['FechaAsc']), resol_asc,
+            resol_asc if rng.random() < 0.8 else resolucion(rng, pick(rng, DOCENTE_RESOLUCION), ascenso.year),
+            maybe_zero(rng, random_date(rng, 1935, 1995), DOCENTE_FECHAS_CERO['FechaNac']),
+            '*' if rng.random() < 0.685 else f"{rng.choice(CALLES)} {rng.randrange(1, 2000)}",
+            '' if rng.random() < 0.056 else random_celular(rng), pick(rng, DOCENTE_RENACYT),
+            correo, '' if rng.random() < 0.029 else random_clave(rng)
+        )
+
+
+def tesista_dni(rng, previous_dnis):
+    if previous_dnis and rng.random() < TESISTA_DNI_REPETIDO:
+        return rng.choice(previous_dnis)
+    if rng.random() < TESISTA_DNI_RARO:
+        return rng.choice(['', '0', f"{rng.randrange(1000, 999999)}", f"0{rng.randrange(10**8, 10**9)}",
+                           f"{rng.randrange(40000000, 79999999)} "])
+    return f"{rng.randrange(40000000, 79999999)}"
+
+
+def generate_tesistas(rng, count, docentes):
+    previous = []
+    previous_dnis = []
+    for tesista_id in range(1, count + 1):
+        if docentes and rng.random() < TESISTA_ES_DOCENTE:
+            dni, nombres, apellidos = rng.choice(docentes)
+        else:
+            # ~3 % repite el nombre de un tesista anterior (deduplicación por nombre)
+            if previous and rng.random() < TESISTA_NOMBRE_REPETIDO:
+                nombres, apellidos = rng.choice(previous)
+            else:
+                nombres, apellidos = random_name(rng)
+                if len(previous) < 1000:
+                    previous.append((nombres, apellidos))
+            dni = tesista_dni(rng, previous_dnis)
+        if len(previous_dnis) < 1000 and dni.strip():
+            previous_dnis.append(dni)
+
+        carrera = rng.choice(list(CARRERAS))
+        fecha_reg = random_datetime(rng)
+        ingreso = fecha_reg.year - rng.randint(4, 8)
+        if rng.random() < TESISTA_CODIGO_LARGO:
+            codigo = rng.choice([f"{rng.randrange(10**6, 10**8)}", f"{rng.randrange(10**5, 10**6)}\t"])
+        else:
+            codigo = f"{ingreso % 100:02d}{rng.randrange(10000):04d}"
+        sem_reg = '' if rng.random() < TESISTA_SIN_SEMESTRE else \
+            f"{ingreso}-{rng.choice(['I', 'II', 'UNI'])} ({rng.choice(CICLOS)})"
+        correo = random_correo(rng, nombres, apellidos, tesista_id)
+        if rng.random() < 0.005:
+            correo += ' '
+        yield (
+            tesista_id, pick(rng, TESISTA_ACTIVO), dni, pick(rng, TESISTA_SEXO), codigo,
+            CARRERAS[carrera], carrera, pick(rng, TESISTA_ESPECIALIDAD), apellidos, nombres, fecha_reg, sem_reg,
+            '' if rng.random() < TESISTA_SIN_DIRECCION else f"{rng.choice(CALLES)} {rng.randrange(1, 2000)}",
+            '0' if rng.random() < 0.01 else random_celular(rng), correo, random_clave(rng)
+        )
+
+
+def generate_tramites(rng, count, tesistas, docentes, tramites):
+    """
+    Filas de tesTramites; guarda en tramites el (Id, Estado, FechRegProy,
+    jurados) de cada trámite para generar las tablas que dependen de él.
+    """
+    orden_por_anio = {}
+    for tramite_id in range(1, count + 1):
+        fecha = random_datetime(rng)
+        orden = orden_por_anio[fecha.year] = orden_por_anio.get(fecha.year, 0) + 1
+        if rng.random() < TRAMITE_SIN_ETAPA:
+            estado = rng.choice(TRAMITE_ESTADOS_SIN_ETAPA)
+        else:
+            estado = rng.randint(0, 14)
+        con_jurados = not 0 <= estado < ESTADO_CON_JURADOS
+        jurados = rng.sample(range(1, docentes + 1), 4) if con_jurados else [0, 0, 0, 0]
+        tramites.append((tramite_id, estado, fecha, jurados))
+        borrador = fecha + timedelta(days=rng.randrange(60, 400)) if estado >= ESTADO_CON_BORRADOR else None
+        yield (
+            tramite_id, rng.randint(0, 3), f"{fecha.year}-{orden}", fecha.year, orden,
+            rng.choice(list(CARRERAS)), estado, 0, rng.randint(1, tesistas),
+            rng.randint(1, tesistas) if rng.random() < 0.05 else 0,
+            rng.randint(1, SUBLINEAS), 0, *jurados, 0, fecha, borrador, None,
+            (borrador or fecha) + timedelta(days=rng.randrange(1, 200))
+        )
+
+
+def generate_log_tramites(rng, count, tramites):
+    for log_id in range(1, count + 1):
+        tramite_id, estado, fecha, jurados = rng.choice(tramites)
+        alcanzado = estado if estado >= 0 else 0
+        acciones = [accion for accion, minimo in ACCIONES.items() if minimo <= alcanzado]
+        # El envío a revisión es la acción más frecuente entre los trámites que la alcanzaron
+        accion = 'Proyecto enviado a Revisión' if 'Proyecto enviado a Revisión' in acciones and \
+            rng.random() < 0.3 else rng.choice(acciones)
+        id_docente = rng.choice(jurados) if accion in ACCIONES_DE_JURADO and jurados[0] else 0
+        yield (log_id, tramite_id, id_docente, accion, fecha + timedelta(minutes=rng.randrange(60 * 24 * 400)))
+
+
+def generate_ju_cambios(rng, count, tramites, docentes):
+    con_jurados = [tramite for tramite in tramites if tramite[3][0]]
+    for cambio_id in range(1, count + 1):
+        tramite_id, _, fecha, jurados = rng.choice(con_jurados)
+        jurados = list(jurados)
+        # Cambio de un jurado por otro docente; a veces queda el puesto vacío
+        jurados[rng.randrange(4)] = 0 if rng.random() < 0.05 else rng.randint(1, docentes)
+        yield (cambio_id, tramite_id, *jurados, pick(rng, MOTIVOS),
+               fecha + timedelta(minutes=rng.randrange(60 * 24 * 300)))
+
+
+def generate_correcciones(rng, count, tramites, docentes):
+    con_jurados = [tramite for tramite in tramites if tramite[3][0]]
+    for correccion_id in range(1, count + 1):
+        tramite_id, _, fecha, jurados = rng.choice(con_jurados)
+        docente = rng.randint(1, docentes) if rng.random() < CORRECCION_SIN_JURADO else rng.choice(jurados)
+        mensaje = ' '.join(rng.choice(['Revisar', 'marco', 'teórico', 'la', 'metodología', 'citas',
+                                       'formato', 'APA', 'objetivos', 'conclusiones'])
+                           for _ in range(rng.randint(5, 60)))
+        yield (correccion_id, tramite_id, docente, fecha + timedelta(minutes=rng.randrange(60 * 24 * 400)), mensaje)
+
+
+def insert_rows(conn, table, rows):
+    """Recrea la tabla y la llena en lotes de BATCH_SIZE filas."""
+    cursor = conn.cursor()
+    try:
+        # Sin modo estricto, para admitir fechas cero como la base real
+        cursor.execute("SET SESSION sql_mode = ''")
+        cursor.execute(f"DROP TABLE IF EXISTS `{table}`")
+        cursor.execute(create_statement(table))
+        columns = table_columns(table)
+        query = (f"INSERT INTO `{table}` ({', '.join(f'`{name}`' for name in columns)}) "
+                 f"VALUES ({', '.join(['%s'] * len(columns))})")
+        batch = []
+        total = 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                cursor.executemany(query, batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(query, batch)
+            total += len(batch)
+        conn.commit()
+        return total
+    finally:
+        cursor.close()
+
+
+def dataset_plan(rng, scale):
+    """
+    Lista de (tabla, filas) en el orden de carga. Las filas son
+    generadores: docentes y tramites se llenan al generar tblDocentes y
+    tesTramites, que van antes que las tablas que los usan.
+    """
+    counts = {table: rows * scale for table, rows in BASE_ROWS.items()}
+    areas, subareas, disciplinas = generate_ocde()
+    lineas_vri, sublineas = generate_lineas(rng, len(disciplinas))
+    docentes = []
+    tramites = []
+    return [
+        ('ocdeAreas', areas),
+        ('ocdeSubAreas', subareas),
+        ('ocdeDisciplinas', disciplinas),
+        ('dicFacultades', generate_facultades(rng)),
+        ('dicCarreras', generate_carreras()),
+        ('dicCategorias', generate_categorias()),
+        ('dicLineasVRI', lineas_vri),
+        ('tblLineas', sublineas),
+        ('tblDocentes', generate_docentes(rng, counts['tblDocentes'], docentes)),
+        ('tblTesistas', generate_tesistas(rng, counts['tblTesistas'], docentes)),
+        ('tesTramites', generate_tramites(rng, counts['tesTramites'], counts['tblTesistas'],
+                                          counts['tblDocentes'], tramites)),
+        ('logTramites', generate_log_tramites(rng, counts['logTramites'], tramites)),
+        ('tesJuCambios', generate_ju_cambios(rng, counts['tesJuCambios'], tramites, counts['tblDocentes'])),
+        ('tblCorrects', generate_correcciones(rng, counts['tblCorrects'], tramites, counts['tblDocentes'])),
+    ]
+
+
+def generate_dataset(scale, seed=42):
+    """Genera y carga todas las tablas con el factor de escala indicado."""
+    rng = random.Random(seed)
+
+    absmain_conn = get_mysql_absmain_connection()
+    pilar3_conn = get_mysql_pilar3_connection()
+    if absmain_conn is None or pilar3_conn is None:
+        raise Exception("No se pudieron establecer las conexiones a MySQL.")
+
+    try:
+        connections = {'absmain': absmain_conn, 'pilar3': pilar3_conn}
+        for table, rows in dataset_plan(rng, scale):
+            print(f"Generando {table}...")
+            total = insert_rows(connections[TABLES[table][0]], table, rows)
+            print(f"  {total} filas.")
+        print("--- Datos sintéticos generados ---")
+    finally:
+        absmain_conn.close()
+        pilar3_conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos en las bases MySQL de prueba.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default='1x',
+                        help="Factor de escala respecto del tamaño real (por defecto: %(default)s).")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla para reproducir los mismos datos.")
+    parser.add_argument("--replace", action="store_true",
+                        help="Confirma que se pueden borrar y recrear las tablas de origen en las bases configuradas.")
+    args = parser.parse_args()
+    if not args.replace:
+        parser.error("este script borra y recrea tablas de origen; indique --replace para confirmar.")
+    generate_dataset(SCALES[args.scale], seed=args.seed)
@@ -0,0 +1,8 @@
+# Los módulos de migration_scripts se importan por su nombre (from
+# run_metrics import ...), igual que cuando se ejecuta run_migrations.py
+# desde esa carpeta.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -0,0 +1,86 @@
+# Conexiones y sesión de prueba: responden a las consultas con filas fijas
+# y guardan las sentencias que reciben.
+
+
+class StubCursor:
+    def __init__(self, connection, dictionary=False):
+        self.connection = connection
+        self.dictionary = dictionary
+        self.rows = []
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def execute(self, query, params=None):
+        self.connection.executed.append((' '.join(query.split()), params))
+        rows = []
+        for fragment, result in self.connection.results.items():
+            if fragment in query:
+                rows = result(params) if callable(result) else result
+                break
+        if not self.dictionary:
+            rows = [tuple(row.values()) if isinstance(row, dict) else row for row in rows]
+        self.rows = list(rows)
+        self.rowcount = len(self.rows)
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchmany(self, size=1):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def close(self):
+        pass
+
+
+class StubConnection:
+    """Conexión cuyas consultas que contienen un fragmento de results devuelven esas filas."""
+
+    def __init__(self, results=None, database=None):
+        self.results = results or {}
+        self.database = database
+        self.executed = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed = False
+        self.unread_result = False
+
+    def cursor(self, dictionary=False, **kwargs):
+        return StubCursor(self, dictionary)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+class StubSession:
+    """Sesión con la interfaz de db_connections.MigrationSession."""
+
+    def __init__(self, postgres=None, absmain=None, pilar3=None, crosswalk=None):
+        self._postgres = postgres or StubConnection()
+        self._absmain = absmain or StubConnection()
+        self._pilar3 = pilar3 or StubConnection()
+        self.crosswalk = crosswalk
+
+    def postgres(self):
+        return self._postgres
+
+    def mysql_absmain(self):
+        return self._absmain
+
+    def mysql_pilar3(self):
+        return self._pilar3
@@ -0,0 +1,89 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+import psycopg2.errors
+import pytest
+
+import bulk_loader
+from bulk_loader import CopyStream, bulk_load, bulk_load_with_ids, format_copy_value
+from stubs import StubConnection
+
+
+@pytest.mark.parametrize('value, expected', [
+    (None, '\\N'),
+    (True, 't'),
+    (False, 'f'),
+    (0, '0'),
+    (-12, '-12'),
+    (1.5, '1.5'),
+    (Decimal('17.50'), '17.50'),
+    ('', ''),
+    ('Peña', 'Peña'),
+    ('a\tb\nc\rd', 'a\\tb\\nc\\rd'),
+    ('C:\\ruta', 'C:\\\\ruta'),
+    ('\\N', '\\\\N'),
+    (date(2013, 12, 1), '2013-12-01'),
+    (datetime(2020, 1, 2, 3, 4, 5), '2020-01-02T03:04:05'),
+    (time(8, 30), '08:30:00'),
+    (timedelta(hours=1, seconds=3), '3603.0 seconds'),
+    (b'\x00\xff', '\\\\x00ff'),
+    (memoryview(b'\x01'), '\\\\x01'),
+    ({'nota': 'a\tb'}, '{"nota": "a\\\\tb"}'),
+    ([1, date(2020, 1, 1)], '[1, "2020-01-01"]'),
+])
+def test_format_copy_value(value, expected):
+    assert format_copy_value(value) == expected
+
+
+def test_copy_stream_reads_rows_in_chunks():
+    stream = CopyStream([(1, 'a'), (2, None), (3, 'x\ty')], 2)
+
+    chunks = []
+    while True:
+        chunk = stream.read(4)
+        if not chunk:
+            break
+        chunks.append(chunk)
+
+    assert b''.join(chunks) == b'1\ta\n2\t\\N\n3\tx\\ty\n'
+    assert all(len(chunk) <= 4 for chunk in chunks)
+    assert stream.rows_written == 3 and stream.bytes_written == len(b''.join(chunks))
+
+
+def test_copy_stream_rejects_rows_of_the_wrong_width():
+    with pytest.raises(ValueError, match="La fila 2 tiene 1 valores; se esperaban 2"):
+        CopyStream([(1, 'a'), (2,)], 2).read()
+
+
+def test_bulk_load_falls_back_to_values_when_copy_is_refused(monkeypatch):
+    inserted = []
+
+    def refuse_copy(cursor, table, columns, rows):
+        raise psycopg2.errors.FeatureNotSupported("COPY no permitido")
+
+    monkeypatch.setattr(bulk_loader, 'copy_rows', refuse_copy)
+    monkeypatch.setattr(bulk_loader, 'insert_values',
+                        lambda cursor, table, columns, rows, **kw: inserted.extend(rows) or len(rows))
+    conn = StubConnection()
+
+    assert bulk_load(conn.cursor(), 'tbl_x', ['a'], [(1,), (2,)]) == 2
+    assert inserted == [(1,), (2,)]
+    assert [query for query, _ in conn.executed] == [
+        "SAVEPOINT bulk_load_copy", "ROLLBACK TO SAVEPOINT bulk_load_copy", "RELEASE SAVEPOINT bulk_load_copy"]
+
+
+def test_bulk_load_with_ids_maps_keys_to_reserved_ids(monkeypatch):
+    loaded = []
+    monkeypatch.setattr(bulk_loader, 'bulk_load',
+                        lambda cursor, table, columns, rows, method=None: loaded.append((columns, rows)))
+    sequence = iter(range(100, 200))
+    conn = StubConnection({"nextval": lambda params: [(next(sequence),) for _ in range(params[2])]})
+
+    rows = (row for row in [('a', 1), (None, 2), ('c', 3)])
+    mapping = bulk_load_with_ids(conn.cursor(), 'tbl_x', ['clave', 'valor'], rows, key_column='clave',
+                                 chunk_size=2)
+
+    # La fila con llave nula se carga pero no entra en el mapa
+    assert mapping == {'a': 100, 'c': 102}
+    assert loaded == [(['id', 'clave', 'valor'], [(100, 'a', 1), (101, None, 2)]),
+                      (['id', 'clave', 'valor'], [(102, 'c', 3)])]
@@ -0,0 +1,87 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from coercion import Coercer, ColumnCoercion
+from run_metrics import RunMetrics
+
+
+def convert(declared, value):
+    row = {'v': value}
+    ColumnCoercion('v', declared).apply([row])
+    return row['v']
+
+
+@pytest.mark.parametrize('declared, value, expected', [
+    ('int', '12', 12),
+    ('int', ' 7 ', 7),
+    ('int', Decimal('3'), 3),
+    ('int', Decimal('3.5'), None),
+    ('int', '*', None),
+    ('int', 'VACIO_123', None),
+    ('int', 'doce', None),
+    ('text', '  ARO ARO ', 'ARO ARO'),
+    ('text', '', None),
+    ('text', '*', None),
+    ('text', b'PE\xc3\x91A', 'PEÑA'),
+    ('text:raw', '  ARO ARO ', '  ARO ARO '),
+    ('text:raw', '', ''),
+    ('text:raw', '*', '*'),
+    ('flag:A', 'A', 1),
+    ('flag:A', 'I', 0),
+    ('flag:A', None, 0),
+    ('bool', None, False),
+    ('bool', '0', False),
+    ('bool', 'Sí', True),
+    ('bool', 'no', False),
+    ('bool', 2, True),
+    ('bool', '*', False),
+    ('date', '0000-00-00', None),
+    ('date', '0000-00-00 00:00:00', None),
+    ('date', '2013-12-01 10:00:00', date(2013, 12, 1)),
+    ('date', datetime(2013, 12, 1, 10), date(2013, 12, 1)),
+    ('date', '2020-02-30', None),
+    ('date:%d/%m/%Y', '01/12/2013', date(2013, 12, 1)),
+    ('datetime', '2017-05-12 15:01:18', datetime(2017, 5, 12, 15, 1, 18)),
+    ('datetime', date(2017, 5, 12), datetime(2017, 5, 12)),
+    ('datetime', '*', None),
+])
+def test_converters(declared, value, expected):
+    assert convert(declared, value) == expected
+
+
+def test_unknown_type_and_flag_without_value():
+    with pytest.raises(ValueError, match="tipo desconocido"):
+        ColumnCoercion('v', 'money')
+    with pytest.raises(ValueError, match="flag necesita"):
+        ColumnCoercion('v', 'flag')
+    with pytest.raises(ValueError, match="solo 'text:raw'"):
+        ColumnCoercion('v', 'text:trim')
+
+
+def test_counts_changed_and_invalid_values():
+    column = ColumnCoercion('Fecha', 'date')
+    rows = [{'Fecha': date(2013, 12, 1)}, {'Fecha': '2013-12-01'}, {'Fecha': '0000-00-00'},
+            {'Fecha': 'ayer'}, {}]
+
+    assert column.apply(rows) == (2, 1)
+    assert [row['Fecha'] for row in rows] == [date(2013, 12, 1), date(2013, 12, 1), None, None, None]
+
+
+def test_apply_on_positional_rows():
+    rows = [['1', 'A'], ['x', 'I']]
+    assert Coercer('tblDocentes', {0: 'int', 1: 'flag:A'}).apply(rows) == [[1, 1], [None, 0]]
+
+
+def test_counts_are_recorded_in_the_current_step():
+    coercer = Coercer('tblDocentes', {'Activo': 'int', 'Estado': 'flag:A', 'DNI': 'text'})
+    metrics = RunMetrics(sample_interval=60)
+    with metrics.step('migrate_docentes') as step:
+        rows = list(coercer.stream(({'Activo': activo, 'Estado': 'A', 'DNI': '1'} for activo in ['5', 'x', 6]),
+                                   batch_size=2))
+    metrics.finish()
+
+    assert [row['Activo'] for row in rows] == [5, None, 6]
+    assert step.values == {'tblDocentes.Activo': {'coerced': 1, 'invalid': 1},
+                           'tblDocentes.Estado': {'coerced': 3, 'invalid': 0}}
@@ -0,0 +1,70 @@
+import json
+
+import psycopg2
+
+from crosswalk import Crosswalk
+from stubs import StubConnection
+
+STAMP = [["migrate_tbl_tramites", "20260105T100000Z", "2026-01-05 10:20:00+00"]]
+
+
+def missing_state_table(params):
+    raise psycopg2.errors.UndefinedTable('relation "public.migration_state" does not exist')
+
+
+def postgres(stamp_rows):
+    return StubConnection({
+        "FROM public.migration_state": stamp_rows,
+        "FROM tbl_tramites": [(10, 1), (11, 2)],
+    })
+
+
+def save(tmp_path, stamp, pairs):
+    with open(tmp_path / "tramites_por_id_antiguo.json", 'w', encoding='utf-8') as f:
+        json.dump({'stamp': stamp, 'pairs': pairs}, f)
+
+
+def test_failed_stamp_lookup_keeps_the_step_transaction(tmp_path):
+    save(tmp_path, None, [[10, 99]])
+    conn = postgres(missing_state_table)
+    crosswalk = Crosswalk(persist_dir=str(tmp_path))
+
+    mapping = crosswalk.get('tramites_por_id_antiguo', conn)
+
+    # No se reutiliza el mapa guardado sin marca: se lee de PostgreSQL
+    assert mapping == {10: 1, 11: 2}
+    assert crosswalk.stats['queries'] == 1 and crosswalk.stats['disk'] == 0
+    assert conn.rollbacks == 0
+    queries = [query for query, _ in conn.executed]
+    assert "ROLLBACK TO SAVEPOINT crosswalk_stamp" in queries
+    assert queries.index("SAVEPOINT crosswalk_stamp") < queries.index("ROLLBACK TO SAVEPOINT crosswalk_stamp")
+
+
+def test_saved_map_with_current_stamp_is_reused(tmp_path):
+    save(tmp_path, STAMP, [[10, 7]])
+    conn = postgres([tuple(STAMP[0])])
+    crosswalk = Crosswalk(persist_dir=str(tmp_path))
+
+    assert crosswalk.get('tramites_por_id_antiguo', conn) == {10: 7}
+    assert crosswalk.stats['disk'] == 1 and crosswalk.stats['queries'] == 0
+
+
+def test_saved_map_with_old_stamp_is_rebuilt(tmp_path):
+    save(tmp_path, [["migrate_tbl_tramites", "20250101T000000Z", "2025-01-01 00:00:00+00"]], [[10, 7]])
+    conn = postgres([tuple(STAMP[0])])
+    crosswalk = Crosswalk(persist_dir=str(tmp_path))
+
+    assert crosswalk.get('tramites_por_id_antiguo', conn) == {10: 1, 11: 2}
+    with open(tmp_path / "tramites_por_id_antiguo.json", encoding='utf-8') as f:
+        assert json.load(f)['stamp'] == STAMP
+
+
+def test_published_parts_are_merged_without_querying():
+    crosswalk = Crosswalk()
+    for owner, part in [("migrate_docentes_with_placeholders", {'1': 1}),
+                        ("migrate_tesistas_deduplicated", {'2': 2}), ("add_system_user", {'0': 3})]:
+        crosswalk.publish('usuarios_por_dni', owner, part)
+
+    conn = StubConnection()
+    assert crosswalk.get('usuarios_por_dni', conn) == {'1': 1, '2': 2, '0': 3}
+    assert conn.executed == []
@@ -0,0 +1,55 @@
+import pytest
+
+from coercion import converter
+from csv_dictionaries import DICTIONARIES, read_rows
+
+SPEC = {'table': 'dic_prueba', 'csv': 'dic_prueba.csv',
+        'columns': {'id': 'int', 'nombre': 'text', 'activo': 'bool', 'pais': 'text?', 'id_padre': 'int?',
+                    'sigla': 'text?'},
+        'constants': {'estado': 1}}
+
+
+def write(tmp_path, text):
+    (tmp_path / 'dic_prueba.csv').write_text(text, encoding='utf-8')
+
+
+def test_empty_cells_in_text_columns_load_as_empty_strings(tmp_path):
+    write(tmp_path, "id,nombre,activo,pais,id_padre\n1,,true,,\n2,UNA Puno,f,Perú,1\n")
+
+    columns, rows = read_rows(SPEC, csv_dir=str(tmp_path))
+
+    assert columns == ['id', 'nombre', 'activo', 'pais', 'id_padre', 'sigla', 'estado']
+    # pais vacío -> '' como el cargador anterior; id_padre vacío -> NULL; sigla no está en el CSV -> NULL
+    assert rows == [(1, '', True, '', None, None, 1), (2, 'UNA Puno', False, 'Perú', 1, None, 1)]
+
+
+def test_empty_required_number_is_rejected(tmp_path):
+    write(tmp_path, "id,nombre,activo\n,X,true\n")
+
+    with pytest.raises(ValueError, match="línea 2: 'id' no puede estar vacía"):
+        read_rows(SPEC, csv_dir=str(tmp_path))
+
+
+def test_missing_required_column_and_bad_values_are_rejected(tmp_path):
+    write(tmp_path, "id,activo\n1,true\n")
+    with pytest.raises(ValueError, match="falta la columna obligatoria 'nombre'"):
+        read_rows(SPEC, csv_dir=str(tmp_path))
+
+    write(tmp_path, "id,nombre,activo\n1,X,quizás\n")
+    with pytest.raises(ValueError, match="'activo'"):
+        read_rows(SPEC, csv_dir=str(tmp_path))
+
+
+def test_values_follow_the_shared_coercion_rules(tmp_path):
+    write(tmp_path, "id,nombre,activo\n 7 ,  X ,Sí\n8,Y,n\n9,Z,0\n")
+
+    _, rows = read_rows(SPEC, csv_dir=str(tmp_path))
+
+    assert [row[:3] for row in rows] == [(7, '  X ', True), (8, 'Y', False), (9, 'Z', False)]
+    assert [row[2] for row in rows] == [converter('bool')(text) for text in ('Sí', 'n', '0')]
+
+
+@pytest.mark.parametrize('spec', DICTIONARIES, ids=lambda spec: spec['table'])
+def test_repository_csvs_match_their_spec(spec):
+    columns, rows = read_rows(spec)
+    assert rows and all(len(row) == len(columns) for row in rows)
@@ -0,0 +1,123 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import entity_resolution
+from entity_resolution import load_merge_plan, make_record, resolve, resolve_usuarios
+from stubs import StubConnection, StubSession
+
+
+def docente(id, nombres, apellidos, dni='', correo=None, codigo=None):
+    return make_record('docentes', {'Id': id, 'DNI': dni, 'Nombres': nombres, 'Apellidos': apellidos,
+                                    'Correo': correo, 'Codigo': codigo})
+
+
+def tesista(id, nombres, apellidos, dni='', correo=None, codigo=None):
+    return make_record('tesistas', {'Id': id, 'DNI': dni, 'Nombres': nombres, 'Apellidos': apellidos,
+                                    'Correo': correo, 'Codigo': codigo})
+
+
+def test_make_record_normalizes_names_and_drops_placeholder_dnis():
+    record = docente(1, 'José  Ñaupa', 'de la Cruz', dni='00000000', correo=' JNAUPA@UNAP.EDU.PE ')
+
+    assert record['tokens'] == ['CRUZ', 'JOSE', 'NAUPA']
+    assert record['dni'] is None and record['dni_original'] == '00000000'
+    assert record['correo'] == 'jnaupa@unap.edu.pe'
+
+
+def test_same_person_across_sources_is_merged_with_docente_as_canonical():
+    records = [tesista(7, 'Jose Maria', 'Quispe Mamani', dni='40123456'),
+               docente(3, 'JOSÉ MARÍA', 'QUISPE MAMANI', dni='40123456')]
+
+    result = resolve(records)
+
+    assert result['clusters'] == [['docentes:3', 'tesistas:7']]
+
+
+def test_homonyms_with_different_dnis_are_not_merged():
+    records = [docente(1, 'JUAN', 'MAMANI QUISPE', dni='40123456'),
+               tesista(2, 'JUAN', 'MAMANI QUISPE', dni='40987654')]
+
+    result = resolve(records)
+
+    assert result['clusters'] == []
+    assert result['stats']['merged'] == 0
+
+
+def test_record_without_dni_never_bridges_two_dnis():
+    # El registro sin DNI coincide con ambos, pero solo puede unirse a uno
+    records = [docente(1, 'JUAN', 'MAMANI QUISPE', dni='40123456', correo='jmamani@unap.edu.pe'),
+               tesista(2, 'JUAN', 'MAMANI QUISPE', correo='jmamani@unap.edu.pe'),
+               tesista(3, 'JUAN', 'MAMANI QUISPE', dni='40987654')]
+
+    result = resolve(records)
+
+    assert result['clusters'] == [['docentes:1', 'tesistas:2']]
+    assert result['stats']['rejected_by_dni'] >= 1
+
+
+def sources(docentes_update, docentes):
+    absmain = StubConnection({
+        "information_schema.tables": [(docentes_update,)],
+        "COUNT(*)": [(len(docentes),)],
+        "FROM tblDocentes": docentes,
+    })
+    pilar3 = StubConnection({
+        "information_schema.tables": [('2026-01-05 10:00:00',)],
+        "COUNT(*)": [(1,)],
+        "FROM tblTesistas": [{'Id': 9, 'DNI': '40123456', 'Codigo': '2012', 'Nombres': 'JOSE',
+                              'Apellidos': 'QUISPE', 'Correo': None}],
+    })
+    return StubSession(absmain=absmain, pilar3=pilar3)
+
+
+def test_merge_plan_is_recomputed_when_sources_change(tmp_path, monkeypatch):
+    monkeypatch.setattr(entity_resolution, 'MERGE_PLAN_PATH', str(tmp_path / 'plan.json'))
+    monkeypatch.setattr(entity_resolution, 'write_report', lambda records, result: None)
+    docentes = [{'Id': 1, 'DNI': '40123456', 'Codigo': None, 'Nombres': 'JOSE', 'Apellidos': 'QUISPE',
+                 'Correo': None}]
+
+    plan = load_merge_plan(sources('2026-01-05 10:00:00', docentes))
+    assert plan.duplicate_of('tesistas', 9) == 'docentes:1'
+
+    # Mismas fuentes: se reutiliza el plan guardado sin leer los registros
+    session = sources('2026-01-05 10:00:00', docentes)
+    assert load_merge_plan(session).duplicate_of('tesistas', 9) == 'docentes:1'
+    assert not any('FROM tblDocentes' in query for query, _ in session.mysql_absmain().executed)
+
+    # tblDocentes cambió: el docente ahora tiene otro DNI y ya no se fusiona
+    docentes[0]['DNI'] = '40987654'
+    plan = load_merge_plan(sources('2026-01-06 08:00:00', docentes))
+    assert plan.duplicate_of('tesistas', 9) is None
+    with open(tmp_path / 'plan.json', encoding='utf-8') as f:
+        assert json.load(f)['version']['tblDocentes'] == '2026-01-06 08:00:00|1'
+
+
+def test_parallel_consumers_compute_the_plan_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(entity_resolution, 'MERGE_PLAN_PATH', str(tmp_path / 'plan.json'))
+    monkeypatch.setattr(entity_resolution, 'write_report', lambda records, result: None)
+    read_sources = entity_resolution.read_sources
+    reads = []
+
+    def slow_read_sources(session):
+        reads.append(1)
+        time.sleep(0.05)
+        return read_sources(session)
+
+    monkeypatch.setattr(entity_resolution, 'read_sources', slow_read_sources)
+    docentes = [{'Id': 1, 'DNI': '40123456', 'Codigo': None, 'Nombres': 'JOSE', 'Apellidos': 'QUISPE',
+                 'Correo': None}]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        plans = list(executor.map(lambda _: load_merge_plan(sources('2026-01-05 10:00:00', docentes)), range(4)))
+
+    assert len(reads) == 1
+    assert all(plan.duplicate_of('tesistas', 9) == 'docentes:1' for plan in plans)
+    # El plan se escribe en un temporal que reemplaza al archivo
+    assert [path.name for path in tmp_path.iterdir()] == ['plan.json']
+
+    # El paso incremental conserva el plan vigente; el completo lo recalcula
+    resolve_usuarios(sources('2026-01-05 10:00:00', docentes), incremental=True)
+    assert len(reads) == 1
+    resolve_usuarios(sources('2026-01-05 10:00:00', docentes))
+    assert len(reads) == 2
@@ -0,0 +1,123 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import extract_cache
+from extract_cache import SnapshotWriter, cached_rows, read_index, read_snapshot, source_table
+from stubs import StubConnection
+
+ROWS = [
+    {'Id': 1, 'Nombre': 'ARO ARO', 'Nota': Decimal('17.50'), 'Fecha': date(2013, 12, 1),
+     'Registro': datetime(2020, 1, 2, 3, 4, 5), 'Hora': timedelta(hours=1, seconds=3), 'Peso': 1.5,
+     'Foto': b'\x00\xff', 'Extra': None},
+    {'Id': 2, 'Nombre': 'ñandú', 'Nota': None, 'Fecha': None,
+     'Registro': None, 'Hora': None, 'Peso': None, 'Foto': None, 'Extra': None},
+    {'Id': -3, 'Nombre': '', 'Nota': Decimal('-1'), 'Fecha': date(1969, 6, 23),
+     'Registro': datetime(1999, 12, 31, 23, 59, 59, 123456), 'Hora': timedelta(days=-1), 'Peso': -0.25,
+     'Foto': b'', 'Extra': None},
+]
+
+
+def write(path, rows, meta=None):
+    writer = SnapshotWriter(str(path), meta or {'version': 'v1'})
+    for row in rows:
+        writer.add(row)
+    return writer.finish()
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = tmp_path / 'rows.mxc'
+    assert write(path, [dict(row) for row in ROWS])
+
+    index = read_index(str(path))
+    assert index['rows'] == 3 and index['version'] == 'v1'
+    assert list(read_snapshot(str(path), index)) == ROWS
+    assert list(read_snapshot(str(path), index, dictionary=False)) == [tuple(row.values()) for row in ROWS]
+
+
+def test_snapshot_of_tuples_and_empty_result(tmp_path):
+    path = tmp_path / 'tuples.mxc'
+    assert write(path, [(1, 'a'), (2, None)])
+    assert list(read_snapshot(str(path), read_index(str(path)), dictionary=False)) == [(1, 'a'), (2, None)]
+
+    empty = tmp_path / 'empty.mxc'
+    assert write(empty, [])
+    assert list(read_snapshot(str(empty), read_index(str(empty)))) == []
+
+
+def test_mixed_column_types_discard_the_snapshot(tmp_path):
+    path = tmp_path / 'mixed.mxc'
+    assert not write(path, [{'a': 1}, {'a': 'uno'}])
+    assert not path.exists()
+
+
+def test_truncated_file_is_not_a_snapshot(tmp_path):
+    path = tmp_path / 'rows.mxc'
+    write(path, [dict(row) for row in ROWS])
+    path.write_bytes(path.read_bytes()[:-3])
+    assert read_index(str(path)) is None
+
+
+def test_source_table():
+    assert source_table("SELECT * FROM tblDocentes WHERE Id > %s") == 'tblDocentes'
+    assert source_table("SELECT * FROM tesTramites t JOIN tblTesistas s ON s.Id = t.IdTesista1") is None
+    assert source_table("SELECT * FROM information_schema.columns") is None
+
+
+def test_cached_rows_hit_and_invalidation(tmp_path, monkeypatch):
+    monkeypatch.setattr(extract_cache, 'EXTRACT_CACHE_DIR', str(tmp_path))
+    version = {'count': 2}
+    conn = StubConnection({
+        "information_schema.tables": [('2026-01-05 10:00:00',)],
+        "COUNT(*)": lambda params: [(version['count'],)],
+    }, database='vriunap_absmain')
+    reads = []
+
+    def read():
+        reads.append(1)
+        return iter([{'Id': 1, 'Nombre': 'a'}, {'Id': 2, 'Nombre': 'b'}])
+
+    def rows():
+        return list(cached_rows(conn, "SELECT Id, Nombre FROM tblDocentes", None, True, read, 1))
+
+    first = rows()
+    second = rows()
+    assert first == second == [{'Id': 1, 'Nombre': 'a'}, {'Id': 2, 'Nombre': 'b'}]
+    assert len(reads) == 1
+
+    version['count'] = 3
+    rows()
+    assert len(reads) == 2
+    # La versión se valida sin recorrer la tabla
+    assert not any('CHECKSUM' in query for query, _ in conn.executed)
+
+
+def test_snapshot_expires_and_missing_update_time_is_reported(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(extract_cache, 'EXTRACT_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(extract_cache, 'EXTRACT_CACHE_TTL_MINUTES', 60)
+    monkeypatch.setattr(extract_cache, '_warned_tables', set())
+    now = {'time': 1_000_000.0}
+    monkeypatch.setattr(extract_cache.time, 'time', lambda: now['time'])
+    # InnoDB sin UPDATE_TIME: un UPDATE en el lugar no cambia la versión
+    conn = StubConnection({"information_schema.tables": [(None,)], "COUNT(*)": [(1,)]}, database='vriunap_pilar3')
+    nombre = {'value': 'a'}
+    reads = []
+
+    def read():
+        reads.append(1)
+        return iter([{'Id': 1, 'Nombre': nombre['value']}])
+
+    def rows():
+        return list(cached_rows(conn, "SELECT Id, Nombre FROM tblTesistas", None, True, read, 1))
+
+    assert rows() == [{'Id': 1, 'Nombre': 'a'}]
+    nombre['value'] = 'b'
+    now['time'] += 59 * 60
+    assert rows() == [{'Id': 1, 'Nombre': 'a'}]
+
+    # Al vencer se vuelve a leer el origen
+    now['time'] += 2 * 60
+    assert rows() == [{'Id': 1, 'Nombre': 'b'}]
+    assert len(reads) == 2
+
+    output = capsys.readouterr().out
+    assert output.count("tblTesistas no informa UPDATE_TIME") == 1
@@ -0,0 +1,17 @@
+import glob
+import os
+import re
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), '..')
+PACKAGE_IMPORT = re.compile(r"^\s*(from|import)\s+migration_scripts\b", re.MULTILINE)
+
+
+def test_modules_import_each_other_by_top_level_name():
+    # Con from migration_scripts.x, x se cargaría dos veces (con pools,
+    # métricas y cachés separados) al ejecutar desde migration_scripts/
+    offenders = []
+    for path in glob.glob(os.path.join(SCRIPTS_DIR, '*.py')):
+        with open(path, encoding='utf-8') as f:
+            if PACKAGE_IMPORT.search(f.read()):
+                offenders.append(os.path.basename(path))
+    assert offenders == []
@@ -0,0 +1,99 @@
+from datetime import date
+
+import migrate_docentes_with_placeholders as step
+from crosswalk import Crosswalk
+from entity_resolution import MergePlan
+from run_metrics import RunMetrics
+from stubs import StubConnection, StubSession
+
+DOCENTES = [
+    {'Id': 1, 'DNI': '29413634', 'Correo': 'jmaro@unap.pe', 'Nombres': 'JUAN MARCOS', 'Apellidos': 'ARO ARO',
+     'NroCelular': '999391166', 'Direccion': '*', 'Sexo': 'M', 'FechaNac': '1969-06-23', 'Clave': '*D46A',
+     'Activo': 5},
+    {'Id': 2, 'DNI': '01321331', 'Correo': '', 'Nombres': 'FLORENTINO', 'Apellidos': 'CHOQUEHUANCA',
+     'NroCelular': None, 'Direccion': 'Jr. Lima 10', 'Sexo': 'M', 'FechaNac': '0000-00-00', 'Clave': None,
+     'Activo': -100},
+    # Duplicado del docente 1 según el plan de fusión
+    {'Id': 3, 'DNI': '29413634', 'Correo': 'otro@unap.pe', 'Nombres': 'JUAN', 'Apellidos': 'ARO',
+     'NroCelular': None, 'Direccion': None, 'Sexo': 'M', 'FechaNac': None, 'Clave': None, 'Activo': 5},
+    # Sin DNI ni correo: se omite
+    {'Id': 4, 'DNI': '', 'Correo': None, 'Nombres': 'X', 'Apellidos': 'Y',
+     'NroCelular': None, 'Direccion': None, 'Sexo': None, 'FechaNac': None, 'Clave': None, 'Activo': 0},
+]
+
+
+def run_step(monkeypatch, docentes):
+    loaded = {}
+
+    def fake_bulk_load_with_ids(cursor, table, columns, rows, key_column):
+        rows = list(rows)
+        loaded.update(table=table, columns=columns, rows=rows)
+        key = columns.index(key_column)
+        return {row[key]: new_id for new_id, row in enumerate(rows, start=100)}
+
+    plan = MergePlan({'clusters': [["docentes:1", "docentes:3"]], 'scores': {"docentes:3": 0.97}})
+    monkeypatch.setattr(step, 'bulk_load_with_ids', fake_bulk_load_with_ids)
+    monkeypatch.setattr(step, 'load_merge_plan', lambda session: plan)
+
+    postgres = StubConnection()
+    session = StubSession(postgres=postgres, absmain=StubConnection({"FROM tblDocentes": docentes}),
+                          crosswalk=Crosswalk())
+    metrics = RunMetrics(sample_interval=60)
+    with metrics.step('migrate_docentes_with_placeholders') as step_metrics:
+        step.migrate_docentes_with_placeholders(session=session)
+    metrics.finish()
+    return loaded, postgres, session, step_metrics
+
+
+def test_loads_docentes_and_records_rejected_rows(monkeypatch):
+    loaded, postgres, session, step_metrics = run_step(monkeypatch, [dict(d) for d in DOCENTES])
+
+    assert loaded['table'] == 'tbl_usuarios'
+    by_dni = {row[3]: row for row in loaded['rows']}
+    assert set(by_dni) == {'29413634', '01321331'}
+    # Correo de marcador para el docente sin correo
+    assert by_dni['01321331'][4] == 'dni.01321331@unap.edu.pe'
+    # Fechas cero y el marcador '*' se cargan como NULL
+    assert by_dni['01321331'][10] is None
+    assert by_dni['29413634'][10] == date(1969, 6, 23)
+    assert by_dni['29413634'][8] is None
+    assert by_dni['01321331'][8] == 'Jr. Lima 10'
+
+    assert step_metrics.rows['rejected'] == 2
+    assert postgres.commits == 1
+    assert session.crosswalk._parts['usuarios_por_dni']['migrate_docentes_with_placeholders'] == {
+        '29413634': 100, '01321331': 101}
+
+
+def test_empty_source_loads_nothing(monkeypatch):
+    loaded, postgres, _, step_metrics = run_step(monkeypatch, [])
+
+    assert loaded == {}
+    assert step_metrics.rows['rejected'] == 0
+
+
+def test_incremental_upserts_by_dni_and_rereads_the_map(monkeypatch):
+    loaded = {}
+
+    def fake_bulk_load(cursor, table, columns, rows, on_conflict=None):
+        loaded.update(table=table, rows=list(rows), on_conflict=on_conflict)
+        return len(loaded['rows'])
+
+    plan = MergePlan({'clusters': [["docentes:1", "docentes:3"]], 'scores': {"docentes:3": 0.97}})
+    monkeypatch.setattr(step, 'bulk_load', fake_bulk_load)
+    monkeypatch.setattr(step, 'load_merge_plan', lambda session: plan)
+    crosswalk = Crosswalk()
+    crosswalk.publish('usuarios_por_dni', 'migrate_docentes_with_placeholders', {'29413634': 1})
+    postgres = StubConnection()
+    session = StubSession(postgres=postgres, absmain=StubConnection({"FROM tblDocentes": [dict(d) for d in DOCENTES]}),
+                          crosswalk=crosswalk)
+
+    step.migrate_docentes_with_placeholders(session=session, incremental=True)
+
+    assert loaded['table'] == 'tbl_usuarios'
+    assert loaded['on_conflict'].startswith('(num_doc_identidad) DO UPDATE')
+    assert {row[3] for row in loaded['rows']} == {'29413634', '01321331'}
+    assert any('tbl_usuarios_num_doc_identidad_key' in query for query, _ in postgres.executed)
+    # El mapa publicado en la carga completa ya no vale: se relee de PostgreSQL
+    assert 'migrate_docentes_with_placeholders' not in crosswalk._parts['usuarios_por_dni']
+    assert postgres.commits == 1
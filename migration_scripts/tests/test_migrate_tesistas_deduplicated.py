@@ -0,0 +1,35 @@
+import migrate_tesistas_deduplicated as step
+from crosswalk import Crosswalk
+from entity_resolution import MergePlan
+from stubs import StubConnection, StubSession
+
+TESISTAS = [
+    {'Id': 1, 'DNI': '70000001', 'Correo': 'a@unap.pe', 'Nombres': 'ANA', 'Apellidos': 'QUISPE',
+     'NroCelular': None, 'Direccion': None, 'Sexo': 'F', 'Clave': None},
+    {'Id': 2, 'DNI': '70000002', 'Correo': '', 'Nombres': 'LUIS', 'Apellidos': 'MAMANI',
+     'NroCelular': None, 'Direccion': None, 'Sexo': 'M', 'Clave': None},
+    {'Id': 3, 'DNI': '', 'Correo': '', 'Nombres': 'ROSA', 'Apellidos': 'CCAMA',
+     'NroCelular': None, 'Direccion': None, 'Sexo': 'F', 'Clave': None},
+]
+
+
+def test_incremental_inserts_only_new_dnis(monkeypatch):
+    loaded = {}
+
+    def fake_bulk_load(cursor, table, columns, rows, on_conflict=None):
+        loaded.update(rows=list(rows), on_conflict=on_conflict)
+        return len(loaded['rows'])
+
+    monkeypatch.setattr(step, 'bulk_load', fake_bulk_load)
+    monkeypatch.setattr(step, 'load_merge_plan', lambda session: MergePlan({'clusters': [], 'scores': {}}))
+    # El tesista 1 y el de DNI vacío ya se cargaron en una ejecución anterior
+    postgres = StubConnection({"FROM tbl_usuarios": [('a@unap.pe', '70000001'), ('x@unap.pe', 'dd_rosa_ccam')]})
+    session = StubSession(postgres=postgres, pilar3=StubConnection({"FROM tblTesistas": TESISTAS}),
+                          crosswalk=Crosswalk())
+
+    step.migrate_tesistas_deduplicated(session=session, incremental=True)
+
+    assert [row[3] for row in loaded['rows']] == ['70000002']
+    assert loaded['rows'][0][4] == 'dni.70000002@unap.edu.pe'
+    assert loaded['on_conflict'].startswith('(num_doc_identidad) DO UPDATE')
+    assert postgres.commits == 1
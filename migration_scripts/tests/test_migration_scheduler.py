@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from migration_scheduler import build_dependencies, critical_path_lengths, parse_foreign_keys, run_steps
+
+SCHEMA = """
+ALTER TABLE ONLY public.tbl_docentes
+    ADD CONSTRAINT tbl_docentes_id_usuario_fkey FOREIGN KEY (id_usuario) REFERENCES public.tbl_usuarios(id);
+ALTER TABLE ONLY public.tbl_docentes
+    ADD CONSTRAINT tbl_docentes_id_categoria_fkey FOREIGN KEY (id_categoria) REFERENCES public.dic_categoria(id);
+ALTER TABLE ONLY public.tbl_usuarios
+    ADD CONSTRAINT tbl_usuarios_id_jefe_fkey FOREIGN KEY (id_jefe) REFERENCES public.tbl_usuarios(id);
+ALTER TABLE ONLY public.tbl_conformacion_jurados
+    ADD CONSTRAINT fk_docente FOREIGN KEY (id_docente) REFERENCES public.tbl_docentes(id);
+"""
+
+STEPS = [
+    {'name': 'conformacion', 'tables': ['tbl_conformacion_jurados']},
+    {'name': 'docentes', 'tables': ['tbl_docentes']},
+    {'name': 'categorias', 'tables': ['dic_categoria']},
+    {'name': 'usuarios', 'tables': ['tbl_usuarios']},
+    {'name': 'usuarios_sistema', 'tables': ['tbl_usuarios'], 'depends_on': ['usuarios']},
+    {'name': 'reporte', 'tables': [], 'depends_on': ['conformacion']},
+]
+
+
+@pytest.fixture
+def fk_graph(tmp_path):
+    path = tmp_path / 'schema.sql'
+    path.write_text(SCHEMA, encoding='utf-8')
+    return parse_foreign_keys(str(path))
+
+
+def test_parse_foreign_keys_ignores_self_references(fk_graph):
+    assert fk_graph == {
+        'tbl_docentes': {'tbl_usuarios', 'dic_categoria'},
+        'tbl_conformacion_jurados': {'tbl_docentes'},
+    }
+
+
+def test_dependencies_come_from_foreign_keys_and_depends_on(fk_graph):
+    dependencies = build_dependencies(STEPS, fk_graph)
+
+    # Todos los pasos que cargan tbl_usuarios van antes que docentes
+    assert dependencies['docentes'] == {'categorias', 'usuarios', 'usuarios_sistema'}
+    assert dependencies['conformacion'] == {'docentes'}
+    assert dependencies['usuarios_sistema'] == {'usuarios'}
+    assert dependencies['reporte'] == {'conformacion'}
+    assert dependencies['usuarios'] == dependencies['categorias'] == set()
+
+
+def test_unknown_dependency_and_cycles_are_rejected(fk_graph):
+    with pytest.raises(ValueError, match="inexistentes"):
+        build_dependencies([{'name': 'a', 'depends_on': ['b']}], fk_graph)
+
+    with pytest.raises(ValueError, match="Ciclo"):
+        build_dependencies([{'name': 'usuarios', 'tables': ['tbl_usuarios'], 'depends_on': ['docentes']},
+                            {'name': 'docentes', 'tables': ['tbl_docentes']}], fk_graph)
+
+
+def test_critical_path_lengths():
+    dependencies = {'a': set(), 'b': {'a'}, 'c': {'b'}, 'd': set()}
+    assert critical_path_lengths(dependencies) == {'a': 3, 'b': 2, 'c': 1, 'd': 1}
+    assert critical_path_lengths(dependencies, {'c': 5})['a'] == 7
+
+
+def test_run_steps_respects_dependencies(fk_graph):
+    dependencies = build_dependencies(STEPS, fk_graph)
+    finished = []
+    lock = threading.Lock()
+
+    def run_step(step):
+        with lock:
+            assert dependencies[step['name']] <= set(finished) | {'categorias'}
+            finished.append(step['name'])
+
+    durations = run_steps(STEPS, max_workers=3, fk_graph=fk_graph, run_step=run_step, completed={'categorias'})
+
+    assert sorted(finished) == sorted(durations) == sorted(step['name'] for step in STEPS if step['name'] != 'categorias')
+
+
+def test_failed_step_stops_its_dependents(fk_graph):
+    ran = []
+
+    def run_step(step):
+        ran.append(step['name'])
+        if step['name'] == 'docentes':
+            raise RuntimeError("sin conexión")
+
+    with pytest.raises(Exception, match="Falló el paso 'docentes': sin conexión"):
+        run_steps(STEPS, max_workers=1, fk_graph=fk_graph, run_step=run_step)
+    assert 'conformacion' not in ran and 'reporte' not in ran
@@ -0,0 +1,62 @@
+from migration_state import step_fingerprint, steps_to_rerun, table_version
+from stubs import StubConnection, StubSession
+
+
+def migrate_example(session=None):
+    pass
+
+
+def absmain(update_time, count):
+    return StubConnection({
+        "information_schema.tables": [(update_time,)],
+        "COUNT(*)": [(count,)],
+    })
+
+
+def test_table_version_does_not_scan_with_checksum():
+    conn = absmain('2026-01-05 10:00:00', 1200)
+
+    assert table_version(conn, 'tblDocentes') == '2026-01-05 10:00:00|1200'
+    assert not any('CHECKSUM' in query for query, _ in conn.executed)
+
+
+def test_table_version_of_missing_table():
+    assert table_version(StubConnection(), 'tblNoExiste') == 'missing'
+
+
+def test_fingerprint_follows_source_version():
+    step = {'name': 'example', 'func': migrate_example, 'sources': ["absmain:tblDocentes"]}
+
+    first = step_fingerprint(step, StubSession(absmain=absmain('2026-01-05 10:00:00', 1200)))
+    same = step_fingerprint(step, StubSession(absmain=absmain('2026-01-05 10:00:00', 1200)))
+    more_rows = step_fingerprint(step, StubSession(absmain=absmain('2026-01-05 10:00:00', 1201)))
+    touched = step_fingerprint(step, StubSession(absmain=absmain('2026-01-06 08:00:00', 1200)))
+
+    assert first == same
+    assert len({first, more_rows, touched}) == 3
+
+
+def test_fingerprint_cache_reads_each_source_once():
+    conn = absmain(None, 5)
+    session = StubSession(absmain=conn)
+    cache = {}
+    for name in ('a', 'b'):
+        step_fingerprint({'name': name, 'func': migrate_example, 'sources': ["absmain:tblDocentes"]},
+                         session, cache)
+
+    assert sum('COUNT(*)' in query for query, _ in conn.executed) == 1
+
+
+def test_steps_to_rerun_follows_dependents_and_shared_tables():
+    steps = [
+        {'name': 'a', 'tables': ['t_a']},
+        {'name': 'b', 'tables': ['t_b']},
+        {'name': 'c', 'tables': ['t_b']},
+        {'name': 'd', 'tables': ['t_d']},
+    ]
+    dependencies = {'a': set(), 'b': {'a'}, 'c': set(), 'd': set()}
+    states = {name: {'status': 'completed', 'input_fingerprint': name} for name in 'abcd'}
+    fingerprints = {'a': 'changed', 'b': 'b', 'c': 'c', 'd': 'd'}
+
+    # a cambió; b depende de a y c carga la misma tabla que b
+    assert steps_to_rerun(steps, dependencies, states, fingerprints) == {'a', 'b', 'c'}
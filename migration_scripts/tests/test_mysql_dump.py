@@ -0,0 +1,136 @@
+import gzip
+import hashlib
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from migration_state import table_version
+from mysql_dump import MySQLDump, convert_value, parse_values, unescape
+from source_adapter import DumpConnection, UnsupportedQuery
+from source_extract import stream_rows
+
+DUMP = r"""-- MySQL dump 10.13
+USE `vriunap_absmain`;
+
+CREATE TABLE `tblDocentes` (
+  `Id` int(11) NOT NULL AUTO_INCREMENT,
+  `Activo` int(11) DEFAULT NULL,
+  `DNI` varchar(12) DEFAULT NULL,
+  `Apellidos` varchar(90) DEFAULT NULL,
+  `FechaCon` date DEFAULT NULL,
+  `Sueldo` decimal(8,2) DEFAULT NULL,
+  `Foto` blob,
+  PRIMARY KEY (`Id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+
+INSERT INTO `tblDocentes` VALUES (1,5,'29413634','ARO ARO','0000-00-00',1500.50,0x00FF),
+(2,-100,'01321331','O\'BRIEN; PEÑA','2013-12-01',NULL,NULL);
+INSERT INTO `tblDocentes` VALUES (3,6,'0','LINEA\nNUEVA','2020-02-30',-3.00,_binary 'ab');
+
+USE `vriunap_pilar3`;
+
+CREATE TABLE `tesTramites` (
+  `Id` int(11) NOT NULL,
+  `Estado` int(11) DEFAULT NULL,
+  `FechRegProy` datetime DEFAULT NULL,
+  `Hora` time DEFAULT NULL
+);
+
+INSERT INTO `tesTramites` (`Estado`, `Id`) VALUES (-1,10),(30,11);
+"""
+
+
+@pytest.fixture(params=['sql', 'sql.gz'])
+def dump_path(tmp_path, request):
+    path = tmp_path / f"vriunap.{request.param}"
+    data = DUMP.encode('utf-8')
+    path.write_bytes(gzip.compress(data) if request.param.endswith('gz') else data)
+    return str(path)
+
+
+def test_unescape():
+    assert unescape(r"O\'BRIEN") == "O'BRIEN"
+    assert unescape("O''BRIEN") == "O'BRIEN"
+    assert unescape(r"a\nb\tc\\d\0") == "a\nb\tc\\d\0"
+    assert unescape("sin escapes") == "sin escapes"
+
+
+def test_parse_values_tokens():
+    text = "(1,'a,b',NULL,0x0A,-2.5e3,_utf8mb4 'x'),(2,'it''s','',0x,3,'\\');');"
+    rows = list(parse_values(text))
+    assert rows == [
+        [('number', '1'), ('string', 'a,b'), ('null', None), ('hex', b'\n'), ('number', '-2.5e3'),
+         ('string', 'x')],
+        [('number', '2'), ('string', "it's"), ('string', ''), ('hex', b''), ('number', '3'), ('string', "');")],
+    ]
+    with pytest.raises(ValueError, match="Valor no reconocido"):
+        list(parse_values("(1, ???)"))
+
+
+@pytest.mark.parametrize('token, data_type, expected', [
+    (('number', '5'), 'int', 5),
+    (('number', '1500.50'), 'decimal', Decimal('1500.50')),
+    (('number', '1.5'), 'double', 1.5),
+    (('number', '7'), None, 7),
+    (('number', '7.0'), None, Decimal('7.0')),
+    (('string', '0000-00-00'), 'date', None),
+    (('string', '2020-02-30'), 'date', None),
+    (('string', '2013-12-01'), 'date', date(2013, 12, 1)),
+    (('string', '0000-00-00 00:00:00'), 'datetime', None),
+    (('string', '2017-05-12 15:01:18'), 'datetime', datetime(2017, 5, 12, 15, 1, 18)),
+    (('string', '-01:30:00'), 'time', -timedelta(hours=1, minutes=30)),
+    (('string', 'ab'), 'blob', b'ab'),
+    (('string', '12'), 'int', 12),
+    (('null', None), 'int', None),
+])
+def test_convert_value(token, data_type, expected):
+    assert convert_value(token, data_type) == expected
+
+
+def test_rows_are_read_per_database_and_converted(dump_path):
+    dump = MySQLDump(dump_path)
+
+    assert dump.table('tbldocentes', 'vriunap_absmain').column_names() == [
+        'Id', 'Activo', 'DNI', 'Apellidos', 'FechaCon', 'Sueldo', 'Foto']
+    assert list(dump.rows('tblDocentes', 'vriunap_absmain')) == [
+        (1, 5, '29413634', 'ARO ARO', None, Decimal('1500.50'), b'\x00\xff'),
+        (2, -100, '01321331', "O'BRIEN; PEÑA", date(2013, 12, 1), None, None),
+        (3, 6, '0', 'LINEA\nNUEVA', None, Decimal('-3.00'), b'ab'),
+    ]
+    # INSERT con lista de columnas: las que faltan quedan en NULL
+    assert list(dump.rows('tesTramites', 'vriunap_pilar3')) == [(10, -1, None, None), (11, 30, None, None)]
+    assert dump.table('tesTramites', 'vriunap_absmain') is None
+
+
+def test_dump_connection_answers_the_step_queries(dump_path):
+    conn = DumpConnection(dump_path, 'vriunap_absmain')
+
+    rows = list(stream_rows(conn, "SELECT Id, DNI FROM tblDocentes WHERE Activo > %s ORDER BY Id DESC", (0,)))
+    assert rows == [{'Id': 3, 'DNI': '0'}, {'Id': 1, 'DNI': '29413634'}]
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*), MAX(Id) FROM tblDocentes WHERE FechaCon IS NULL")
+    assert cursor.fetchall() == [(2, 3)]
+
+    # La versión de la tabla se obtiene sin el servidor
+    assert table_version(conn, 'tblDocentes').endswith('|3')
+    assert table_version(conn, 'tblNoExiste') == 'missing'
+
+    with pytest.raises(UnsupportedQuery):
+        cursor.execute("DELETE FROM tblDocentes")
+
+
+def test_dump_connection_evaluates_verification_expressions(dump_path):
+    cursor = DumpConnection(dump_path, 'vriunap_absmain').cursor()
+
+    cursor.execute("SELECT (Id - %s) DIV %s, SUM((IFNULL(Activo, 0) > 0) + (Id > 1)), "
+                   "CAST(MAX(FechaCon) AS DATETIME) FROM tblDocentes GROUP BY 1", (1, 2))
+    assert cursor.fetchall() == [(0, 2, datetime(2013, 12, 1)), (1, 2, None)]
+
+    cursor.execute("SELECT CASE Activo WHEN 5 THEN 'cinco' WHEN -100 THEN 'baja' ELSE 'otro' END, "
+                   "CONCAT_WS('|', Id, Sueldo, Foto), -Id * 2 FROM tblDocentes ORDER BY Id")
+    assert cursor.fetchall() == [('cinco', '1|1500.50|\x00�', -2), ('baja', '2', -4), ('otro', '3|-3.00|ab', -6)]
+
+    cursor.execute("SELECT CAST(CONV(SUBSTRING(MD5('x'), 1, 15), 16, 10) AS UNSIGNED) FROM tblDocentes LIMIT 1")
+    assert cursor.fetchall() == [(int(hashlib.md5(b'x').hexdigest()[:15], 16),)]
@@ -0,0 +1,143 @@
+from datetime import date
+
+import psycopg2
+import pytest
+
+import row_hash_merge
+from row_hash_merge import merge_rows, row_hash
+from stubs import StubConnection
+
+COLUMNS = ['id_usuario', 'id_categoria', 'codigo_airhs', 'id_antiguo']
+
+
+class Destination:
+    """tbl_docentes y public.migration_row_hashes en memoria."""
+
+    def __init__(self, monkeypatch):
+        self.rows = {}
+        self.hashes = {}
+        self.upserts = []
+        self.deactivated = set()
+        # Llaves con filas que las referencian (jurados, historial, grados)
+        self.referenced = set()
+        monkeypatch.setattr(row_hash_merge, 'bulk_load', self.bulk_load)
+        monkeypatch.setattr(row_hash_merge, 'execute_values', self.execute_values)
+        self.conn = StubConnection({
+            "DELETE FROM public.migration_row_hashes": self.delete_hashes,
+            "DELETE FROM tbl_docentes": self.delete_rows,
+            "UPDATE tbl_docentes SET estado_docente": self.deactivate,
+            "SELECT row_key, row_hash": lambda params: list(self.hashes.items()),
+            "SELECT id_antiguo FROM tbl_docentes": lambda params: [(key,) for key in self.rows],
+        })
+
+    def bulk_load(self, cursor, table, columns, rows, on_conflict=None):
+        assert on_conflict
+        self.upserts.append(list(rows))
+        for row in rows:
+            self.rows[row[-1]] = row
+
+    def execute_values(self, cursor, query, values, page_size=None):
+        for _, key, digest in values:
+            self.hashes[key] = digest
+
+    def delete_hashes(self, params):
+        for key in params[1]:
+            self.hashes.pop(key)
+        return []
+
+    def delete_rows(self, params):
+        if self.referenced & set(params[0]):
+            raise psycopg2.errors.ForeignKeyViolation('tbl_conformacion_jurados_id_docente_fkey')
+        for key in params[0]:
+            self.rows.pop(key)
+        return []
+
+    def deactivate(self, params):
+        assert params[0] == 0
+        self.deactivated.update(params[1])
+        return []
+
+    def merge(self, rows, **options):
+        self.upserts = []
+        counts = merge_rows(self.conn.cursor(), 'tbl_docentes', COLUMNS, rows, **options)
+        return {name: counts[name] for name in ('inserted', 'updated', 'removed', 'unchanged')}
+
+
+def test_row_hash_is_stable_and_sensitive_to_values():
+    assert row_hash((1, 'a', None)) == row_hash((1, 'a', None))
+    assert row_hash((1, 'a', None)) != row_hash((1, 'a', ''))
+    assert row_hash(('a\x1fb', 'c')) != row_hash(('a', 'b\x1fc'))
+    assert row_hash((date(2020, 1, 1),)) == row_hash(('2020-01-01',))
+
+
+def test_merge_counts_inserts_updates_deletes(monkeypatch):
+    destination = Destination(monkeypatch)
+    first = [(10, 1, '200529', 1), (11, 2, '2001620', 2), (12, 5, None, 3), (13, 1, 'x', None)]
+
+    assert destination.merge(first) == {'inserted': 3, 'updated': 0, 'removed': 0, 'unchanged': 0}
+
+    # Sin cambios no se envía nada
+    assert destination.merge(first) == {'inserted': 0, 'updated': 0, 'removed': 0, 'unchanged': 3}
+    assert destination.upserts == []
+
+    # 2 cambia de categoría, 3 desaparece del origen y 4 es nuevo
+    second = [(10, 1, '200529', 1), (11, 8, '2001620', 2), (14, 1, '94042', 4)]
+    assert destination.merge(second) == {'inserted': 1, 'updated': 1, 'removed': 1, 'unchanged': 1}
+    assert destination.upserts == [[(11, 8, '2001620', 2), (14, 1, '94042', 4)]]
+    # Sin indicar cómo, la llave que desaparece solo se reporta
+    assert set(destination.rows) == {1, 2, 3, 4}
+    assert set(destination.hashes) == {'1', '2', '4'}
+    assert not any(query.startswith(('DELETE FROM tbl_docentes', 'UPDATE'))
+                   for query, _ in destination.conn.executed)
+
+
+def test_removed_key_still_referenced_is_deactivated(monkeypatch):
+    destination = Destination(monkeypatch)
+    destination.merge([(10, 1, '200529', 1), (11, 2, '2001620', 2)])
+    destination.referenced.add(2)
+
+    counts = merge_rows(destination.conn.cursor(), 'tbl_docentes', COLUMNS, [(10, 1, '200529', 1)],
+                        deactivate={'estado_docente': 0})
+
+    assert counts['removed'] == 1 and counts['removed_keys'] == [2]
+    assert counts['removed_action'] == 'desactivadas'
+    assert destination.deactivated == {2} and set(destination.rows) == {1, 2}
+
+    # Si reaparece se vuelve a enviar (y se reactiva)
+    assert destination.merge([(10, 1, '200529', 1), (11, 2, '2001620', 2)])['updated'] == 1
+
+
+def test_deletion_is_opt_in_per_table(monkeypatch):
+    destination = Destination(monkeypatch)
+    destination.merge([(10, 1, '200529', 1), (11, 2, '2001620', 2)])
+    monkeypatch.setattr(row_hash_merge, 'DELETE_REMOVED_TABLES', {'tbl_docentes'})
+
+    assert destination.merge([(10, 1, '200529', 1)], deactivate={'estado_docente': 0})['removed'] == 1
+    assert set(destination.rows) == {1} and destination.deactivated == set()
+
+    # Con referencias el DELETE falla: por eso no es el comportamiento por defecto
+    destination.referenced.add(1)
+    with pytest.raises(psycopg2.errors.ForeignKeyViolation):
+        destination.merge([])
+
+
+def test_rows_are_resent_after_the_destination_is_truncated(monkeypatch):
+    destination = Destination(monkeypatch)
+    rows = [(10, 1, '200529', 1), (11, 2, '2001620', 2)]
+    destination.merge(rows)
+
+    destination.rows.clear()
+
+    assert destination.merge(rows) == {'inserted': 2, 'updated': 0, 'removed': 0, 'unchanged': 0}
+
+
+def test_keys_without_a_prepared_row_are_not_removed(monkeypatch):
+    destination = Destination(monkeypatch)
+    destination.merge([(10, 1, '200529', 1), (11, 2, '2001620', 2)])
+
+    # El docente 2 sigue en el origen pero su usuario aún no está mapeado
+    counts = merge_rows(destination.conn.cursor(), 'tbl_docentes', COLUMNS, [(10, 1, '200529', 1)],
+                        deactivate={'estado_docente': 0}, keep_keys=[2])
+
+    assert counts['removed'] == 0 and destination.deactivated == set()
+    assert set(destination.hashes) == {'1', '2'}
@@ -0,0 +1,58 @@
+import csv
+import os
+import random
+
+import synthetic_data
+from synthetic_data import ZERO_DATE, dataset_plan, table_columns
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+
+
+def sample_header(name):
+    with open(os.path.join(ROOT, name), encoding='utf-8') as f:
+        return next(csv.reader(f))
+
+
+def generate(monkeypatch, scale_rows):
+    monkeypatch.setattr(synthetic_data, 'BASE_ROWS', scale_rows)
+    return {table: list(rows) for table, rows in dataset_plan(random.Random(7), 1)}
+
+
+def test_source_tables_have_the_columns_of_the_real_samples():
+    assert table_columns('tblDocentes') == sample_header('tblDocentesBak2.csv')
+    assert table_columns('tblTesistas') == sample_header('tesistas_con_codigo_largo.csv')
+    assert table_columns('tesTramites') == sample_header('tramites_no_mapeados.csv')
+
+
+def test_generated_rows_match_columns_and_real_value_shapes(monkeypatch):
+    data = generate(monkeypatch, {'tblDocentes': 3000, 'tblTesistas': 2000, 'tesTramites': 5000,
+                                  'logTramites': 3000, 'tesJuCambios': 500, 'tblCorrects': 2000})
+    for table, rows in data.items():
+        assert all(len(row) == len(table_columns(table)) for row in rows), table
+
+    docentes = [dict(zip(table_columns('tblDocentes'), row)) for row in data['tblDocentes']]
+    assert {-100, 0, 5, 6} <= {d['Activo'] for d in docentes}
+    assert sum(d['FechaCon'] == ZERO_DATE for d in docentes) > len(docentes) / 3
+    assert any(d['FechaAsc'] == ZERO_DATE for d in docentes)
+    assert any(d['DNI'] in ('0',) or len(d['DNI']) == 9 for d in docentes)
+    assert any(d['Direccion'] == '*' for d in docentes)
+
+    # Los diccionarios cubren las referencias de los docentes
+    carreras = {row[0] for row in data['dicCarreras']}
+    categorias = {row[0] for row in data['dicCategorias']}
+    assert {d['IdCarrera'] for d in docentes} <= carreras
+    assert {d['IdCategoria'] for d in docentes} <= categorias
+
+    tramites = {row[0]: dict(zip(table_columns('tesTramites'), row)) for row in data['tesTramites']}
+    assert -1 in {t['Estado'] for t in tramites.values()}
+    assert {t['IdLinea'] for t in tramites.values()} <= {row[0] for row in data['tblLineas']}
+
+    # Solo los trámites que llegaron a revisión tienen ese registro en logTramites
+    enviados = [tramites[row[1]] for row in data['logTramites'] if row[3] == 'Proyecto enviado a Revisión']
+    assert enviados and all(t['Estado'] >= 2 for t in enviados)
+
+    # Casi todas las correcciones son de un jurado del trámite
+    def es_jurado(row):
+        t = tramites[row[1]]
+        return row[2] in (t['IdJurado1'], t['IdJurado2'], t['IdJurado3'], t['IdJurado4'])
+    assert sum(map(es_jurado, data['tblCorrects'])) > 0.9 * len(data['tblCorrects'])
@@ -0,0 +1,272 @@
+# Verificación de la migración: conteos y checksums por rangos de Id.
+#
+# Compara cada par de tablas origen -> destino de RECONCILIATION_PAIRS sin
+# traer las filas a Python. Ambos servidores calculan, en una sola consulta
+# agrupada, el número de filas y un checksum independiente del orden (la
+# suma de un hash MD5 de 60 bits de cada fila) por cada rango de
+# CHUNK_SIZE Ids; las consultas de origen y destino de todos los pares se
+# ejecutan en paralelo. Solo los rangos que difieren se vuelven a dividir
+# (DRILL_FACTOR) y, al llegar a LEAF_SIZE Ids, se comparan los Ids de ese
+# rango uno por uno para informar cuáles faltan, sobran o cambiaron.
+#
+# Cada lado de un par declara las expresiones SQL de sus columnas de modo
+# que produzcan el mismo texto para una fila bien migrada (p. ej. el
+# Estado 'A' del origen se compara con el 1 del destino). 'weight' indica
+# cuántas filas de destino produce cada fila de origen (tesJuCambios
+# genera una asignación por jurado).
+#
+# Uso:
+#   python verify_migration.py
+#   python verify_migration.py --pairs tramites docentes --chunk-size 5000
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from db_connections import ConnectionPoolManager
+from run_metrics import REPORT_DIR
+
+CHUNK_SIZE = int(os.getenv("MIGRATION_VERIFY_CHUNK_SIZE", "10000"))
+DRILL_FACTOR = int(os.getenv("MIGRATION_VERIFY_DRILL_FACTOR", "20"))
+LEAF_SIZE = int(os.getenv("MIGRATION_VERIFY_LEAF_SIZE", "500"))
+MAX_REPORTED_KEYS = int(os.getenv("MIGRATION_VERIFY_MAX_KEYS", "200"))
+REPORT_NAME = "verification_report.json"
+
+RECONCILIATION_PAIRS = {
+    'tramites': {
+        'source': {'db': 'pilar3', 'from': "tesTramites", 'key': "Id",
+                   'columns': ["Id", "Codigo", "IdLinea", "FechRegProy"]},
+        'target': {'from': "tbl_tramites", 'key': "id_antiguo",
+                   'columns': ["id_antiguo", "codigo_proyecto", "id_sublinea_vri", "fecha_registro"]},
+    },
+    'docentes': {
+        'source': {'db': 'absmain', 'from': "tblDocentes", 'key': "Id",
+                   'columns': ["Id", "IdCategoria", "Codigo", "IdEspecialidad",
+                               "CASE WHEN Estado = 'A' THEN 1 ELSE 0 END"]},
+        'target': {'from': "tbl_docentes", 'key': "id_antiguo",
+                   'columns': ["id_antiguo", "id_categoria", "codigo_airhs", "id_especialidad", "estado_docente"]},
+    },
+    'tesistas': {
+        'source': {'db': 'pilar3', 'from': "tblTesistas", 'key': "Id",
+                   'columns': ["Id", "Codigo", "IdCarrera", "CASE WHEN Activo = 'A' THEN 1 ELSE 0 END"]},
+        'target': {'from': "tbl_tesistas", 'key': "id_antiguo",
+                   'columns': ["id_antiguo", "codigo_estudiante", "id_estructura_academica", "estado"]},
+    },
+    'asignacion_jurado': {
+        'source': {'db': 'pilar3', 'from': "tesJuCambios", 'key': "IdTramite",
+                   'columns': ["IdTramite", "Fecha"],
+                   'weight': "(IFNULL(IdJurado1, 0) > 0) + (IFNULL(IdJurado2, 0) > 0) "
+                             "+ (IFNULL(IdJurado3, 0) > 0) + (IFNULL(IdJurado4, 0) > 0)"},
+        'target': {'from': "tbl_asignacion_jurado a JOIN tbl_tramites t ON t.id = a.tramite_id",
+                   'key': "t.id_antiguo", 'columns': ["t.id_antiguo", "a.fecha_evento"]},
+    },
+    'sublineas_vri': {
+        'source': {'db': 'absmain', 'from': "tblLineas", 'key': "Id",
+                   'columns': ["Id", "id_lineaV", "Nombre", "IdDiscip", "IdCarrera", "CAST(fecha AS DATETIME)",
+                               "Estado"]},
+        'target': {'from': "tbl_sublineas_vri", 'key': "id",
+                   'columns': ["id", "id_linea_universidad", "nombre", "id_disciplina", "id_carrera",
+                               "fecha_registro", "estado_sublinea_vri"]},
+    },
+    'carreras': {
+        'source': {'db': 'absmain', 'from': "dicCarreras", 'key': "Id",
+                   'columns': ["Id", "IdFacultad", "Nombre"]},
+        'target': {'from': "dic_carreras", 'key': "id", 'columns': ["id", "id_facultad", "nombre"]},
+    },
+}
+
+
+def _hash_expression(side, is_source):
+    """Hash de 60 bits de una fila, igual en MySQL y en PostgreSQL para el mismo texto."""
+    columns = ', '.join(side['columns'])
+    if is_source:
+        expression = f"CAST(CONV(SUBSTRING(MD5(CONCAT_WS('|', {columns})), 1, 15), 16, 10) AS UNSIGNED)"
+        weight = side.get('weight')
+        return f"{expression} * ({weight})" if weight else expression
+    return f"('x' || substr(md5(concat_ws('|', {columns})), 1, 15))::bit(60)::bigint"
+
+
+def _count_expression(side, is_source):
+    weight = side.get('weight') if is_source else None
+    return f"SUM({weight})" if weight else "COUNT(*)"
+
+
+def _stats(rows, convert=lambda key: key):
+    """{llave o rango: (filas, checksum)}; se omiten los que no producen filas (peso 0)."""
+    stats = {}
+    for key, count, checksum in rows:
+        if count:
+            stats[convert(key)] = (int(count), int(checksum))
+    return stats
+
+
+class Reconciler:
+    """Compara un par de tablas por rangos de su llave (ver el comienzo del módulo)."""
+
+    def __init__(self, pool, name, pair, executor, chunk_size=CHUNK_SIZE):
+        self.pool = pool
+        self.chunk_size = chunk_size
+        self.name = name
+        self.source = pair['source']
+        self.target = pair['target']
+        self.executor = executor
+
+    def _query(self, is_source, sql, params):
+        kind = self.source['db'] if is_source else 'postgres'
+        conn = self.pool.acquire(kind)
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+        finally:
+            if kind == 'postgres':
+                conn.rollback()
+            self.pool.release(kind, conn)
+
+    def _both(self, build):
+        """Ejecuta en paralelo la consulta build(side, is_source) en origen y destino."""
+        futures = [self.executor.submit(self._query, is_source, *build(side, is_source))
+                   for side, is_source in ((self.source, True), (self.target, False))]
+        return [future.result() for future in futures]
+
+    def key_bounds(self):
+        """Menor y mayor llave entre ambos lados, o None si las dos tablas están vacías."""
+        results = self._both(lambda side, _: (
+            f"SELECT MIN({side['key']}), MAX({side['key']}) FROM {side['from']}", ()
+        ))
+        lows = [row[0][0] for row in results if row and row[0][0] is not None]
+        highs = [row[0][1] for row in results if row and row[0][1] is not None]
+        if not lows:
+            return None
+        return min(lows), max(highs) + 1
+
+    def chunk_stats(self, low, high, size):
+        """{índice de rango: (filas, checksum)} de cada lado para [low, high) en rangos de size."""
+        def build(side, is_source):
+            key = side['key']
+            chunk = f"({key} - %s) DIV %s" if is_source else f"div({key} - %s, %s)"
+            return (
+                f"SELECT {chunk}, {_count_expression(side, is_source)}, "
+                f"COALESCE(SUM({_hash_expression(side, is_source)}), 0) "
+                f"FROM {side['from']} WHERE {key} >= %s AND {key} < %s GROUP BY 1",
+                (low, size, low, high)
+            )
+        return [_stats(rows, int) for rows in self._both(build)]
+
+    def key_stats(self, low, high):
+        """{llave: (filas, checksum)} de cada lado para las llaves de [low, high)."""
+        def build(side, is_source):
+            key = side['key']
+            return (
+                f"SELECT {key}, {_count_expression(side, is_source)}, "
+                f"COALESCE(SUM({_hash_expression(side, is_source)}), 0) "
+                f"FROM {side['from']} WHERE {key} >= %s AND {key} < %s GROUP BY 1",
+                (low, high)
+            )
+        return [_stats(rows) for rows in self._both(build)]
+
+    def compare(self, low, high, size, result, top=False):
+        """Compara [low, high) en rangos de size y baja solo a los que difieren."""
+        source, target = self.chunk_stats(low, high, size)
+        if top:
+            result['source_rows'] = sum(rows for rows, _ in source.values())
+            result['target_rows'] = sum(rows for rows, _ in target.values())
+            result['chunks'] = len(source.keys() | target.keys())
+        for index in sorted(source.keys() | target.keys()):
+            if source.get(index) == target.get(index):
+                continue
+            chunk_low = low + index * size
+            chunk_high = min(chunk_low + size, high)
+            if top:
+                result['mismatched_chunks'].append([chunk_low, chunk_high])
+            if size <= LEAF_SIZE:
+                self.compare_keys(chunk_low, chunk_high, result)
+            else:
+                self.compare(chunk_low, chunk_high, max(LEAF_SIZE, size // DRILL_FACTOR), result)
+
+    def compare_keys(self, low, high, result):
+        source, target = self.key_stats(low, high)
+        for key in sorted(source.keys() | target.keys()):
+            if key not in target:
+                kind = 'missing'
+            elif key not in source:
+                kind = 'extra'
+            elif source[key] != target[key]:
+                kind = 'different'
+            else:
+                continue
+            result['key_counts'][kind] += 1
+            if len(result['keys'][kind]) < MAX_REPORTED_KEYS:
+                result['keys'][kind].append(key)
+
+    def run(self):
+        start = time.perf_counter()
+        result = {
+            'pair': self.name, 'source': self.source['from'], 'target': self.target['from'],
+            'source_rows': 0, 'target_rows': 0, 'chunks': 0, 'mismatched_chunks': [],
+            'key_counts': {'missing': 0, 'extra': 0, 'different': 0},
+            'keys': {'missing': [], 'extra': [], 'different': []},
+        }
+        bounds = self.key_bounds()
+        if bounds is not None:
+            self.compare(bounds[0], bounds[1], self.chunk_size, result, top=True)
+        result['ok'] = not result['mismatched_chunks']
+        result['seconds'] = round(time.perf_counter() - start, 3)
+        return result
+
+
+def verify(pairs=None, workers=4, chunk_size=CHUNK_SIZE):
+    """Verifica los pares indicados (por defecto, todos) y devuelve sus resultados."""
+    names = pairs or list(RECONCILIATION_PAIRS)
+    pool = ConnectionPoolManager(max_idle=workers * 2)
+    # Cada par consulta origen y destino a la vez, en hilos del primer executor
+    try:
+        with ThreadPoolExecutor(max_workers=workers * 2) as queries, \
+                ThreadPoolExecutor(max_workers=workers) as pair_runner:
+            futures = [
+                pair_runner.submit(Reconciler(pool, name, RECONCILIATION_PAIRS[name], queries, chunk_size).run)
+                for name in names
+            ]
+            return [future.result() for future in futures]
+    finally:
+        pool.close_all()
+
+
+def print_results(results):
+    print(f"{'Par':<20} {'Origen':>10} {'Destino':>10} {'Rangos':>7} {'Difieren':>8} "
+          f"{'Faltan':>7} {'Sobran':>7} {'Cambian':>7} {'Tiempo':>7}")
+    for result in results:
+        counts = result['key_counts']
+        print(f"{result['pair']:<20} {result['source_rows']:>10} {result['target_rows']:>10} "
+              f"{result['chunks']:>7} {len(result['mismatched_chunks']):>8} {counts['missing']:>7} "
+              f"{counts['extra']:>7} {counts['different']:>7} {result['seconds']:>6.1f}s")
+        for kind, label in (('missing', 'faltan en destino'), ('extra', 'sobran en destino'),
+                            ('different', 'con valores distintos')):
+            if result['keys'][kind]:
+                sample = ', '.join(str(key) for key in result['keys'][kind][:20])
+                more = ' ...' if counts[kind] > 20 else ''
+                print(f"    {label}: {sample}{more}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compara conteos y checksums por rangos de Id entre MySQL y PostgreSQL.")
+    parser.add_argument("--pairs", nargs='+', choices=sorted(RECONCILIATION_PAIRS),
+                        help="Pares de tablas a verificar (por defecto, todos).")
+    parser.add_argument("--workers", type=int, default=4, help="Pares que se verifican en paralelo.")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Ids por rango en la primera pasada.")
+    parser.add_argument("--report-dir", default=REPORT_DIR, help="Directorio del reporte JSON.")
+    args = parser.parse_args()
+
+    results = verify(args.pairs, workers=args.workers, chunk_size=args.chunk_size)
+    print_results(results)
+    path = os.path.join(args.report_dir, REPORT_NAME)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False, default=str)
+    print(f"--- Reporte guardado en {path} ---")
+    sys.exit(0 if all(result['ok'] for result in results) else 1)